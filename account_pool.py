@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+账号池
+每个 Google 账号对应 .browser_session/accounts/ 下的一个 storage_state 文件，
+调度时选择剩余配额最多的账号；遇到速率限制的账号进入冷却，视频改派给其他账号。
+用量计数和冷却时间保存在 account_pool.json 中，重启后继续生效。
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class AccountPool:
+    """账号池调度器（线程安全，多个工作者共享一个实例）"""
+
+    def __init__(self, state_dir=None, pool_file=None, daily_quota=None, cooldown=None):
+        self.state_dir = Path(state_dir or config.ACCOUNT_STATE_DIR)
+        self.pool_file = Path(pool_file or config.ACCOUNT_POOL_FILE)
+        self.daily_quota = daily_quota if daily_quota is not None else config.ACCOUNT_DAILY_QUOTA
+        self.cooldown = cooldown if cooldown is not None else config.ACCOUNT_COOLDOWN
+
+        self.lock = threading.Lock()
+        self.in_use = set()  # 正在被工作者使用的账号
+        self.usage = self._load_usage()
+
+    # ==================== 持久化 ====================
+
+    def _load_usage(self):
+        """读取用量记录（文件不存在或损坏时从空记录开始）"""
+        if not self.pool_file.exists():
+            return {}
+        try:
+            with open(self.pool_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("accounts", {})
+        except Exception as e:
+            logger.warning(f"⚠️ 读取账号池记录失败，将重新计数: {e}")
+            return {}
+
+    def _save_usage(self):
+        """写入用量记录（先写临时文件再替换，避免中断时文件损坏）"""
+        try:
+            self.pool_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.pool_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"accounts": self.usage}, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.pool_file)
+        except Exception as e:
+            logger.error(f"❌ 保存账号池记录失败: {e}")
+
+    def _record(self, account):
+        """获取账号的用量记录，跨天时重置当日计数"""
+        today = date.today().isoformat()
+        record = self.usage.setdefault(account, {
+            "date": today,
+            "used_today": 0,
+            "total_used": 0,
+            "rate_limits": 0,
+            "cooldown_until": 0,
+        })
+        if record.get("date") != today:
+            record["date"] = today
+            record["used_today"] = 0
+        return record
+
+    # ==================== 查询 ====================
+
+    def accounts(self):
+        """列出所有已登录的账号（以 storage_state 文件名为账号名）"""
+        if not self.state_dir.exists():
+            return []
+        return sorted(p.stem for p in self.state_dir.glob("*.json"))
+
+    def state_file(self, account):
+        """账号的 storage_state 文件路径"""
+        return self.state_dir / f"{account}.json"
+
+    def remaining_quota(self, account):
+        """账号今天的剩余配额"""
+        return self.daily_quota - self._record(account)["used_today"]
+
+    def cooldown_remaining(self, account, now=None):
+        """账号剩余冷却秒数（0 表示未冷却）"""
+        now = time.time() if now is None else now
+        return max(0, self._record(account)["cooldown_until"] - now)
+
+    # ==================== 调度 ====================
+
+    def acquire(self, exclude=()):
+        """分配一个账号：未被占用、不在冷却中、剩余配额最多
+
+        返回账号名；没有可用账号时返回 None。
+        """
+        with self.lock:
+            now = time.time()
+            candidates = []
+            for account in self.accounts():
+                if account in self.in_use or account in exclude:
+                    continue
+                if self.cooldown_remaining(account, now) > 0:
+                    continue
+                remaining = self.remaining_quota(account)
+                if remaining <= 0:
+                    continue
+                candidates.append((remaining, account))
+
+            if not candidates:
+                return None
+
+            # 剩余配额最多的优先；相同时按账号名排序保证结果稳定
+            candidates.sort(key=lambda item: (-item[0], item[1]))
+            account = candidates[0][1]
+            self.in_use.add(account)
+            return account
+
+    def release(self, account, used=True):
+        """归还账号；used=True 表示本次消耗了一个视频的配额"""
+        with self.lock:
+            self.in_use.discard(account)
+            if used:
+                record = self._record(account)
+                record["used_today"] += 1
+                record["total_used"] += 1
+                self._save_usage()
+
+    def mark_rate_limited(self, account):
+        """账号遇到速率限制：进入冷却并归还"""
+        with self.lock:
+            self.in_use.discard(account)
+            record = self._record(account)
+            record["rate_limits"] += 1
+            record["cooldown_until"] = time.time() + self.cooldown
+            self._save_usage()
+        logger.warning(f"🧊 账号 {account} 进入冷却 {self.cooldown} 秒")
+
+    def next_available_in(self):
+        """距离下一个账号可用还有多少秒
+
+        返回 0 表示现在就有可用账号；返回 None 表示今天所有账号配额都已用完
+        （或没有任何账号）。
+        """
+        with self.lock:
+            now = time.time()
+            waits = []
+            for account in self.accounts():
+                if self.remaining_quota(account) <= 0:
+                    continue
+                if account in self.in_use:
+                    waits.append(0)
+                else:
+                    waits.append(self.cooldown_remaining(account, now))
+            return min(waits) if waits else None
+
+    def log_status(self):
+        """输出账号池状态"""
+        accounts = self.accounts()
+        logger.info(f"👥 账号池: {len(accounts)} 个账号（每日配额 {self.daily_quota}）")
+        for account in accounts:
+            cooldown = self.cooldown_remaining(account)
+            status = f"冷却中 {int(cooldown)} 秒" if cooldown else "可用"
+            logger.info(f"  📧 {account}: 今日剩余 {self.remaining_quota(account)}，{status}")
+
+
+def add_account(account, headless=False):
+    """打开浏览器让用户登录，并把会话保存为账号的 storage_state 文件"""
+    from playwright.sync_api import sync_playwright
+
+    state_dir = Path(config.ACCOUNT_STATE_DIR)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    state_file = state_dir / f"{account}.json"
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=headless, args=["--start-maximized"])
+        context = browser.new_context(viewport=None)
+        page = context.new_page()
+        page.goto(config.AI_STUDIO_URL)
+        print(f"\n请在浏览器中登录账号 {account}，进入 AI Studio 对话界面后按 Enter...")
+        input("👉 登录完成后按 Enter: ")
+        context.storage_state(path=str(state_file))
+        browser.close()
+
+    print(f"✅ 已保存账号会话: {state_file}")
+
+
+def main():
+    """命令行：python account_pool.py add <邮箱> / python account_pool.py status"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) >= 3 and sys.argv[1] == "add":
+        add_account(sys.argv[2])
+    else:
+        AccountPool().log_status()
+
+
+if __name__ == "__main__":
+    main()
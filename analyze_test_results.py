@@ -6,7 +6,14 @@
 
 import sys
 from pathlib import Path
-import pandas as pd
+
+# 检查依赖（columnar_store 需要 pandas）
+try:
+    from columnar_store import read_table, step_table_path
+except ImportError:
+    print("❌ 需要安装 pandas")
+    print("运行: pip install pandas openpyxl")
+    sys.exit(1)
 
 def analyze_step23_output(folder):
     """分析步骤23的输出"""
@@ -81,34 +88,32 @@ def analyze_step25_output(folder):
     print("📊 步骤25：表格数据分析")
     print("=" * 60)
     
-    # 查找Excel文件
-    excel_files = list(folder.glob("step_25_output.xlsx"))
+    # 查找表格文件（Parquet / Feather / Excel）
+    table_file = step_table_path(folder, 25)
     
-    if excel_files:
-        print(f"\n✅ 找到 {len(excel_files)} 个Excel文件:")
-        for excel_file in excel_files:
-            try:
-                df = pd.read_excel(excel_file)
-                
-                print(f"\n  📝 {excel_file.name}")
-                print(f"    行数: {len(df)}")
-                print(f"    列数: {len(df.columns)}")
-                print(f"    列名: {', '.join(df.columns.tolist())}")
-                
-                # 显示每列的统计
-                print(f"\n    列统计:")
-                for col in df.columns:
-                    non_empty = df[col].astype(str).str.strip().ne('').sum()
-                    print(f"      {col}: {non_empty}/{len(df)} 行有数据")
-                
-                # 显示前3行
-                print(f"\n    前3行数据:")
-                print(df.head(3).to_string(index=False))
-                
-            except Exception as e:
-                print(f"  ❌ 读取Excel失败: {e}")
+    if table_file:
+        print(f"\n✅ 找到表格文件: {table_file.name}")
+        try:
+            df = read_table(table_file)
+            
+            print(f"    行数: {len(df)}")
+            print(f"    列数: {len(df.columns)}")
+            print(f"    列名: {', '.join(df.columns.tolist())}")
+            
+            # 显示每列的统计
+            print(f"\n    列统计:")
+            for col in df.columns:
+                non_empty = df[col].astype(str).str.strip().ne('').sum()
+                print(f"      {col}: {non_empty}/{len(df)} 行有数据")
+            
+            # 显示前3行
+            print(f"\n    前3行数据:")
+            print(df.head(3).to_string(index=False))
+            
+        except Exception as e:
+            print(f"  ❌ 读取表格失败: {e}")
     else:
-        print("\n❌ 未找到Excel文件")
+        print("\n❌ 未找到表格文件")
     
     # 查找调试文件
     debug_folder = folder / "debug"
@@ -168,12 +173,4 @@ def main():
     print("  4. 根据分析结果调整提取策略")
 
 if __name__ == "__main__":
-    # 检查依赖
-    try:
-        import pandas as pd
-    except ImportError:
-        print("❌ 需要安装 pandas")
-        print("运行: pip install pandas openpyxl")
-        sys.exit(1)
-    
     main()
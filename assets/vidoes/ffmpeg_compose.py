@@ -0,0 +1,172 @@
+"""
+ffmpeg 合成（process_video.py 的 process_videos 默认使用）
+
+用一个 filter_complex 完成 moviepy 版本的全部合成，逐帧计算都在 ffmpeg 内部：
+  [主视频] scale 到 TARGET_WIDTH
+     → overlay 画中画（缩放到主视频宽度，水平居中、贴顶，从 PIP_START_TIME 秒开始）
+     → overlay 文案图片
+     → overlay 箭头（y = 基准 + sin(BOUNCE_SPEED*t)*BOUNCE_HEIGHT，逐帧计算）
+  [片尾] scale 到主视频尺寸、fps 与主视频一致
+  concat 主视频 + 片尾（缺少音轨的一方补静音）
+"""
+
+import re
+import subprocess
+
+from ffmpeg_cut import _t
+
+
+def probe_media(ffmpeg, ffprobe, path):
+    """视频的宽、高、帧率、时长和是否有音轨（ffprobe 不可用时解析 ffmpeg -i 的输出），失败返回 None"""
+    try:
+        cmd = [ffprobe, "-v", "error", "-show_entries", "stream=codec_type,width,height,r_frame_rate:format=duration",
+               "-of", "default=noprint_wrappers=1", str(path)]
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
+        info = {"has_audio": False}
+        for line in out.splitlines():
+            key, _, value = line.partition("=")
+            if key == "codec_type" and value == "audio":
+                info["has_audio"] = True
+            elif key in ("width", "height") and key not in info and value.isdigit():
+                info[key] = int(value)
+            elif key == "r_frame_rate" and "fps" not in info and value not in ("0/0", "N/A"):
+                num, _, den = value.partition("/")
+                info["fps"] = float(num) / float(den or 1)
+            elif key == "duration" and value != "N/A":
+                info["duration"] = float(value)
+        if {"width", "height", "fps", "duration"} <= set(info):
+            return info
+    except Exception:
+        pass
+
+    try:
+        result = subprocess.run([ffmpeg, "-hide_banner", "-nostdin", "-i", str(path)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+        duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+        video = re.search(r"Stream #.*?Video: .*?, (\d{2,5})x(\d{2,5}).*?, ([\d.]+) (?:fps|tbr)", result.stderr)
+        if not duration or not video:
+            return None
+        hours, minutes, seconds = duration.groups()
+        return {
+            "width": int(video.group(1)),
+            "height": int(video.group(2)),
+            "fps": float(video.group(3)),
+            "duration": int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+            "has_audio": bool(re.search(r"Stream #.*?Audio:", result.stderr)),
+        }
+    except Exception:
+        return None
+
+
+def output_size(width, height, enable_resize=True, target_width=1080):
+    """主视频缩放后的尺寸（只缩小不放大，宽高取偶数以便 yuv420p 编码）"""
+    if enable_resize and width > target_width:
+        height = height * target_width / width
+        width = target_width
+    return int(width) // 2 * 2, int(round(height)) // 2 * 2
+
+
+def build_compose_graph(main, size, layout, pip=None, outro=None):
+    """生成合成用的 filter_complex
+
+    输入顺序：0 主视频，1 箭头图片，2 文案图片，之后依次是画中画（可选）、片尾（可选）。
+
+    Args:
+        main: probe_media 的结果（主视频）
+        size: output_size 的结果
+        layout: 位置和动画参数，键为 arrow_size / arrow_pos_x / text_width / text_pos_x /
+                position_y / bounce_speed / bounce_height / pip_start
+        pip / outro: 画中画、片尾的 probe_media 结果（None 表示不使用）
+
+    Returns:
+        (filter_complex, 视频输出标签, 音频输出标签或 None)
+    """
+    width, height = size
+    fps = _t(main["fps"])
+    chains = [f"[0:v]scale={width}:{height},setsar=1[base]"]
+    current = "[base]"
+    next_input = 3
+
+    # [功能 A] 画中画：缩放到主视频宽度，整体后移到 pip_start 秒，播放完后只显示主视频
+    if pip is not None:
+        chains.append(
+            f"[{next_input}:v]scale={width}:-2,setsar=1,setpts=PTS-STARTPTS+{_t(layout['pip_start'])}/TB[pip]"
+        )
+        chains.append(f"{current}[pip]overlay=x=(W-w)/2:y=0:eof_action=pass[withpip]")
+        current = "[withpip]"
+        next_input += 1
+
+    # [功能 B] 文案（箭头上方）和上下跳动的箭头
+    arrow_w, arrow_h = layout["arrow_size"]
+    base_y = f"H*{_t(layout['position_y'])}"
+    chains.append(f"[2:v]scale={layout['text_width']}:-1[text]")
+    chains.append(f"{current}[text]overlay=x=W*{_t(layout['text_pos_x'])}-w/2:y={base_y}-h-10[withtext]")
+    chains.append(f"[1:v]scale={arrow_w}:{arrow_h}[arrow]")
+    chains.append(
+        f"[withtext][arrow]overlay=x=W*{_t(layout['arrow_pos_x'])}-{_t(arrow_w / 2)}"
+        f":y={base_y}+sin({_t(layout['bounce_speed'])}*t)*{_t(layout['bounce_height'])}"
+        f",format=yuv420p[main]"
+    )
+
+    if outro is None:
+        return ";".join(chains), "[main]", "[0:a]" if main["has_audio"] else None
+
+    # [功能 C] 片尾：缩放到主视频尺寸、帧率一致，音轨统一格式后 concat
+    outro_input = next_input
+    chains.append(f"[{outro_input}:v]scale={width}:{height},setsar=1,fps={fps},format=yuv420p[outro]")
+    audio_format = "aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo"
+    for label, index, info in (("mainaudio", 0, main), ("outroaudio", outro_input, outro)):
+        if info["has_audio"]:
+            chains.append(f"[{index}:a]{audio_format}[{label}]")
+        else:
+            chains.append(f"anullsrc=r=44100:cl=stereo,atrim=duration={_t(info['duration'])}[{label}]")
+    chains.append("[main][mainaudio][outro][outroaudio]concat=n=2:v=1:a=1[outv][outa]")
+    return ";".join(chains), "[outv]", "[outa]"
+
+
+def build_compose_command(ffmpeg, input_path, output_path, main, size, layout, arrow_path, text_path,
+                          pip_path=None, pip=None, outro_path=None, outro=None, output_args=()):
+    """生成合成命令"""
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-nostdin",
+           "-i", str(input_path), "-i", str(arrow_path), "-i", str(text_path)]
+    if pip is not None:
+        # 画中画只需要主视频剩余的时长
+        remaining = max(main["duration"] - layout["pip_start"], 0)
+        cmd += ["-t", _t(remaining), "-an", "-i", str(pip_path)]
+    if outro is not None:
+        cmd += ["-i", str(outro_path)]
+    filter_complex, video_label, audio_label = build_compose_graph(main, size, layout, pip, outro)
+    cmd += ["-filter_complex", filter_complex, "-map", video_label]
+    if audio_label:
+        cmd += ["-map", audio_label]
+    cmd += ["-r", _t(main["fps"]), *output_args, "-movflags", "+faststart", str(output_path)]
+    return cmd
+
+
+def compose_video(ffmpeg, ffprobe, input_path, output_path, layout, arrow_path, text_path,
+                  pip_path=None, outro_path=None, enable_resize=True, target_width=1080, output_args=(), probe=None):
+    """用 ffmpeg 合成箭头、文案、画中画和片尾，成功返回 True
+
+    probe: 读取媒体信息的函数（路径 → probe_media 格式的信息），默认每次调用 probe_media；
+           process_video.py 传入媒体信息缓存，片尾/画中画素材不会重复探测
+    """
+    probe = probe or (lambda path: probe_media(ffmpeg, ffprobe, path))
+    main = probe(input_path)
+    if main is None:
+        print(f"    ⚠️ 读取不到视频信息: {input_path}")
+        return False
+    size = output_size(main["width"], main["height"], enable_resize, target_width)
+
+    pip = None
+    if pip_path and main["duration"] > layout["pip_start"]:
+        pip = probe(pip_path)
+        if pip is not None:
+            print(f"     > 添加画中画: {pip_path}")
+    outro = probe(outro_path) if outro_path else None
+
+    cmd = build_compose_command(ffmpeg, input_path, output_path, main, size, layout, arrow_path, text_path,
+                                pip_path, pip, outro_path, outro, output_args)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+    if result.returncode != 0:
+        print(f"    ⚠️ ffmpeg 合成失败: {result.stderr.strip()[-300:]}")
+    return result.returncode == 0
@@ -0,0 +1,127 @@
+"""
+单次解码的片段剪切（process_video.py 使用）
+
+一个输出（folder2 + folder3）的所有片段合成一个 ffmpeg 命令：
+  -ss <开始> -t <时长> -i 源视频               输入端定位，只解码需要的范围
+  split / asplit → 每个片段 trim / atrim → concat   按表格顺序拼接
+间隔小于 merge_gap 秒的片段共用一个输入（一次定位连续解码），间隔更大的片段各自定位，
+中间的内容不解码。整个输出只运行一次 ffmpeg、编码一次，取代“每行一次重编码
+（输出端定位，从头解码）+ concat 分离器再合并”。
+"""
+
+import subprocess
+
+
+def _t(seconds):
+    return f"{seconds:.6f}".rstrip("0").rstrip(".") or "0"
+
+
+def valid_segments(segments):
+    """去掉无效的片段（结束不晚于开始）"""
+    return [(float(start), float(end)) for start, end in segments if end is not None and start is not None and end > start]
+
+
+def plan_inputs(segments, merge_gap=5.0):
+    """把片段分配到输入
+
+    按时间排序后，与上一个输入的范围间隔不超过 merge_gap 秒的片段合并到同一个输入。
+
+    Returns:
+        (inputs, placements)
+        inputs: [(定位秒, 时长秒), ...]
+        placements: 与 segments 顺序一致的 [(输入序号, 相对开始, 相对结束), ...]
+    """
+    spans = []  # [开始, 结束, [片段序号]]
+    for i in sorted(range(len(segments)), key=lambda i: segments[i]):
+        start, end = segments[i]
+        if spans and start <= spans[-1][1] + merge_gap:
+            spans[-1][1] = max(spans[-1][1], end)
+            spans[-1][2].append(i)
+        else:
+            spans.append([start, end, [i]])
+
+    inputs = []
+    placements = [None] * len(segments)
+    for index, (span_start, span_end, members) in enumerate(spans):
+        inputs.append((span_start, span_end - span_start))
+        for i in members:
+            start, end = segments[i]
+            placements[i] = (index, start - span_start, end - span_start)
+    return inputs, placements
+
+
+def build_cut_graph(placements, has_audio=True, has_video=True):
+    """生成 trim/atrim + concat 滤镜图
+
+    Args:
+        placements: plan_inputs 返回的 [(输入序号, 相对开始, 相对结束), ...]，按输出顺序
+        has_audio: 源视频是否有音轨
+        has_video: 是否输出视频（False 时只剪音轨，智能剪切使用）
+
+    Returns:
+        (filter_complex, 输出标签列表)
+    """
+    chains = []
+    uses = {}
+    for input_index, _, _ in placements:
+        uses[input_index] = uses.get(input_index, 0) + 1
+
+    # 同一个输入被多个片段使用时先 split
+    video_labels = {}
+    audio_labels = {}
+    for input_index, count in sorted(uses.items()):
+        if count > 1:
+            if has_video:
+                video_labels[input_index] = [f"[v{input_index}_{k}]" for k in range(count)]
+                chains.append(f"[{input_index}:v]split={count}{''.join(video_labels[input_index])}")
+            if has_audio:
+                audio_labels[input_index] = [f"[a{input_index}_{k}]" for k in range(count)]
+                chains.append(f"[{input_index}:a]asplit={count}{''.join(audio_labels[input_index])}")
+        else:
+            video_labels[input_index] = [f"[{input_index}:v]"]
+            audio_labels[input_index] = [f"[{input_index}:a]"]
+
+    concat_inputs = ""
+    for i, (input_index, start, end) in enumerate(placements):
+        if has_video:
+            video_in = video_labels[input_index].pop(0)
+            chains.append(f"{video_in}trim=start={_t(start)}:end={_t(end)},setpts=PTS-STARTPTS[tv{i}]")
+            concat_inputs += f"[tv{i}]"
+        if has_audio:
+            audio_in = audio_labels[input_index].pop(0)
+            chains.append(f"{audio_in}atrim=start={_t(start)}:end={_t(end)},asetpts=PTS-STARTPTS[ta{i}]")
+            concat_inputs += f"[ta{i}]"
+
+    outputs = (["[outv]"] if has_video else []) + (["[outa]"] if has_audio else [])
+    chains.append(f"{concat_inputs}concat=n={len(placements)}:v={int(has_video)}:a={int(has_audio)}{''.join(outputs)}")
+    return ";".join(chains), outputs
+
+
+def build_cut_command(ffmpeg, input_path, segments, output_path, has_audio=True, video_args=(), audio_args=(), merge_gap=5.0, has_video=True):
+    """生成单次剪切命令（segments 需要先经过 valid_segments）"""
+    inputs, placements = plan_inputs(segments, merge_gap)
+    filter_complex, outputs = build_cut_graph(placements, has_audio=has_audio, has_video=has_video)
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error"]
+    for seek, duration in inputs:
+        cmd += ["-ss", _t(seek), "-t", _t(duration), "-i", str(input_path)]
+    cmd += ["-filter_complex", filter_complex]
+    for label in outputs:
+        cmd += ["-map", label]
+    if has_video:
+        cmd += list(video_args)
+    if has_audio:
+        cmd += list(audio_args)
+    cmd.append(str(output_path))
+    return cmd
+
+
+def cut_segments(ffmpeg, input_path, segments, output_path, has_audio=True, video_args=(), audio_args=(), merge_gap=5.0):
+    """一次剪切并拼接所有片段，成功返回 True"""
+    segments = valid_segments(segments)
+    if not segments:
+        return False
+    cmd = build_cut_command(ffmpeg, input_path, segments, output_path, has_audio, video_args, audio_args, merge_gap)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+    if result.returncode != 0:
+        print(f"    ⚠️ 单次剪切失败: {result.stderr.strip()[-300:]}")
+    return result.returncode == 0
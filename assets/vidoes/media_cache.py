@@ -0,0 +1,201 @@
+"""
+媒体信息缓存（SQLite，process_video.py 使用）
+
+每个文件只调用一次 ffprobe（JSON 输出），得到 时长、帧率、分辨率、编码、是否有音轨，
+需要时一并读取关键帧索引（数据包标记，不解码）。结果按 路径 + 大小 + 修改时间 缓存，
+文件没有变化时再次运行直接读取缓存，不再启动 ffprobe。
+没有 ffprobe 时改用 ffmpeg 读取（ffmpeg_compose.probe_media / smart_cut），结果同样缓存。
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from contextlib import contextmanager
+from fractions import Fraction
+
+from ffmpeg_compose import probe_media
+from smart_cut import keyframe_times, probe_keyframes, probe_reorder_delay, probe_stream
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov")
+CACHE_VERSION = 2  # 媒体信息格式的版本，旧版本的缓存视为没有缓存（2: 关键帧时间从文件开始时间算起）
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    info TEXT NOT NULL,            -- 媒体信息（JSON）
+    probed_at REAL NOT NULL
+);
+"""
+
+
+def list_media(folder):
+    """文件夹中的视频文件（按文件名排序）"""
+    if not folder or not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.lower().endswith(VIDEO_EXTENSIONS)]
+
+
+def _rate(text):
+    try:
+        rate = Fraction(str(text))
+        return rate if rate > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_ffprobe(data):
+    """ffprobe JSON 输出 → 媒体信息
+
+    {duration, width, height, fps, fps_rate, cfr, video_codec, profile, pix_fmt, audio_codec, has_audio,
+     keyframes（读取了数据包时，从文件开始时间算起）, delay（B 帧重排序延迟，帧）}
+    """
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if video is None:
+        return None
+
+    rate = _rate(video.get("r_frame_rate"))
+    duration = data.get("format", {}).get("duration") or video.get("duration")
+    info = {
+        "duration": float(duration) if duration not in (None, "N/A") else 0.0,
+        "width": int(video.get("width", 0)),
+        "height": int(video.get("height", 0)),
+        "fps": float(rate) if rate else 30.0,
+        "fps_rate": str(rate) if rate else None,
+        "cfr": rate is not None and rate == _rate(video.get("avg_frame_rate")),
+        "video_codec": video.get("codec_name"),
+        "profile": video.get("profile", ""),
+        "pix_fmt": video.get("pix_fmt"),
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "has_audio": audio is not None,
+        "version": CACHE_VERSION,
+    }
+
+    if "packets" in data:
+        packets = [p for p in data["packets"] if p.get("stream_index") == video.get("index")]
+        start_time = data.get("format", {}).get("start_time", video.get("start_time"))
+        info["keyframes"] = keyframe_times(packets, start_time)
+        first = packets[0] if packets else {}
+        if rate and first.get("pts_time") not in (None, "N/A") and first.get("dts_time") not in (None, "N/A"):
+            info["delay"] = round((float(first["pts_time"]) - float(first["dts_time"])) * float(rate))
+    return info
+
+
+class MediaCache:
+    """ffprobe 结果的持久缓存（每次操作单独连接数据库，可以在多个渲染进程中使用）"""
+
+    def __init__(self, db_file, ffmpeg="ffmpeg", ffprobe="ffprobe"):
+        self.db_file = db_file
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.hits = 0
+        self.probes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    # ==================== 缓存 ====================
+
+    def get(self, path):
+        """缓存中的媒体信息，文件不存在、没有缓存或文件已变化时返回 None"""
+        try:
+            key, size, mtime_ns = self._key(path)
+        except OSError:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT size, mtime_ns, info FROM media WHERE path = ?", (key,)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        info = json.loads(row[2])
+        return info if info.get("version") == CACHE_VERSION else None
+
+    def put(self, path, info):
+        key, size, mtime_ns = self._key(path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime_ns, info, probed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, size, mtime_ns, json.dumps(info, ensure_ascii=False), time.time()),
+            )
+
+    # ==================== 探测 ====================
+
+    def probe(self, path, keyframes=False):
+        """调用一次 ffprobe 读取媒体信息（失败时改用 ffmpeg），返回信息或 None"""
+        entries = ("format=duration,start_time:stream=index,codec_type,codec_name,profile,pix_fmt,width,height,"
+                   "r_frame_rate,avg_frame_rate,start_time")
+        if keyframes:
+            entries += ":packet=stream_index,pts_time,dts_time,flags"
+        cmd = [self.ffprobe, "-v", "error", "-show_entries", entries, "-of", "json", str(path)]
+        try:
+            info = parse_ffprobe(json.loads(subprocess.check_output(cmd, stderr=subprocess.DEVNULL)))
+            if info:
+                return info
+        except Exception:
+            pass
+        return self._probe_with_ffmpeg(path, keyframes)
+
+    def _probe_with_ffmpeg(self, path, keyframes=False):
+        """没有 ffprobe 时的回退（解析 ffmpeg -i 的输出，关键帧只解码关键帧获取）"""
+        media = probe_media(self.ffmpeg, self.ffprobe, path)
+        if media is None:
+            return None
+        stream = probe_stream(self.ffmpeg, self.ffprobe, path) or {}
+        rate = stream.get("fps")
+        info = dict(media)
+        info.update({
+            "fps_rate": str(rate) if rate else None,
+            "cfr": bool(stream.get("cfr")),
+            "video_codec": stream.get("codec"),
+            "profile": stream.get("profile", ""),
+            "pix_fmt": stream.get("pix_fmt"),
+            "audio_codec": None,
+            "version": CACHE_VERSION,
+        })
+        if keyframes:
+            info["keyframes"] = probe_keyframes(self.ffmpeg, self.ffprobe, path) or []
+            info["delay"] = probe_reorder_delay(self.ffmpeg, path)
+        return info
+
+    def media_info(self, path, keyframes=False):
+        """媒体信息：文件未变化时读取缓存，否则探测并写入缓存（keyframes=True 时保证包含关键帧索引）"""
+        info = self.get(path)
+        if info is not None and (not keyframes or "keyframes" in info):
+            self.hits += 1
+            return info
+        info = self.probe(path, keyframes)
+        self.probes += 1
+        if info is not None:
+            try:
+                self.put(path, info)
+            except (OSError, sqlite3.Error) as e:
+                print(f"    ⚠️ 写入媒体信息缓存失败: {e}")
+        return info
+
+    def warm(self, paths, keyframes=False):
+        """预先读取一批文件的媒体信息（已缓存且未变化的文件不会重新探测）"""
+        hits, probes = self.hits, self.probes
+        for path in paths:
+            self.media_info(path, keyframes)
+        if paths:
+            print(f"🗂️ 媒体信息: {len(paths)} 个文件，缓存命中 {self.hits - hits} 个，重新探测 {self.probes - probes} 个")
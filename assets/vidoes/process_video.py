@@ -1,10 +1,13 @@
 import os
+import sys
+import argparse
 import subprocess
 import pandas as pd
 import traceback
 import textwrap
 import math
 import random
+import time
 import PIL.Image
 
 # ================= 修复 Pillow 报错补丁 =================
@@ -12,12 +15,18 @@ if not hasattr(PIL.Image, 'ANTIALIAS'):
     PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
 # ======================================================
 from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+from ffmpeg_cut import cut_segments
+from smart_cut import smart_cut_segments, source_from_info
+from ffmpeg_compose import compose_video
+from media_cache import MediaCache, list_media
+from render_scheduler import run_jobs, thread_budget
 
 # ------- 配置区 (主脚本) -------
 VIDEO_DIR = r"D:\videos\input"      # 原始视频文件夹
 MUSIC_DIR = r"D:\videos\music"      # 背景音乐文件夹
 OUTPUT_DIR = r"D:\videos\output"    # 输出主文件夹
 EXCEL_FILE = r"D:\videos\clips.xlsx"
+CLIPS_DATASET = r"D:\videos\clips_dataset"  # 列式合并数据集（每个视频一个 .parquet），存在时优先于 EXCEL_FILE
 
 # ❗❗ 字体路径
 FONT_PATH = "C:/Windows/Fonts/impact.ttf"
@@ -32,6 +41,10 @@ VIDEO_PRESET = "fast"
 VIDEO_CRF = "22"
 AUDIO_CODEC = "aac"
 AUDIO_BITRATE = "192k"
+SINGLE_PASS_CUT = True  # 每个输出一次 ffmpeg、一次编码（输入端定位 + trim/atrim + concat），失败时回退到逐行剪切
+CUT_MERGE_GAP = 5.0     # 间隔小于该秒数的片段共用一次定位连续解码，更远的片段各自定位
+SMART_CUT = False       # 智能剪切：H.264 源视频关键帧之间的内容直接复制码流，只重新编码片段首尾不完整的 GOP，失败时回退到单次剪切
+SMART_CUT_MIN_COPY = 1.0  # 关键帧之间可复制的内容少于该秒数时整段重新编码
 # ----------------------
 
 # ------- 配置区 (脚本 B - 视频处理) -------
@@ -53,15 +66,37 @@ TEXT_POS_X = 0.82
 BOUNCE_SPEED = 6.0
 BOUNCE_HEIGHT = 20
 
+# --- 画中画 ---
+PIP_START_TIME = 30
+
 # --- 强制压缩设置 ---
 ENABLE_RESIZE = True       
 TARGET_WIDTH = 1080        
+
+# --- 合成方式 ---
+COMPOSE_WITH_FFMPEG = True  # 用一个 ffmpeg filter_complex 合成（不经过 Python 逐帧处理），失败时回退到 moviepy
+# ----------------------
+
+# ------- 配置区 (并行渲染) -------
+RENDER_WORKERS = 0          # 同时渲染的视频数，0 = 自动（CPU 核数 // RENDER_THREADS_PER_JOB），1 = 在当前进程按顺序渲染
+RENDER_THREADS_PER_JOB = 4  # 自动模式下每个视频分配的线程数（libx264 超过 4 线程后收益明显下降）
+RENDER_REPORT = os.path.join(OUTPUT_DIR, "render_report.csv")  # 每个视频各阶段的用时
+# ----------------------
+
+# ------- 配置区 (媒体信息缓存) -------
+MEDIA_CACHE_FILE = os.path.join(OUTPUT_DIR, "media_cache.sqlite3")  # ffprobe 结果按 路径+大小+修改时间 缓存，文件没变不再探测
 # ----------------------
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 TEMP_CLIPS_DIR = os.path.join(OUTPUT_DIR, "temp_clips")
 os.makedirs(TEMP_CLIPS_DIR, exist_ok=True)
 
+# 当前任务分到的线程数（render_output 按调度结果设置，None = 不限制）
+JOB_THREADS = None
+
+# 媒体信息缓存（get_media_cache 第一次调用时创建）
+_MEDIA_CACHE = None
+
 # -----------------------------------------------------------------------
 # 🛠️ 自动生成临时素材函数
 # -----------------------------------------------------------------------
@@ -77,6 +112,10 @@ def ensure_image_exists(path, default_name, color, size=(200, 200)):
 # -----------------------------------------------------------------------
 # FFmpeg 工具函数
 # -----------------------------------------------------------------------
+def thread_args():
+    """ffmpeg 编码线程数参数（按当前任务分到的线程数）"""
+    return ["-threads", str(JOB_THREADS)] if JOB_THREADS else []
+
 def run(cmd):
     process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding='utf-8')
     stdout, stderr = process.communicate()
@@ -84,20 +123,35 @@ def run(cmd):
         print(f"    ⚠️ FFmpeg 出错: {process.returncode}")
     return process.returncode, stdout, stderr
 
+def get_media_cache():
+    global _MEDIA_CACHE
+    if _MEDIA_CACHE is None:
+        _MEDIA_CACHE = MediaCache(MEDIA_CACHE_FILE, FFMPEG_CMD, FFPROBE_CMD)
+    return _MEDIA_CACHE
+
 def get_media_info(path, info_type='duration'):
+    info = get_media_cache().media_info(path)
     if info_type == 'duration':
-        cmd_part = ["-show_entries", "format=duration"]
-    else:
-        cmd_part = ["-select_streams", "v:0", "-show_entries", "stream=r_frame_rate"]
-    cmd = [ FFPROBE_CMD, "-v", "error", *cmd_part, "-of", "default=noprint_wrappers=1:nokey=1", path ]
-    try:
-        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode().strip()
-        if "/" in out:
-            num, den = out.split("/")
-            return float(num) / float(den)
-        return float(out)
-    except Exception:
-        return 30.0 if info_type == 'fps' else 0
+        return info['duration'] if info else 0
+    return info['fps'] if info else 30.0
+
+def load_clips_table(path=None):
+    """读取剪辑表：指定文件时只读该文件，否则优先读取列式数据集（需要 pyarrow），没有时读取 Excel"""
+    if path:
+        print(f"--- 正在读取剪辑表: {path} ---")
+        if path.endswith(".parquet"): return pd.read_parquet(path)
+        if path.endswith(".feather"): return pd.read_feather(path)
+        return pd.read_excel(path)
+    if os.path.isdir(CLIPS_DATASET):
+        parts = sorted(f for f in os.listdir(CLIPS_DATASET) if f.endswith(".parquet") and not f.startswith("~"))
+        if parts:
+            try:
+                print(f"--- 正在读取数据集: {CLIPS_DATASET}（{len(parts)} 个分区） ---")
+                return pd.concat([pd.read_parquet(os.path.join(CLIPS_DATASET, f)) for f in parts], ignore_index=True)
+            except Exception as e:
+                print(f"⚠️ 读取数据集失败，改用 Excel: {e}")
+    print(f"--- 正在读取 Excel 文件: {EXCEL_FILE} ---")
+    return pd.read_excel(EXCEL_FILE)
 
 def parse_time(t, fps=30.0):
     if pd.isna(t): return None
@@ -156,22 +210,41 @@ def generate_cover_image(video_path, time_pos, title, subtitle, output_path):
 # 脚本 B 的函数 
 # -----------------------------------------------------------------------
 def get_random_video(folder_path):
-    if not os.path.exists(folder_path): return None
-    files = [f for f in os.listdir(folder_path) if f.endswith(('.mp4', '.mov', '.MP4', '.MOV'))]
+    files = list_media(folder_path)
     if not files: return None
-    return os.path.join(folder_path, random.choice(files))
+    return random.choice(files)
 
 def process_videos(input_video_path, output_video_path): 
     """处理单个视频，添加箭头、文案、画中画、片尾"""
+    real_arrow_path = ensure_image_exists(ARROW_IMAGE, "temp_arrow.png", (255, 0, 0, 255), size=ARROW_SIZE)
+    real_text_path = ensure_image_exists(TEXT_IMAGE, "temp_text.png", (0, 0, 255, 255), size=(TEXT_SIZE_WIDTH, 100))
+    pip_path = get_random_video(FOLDER_B)
+    outro_path = get_random_video(FOLDER_A)
+
+    if COMPOSE_WITH_FFMPEG:
+        layout = {
+            'arrow_size': ARROW_SIZE, 'arrow_pos_x': ARROW_POS_X,
+            'text_width': TEXT_SIZE_WIDTH, 'text_pos_x': TEXT_POS_X, 'position_y': POSITION_Y,
+            'bounce_speed': BOUNCE_SPEED, 'bounce_height': BOUNCE_HEIGHT, 'pip_start': PIP_START_TIME,
+        }
+        if compose_video(FFMPEG_CMD, FFPROBE_CMD, input_video_path, output_video_path, layout,
+                         real_arrow_path, real_text_path, pip_path=pip_path, outro_path=outro_path,
+                         enable_resize=ENABLE_RESIZE, target_width=TARGET_WIDTH, probe=get_media_cache().media_info,
+                         output_args=["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", *thread_args(),
+                                      *(["-filter_complex_threads", str(JOB_THREADS)] if JOB_THREADS else [])]):
+            return True
+        print("    ⚠️ ffmpeg 合成失败，改用 moviepy")
+
+    return process_videos_moviepy(input_video_path, output_video_path, real_arrow_path, real_text_path, pip_path, outro_path)
+
+def process_videos_moviepy(input_video_path, output_video_path, real_arrow_path, real_text_path, pip_path, outro_path):
+    """moviepy 版本的合成（逐帧在 Python 中处理，COMPOSE_WITH_FFMPEG 关闭或 ffmpeg 合成失败时使用）"""
     main_clip = None
     processed_main_clip = None
     final_video = None
     outro_clip = None
     
     try:
-        real_arrow_path = ensure_image_exists(ARROW_IMAGE, "temp_arrow.png", (255, 0, 0, 255), size=ARROW_SIZE)
-        real_text_path = ensure_image_exists(TEXT_IMAGE, "temp_text.png", (0, 0, 255, 255), size=(TEXT_SIZE_WIDTH, 100))
-
         main_clip = VideoFileClip(input_video_path)
         if ENABLE_RESIZE and main_clip.w > TARGET_WIDTH:
             main_clip = main_clip.resize(width=TARGET_WIDTH)
@@ -180,9 +253,7 @@ def process_videos(input_video_path, output_video_path):
         layers = [main_clip]
 
         # [功能 A] 画中画
-        PIP_START_TIME = 30
         if main_clip.duration > PIP_START_TIME:
-            pip_path = get_random_video(FOLDER_B)
             if pip_path:
                 print(f"     > 添加画中画: {os.path.basename(pip_path)}")
                 pip_clip = VideoFileClip(pip_path)
@@ -214,7 +285,6 @@ def process_videos(input_video_path, output_video_path):
         processed_main_clip = CompositeVideoClip(layers)
 
         # [功能 C] 拼接片尾
-        outro_path = get_random_video(FOLDER_A)
         if outro_path:
             outro_clip = VideoFileClip(outro_path)
             if outro_clip.size != main_clip.size: outro_clip = outro_clip.resize(newsize=(w, h))
@@ -223,11 +293,12 @@ def process_videos(input_video_path, output_video_path):
         else:
             final_video = processed_main_clip
 
-        final_video.write_videofile(output_video_path, codec="libx264", audio_codec="aac", fps=main_clip.fps, preset='ultrafast', threads=8, logger=None)
-        
+        final_video.write_videofile(output_video_path, codec="libx264", audio_codec="aac", fps=main_clip.fps, preset='ultrafast', threads=JOB_THREADS or 8, logger=None)
+        return True
     except Exception as e:
         print(f"❌  process_videos 出错: {e}")
         traceback.print_exc()
+        return False
     finally:
         if main_clip: main_clip.close()
         if final_video and final_video != processed_main_clip: final_video.close()
@@ -235,14 +306,13 @@ def process_videos(input_video_path, output_video_path):
         if outro_clip: outro_clip.close()
 
 # ===== 主流程 =====
-try:
-    print(f"--- 正在读取 Excel 文件: {EXCEL_FILE} ---")
-    df = pd.read_excel(EXCEL_FILE)
+def prepare_clips_table(df):
+    """规范列名、补齐可选列"""
     df.columns = df.columns.str.strip().str.lower()
 
     required_columns = ['filename', 'start', 'end', 'folder2', 'folder3']
     if any(col not in df.columns for col in required_columns):
-        raise ValueError(f"Excel 缺少列: {required_columns}")
+        raise ValueError(f"剪辑表缺少列: {required_columns}")
 
     if 'time' in df.columns and 'cover_time' not in df.columns: df.rename(columns={'time': 'cover_time'}, inplace=True)
     for col in ['music', 'cover_time', 'title', 'subtitle']:
@@ -253,86 +323,198 @@ try:
     df['folder2'] = df['folder2'].fillna('').astype(str).str.strip()
     df['folder3'] = df['folder3'].fillna('').astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
     df['music'] = df['music'].fillna('').astype(str).str.strip()
+    return df
+
+def cut_segments_per_row(input_path, segments, file_stem, f2_name, f3_name, merged_temp):
+    """逐行剪切再用 concat 分离器合并（单次剪切失败时的回退方式）"""
+    clips_for_this_folder = []
+    for index, start, end in segments:
+        temp_name = f"{file_stem}_{f2_name}{f3_name}_{index}.mp4"
+        out_clip_path = os.path.join(TEMP_CLIPS_DIR, temp_name)
+        
+        cmd = [FFMPEG_CMD, "-y", "-i", input_path, "-ss", str(start), "-to", str(end),
+               "-c:v", VIDEO_CODEC, "-preset", VIDEO_PRESET, "-crf", VIDEO_CRF,
+               "-c:a", AUDIO_CODEC, "-b:a", AUDIO_BITRATE, "-avoid_negative_ts", "1", *thread_args(), out_clip_path]
+        
+        rc, _, _ = run(cmd)
+        if rc == 0: clips_for_this_folder.append(out_clip_path)
+
+    if not clips_for_this_folder: return False
+    list_path = os.path.join(TEMP_CLIPS_DIR, f"list_{file_stem}_{f2_name}_{f3_name}.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in clips_for_this_folder:
+            # 转换路径格式并转义单引号
+            escaped_path = p.replace('\\', '/').replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+
+    rc, _, _ = run([FFMPEG_CMD, "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", merged_temp])
+    return rc == 0
 
-    video_info_cache = {}
-    
-    # 第一次分组：按文件名（比如 A.mp4）
-    grouped = df.groupby('filename')
+def plan_source_video(vid_filename, group, video_info_cache):
+    """把一个源视频拆成渲染任务：每个 (folder2, folder3) 一个任务（片段、封面和源视频信息）"""
+    file_stem = os.path.splitext(vid_filename)[0]
+    target_output_dir = os.path.join(OUTPUT_DIR, file_stem)
+    os.makedirs(target_output_dir, exist_ok=True)
+
+    print(f"\n=================================================")
+    print(f"📂 正在处理源视频: {vid_filename}")
+
+    jobs = []
+    # ❗❗❗ 关键修改：在这里就进行第二次分组（按 Folder2 和 Folder3）
+    # 确保每个任务只包含属于这一个“小视频”的片段
+    for (f2_name, f3_name), sub_group in group.groupby(['folder2', 'folder3']):
+        segments = []  # (行号, 开始秒, 结束秒)，按表格顺序
+        covers = []    # (封面秒, 标题, 副标题)
+        input_path = None
+
+        for index, row in sub_group.iterrows():
+            video_full_name = row['filename']
+            input_path = os.path.join(VIDEO_DIR, video_full_name)
+            
+            if not os.path.isfile(input_path): continue
+
+            if input_path not in video_info_cache:
+                # 帧率、音轨、关键帧索引一次探测（或直接读取缓存）
+                media = get_media_cache().media_info(input_path, keyframes=SMART_CUT) or {}
+                video_info_cache[input_path] = {'fps': media.get('fps', 30.0), 'has_audio': media.get('has_audio')}
+                if SMART_CUT:
+                    video_info_cache[input_path]['smart_cut'] = source_from_info(media)
+                    if video_info_cache[input_path]['smart_cut'] is None:
+                        print("  ℹ️ 源视频不适合智能剪切（非 H.264、可变帧率或读取不到关键帧），改用单次剪切")
+            current_fps = video_info_cache[input_path]['fps']
+
+            cover_t_str = row.get('cover_time')
+            if pd.notna(cover_t_str) and str(cover_t_str).strip() != "":
+                cover_time_sec = parse_time(cover_t_str, fps=current_fps)
+                if cover_time_sec is not None:
+                    covers.append((cover_time_sec, row.get('title', ''), row.get('subtitle', '')))
+
+            # 计算起止时间
+            start = parse_time(row["start"], fps=current_fps)
+            end = parse_time(row["end"], fps=current_fps)
+            if start is None or end is None: continue
+            segments.append((index, start, end))
+
+        if not segments and not covers: continue
+
+        # 源视频的探测结果（每个源视频一次）随任务传给工作进程
+        info = video_info_cache[input_path]
+
+        jobs.append({
+            'name': f"{file_stem}/{f2_name}{f3_name}",
+            'input_path': input_path,
+            'file_stem': file_stem,
+            'f2_name': f2_name,
+            'f3_name': f3_name,
+            'target_output_dir': target_output_dir,
+            'segments': segments,
+            'covers': covers,
+            'info': dict(info),
+        })
+    return jobs
+
+def cut_output(job):
+    """剪切并合并一个输出的片段，返回合并后的临时文件（失败返回 None）"""
+    input_path, segments, info = job['input_path'], job['segments'], job['info']
+    file_stem, f2_name, f3_name = job['file_stem'], job['f2_name'], job['f3_name']
+    # 给临时合并文件起个独特名字，防止混淆
+    merged_temp = os.path.join(TEMP_CLIPS_DIR, f"merged_{file_stem}_{f2_name}_{f3_name}.mp4")
+    video_args = ["-c:v", VIDEO_CODEC, "-preset", VIDEO_PRESET, "-crf", VIDEO_CRF] + thread_args()
+    audio_args = ["-c:a", AUDIO_CODEC, "-b:a", AUDIO_BITRATE]
+
+    merged_ok = False
+    if SMART_CUT and info.get('smart_cut') is not None:
+        print(f"  ✂️ [{job['name']}] 智能剪切 {len(segments)} 个片段...")
+        merged_ok = smart_cut_segments(FFMPEG_CMD, input_path, [(s, e) for _, s, e in segments], merged_temp,
+                                       info['smart_cut'], has_audio=info.get('has_audio') is not False,
+                                       video_args=video_args, audio_args=audio_args,
+                                       min_copy=SMART_CUT_MIN_COPY, merge_gap=CUT_MERGE_GAP)
+    if SINGLE_PASS_CUT and not merged_ok:
+        print(f"  ✂️ [{job['name']}] 单次剪切 {len(segments)} 个片段...")
+        merged_ok = cut_segments(FFMPEG_CMD, input_path, [(s, e) for _, s, e in segments], merged_temp,
+                                 has_audio=info.get('has_audio') is not False,
+                                 video_args=video_args, audio_args=audio_args, merge_gap=CUT_MERGE_GAP)
+    if not merged_ok:
+        merged_ok = cut_segments_per_row(input_path, segments, file_stem, f2_name, f3_name, merged_temp)
+    return merged_temp if merged_ok else None
+
+def render_output(job):
+    """渲染一个输出视频：剪切/合并 → 合成 → 封面（在工作进程中运行），返回各阶段用时"""
+    global JOB_THREADS
+    JOB_THREADS = job.get('threads')
+    f2_name, f3_name = job['f2_name'], job['f3_name']
+    result = {'output': job['name'], 'segments': len(job['segments']), 'threads': JOB_THREADS,
+              'cut': 0.0, 'composite': 0.0, 'cover': 0.0, 'ok': False}
+
+    # --- 1. 剪切并合并片段 ---
+    if job['segments']:
+        t = time.time()
+        merged_temp = cut_output(job)
+        result['cut'] = round(time.time() - t, 2)
+
+        # --- 2. 施加特效（脚本B逻辑） ---
+        if merged_temp:
+            final_video_path = os.path.join(job['target_output_dir'], f"{f2_name}{f3_name}.mp4")
+            print(f"  ✨ 正在生成最终视频: {f2_name}{f3_name}.mp4 ...")
+            t = time.time()
+            # 传入的是刚刚合并好的“小片段”，而不是巨大的源视频
+            result['ok'] = bool(process_videos(merged_temp, final_video_path))
+            result['composite'] = round(time.time() - t, 2)
+
+    # --- 3. 封面 ---
+    t = time.time()
+    for cover_time_sec, title, subtitle in job['covers']:
+        cover_out = os.path.join(job['target_output_dir'], f"{f2_name}{f3_name}_cover.jpg")
+        print(f"  🖼️ 生成封面: {title}")
+        if generate_cover_image(job['input_path'], cover_time_sec, title, subtitle, cover_out):
+            print(f"    ✅ 封面完成")
+    result['cover'] = round(time.time() - t, 2)
+    if not job['segments']:
+        result['ok'] = True
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按剪辑表剪切、合成视频并生成封面")
+    parser.add_argument("--clips", help="只处理该剪辑表（.parquet / .feather / .xlsx），默认读取 CLIPS_DATASET 或 EXCEL_FILE")
+    parser.add_argument("--no-pause", action="store_true", help="结束后不等待按 Enter（后台流水线调用）")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="同时渲染的视频数，0 = 按 CPU 核数自动计算")
+    parser.add_argument("--threads", type=int, default=0, help="本次可以使用的 CPU 线程数，默认全部核数")
+    parser.add_argument("--report", default=RENDER_REPORT, help="用时报告（CSV），默认 RENDER_REPORT；同时运行多个实例时各自指定")
+    args = parser.parse_args(argv)
 
-    for vid_filename, group in grouped:
-        file_stem = os.path.splitext(vid_filename)[0]
-        target_output_dir = os.path.join(OUTPUT_DIR, file_stem)
-        os.makedirs(target_output_dir, exist_ok=True)
+    try:
+        df = prepare_clips_table(load_clips_table(args.clips))
+        video_info_cache = {}
+
+        # 媒体信息预热：源视频（智能剪切时连同关键帧索引）和片尾/画中画素材，未变化的文件直接读缓存
+        cache = get_media_cache()
+        sources = [os.path.join(VIDEO_DIR, name) for name in df['filename'].dropna().unique()]
+        cache.warm([path for path in sources if os.path.isfile(path)], keyframes=SMART_CUT)
+        cache.warm(list_media(FOLDER_A) + list_media(FOLDER_B))
+
+        # 第一次分组：按文件名（比如 A.mp4），每个输出视频一个任务
+        jobs = []
+        for vid_filename, group in df.groupby('filename'):
+            jobs.extend(plan_source_video(vid_filename, group, video_info_cache))
+
+        workers, threads = thread_budget(len(jobs), args.threads or None, args.workers, RENDER_THREADS_PER_JOB)
+        for job in jobs:
+            job['threads'] = threads
+        if workers > 1:
+            # 临时素材在分发任务前生成，避免多个进程同时写同一个文件
+            ensure_image_exists(ARROW_IMAGE, "temp_arrow.png", (255, 0, 0, 255), size=ARROW_SIZE)
+            ensure_image_exists(TEXT_IMAGE, "temp_text.png", (0, 0, 255, 255), size=(TEXT_SIZE_WIDTH, 100))
+        print(f"\n🚀 渲染 {len(jobs)} 个视频：{workers} 个并行，每个 {threads} 线程")
+        results = run_jobs(render_output, jobs, workers, args.report)
+
+        print("\n🎉 全部处理结束")
+        return 0 if all(result.get('ok') for result in results) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        if not args.no_pause:
+            input("按 Enter 退出...")
 
-        print(f"\n=================================================")
-        print(f"📂 正在处理源视频: {vid_filename}")
-        
-        # ❗❗❗ 关键修改：在这里就进行第二次分组（按 Folder2 和 Folder3）
-        # 确保每次循环只处理属于这一个“小视频”的片段
-        for (f2_name, f3_name), sub_group in group.groupby(['folder2', 'folder3']):
-            
-            # --- 1. 剪辑当前小视频的片段 ---
-            clips_for_this_folder = []
-            
-            for index, row in sub_group.iterrows():
-                video_full_name = row['filename']
-                input_path = os.path.join(VIDEO_DIR, video_full_name)
-                
-                if not os.path.isfile(input_path): continue
-
-                if input_path not in video_info_cache:
-                    video_info_cache[input_path] = {'fps': get_media_info(input_path, 'fps')}
-                current_fps = video_info_cache[input_path]['fps']
-
-                # 封面生成（逻辑不变）
-                cover_t_str = row.get('cover_time')
-                if pd.notna(cover_t_str) and str(cover_t_str).strip() != "":
-                    cover_time_sec = parse_time(cover_t_str, fps=current_fps)
-                    if cover_time_sec is not None:
-                        cover_out = os.path.join(target_output_dir, f"{f2_name}{f3_name}_cover.jpg")
-                        print(f"  🖼️ 生成封面: {row.get('title', '')}")
-                        if generate_cover_image(input_path, cover_time_sec, row.get('title', ''), row.get('subtitle', ''), cover_out):
-                            print(f"    ✅ 封面完成")
-
-                # 计算起止时间
-                start = parse_time(row["start"], fps=current_fps)
-                end = parse_time(row["end"], fps=current_fps)
-                if start is None or end is None: continue
-
-                # 剪切
-                temp_name = f"{file_stem}_{f2_name}{f3_name}_{index}.mp4"
-                out_clip_path = os.path.join(TEMP_CLIPS_DIR, temp_name)
-                
-                cmd = [FFMPEG_CMD, "-y", "-i", input_path, "-ss", str(start), "-to", str(end),
-                       "-c:v", VIDEO_CODEC, "-preset", VIDEO_PRESET, "-crf", VIDEO_CRF,
-                       "-c:a", AUDIO_CODEC, "-b:a", AUDIO_BITRATE, "-avoid_negative_ts", "1", out_clip_path]
-                
-                rc, _, _ = run(cmd)
-                if rc == 0: clips_for_this_folder.append(out_clip_path)
-
-            # --- 2. 合并片段 ---
-            if clips_for_this_folder:
-                # 给临时合并文件起个独特名字，防止混淆
-                list_path = os.path.join(TEMP_CLIPS_DIR, f"list_{file_stem}_{f2_name}_{f3_name}.txt")
-                with open(list_path, "w", encoding="utf-8") as f:
-                    for p in clips_for_this_folder:
-                        # 转换路径格式并转义单引号
-                        escaped_path = p.replace('\\', '/').replace("'", "'\\''")
-                        f.write(f"file '{escaped_path}'\n")
-
-                merged_temp = os.path.join(TEMP_CLIPS_DIR, f"merged_{file_stem}_{f2_name}_{f3_name}.mp4")
-                run([FFMPEG_CMD, "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", merged_temp])
-
-                # --- 3. 施加特效（脚本B逻辑） ---
-                final_video_path = os.path.join(target_output_dir, f"{f2_name}{f3_name}.mp4")
-                print(f"  ✨ 正在生成最终视频: {f2_name}{f3_name}.mp4 ...")
-                
-                # 传入的是刚刚合并好的“小片段”，而不是巨大的源视频
-                process_videos(merged_temp, final_video_path)
-
-    print("\n🎉 全部处理结束")
-
-except Exception:
-    traceback.print_exc()
-finally:
-    input("按 Enter 退出...")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+并行渲染调度（process_video.py 使用）
+
+每个输出视频（folder2 + folder3）是一个独立的任务：剪切/合并 → 合成 → 封面，
+任务之间没有依赖，放到进程池中同时运行。CPU 核数按同时运行的任务数平分，
+每个任务的 ffmpeg -threads / moviepy threads 使用分到的线程数，既用满所有核又不过度竞争。
+
+每个任务的各阶段用时写入报告（CSV）。
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+
+def thread_budget(job_count, cpu_count=None, workers=0, threads_per_job=4):
+    """计算同时运行的任务数和每个任务的线程数
+
+    Args:
+        job_count: 任务数
+        cpu_count: 可用的 CPU 核数（默认 os.cpu_count()）
+        workers: 指定同时运行的任务数，0 表示自动（cpu_count // threads_per_job）
+        threads_per_job: 自动模式下每个任务期望的线程数
+
+    Returns:
+        (同时运行的任务数, 每个任务的线程数)
+    """
+    cpu_count = max(1, cpu_count or os.cpu_count() or 1)
+    if workers <= 0:
+        workers = max(1, cpu_count // max(1, threads_per_job))
+    workers = max(1, min(workers, job_count or 1))
+    return workers, max(1, cpu_count // workers)
+
+
+def _run_one(render, job):
+    """运行一个任务，异常也记录为失败的结果"""
+    start = time.time()
+    try:
+        result = render(job) or {}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result.setdefault("output", job.get("name"))
+    result["wall"] = round(time.time() - start, 2)
+    result["pid"] = os.getpid()
+    return result
+
+
+def run_jobs(render, jobs, workers=1, report_file=None):
+    """运行所有任务（workers > 1 时使用进程池），返回每个任务的结果列表
+
+    render 必须是模块级函数（进程池需要序列化），返回 {阶段: 用时, ..., "ok": 是否成功}。
+    """
+    if not jobs:
+        return []
+    start = time.time()
+    results = []
+    if workers <= 1:
+        for job in jobs:
+            results.append(_run_one(render, job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_one, render, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # 工作进程异常退出
+                    results.append({"output": futures[future].get("name"), "ok": False, "error": str(e)})
+
+    elapsed = time.time() - start
+    busy = sum(result.get("wall", 0) for result in results)
+    success = sum(1 for result in results if result.get("ok"))
+    print(f"\n⏱️ 渲染 {success}/{len(results)} 个视频成功，{workers} 个并行，"
+          f"总用时 {elapsed:.1f} 秒（任务累计 {busy:.1f} 秒）")
+    if report_file:
+        try:
+            pd.DataFrame(results).to_csv(report_file, index=False, encoding="utf-8-sig")
+            print(f"📄 用时报告: {report_file}")
+        except Exception as e:
+            print(f"⚠️ 写入用时报告失败: {e}")
+    return results
@@ -0,0 +1,297 @@
+"""
+关键帧感知的智能剪切（process_video.py 的 SMART_CUT 模式）
+
+H.264 源视频的片段通常有好几秒，大部分内容可以直接复制码流，不需要重新编码：
+  片头  开始 → 第一个关键帧          重新编码（libx264）
+  中间  第一个关键帧 → 最后一个关键帧  复制码流（-c:v copy）
+  片尾  最后一个关键帧 → 结束          重新编码
+每段都按帧数截取（-frames:v），结果逐帧准确。每段保存为单独的 .mkv，用 concat 分离器按顺序拼接
+（重新编码部分的 SPS/PPS 与源视频不同，concat 分离器会随数据包切换）。重新编码部分使用与源视频相同的
+B 帧重排序延迟，拼接处的解码时间戳保持递增。音轨用 ffmpeg_cut 一次剪切、编码，拼接时一起封装。
+
+源视频的关键帧位置和视频流信息每个源视频只探测一次（probe_source，由调用方缓存）。
+非 H.264、可变帧率、重排序延迟超过 2 帧或探测失败的源视频不使用智能剪切，smart_cut_segments 返回 False，由调用方回退。
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from fractions import Fraction
+
+from ffmpeg_cut import _t, build_cut_command, valid_segments
+
+
+PROFILES = {
+    "baseline": "baseline",
+    "constrained baseline": "baseline",
+    "main": "main",
+    "high": "high",
+    "high 10": "high10",
+    "high 4:2:2": "high422",
+    "high 4:4:4 predictive": "high444",
+}
+
+# 重排序延迟（帧）→ libx264 参数：没有 B 帧 / 单个 B 帧 / B 帧金字塔
+REORDER_ARGS = {
+    0: ["-bf", "0"],
+    1: ["-bf", "1"],
+    2: ["-bf", "3", "-x264-params", "b-pyramid=normal"],
+}
+
+
+def _frame_rate(text):
+    """'30000/1001' / '25' / '29.97' → Fraction，无效时返回 None"""
+    try:
+        rate = Fraction(str(text).strip())
+        if "/" not in str(text):
+            rate = rate.limit_denominator(1001)
+        return rate if rate > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def probe_stream(ffmpeg, ffprobe, path):
+    """视频流的编码、profile、像素格式和帧率（ffprobe 不可用时解析 ffmpeg -i 的输出），失败返回 None"""
+    try:
+        cmd = [ffprobe, "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "stream=codec_name,profile,pix_fmt,r_frame_rate,avg_frame_rate",
+               "-of", "default=noprint_wrappers=1", str(path)]
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
+        fields = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+        rate = _frame_rate(fields.get("r_frame_rate"))
+        return {
+            "codec": fields.get("codec_name"),
+            "profile": fields.get("profile", ""),
+            "pix_fmt": fields.get("pix_fmt"),
+            "fps": rate,
+            "cfr": rate is not None and rate == _frame_rate(fields.get("avg_frame_rate")),
+        }
+    except Exception:
+        pass
+
+    try:
+        result = subprocess.run([ffmpeg, "-hide_banner", "-nostdin", "-i", str(path)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+        match = re.search(r"Video: (\w+)(?: \(([^)]*)\))?.*?, (\w+)[(,].*?([\d.]+) fps", result.stderr)
+        if not match:
+            return None
+        return {
+            "codec": match.group(1),
+            "profile": match.group(2) or "",
+            "pix_fmt": match.group(3),
+            "fps": _frame_rate(match.group(4)),
+            "cfr": True,  # ffmpeg -i 看不出是否可变帧率
+        }
+    except Exception:
+        return None
+
+
+def keyframe_times(packets, start_time=None):
+    """ffprobe 数据包（pts_time、flags）→ 关键帧时间（秒，升序）
+
+    数据包的 pts_time 是容器中的原始时间，减去文件的 start_time 后才是 -ss 定位和剪辑表使用的时间轴
+    （没有编辑列表的 MP4 带 B 帧时 start_time 通常不为 0）。
+    """
+    try:
+        start = float(start_time)
+    except (TypeError, ValueError):
+        start = 0.0
+    times = [
+        round(float(packet["pts_time"]) - start, 6)
+        for packet in packets
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "", "N/A")
+    ]
+    return sorted(times)
+
+
+def probe_keyframes(ffmpeg, ffprobe, path):
+    """关键帧时间（秒，升序，从文件开始时间算起）。优先用 ffprobe 读取数据包标记（不解码），否则用 ffmpeg 只解码关键帧，失败返回 None"""
+    try:
+        cmd = [ffprobe, "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "format=start_time:packet=pts_time,flags", "-of", "json", str(path)]
+        data = json.loads(subprocess.check_output(cmd, stderr=subprocess.DEVNULL))
+        times = keyframe_times(data.get("packets", []), data.get("format", {}).get("start_time"))
+        if times:
+            return times
+    except Exception:
+        pass
+
+    try:
+        cmd = [ffmpeg, "-hide_banner", "-nostdin", "-skip_frame", "nokey", "-i", str(path),
+               "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+        times = [float(t) for t in re.findall(r"showinfo.*? pts_time:(-?[\d.]+)", result.stderr)]
+        return sorted(times) or None
+    except Exception:
+        return None
+
+
+def probe_reorder_delay(ffmpeg, path):
+    """B 帧重排序延迟（帧数）：第一个数据包的 pts 与 dts 之差，失败返回 None"""
+    cmd = [ffmpeg, "-v", "error", "-nostdin", "-i", str(path), "-map", "0:v:0", "-c", "copy",
+           "-frames:v", "1", "-f", "framecrc", "-"]
+    try:
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
+        for line in out.splitlines():
+            if line and not line.startswith("#"):
+                _, dts, pts, duration = [int(value) for value in line.split(",")[:4]]
+                return round((pts - dts) / duration) if duration > 0 else 0
+    except Exception:
+        pass
+    return None
+
+
+def probe_source(ffmpeg, ffprobe, path):
+    """智能剪切需要的源视频信息：{codec, profile, pix_fmt, fps, cfr, delay, keyframes}，不适合智能剪切时返回 None"""
+    stream = probe_stream(ffmpeg, ffprobe, path)
+    if not stream or stream["codec"] != "h264" or not stream["fps"] or not stream["cfr"]:
+        return None
+    stream["delay"] = probe_reorder_delay(ffmpeg, path)
+    if stream["delay"] not in REORDER_ARGS:
+        return None
+    keyframes = probe_keyframes(ffmpeg, ffprobe, path)
+    if not keyframes:
+        return None
+    stream["keyframes"] = keyframes
+    return stream
+
+
+def source_from_info(info):
+    """媒体信息缓存（media_cache）的结果转成 probe_source 的格式，不适合智能剪切时返回 None"""
+    if not info or info.get("video_codec") != "h264" or not info.get("cfr"):
+        return None
+    fps = _frame_rate(info.get("fps_rate"))
+    if not fps or info.get("delay") not in REORDER_ARGS or not info.get("keyframes"):
+        return None
+    return {
+        "codec": "h264",
+        "profile": info.get("profile", ""),
+        "pix_fmt": info.get("pix_fmt"),
+        "fps": fps,
+        "cfr": True,
+        "delay": info["delay"],
+        "keyframes": info["keyframes"],
+    }
+
+
+def _frame(seconds, fps):
+    """时间对应的帧序号（四舍五入到最近的帧）"""
+    return math.floor(seconds * fps + Fraction(1, 2))
+
+
+def plan_segment(start, end, keyframes, fps, min_copy=1.0):
+    """把一个片段拆成 [(方式, 起始帧, 帧数), ...]，方式为 "encode" 或 "copy"
+
+    片段边界对齐到最近的帧；关键帧之间的内容不足 min_copy 秒时整段重新编码。
+    """
+    first = _frame(start, fps)
+    last = _frame(end, fps)
+    if last <= first:
+        return []
+    frames = sorted({_frame(k, fps) for k in keyframes})
+    inner = [f for f in frames if first <= f <= last]
+    if not inner or inner[-1] - inner[0] < min_copy * fps:
+        return [("encode", first, last - first)]
+
+    copy_start, copy_end = inner[0], inner[-1]
+    pieces = []
+    if copy_start > first:
+        pieces.append(("encode", first, copy_start - first))
+    pieces.append(("copy", copy_start, copy_end - copy_start))
+    if last > copy_end:
+        pieces.append(("encode", copy_end, last - copy_end))
+    return pieces
+
+
+def encode_args_for(source, video_args=()):
+    """重新编码部分的参数：与源视频的 profile、像素格式、重排序延迟一致"""
+    args = list(video_args) or ["-c:v", "libx264"]
+    args += REORDER_ARGS.get(source.get("delay"), [])
+    if source.get("pix_fmt"):
+        args += ["-pix_fmt", source["pix_fmt"]]
+    profile = PROFILES.get(str(source.get("profile", "")).lower())
+    if profile:
+        args += ["-profile:v", profile]
+    return args
+
+
+def build_piece_command(ffmpeg, input_path, mode, first_frame, frames, fps, output_path, encode_args=()):
+    """生成一段的命令（只有视频流的 .mkv）
+
+    复制：定位到关键帧后半帧处（输入端定位会落在该关键帧上）；
+    重新编码：定位到起始帧前半帧处（精确定位，丢弃更早的帧）。
+    """
+    if mode == "copy":
+        seek = (first_frame + 0.5) / fps
+        codec_args = ["-c:v", "copy"]
+    else:
+        seek = max(first_frame - 0.5, 0) / fps
+        codec_args = list(encode_args)
+    return [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-ss", _t(float(seek)), "-i", str(input_path),
+            "-map", "0:v:0", "-frames:v", str(frames), *codec_args, "-an", str(output_path)]
+
+
+def _run(cmd):
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, encoding="utf-8")
+    if result.returncode != 0:
+        print(f"    ⚠️ 智能剪切失败: {result.stderr.strip()[-300:]}")
+    return result.returncode == 0
+
+
+def smart_cut_segments(ffmpeg, input_path, segments, output_path, source, has_audio=True,
+                       video_args=(), audio_args=(), min_copy=1.0, merge_gap=5.0):
+    """按表格顺序智能剪切并拼接所有片段，成功返回 True
+
+    Args:
+        source: probe_source 的结果（为 None 时直接返回 False）
+        video_args: 重新编码部分的编码参数（如 -c:v libx264 -preset fast -crf 22）
+        audio_args: 音轨的编码参数
+    """
+    segments = valid_segments(segments)
+    if not source or not segments:
+        return False
+    fps = source["fps"]
+    encode_args = encode_args_for(source, video_args)
+    plans = [plan_segment(start, end, source["keyframes"], fps, min_copy) for start, end in segments]
+    plans = [plan for plan in plans if plan]
+    if not plans:
+        return False
+
+    work_dir = tempfile.mkdtemp(prefix="smartcut_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        # 1. 视频：逐段复制/重新编码
+        list_file = os.path.join(work_dir, "pieces.txt")
+        copied = encoded = 0
+        with open(list_file, "w", encoding="utf-8") as f:
+            for i, (mode, first_frame, frames) in enumerate(piece for plan in plans for piece in plan):
+                piece_file = os.path.join(work_dir, f"{i:04d}.mkv")
+                if not _run(build_piece_command(ffmpeg, input_path, mode, first_frame, frames, fps, piece_file, encode_args)):
+                    return False
+                # 写明每段的时长，否则 concat 分离器按容器时长（含 B 帧延迟）计算偏移，段与段之间会多出一帧
+                f.write(f"file '{piece_file}'\nduration {_t(float(frames / fps))}\n")
+                if mode == "copy":
+                    copied += frames
+                else:
+                    encoded += frames
+        print(f"    ⚡ 智能剪切: 复制 {float(copied / fps):.1f} 秒，重新编码 {float(encoded / fps):.1f} 秒")
+
+        # 2. 音轨：按对齐到帧的边界一次剪切
+        cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-nostdin", "-f", "concat", "-safe", "0", "-i", list_file]
+        if has_audio:
+            bounds = [(float(plan[0][1] / fps), float((plan[-1][1] + plan[-1][2]) / fps)) for plan in plans]
+            audio_file = os.path.join(work_dir, "audio.m4a")
+            if not _run(build_cut_command(ffmpeg, input_path, bounds, audio_file, has_audio=True, has_video=False,
+                                          audio_args=audio_args, merge_gap=merge_gap)):
+                return False
+            cmd += ["-i", audio_file, "-map", "0:v", "-map", "1:a"]
+
+        # 3. 拼接视频并封装
+        cmd += ["-c", "copy", "-movflags", "+faststart", str(output_path)]
+        return _run(cmd)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步视频处理自动化
+基于 playwright.async_api，一个事件循环同时驱动多个 AI Studio 对话
+步骤语义与 video_automation.VideoProcessor 保持一致，
+解析和保存逻辑通过 ProcessorCommonMixin 与同步版共用
+"""
+
+import asyncio
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+from config import config, ensure_directories
+from page_scripts import (
+    AI_IDLE_JS,
+    CONTENT_BLOCKED_TEXTS,
+    DOM_SETTLE_JS,
+    LOADING_TEXTS,
+    PAGE_STATE_PROBE_JS,
+    RATE_LIMIT_TEXTS,
+    RUN_BUTTON_ENABLED_JS,
+    TABLES_EXTRACT_JS,
+    UPLOAD_IDLE_JS,
+)
+from processor_common import ProcessorCommonMixin
+from response_cache import prompt_prefix_hashes
+from video_automation import VideoProcessor, logger
+
+
+SRT_PATTERN = re.compile(r'\d{2}:\d{2}:\d{2},\d{3}')
+
+
+class AsyncVideoProcessor(ProcessorCommonMixin):
+    """异步视频处理类 - 每个实例驱动一个对话页面
+
+    多个实例可以共享同一个浏览器上下文，由同一个事件循环调度。
+    所有等待都是 await（wait_for_function / locator.wait_for / asyncio.sleep），
+    不会阻塞其他对话。
+    """
+
+    def __init__(self, context, worker_id=None):
+        self.base_dir = config.BASE_DIR
+        self.process_folder = config.PROCESS_FOLDER
+        self.videos_folder = config.VIDEOS_FOLDER
+        self.prompts_file = config.PROMPTS_FILE
+        self.video_list_file = config.VIDEO_LIST_FILE
+        self.output_folder = config.OUTPUT_FOLDER
+        self.clips_file = config.CLIPS_FILE
+
+        self.ai_studio_url = config.AI_STUDIO_URL
+        self.context = context
+        self.page = None
+
+        # Content blocked 处理标记
+        self.last_blocked_time = 0
+
+        # 后期处理工作池和处理记录（由 AsyncBatchRunner 设置，所有对话共用）
+        self.postprocess = None
+        self.ledger = None
+
+        self.worker_id = worker_id
+        self.name = f"对话 {worker_id}" if worker_id is not None else "对话"
+        self.screenshot_dir = config.SCREENSHOT_DIR / f"async_{worker_id}"
+
+        ensure_directories()
+        if config.SAVE_SCREENSHOTS:
+            self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+
+    async def open_page(self):
+        """在共享上下文中打开新页面"""
+        self.page = await self.context.new_page()
+        self.page.set_default_timeout(config.BROWSER_TIMEOUT)
+
+    async def close(self):
+        """关闭页面"""
+        if self.page:
+            try:
+                await self.page.close()
+            except Exception:
+                pass
+
+    async def take_screenshot(self, name="screenshot"):
+        """截图保存"""
+        if config.SAVE_SCREENSHOTS and self.page:
+            try:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filepath = self.screenshot_dir / f"{name}_{timestamp}.png"
+                await self.page.screenshot(path=str(filepath))
+            except Exception as e:
+                logger.warning(f"[{self.name}] 截图失败: {e}")
+
+    async def open_ai_studio(self):
+        """打开 Google AI Studio（使用已保存的会话，不等待用户确认）"""
+        logger.info(f"[{self.name}] 🌐 正在打开 {self.ai_studio_url}")
+        try:
+            await self.page.goto(self.ai_studio_url, wait_until="networkidle", timeout=60000)
+            await self.page.wait_for_selector('body', state="visible", timeout=10000)
+            await self.take_screenshot("ai_studio_opened")
+            return True
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ 打开 AI Studio 失败: {e}")
+            await self.take_screenshot("error_open_ai_studio")
+            return False
+
+    async def _first_visible(self, selectors, timeout=10000):
+        """返回第一个在超时内变为可见的元素（各选择器并发等待）"""
+        async def wait_visible(selector):
+            locator = self.page.locator(selector).first
+            await locator.wait_for(state="visible", timeout=timeout)
+            return locator
+
+        tasks = [asyncio.ensure_future(wait_visible(selector)) for selector in selectors]
+        try:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    return await future
+                except Exception:
+                    continue
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def check_and_close_upload_popup(self):
+        """检查上传后是否有弹窗（如版权确认），如果有则关闭"""
+        button = await self._first_visible([
+            'button[aria-label*="Acknowledge"]',
+            'button[aria-label*="acknowledgement"]',
+            'button:has-text("Acknowledge")',
+        ], timeout=2000)
+        if not button:
+            return False
+
+        logger.warning(f"[{self.name}] ⚠️ 检测到上传后的弹窗（版权确认）")
+        try:
+            await button.click(timeout=5000)
+            logger.info(f"[{self.name}] ✅ 已点击 Acknowledge 按钮")
+        except Exception as e:
+            logger.debug(f"[{self.name}] 点击 Acknowledge 失败: {e}")
+        return True
+
+    async def probe_page_state(self):
+        """一次 evaluate 读取页面状态快照（与同步版 probe_page_state 相同），失败时返回 None"""
+        try:
+            return await self.page.evaluate(PAGE_STATE_PROBE_JS, {
+                "rateLimitTexts": RATE_LIMIT_TEXTS,
+                "blockedTexts": CONTENT_BLOCKED_TEXTS,
+                "loadingTexts": LOADING_TEXTS,
+            })
+        except Exception as e:
+            logger.debug(f"[{self.name}] 读取页面状态失败: {e}")
+            return None
+
+    async def check_video_uploaded(self, state=None):
+        """检查视频是否已成功上传到对话中"""
+        state = state or await self.probe_page_state()
+        return bool(state and state["videoUploaded"])
+
+    async def upload_video(self, video_path):
+        """上传视频文件 - 点击添加按钮，然后点击 Upload File"""
+        logger.info(f"[{self.name}] 📤 正在上传视频: {video_path}")
+
+        if not Path(video_path).exists():
+            logger.error(f"[{self.name}] ❌ 视频文件不存在: {video_path}")
+            return False
+
+        try:
+            # 步骤1：点击添加按钮
+            add_button = await self._first_visible([
+                'button[iconname="add_circle"]',
+                'button[data-test-add-chunk-menu-button]',
+                'button[aria-label*="Insert assets"]',
+            ])
+            if not add_button:
+                logger.error(f"[{self.name}] ❌ 找不到添加按钮")
+                await self.take_screenshot("error_no_add_button")
+                return False
+            await add_button.click()
+
+            # 步骤2：等待 Upload File 按钮出现
+            upload_file_button = await self._first_visible([
+                'button[aria-label="Upload File"]',
+                'button:has-text("Upload File")',
+            ])
+            if not upload_file_button:
+                logger.error(f"[{self.name}] ❌ 找不到 Upload File 按钮")
+                await self.take_screenshot("error_no_upload_file_button")
+                return False
+
+            # 步骤3：使用 file chooser 上传文件
+            async with self.page.expect_file_chooser(timeout=30000) as fc_info:
+                await upload_file_button.click()
+            file_chooser = await fc_info.value
+            await file_chooser.set_files(str(video_path))
+            logger.info(f"[{self.name}] ✅ 已选择文件: {Path(video_path).name}")
+
+            # 步骤4：关闭浮窗菜单
+            await self.page.keyboard.press("Escape")
+
+            # 步骤5：等待上传进度指示器消失
+            try:
+                await self.page.wait_for_function(
+                    UPLOAD_IDLE_JS,
+                    timeout=config.WAIT_AFTER_UPLOAD * 2 * 1000,
+                    polling=500,
+                )
+            except PlaywrightTimeout:
+                logger.warning(f"[{self.name}] ⚠️ 等待上传完成超时，继续执行")
+
+            await self.take_screenshot("video_uploaded")
+
+            if await self.check_and_close_upload_popup():
+                return "popup_closed_need_refresh"
+
+            if not await self.check_video_uploaded():
+                logger.warning(f"[{self.name}] ⚠️ 视频可能未成功上传（未检测到视频元素）")
+            return True
+
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ 上传视频失败: {e}")
+            await self.take_screenshot("error_upload_video")
+            return False
+
+    async def send_prompt(self, prompt_text, step_number=None):
+        """发送提示词到对话框（填入提示词 → 等待 Run 可用 → 点击 Run）"""
+        step_info = f"步骤 {step_number}" if step_number else "提示词"
+        logger.info(f"[{self.name}] 📝 发送{step_info}: {prompt_text[:50]}...")
+
+        try:
+            input_box = None
+            for selector in [config.SELECTORS["input_box"], config.SELECTORS["chat_input"], "textarea"]:
+                locator = self.page.locator(selector).first
+                if await locator.count() > 0:
+                    input_box = locator
+                    break
+
+            if not input_box:
+                logger.error(f"[{self.name}] ❌ 找不到输入框")
+                await self.take_screenshot("error_no_input_box")
+                return False
+
+            await input_box.click()
+            await input_box.fill(prompt_text)
+
+            # 等待 Run 按钮可用（事件式等待，不轮询 Python 端）
+            try:
+                await self.page.wait_for_function(
+                    RUN_BUTTON_ENABLED_JS,
+                    timeout=config.WAIT_BUTTON_ENABLED * 1000,
+                    polling=500,
+                )
+                await self.page.locator('button[aria-label="Run"], button.run-button').first.click(timeout=10000)
+            except PlaywrightTimeout:
+                logger.error(f"[{self.name}] ❌ 等待按钮可用超时（{config.WAIT_BUTTON_ENABLED} 秒）")
+                await self.take_screenshot("error_run_button_timeout")
+                if step_number == 1:
+                    return "upload_failed"
+                await self.page.keyboard.press("Control+Enter")
+
+            await asyncio.sleep(config.WAIT_AFTER_SEND)
+            logger.info(f"[{self.name}] ✅ 已发送{step_info}")
+            return True
+
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ 发送提示词失败: {e}")
+            await self.take_screenshot("error_send_prompt")
+            return False
+
+    async def check_content_blocked(self, state=None):
+        """检查是否出现 Content blocked（带去重逻辑），出现时自动发送"继续" """
+        state = state or await self.probe_page_state()
+        text = state and state["contentBlocked"]
+        if not text:
+            return False
+
+        current_time = time.time()
+        if current_time - self.last_blocked_time < config.CONTENT_BLOCKED_COOLDOWN:
+            return False
+
+        logger.warning(f"[{self.name}] ⚠️ 检测到错误提示: {text}")
+        await self.take_screenshot("content_blocked")
+        await self.send_prompt("继续")
+        self.last_blocked_time = current_time
+        return True
+
+    async def check_rate_limit(self, state=None):
+        """检查是否达到速率限制或配额超限"""
+        state = state or await self.probe_page_state()
+        text = state and state["rateLimit"]
+        if text:
+            logger.warning(f"[{self.name}] ⚠️ 检测到速率限制或配额超限: {text}")
+            await self.take_screenshot("rate_limit_or_quota_exceeded")
+            return True
+        return False
+
+    async def is_ai_running(self, state=None):
+        """检查 AI 是否正在运行（Run 按钮显示 Stop 或有加载指示器）"""
+        state = state or await self.probe_page_state()
+        return bool(state and state["running"])
+
+    async def wait_for_response(self, timeout=None, step_number=None):
+        """等待 AI 响应完成
+
+        在浏览器内等待 Run 按钮回到空闲状态，每个检查窗口结束时
+        检查一次速率限制和 Content blocked。
+        返回 None 表示完成，"rate_limit" / "skip" 表示需要放弃当前视频。
+        """
+        if timeout is None:
+            timeout = config.WAIT_FOR_RESPONSE * 6
+
+        check_window = 10  # 每个等待窗口的秒数
+        start_time = time.time()
+        timeout_count = 0
+        max_timeout_count = 3
+
+        while True:
+            state = await self.probe_page_state()
+            if await self.check_rate_limit(state):
+                return "rate_limit"
+
+            if await self.check_content_blocked(state):
+                start_time = time.time()
+                timeout_count = 0
+                continue
+
+            try:
+                await self.page.wait_for_function(AI_IDLE_JS, timeout=check_window * 1000, polling=250)
+                break
+            except PlaywrightTimeout:
+                elapsed = time.time() - start_time
+                logger.info(f"[{self.name}] ⏳ AI 正在处理步骤 {step_number}... (已等待 {int(elapsed)} 秒)")
+                if elapsed > timeout:
+                    timeout_count += 1
+                    logger.warning(f"[{self.name}] ⚠️ 等待超时（第 {timeout_count} 次），但 AI 仍在运行")
+                    if timeout_count >= max_timeout_count:
+                        return "skip"
+                    start_time = time.time()
+
+        # AI 已完成，等待响应 DOM 稳定（步骤25还要等表格行数不再变化）
+        watch_table = step_number == 25
+        quiet_window = config.RESPONSE_QUIET_WINDOW_TABLE if watch_table else config.RESPONSE_QUIET_WINDOW
+        try:
+            settle = await self.page.evaluate(DOM_SETTLE_JS, {
+                "quietMs": int(quiet_window * 1000),
+                "maxMs": int(config.RESPONSE_SETTLE_MAX * 1000),
+                "watchTable": watch_table,
+            })
+            logger.info(f"[{self.name}] 📏 步骤 {step_number} 稳定用时 {settle['settleMs']} ms")
+        except Exception as e:
+            logger.debug(f"[{self.name}] 等待响应稳定失败: {e}")
+            await asyncio.sleep(quiet_window)
+        await self.take_screenshot(
+            f"response_received_step_{step_number}" if step_number else "response_received"
+        )
+        return None
+
+    async def _last_response_element(self):
+        """获取最后一个非空的模型响应元素"""
+        responses = await self.page.locator('[data-turn-role="Model"]').all()
+        for element in reversed(responses):
+            try:
+                text = await element.inner_text()
+                if text and text.strip():
+                    return element
+            except Exception:
+                continue
+        return responses[-1] if responses else None
+
+    async def extract_code_blocks(self, response_element):
+        """直接读取响应中代码块的文本（不经过剪贴板，多个对话并发时互不干扰）"""
+        blocks = await response_element.locator('pre').all_inner_texts()
+        return [block.strip() for block in blocks if block and block.strip()]
+
+    async def extract_table_from_dom(self, response_element):
+        """从HTML DOM中提取最后一个表格的数据（一次 evaluate 读取所有单元格）"""
+        tables = await response_element.evaluate(TABLES_EXTRACT_JS)
+        if not tables:
+            return None
+        return self.parse_dom_table(tables[-1])
+
+    async def extract_response(self, step_number=None):
+        """提取 AI 的响应内容（步骤23返回SRT，步骤25返回表格数据，其余返回文本）"""
+        try:
+            element = await self._last_response_element()
+            if element is None:
+                logger.warning(f"[{self.name}] ⚠️ 未找到任何AI响应元素")
+                return ""
+
+            if step_number == 23:
+                srt_blocks = [b for b in await self.extract_code_blocks(element)
+                              if '-->' in b and SRT_PATTERN.search(b)]
+                if srt_blocks:
+                    return srt_blocks if len(srt_blocks) > 1 else srt_blocks[0]
+
+            if step_number == 25:
+                blocks = await self.extract_code_blocks(element)
+                if blocks:
+                    table_data = self.parse_csv_content(blocks if len(blocks) > 1 else blocks[0])
+                    if table_data:
+                        return table_data
+                table_data = await self.extract_table_from_dom(element)
+                if table_data:
+                    return table_data
+
+            return await element.inner_text()
+
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ 提取响应失败: {e}")
+            return ""
+
+    async def _reload(self):
+        """刷新页面，开始新的对话"""
+        try:
+            await self.page.reload(wait_until="networkidle", timeout=60000)
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ 刷新页面失败: {e}")
+
+    async def process_single_video(self, video_info):
+        """处理单个视频的完整流程
+
+        与同步版步骤一致，但无人值守：上传失败/弹窗时刷新重试
+        （最多 MAX_RETRIES 次），速率限制返回 "rate_limit"，其他错误返回 False。
+        """
+        video_name = video_info["filename"]
+        video_path = self.videos_folder / video_name
+        self.last_blocked_time = 0
+
+        logger.info(f"[{self.name}] 🎬 开始处理视频: {video_name}")
+
+        # 1-2. 渲染这个视频的提示词（内存中替换占位符，不改写 prompts.xlsx）
+        prompts = self.get_prompts_list(video_info)
+        if not prompts:
+            return False
+
+        # 3. 上传视频并发送步骤1
+        for attempt in range(1, config.MAX_RETRIES + 1):
+            upload_result = await self.upload_video(video_path)
+            if upload_result == "popup_closed_need_refresh" or not upload_result:
+                logger.warning(f"[{self.name}] 🔄 上传未完成，刷新后重试（第 {attempt} 次）")
+                await self._reload()
+                continue
+
+            send_result = await self.send_prompt(prompts[0], step_number=1)
+            if send_result == "upload_failed" or not send_result:
+                logger.warning(f"[{self.name}] 🔄 步骤1发送失败，刷新后重试（第 {attempt} 次）")
+                await self._reload()
+                continue
+            break
+        else:
+            logger.error(f"[{self.name}] ❌ 视频 {video_name} 上传/发送步骤1失败")
+            return False
+
+        response_result = await self.wait_for_response(step_number=1)
+        if response_result:
+            return response_result if response_result == "rate_limit" else False
+
+        # 4. 逐步发送剩余提示词（步骤2-25）
+        step_outputs = {}
+        for i, prompt in enumerate(prompts, start=1):
+            if i == 1:
+                continue
+
+            prev_step = i - 1
+            if prev_step in config.SAVE_STEPS:
+                step_outputs[prev_step] = await self.extract_response(step_number=prev_step)
+                logger.info(f"[{self.name}] 💾 已捕获步骤 {prev_step} 的输出")
+
+            if not await self.send_prompt(prompt, step_number=i):
+                logger.error(f"[{self.name}] ❌ 步骤 {i} 发送失败")
+                return False
+
+            response_result = await self.wait_for_response(step_number=i)
+            if response_result:
+                return response_result if response_result == "rate_limit" else False
+
+        last_step = len(prompts)
+        if last_step in config.SAVE_STEPS and last_step not in step_outputs:
+            step_outputs[last_step] = await self.extract_response(step_number=last_step)
+            logger.info(f"[{self.name}] 💾 已捕获步骤 {last_step} 的输出")
+
+        # 5. 保存输出数据（启用流水线时立即提交后台后期处理）
+        # 表格写入、剪辑表合并和视频哈希都是阻塞 I/O，放到线程中执行，不阻塞其他对话
+        output_folder = await asyncio.to_thread(self.save_output_data, video_name, step_outputs)
+        if self.postprocess:
+            await asyncio.to_thread(self.postprocess.submit, video_name, output_folder)
+        if self.ledger:
+            await asyncio.to_thread(self.complete_in_ledger, video_name, prompts)
+        logger.info(f"[{self.name}] ✅ 视频 {video_name} 处理完成")
+        return True
+
+    def complete_in_ledger(self, video_name, prompts):
+        """在处理记录中标记视频已完成（下次运行时跳过）"""
+        try:
+            video_hash = self.ledger.video_hash(self.videos_folder / video_name)
+            self.ledger.start_video(video_hash, video_name)
+            self.ledger.complete_video(video_hash, prompt_prefix_hashes(prompts)[-1] if prompts else None)
+        except Exception as e:
+            logger.debug(f"记录处理进度失败: {e}")
+
+
+class AsyncBatchRunner:
+    """在一个事件循环中并发处理多个视频
+
+    所有对话共享一个浏览器上下文（使用 .browser_session/state.json 会话），
+    每个对话占用一个标签页，从队列中领取视频。
+    """
+
+    def __init__(self, concurrency=None, headless=None):
+        self.concurrency = concurrency or config.ASYNC_CONCURRENCY
+        self.headless = config.HEADLESS if headless is None else headless
+        # 协调者：只负责加载视频列表、合并数据和最终处理，不启动浏览器
+        self.coordinator = VideoProcessor()
+        self.results = []  # (filename, result, elapsed)
+
+    async def _worker(self, context, worker_id, video_queue):
+        processor = AsyncVideoProcessor(context, worker_id=worker_id)
+        processor.postprocess = self.coordinator.postprocess
+        processor.ledger = self.coordinator.ledger
+        await processor.open_page()
+        try:
+            if not await processor.open_ai_studio():
+                return
+
+            while True:
+                try:
+                    video_info = video_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+
+                start_time = time.time()
+                try:
+                    result = await processor.process_single_video(video_info)
+                except Exception as e:
+                    logger.error(f"[{processor.name}] ❌ 处理 {video_info['filename']} 出错: {e}")
+                    result = False
+
+                if result == "rate_limit":
+                    # 视频放回队列，由其他对话继续处理；所有对话都停止时作为未处理视频报告
+                    video_queue.put_nowait(video_info)
+                    logger.warning(f"[{processor.name}] ⚠️ 达到速率限制，{video_info['filename']} 放回队列，该对话停止领取视频")
+                    break
+                self.results.append((video_info["filename"], result, time.time() - start_time))
+
+                # 每个视频使用新的对话
+                await processor._reload()
+        finally:
+            await processor.close()
+
+    async def run(self):
+        """并发处理 VideoList.csv 中的所有视频"""
+        videos = self.coordinator.load_video_list()
+        if not videos:
+            logger.error("❌ 没有找到待处理的视频")
+            return False
+
+        # 跳过处理记录中已完成的视频
+        videos = self.coordinator.skip_completed_videos(videos)
+        if not videos:
+            logger.info("✅ 所有视频都已处理完成")
+            return True
+
+        video_queue = asyncio.Queue()
+        for video_info in videos:
+            video_queue.put_nowait(video_info)
+
+        # 后期处理流水线：每个视频保存输出后立即在后台处理
+        if config.POSTPROCESS_PIPELINE_ENABLED:
+            from postprocess_pool import PostProcessPool
+            self.coordinator.postprocess = PostProcessPool()
+
+        concurrency = min(self.concurrency, len(videos))
+        logger.info(f"🚀 异步模式: {concurrency} 个对话处理 {len(videos)} 个视频")
+
+        batch_start = time.time()
+        state_file = config.BASE_DIR / ".browser_session" / "state.json"
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=self.headless)
+            context = await browser.new_context(
+                viewport=None,
+                storage_state=str(state_file) if state_file.exists() else None,
+            )
+            try:
+                await asyncio.gather(*[
+                    self._worker(context, worker_id, video_queue)
+                    for worker_id in range(1, concurrency + 1)
+                ])
+            finally:
+                await browser.close()
+        batch_elapsed = time.time() - batch_start
+
+        try:
+            self.coordinator.merge_all_excel_files()
+        except Exception as e:
+            logger.error(f"❌ 合并数据失败: {e}")
+        try:
+            self.coordinator.finish_postprocess()
+        except Exception as e:
+            logger.error(f"❌ 最终处理失败: {e}")
+
+        success = [r for r in self.results if r[1] is True]
+        failed = [r[0] for r in self.results if r[1] is not True]
+        logger.info(f"✅ 成功处理: {len(success)}/{len(videos)} 个视频")
+        if failed:
+            logger.warning(f"❌ 失败视频: {', '.join(failed)}")
+        if not video_queue.empty():
+            logger.warning(f"⚠️ 达到速率限制未处理视频: {video_queue.qsize()} 个")
+        if batch_elapsed > 0:
+            logger.info(f"⏱️ 总用时 {int(batch_elapsed)} 秒，吞吐量 {len(success) * 3600 / batch_elapsed:.2f} 个视频/小时")
+        return True
+
+
+def main():
+    """主函数"""
+    asyncio.run(AsyncBatchRunner().run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式输出存储（Parquet / Feather）
+- 每个步骤的表格保存为 step_N_output.parquet（或 .feather），Excel 只作为可选的查看副本
+- 合并数据保存为按视频分区的数据集：<CLIPS_DATASET_DIR>/<视频>.parquet，
+  只重写输出有变化的视频分区；clips.xlsx 作为可选的最终视图
+读取时优先使用列式文件，旧的 step_N_output.xlsx 仍然可以读取。
+
+需要 pyarrow；没有安装时自动回退到 Excel。
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SUFFIXES = {"parquet": ".parquet", "feather": ".feather"}
+TABLE_SUFFIXES = (".parquet", ".feather", ".xlsx")
+MANIFEST_NAME = "_manifest.json"
+
+
+def columnar_available():
+    """是否可以使用列式格式（需要 pyarrow）"""
+    try:
+        import pyarrow  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def output_format():
+    """步骤输出使用的格式：parquet / feather / xlsx"""
+    fmt = str(config.STEP_OUTPUT_FORMAT).lower()
+    if fmt in COLUMNAR_SUFFIXES and not columnar_available():
+        logger.warning("⚠️ 未安装 pyarrow，步骤输出改用 Excel")
+        return "xlsx"
+    return fmt if fmt in COLUMNAR_SUFFIXES else "xlsx"
+
+
+def normalize_for_arrow(df):
+    """列名转成字符串，混合类型的对象列（如同时有数字和文本）转成文本，避免 Arrow 类型推断失败"""
+    df = df.copy()
+    df.columns = [str(column) for column in df.columns]
+    for column in df.columns:
+        if df[column].dtype == object:
+            values = df[column].dropna()
+            if values.map(type).nunique() > 1:
+                df[column] = df[column].map(lambda v: v if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+    return df
+
+
+def write_table(df, path):
+    """按扩展名写入表格（写临时文件再替换）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name("~tmp_" + path.name)
+    if path.suffix == ".parquet":
+        normalize_for_arrow(df).to_parquet(tmp_path, index=False)
+    elif path.suffix == ".feather":
+        normalize_for_arrow(df).reset_index(drop=True).to_feather(tmp_path)
+    else:
+        df.to_excel(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path):
+    """按扩展名读取表格"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    if path.suffix == ".feather":
+        return pd.read_feather(path)
+    return pd.read_excel(path)
+
+
+def is_temp_file(path):
+    """Excel 的临时/锁文件（以 .~ 或 ~$ 开头）以及写入中的临时文件"""
+    return path.name.startswith((".~", "~$", "~tmp_"))
+
+
+def find_step_tables(folder):
+    """目录中的步骤表格，同名的列式文件优先于 .xlsx（按文件名排序）"""
+    tables = {}
+    for suffix in reversed(TABLE_SUFFIXES):
+        for path in Path(folder).glob(f"*{suffix}"):
+            if not is_temp_file(path):
+                tables[path.stem] = path
+    return [tables[stem] for stem in sorted(tables)]
+
+
+def step_table_path(folder, step):
+    """步骤 N 的表格文件（不存在时返回 None）"""
+    for suffix in TABLE_SUFFIXES:
+        path = Path(folder) / f"step_{step}_output{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def save_step_table(df, output_folder, step):
+    """保存步骤表格：主文件使用 STEP_OUTPUT_FORMAT，STEP_EXCEL_EXPORT 时另存一份 .xlsx，返回主文件路径"""
+    fmt = output_format()
+    main_path = Path(output_folder) / f"step_{step}_output{COLUMNAR_SUFFIXES.get(fmt, '.xlsx')}"
+    write_table(df, main_path)
+    excel_copy = fmt != "xlsx" and config.STEP_EXCEL_EXPORT
+    if excel_copy:
+        write_table(df, main_path.with_suffix(".xlsx"))
+    for suffix in TABLE_SUFFIXES:
+        # 其他格式的旧输出会和新文件不一致（读取时列式文件优先），删除
+        path = main_path.with_suffix(suffix)
+        if path != main_path and not (excel_copy and suffix == ".xlsx"):
+            path.unlink(missing_ok=True)
+    return main_path
+
+
+def _signature(paths):
+    return {path.name: [path.stat().st_size, path.stat().st_mtime] for path in paths}
+
+
+class ClipsDataset:
+    """按视频分区的合并数据集
+
+    每个视频一个分区文件（<视频目录名>.parquet），分区清单记录其来源文件的大小和修改时间，
+    update() 只重写来源有变化的分区。
+    """
+
+    def __init__(self, dataset_dir=None):
+        self.dataset_dir = Path(dataset_dir or config.CLIPS_DATASET_DIR)
+        self.manifest_file = self.dataset_dir / MANIFEST_NAME
+
+    def _load_manifest(self):
+        try:
+            return json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def _save_manifest(self, manifest):
+        tmp_file = self.manifest_file.with_name("~tmp_" + MANIFEST_NAME)
+        tmp_file.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_file, self.manifest_file)
+
+    def partition_path(self, video):
+        return self.dataset_dir / f"{video}.parquet"
+
+    def update(self, process_folder, full_rebuild=False):
+        """根据 Process_Folder 中的步骤输出更新数据集，返回总行数"""
+        start = time.time()
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {} if full_rebuild else self._load_manifest()
+        videos = {
+            folder.name: find_step_tables(folder)
+            for folder in sorted(Path(process_folder).iterdir())
+            if folder.is_dir() and folder.name != "videos"
+        }
+
+        rewritten = 0
+        for video, tables in videos.items():
+            signature = _signature(tables)
+            entry = manifest.get(video)
+            if entry and entry["sources"] == signature and self.partition_path(video).exists():
+                continue
+            frames = []
+            for path in tables:
+                try:
+                    frames.append(read_table(path))
+                except Exception as e:
+                    logger.warning(f"  ❌ 读取失败 {video}/{path.name}: {e}")
+            frames = [df for df in frames if not df.empty]
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
+                write_table(df, self.partition_path(video))
+                manifest[video] = {"sources": signature, "rows": len(df)}
+            else:
+                self.partition_path(video).unlink(missing_ok=True)
+                manifest[video] = {"sources": signature, "rows": 0}
+            rewritten += 1
+
+        for video in [v for v in manifest if v not in videos]:
+            self.partition_path(video).unlink(missing_ok=True)
+            del manifest[video]
+            rewritten += 1
+
+        self._save_manifest(manifest)
+        total = sum(entry["rows"] for entry in manifest.values())
+        logger.info(
+            f"✅ 合并数据集: {self.dataset_dir}（{len(manifest)} 个视频，{total} 行，"
+            f"重写 {rewritten} 个分区，用时 {time.time() - start:.1f} 秒）"
+        )
+        return total
+
+    def read(self):
+        """读取整个数据集（按分区名排序）"""
+        return read_clips_dataset(self.dataset_dir)
+
+
+def read_clips_dataset(dataset_dir):
+    """读取按视频分区的合并数据集，没有分区时返回 None"""
+    partitions = sorted(Path(dataset_dir).glob("*.parquet"))
+    partitions = [path for path in partitions if not is_temp_file(path)]
+    if not partitions:
+        return None
+    return pd.concat([pd.read_parquet(path) for path in partitions], ignore_index=True)
@@ -36,7 +36,19 @@ class Config:
     WAIT_BETWEEN_VIDEOS = 5 # 视频之间的休息时间（秒）
     WAIT_BUTTON_ENABLED = 300  # 等待按钮可用的最大时间（秒）- 5分钟，适应慢速网络
     CONTENT_BLOCKED_COOLDOWN = 60  # Content blocked 处理冷却时间（秒）
+    RESPONSE_QUIET_WINDOW = 1.5  # 响应稳定判定：最后一个模型回复连续无 DOM 变化的时长（秒）
+    RESPONSE_QUIET_WINDOW_TABLE = 3  # 步骤25（表格）的静默窗口（秒），同时要求表格行数不变
+    RESPONSE_SETTLE_MAX = 15  # 等待响应稳定的上限（秒）
     
+    # ==================== 内容提取配置 ====================
+    # 复制按钮内容的获取方式：
+    #   "direct"    - 直接读取代码块文本（推荐，不点击按钮，无头模式可用）
+    #   "hook"      - 拦截 navigator.clipboard.writeText，一次点击所有复制按钮
+    #   "clipboard" - 逐个点击复制按钮并读取系统剪贴板（旧方式，需要剪贴板权限）
+    COPY_CAPTURE_MODE = "direct"
+    RESPONSE_CAPTURE_ENABLED = False  # 是否从网络响应中直接获取模型回复（失败时仍回退到页面提取）
+    RESPONSE_CAPTURE_URL_PATTERNS = ["GenerateContent", "generateContent"]  # 生成接口 URL 特征
+
     # ==================== 页面选择器配置 ====================
     # 这些选择器可能需要根据实际页面调整
     SELECTORS = {
@@ -57,6 +69,11 @@ class Config:
         'ai_response': '[data-message-author-role="model"]',
         'response_container': '.response-content',
         
+        # 对话轮次（截断对话时删除指定步骤之后的轮次）
+        'chat_turn': 'ms-chat-turn',
+        'turn_options_button': 'button[aria-label="Open options"]',
+        'turn_delete_menuitem': 'button[role="menuitem"]:has-text("Delete")',
+
         # 错误提示
         'content_blocked': 'text="Content blocked"',
         'error_message': '.error-message',
@@ -66,6 +83,66 @@ class Config:
         'processing': 'text="Processing"',
     }
     
+    # ==================== 并发配置 ====================
+    WORKER_COUNT = 1  # 并发工作者数量（>1 时启用多工作者模式，每个工作者独立浏览器页面）
+    WORKER_START_INTERVAL = 10  # 工作者之间的启动间隔（秒），避免同时登录/上传
+    ASYNC_CONCURRENCY = 3  # 异步模式（async_video_automation.py）同时进行的对话数量
+
+    # ==================== 账号池配置 ====================
+    ACCOUNT_POOL_ENABLED = False  # 是否启用账号池（每个账号独立浏览器上下文，速率限制时改派其他账号）
+    ACCOUNT_STATE_DIR = BASE_DIR / ".browser_session" / "accounts"  # 每个账号一个 storage_state 文件（<邮箱>.json）
+    ACCOUNT_POOL_FILE = BASE_DIR / ".browser_session" / "account_pool.json"  # 用量计数和冷却时间（重启后保留）
+    ACCOUNT_DAILY_QUOTA = 20  # 每个账号每天最多处理的视频数
+    ACCOUNT_COOLDOWN = 3600  # 账号遇到速率限制后的冷却时间（秒）
+
+    # ==================== 预上传配置 ====================
+    PREFETCH_ENABLED = False  # 处理当前视频的后几个步骤时，在影子标签页中打开新对话并预先上传下一个视频
+    PREFETCH_START_STEP = 20  # 从该步骤开始预上传（步骤 20-25 期间完成上传）
+
+    # ==================== 上传代理配置 ====================
+    UPLOAD_PROXY_ENABLED = False  # 上传前用 ffmpeg 转成低码率代理文件（时间码不变）
+    UPLOAD_PROXY_DIR = PROCESS_FOLDER / ".proxy_cache"  # 代理文件缓存目录（按内容哈希 + 转码参数）
+    UPLOAD_PROXY_PROFILE = {
+        'height': 360,  # 最大高度（只缩小不放大）
+        'crf': 32,  # x264 质量（越大码率越低）
+        'preset': 'veryfast',
+        'audio_bitrate': '48k',  # 单声道音频码率
+    }
+    UPLOAD_PROXY_WORKERS = 2  # 同时转码的进程数
+    UPLOAD_PROXY_TIMEOUT = 1800  # 等待单个视频转码的最长时间（秒）
+    FFMPEG_BINARY = "ffmpeg"  # ffmpeg 命令（找不到时使用 imageio-ffmpeg 自带的版本）
+
+    # ==================== 上传检测配置 ====================
+    UPLOAD_TRACKING_ENABLED = True  # 通过网络请求判断上传完成（服务端确认即完成，按分片报告进度）
+    UPLOAD_URL_PATTERNS = ["upload"]  # 上传请求 URL 特征（POST/PUT）
+    UPLOAD_SIGNAL_GRACE = 15  # 选择文件后多久没有上传请求就回退到页面元素检测（秒）
+    UPLOAD_COMMIT_TIMEOUT = 1800  # 等待服务端确认上传的最长时间（秒）
+
+    # ==================== 断点续传配置 ====================
+    LEDGER_ENABLED = True  # 记录每个视频的步骤进度和输出（重启后跳过已完成的视频、从中断的步骤继续）
+    LEDGER_FILE = PROCESS_FOLDER / "ledger.sqlite3"  # 处理记录（SQLite，按视频内容哈希）
+
+    # ==================== 输出存储配置 ====================
+    STEP_OUTPUT_FORMAT = "parquet"  # 步骤表格的保存格式："parquet" / "feather" / "xlsx"（列式格式需要 pyarrow）
+    STEP_EXCEL_EXPORT = False  # 列式格式之外是否另存一份 step_N_output.xlsx（方便用 Excel 查看）
+    CLIPS_DATASET_DIR = OUTPUT_FOLDER / "clips_dataset"  # 合并数据集（每个视频一个 .parquet 分区）
+    CLIPS_EXCEL_EXPORT = False  # 是否同时生成 clips.xlsx（最终查看用；未安装 pyarrow 时总是生成）
+
+    # ==================== 后期处理配置 ====================
+    POSTPROCESS_PIPELINE_ENABLED = False  # 每个视频保存输出后立即在后台运行 process_video.py（与下一个视频的 AI 对话并行）
+    POSTPROCESS_WORKERS = 2  # 同时运行的后期处理任务数（每个任务是一个子进程）
+    POSTPROCESS_DIR = OUTPUT_FOLDER / "postprocess"  # 每个视频的剪辑表和处理日志
+    POSTPROCESS_TIMEOUT = 3600  # 单个视频后期处理的超时时间（秒）
+
+    # ==================== 合并配置 ====================
+    MERGE_FULL_REBUILD = False  # True=每次都重新读取所有输出并重写合并数据集（默认只重写输出有变化的视频）
+
+    # ==================== 回复缓存配置 ====================
+    RESPONSE_CACHE_ENABLED = True  # 按 视频哈希 + 提示词链前缀 缓存每个步骤的回复，重跑时跳过未变化的步骤
+    RESPONSE_CACHE_FILE = PROCESS_FOLDER / "response_cache.sqlite3"
+    RESPONSE_CACHE_MAX_MB = 500  # 缓存总大小上限（超出时按最近使用时间淘汰）
+    RESPONSE_CACHE_MAX_AGE_DAYS = 30  # 超过该天数未使用的条目被删除
+
     # ==================== Excel 配置 ====================
     # prompts.xlsx 中的列名
     EXCEL_COLUMNS = {
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出 clips.xlsx（全量）
+增量合并由按视频分区的合并数据集（columnar_store.ClipsDataset）完成，clips.xlsx 只用于查看，
+每次导出都全量重写：
+- 有合并数据集时直接读取各视频的分区（只读 parquet，不再读取每个步骤输出）
+- 未安装 pyarrow 时读取 Process_Folder/<视频>/ 中的所有步骤输出（.xlsx）
+
+命令行：python excel_merge.py [--full]
+先增量更新合并数据集（--full 时全部重建），再导出 clips.xlsx。
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from columnar_store import ClipsDataset, columnar_available, find_step_tables, read_clips_dataset, read_table
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_source_files(process_folder):
+    """所有需要合并的源文件（按目录名、文件名排序，同名的列式文件优先于 .xlsx）"""
+    sources = []
+    for folder in sorted(Path(process_folder).iterdir()):
+        if folder.is_dir() and folder.name != "videos":
+            sources.extend(find_step_tables(folder))
+    return sources
+
+
+def read_source_files(process_folder):
+    """读取所有步骤输出并合并，没有可合并的数据时返回 None"""
+    frames = []
+    for path in find_source_files(process_folder):
+        try:
+            frames.append(read_table(path))
+            logger.info(f"  ✅ 读取: {path.name}")
+        except Exception as e:
+            logger.warning(f"  ❌ 读取失败 {path.name}: {e}")
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_clips_excel(process_folder=None, clips_file=None, dataset_dir=None):
+    """全量导出 clips.xlsx，返回数据行数（没有可合并的数据时返回 0）
+
+    Args:
+        dataset_dir: 已更新的合并数据集目录；为 None 时读取 Process_Folder 中的所有步骤输出
+    """
+    start = time.time()
+    process_folder = Path(process_folder or config.PROCESS_FOLDER)
+    clips_file = Path(clips_file or config.CLIPS_FILE)
+
+    if dataset_dir is not None:
+        merged_df = read_clips_dataset(dataset_dir)
+    else:
+        logger.info("📊 读取所有步骤输出...")
+        merged_df = read_source_files(process_folder)
+    if merged_df is None:
+        logger.warning("❌ 没有找到可合并的文件")
+        return 0
+
+    # 先写临时文件再替换，中断的写入不会破坏 clips.xlsx
+    clips_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = clips_file.with_name("~tmp_" + clips_file.name)
+    merged_df.to_excel(tmp_file, index=False)
+    os.replace(tmp_file, clips_file)
+    logger.info(f"✅ 导出完成，保存到: {clips_file}")
+    logger.info(f"📊 合并数据: {len(merged_df)} 行 x {len(merged_df.columns)} 列（用时 {time.time() - start:.1f} 秒）")
+    return len(merged_df)
+
+
+def main():
+    """命令行：python excel_merge.py [--full]"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    full_rebuild = "--full" in sys.argv[1:] or config.MERGE_FULL_REBUILD
+    dataset_dir = None
+    if columnar_available():
+        dataset_dir = config.CLIPS_DATASET_DIR
+        ClipsDataset(dataset_dir).update(config.PROCESS_FOLDER, full_rebuild=full_rebuild)
+    export_clips_excel(dataset_dir=dataset_dir)
+
+
+if __name__ == "__main__":
+    main()
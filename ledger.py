@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续传记录（SQLite）
+按视频内容哈希记录每个视频的处理状态、每个步骤的状态/用时/账号，
+以及 SAVE_STEPS 步骤捕获的输出。重启后：
+- run_batch 跳过已完成的视频
+- process_single_video 打开记录的对话地址，从最后完成的步骤之后继续
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import config
+from upload_proxy import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    video_hash TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,          -- running / completed
+    last_step INTEGER NOT NULL DEFAULT 0,
+    chat_url TEXT,
+    account TEXT,
+    chain_hash TEXT,               -- 完成时使用的提示词链哈希
+    started_at REAL,
+    updated_at REAL,
+    completed_at REAL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    video_hash TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    status TEXT NOT NULL,          -- completed
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    account TEXT,
+    prefix_hash TEXT,              -- 到该步骤为止的提示词链哈希
+    output TEXT,                   -- SAVE_STEPS 的输出（JSON）
+    PRIMARY KEY (video_hash, step)
+);
+"""
+
+
+class Ledger:
+    """处理进度记录（线程安全，多个工作者可以共用一个实例或各自打开同一个文件）"""
+
+    def __init__(self, db_file=None):
+        self.db_file = Path(db_file or config.LEDGER_FILE)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self.lock, self.conn:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ==================== 视频哈希 ====================
+
+    def video_hash(self, path):
+        """视频内容哈希（路径、大小、修改时间不变时直接读取记录）"""
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        rows = self._execute("SELECT size, mtime, sha256 FROM file_hashes WHERE path = ?", (key,))
+        if rows and rows[0]["size"] == stat.st_size and rows[0]["mtime"] == stat.st_mtime:
+            return rows[0]["sha256"]
+
+        digest = file_content_hash(path)
+        self._execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+            (key, stat.st_size, stat.st_mtime, digest),
+        )
+        return digest
+
+    # ==================== 视频状态 ====================
+
+    def start_video(self, video_hash, filename, reset=False):
+        """开始处理视频（reset=True 表示从步骤 1 重新开始，清除之前的步骤记录）"""
+        now = time.time()
+        with self.lock, self.conn:
+            if reset:
+                self.conn.execute("DELETE FROM steps WHERE video_hash = ?", (video_hash,))
+            self.conn.execute(
+                """
+                INSERT INTO videos (video_hash, filename, status, last_step, started_at, updated_at)
+                VALUES (?, ?, 'running', 0, ?, ?)
+                ON CONFLICT(video_hash) DO UPDATE SET
+                    filename = excluded.filename,
+                    status = 'running',
+                    last_step = CASE WHEN ? THEN 0 ELSE last_step END,
+                    chat_url = CASE WHEN ? THEN NULL ELSE chat_url END,
+                    updated_at = excluded.updated_at
+                """,
+                (video_hash, filename, now, now, reset, reset),
+            )
+
+    def is_completed(self, video_hash, chain_hash=None):
+        """视频是否已完成（给出 chain_hash 时还要求完成时使用的是同一条提示词链）"""
+        rows = self._execute("SELECT status, chain_hash FROM videos WHERE video_hash = ?", (video_hash,))
+        if not rows or rows[0]["status"] != "completed":
+            return False
+        return chain_hash is None or rows[0]["chain_hash"] in (None, chain_hash)
+
+    def resume_point(self, video_hash):
+        """可恢复的位置：{"last_step", "chat_url", "account", "prefix_hash"}，没有记录时返回 None
+
+        prefix_hash 是最后完成的步骤使用的提示词链哈希（没有记录时为 None）。
+        """
+        rows = self._execute(
+            """
+            SELECT v.last_step, v.chat_url, v.account, v.status,
+                   (SELECT s.prefix_hash FROM steps s WHERE s.video_hash = v.video_hash AND s.step = v.last_step)
+                       AS prefix_hash
+            FROM videos v WHERE v.video_hash = ?
+            """,
+            (video_hash,),
+        )
+        if not rows or rows[0]["status"] == "completed":
+            return None
+        return {
+            "last_step": rows[0]["last_step"],
+            "chat_url": rows[0]["chat_url"],
+            "account": rows[0]["account"],
+            "prefix_hash": rows[0]["prefix_hash"],
+        }
+
+    def complete_video(self, video_hash, chain_hash=None):
+        now = time.time()
+        self._execute(
+            """
+            UPDATE videos SET status = 'completed', chain_hash = ?, completed_at = ?, updated_at = ?
+            WHERE video_hash = ?
+            """,
+            (chain_hash, now, now, video_hash),
+        )
+
+    def reset_video(self, filename):
+        """清除视频的记录（下次从头处理），返回清除的数量"""
+        with self.lock, self.conn:
+            hashes = [row[0] for row in self.conn.execute("SELECT video_hash FROM videos WHERE filename = ?", (filename,))]
+            for video_hash in hashes:
+                self.conn.execute("DELETE FROM steps WHERE video_hash = ?", (video_hash,))
+                self.conn.execute("DELETE FROM videos WHERE video_hash = ?", (video_hash,))
+        return len(hashes)
+
+    # ==================== 步骤 ====================
+
+    def finish_step(self, video_hash, step, started_at=None, account=None, chat_url=None, prefix_hash=None):
+        """步骤完成（模型已回复），prefix_hash 为到该步骤为止的提示词链哈希"""
+        now = time.time()
+        started_at = started_at or now
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO steps (video_hash, step, status, started_at, finished_at, duration, account, prefix_hash)
+                VALUES (?, ?, 'completed', ?, ?, ?, ?, ?)
+                ON CONFLICT(video_hash, step) DO UPDATE SET
+                    status = 'completed',
+                    started_at = excluded.started_at,
+                    finished_at = excluded.finished_at,
+                    duration = excluded.duration,
+                    account = excluded.account,
+                    prefix_hash = excluded.prefix_hash
+                """,
+                (video_hash, step, started_at, now, now - started_at, account, prefix_hash),
+            )
+            self.conn.execute(
+                """
+                UPDATE videos SET
+                    last_step = MAX(last_step, ?),
+                    chat_url = COALESCE(?, chat_url),
+                    account = COALESCE(?, account),
+                    updated_at = ?
+                WHERE video_hash = ?
+                """,
+                (step, chat_url, account, now, video_hash),
+            )
+
+    def save_output(self, video_hash, step, output):
+        """保存步骤的输出（表格行、SRT 内容等，JSON 序列化）"""
+        data = json.dumps(output, ensure_ascii=False, default=str)
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO steps (video_hash, step, status, output) VALUES (?, ?, 'completed', ?)
+                ON CONFLICT(video_hash, step) DO UPDATE SET output = excluded.output
+                """,
+                (video_hash, step, data),
+            )
+
+    def step_outputs(self, video_hash):
+        """已保存的步骤输出 {步骤: 输出}"""
+        rows = self._execute(
+            "SELECT step, output FROM steps WHERE video_hash = ? AND output IS NOT NULL", (video_hash,)
+        )
+        return {row["step"]: json.loads(row["output"]) for row in rows}
+
+    # ==================== 统计 ====================
+
+    def log_status(self):
+        """输出所有视频的处理状态"""
+        rows = self._execute(
+            """
+            SELECT v.filename, v.status, v.last_step, v.account,
+                   (SELECT SUM(duration) FROM steps s WHERE s.video_hash = v.video_hash) AS seconds
+            FROM videos v ORDER BY v.updated_at
+            """
+        )
+        logger.info(f"📒 处理记录: {self.db_file}")
+        if not rows:
+            logger.info("  （空）")
+        for row in rows:
+            status = "✅ 完成" if row["status"] == "completed" else f"⏸️ 进行到步骤 {row['last_step']}"
+            logger.info(
+                f"  {row['filename']}: {status}，模型用时 {int(row['seconds'] or 0)} 秒"
+                + (f"，账号 {row['account']}" if row["account"] else "")
+            )
+
+
+def main():
+    """命令行：python ledger.py status / python ledger.py reset <文件名>"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ledger = Ledger()
+    if len(sys.argv) >= 3 and sys.argv[1] == "reset":
+        count = ledger.reset_video(sys.argv[2])
+        logger.info(f"✅ 已清除 {sys.argv[2]} 的 {count} 条记录")
+    else:
+        ledger.log_status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""本地 AI Studio 模拟服务（离线测试和吞吐量基准）"""
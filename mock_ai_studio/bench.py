@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端吞吐量基准
+启动本地模拟服务，把 config.AI_STUDIO_URL 指向它，在临时工作目录中
+用 VideoProcessor.process_single_video 跑完整的 25 步流程，输出 视频/小时。
+
+运行: python -m mock_ai_studio.bench [--videos 3] [--latency 0.5] [--video-size 5000000] [--prefetch]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import config  # noqa: E402
+from mock_ai_studio.server import MockSettings, start_server  # noqa: E402
+
+
+def prepare_workdir(workdir, video_count, video_size):
+    """创建临时的 Process_Folder：提示词文件副本 + 占位视频"""
+    process_folder = workdir / "Process_Folder"
+    videos_folder = process_folder / "videos"
+    videos_folder.mkdir(parents=True)
+    shutil.copy(config.PROMPTS_FILE, process_folder / "prompts.xlsx")
+
+    rows = ["Filename,line1,line2,Duration"]
+    videos = []
+    for i in range(1, video_count + 1):
+        filename = f"bench_{i:03d}.mp4"
+        with open(videos_folder / filename, "wb") as f:
+            # 每个视频内容不同（处理记录按内容哈希区分视频）
+            header = f"bench video {i}\n".encode("utf-8")
+            f.write(header + b"\0" * max(0, video_size - len(header)))
+        rows.append(f"{filename},第一行 {i},第二行 {i},00:10:00")
+        videos.append({"filename": filename, "duration": "00:10:00", "line1": f"第一行 {i}", "line2": f"第二行 {i}"})
+    (videos_folder / "VideoList.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return process_folder, videos
+
+
+def run_benchmark(video_count=3, video_size=5_000_000, settings=None, headless=True, prefetch=False):
+    """运行基准，返回统计信息字典"""
+    server = start_server(settings or MockSettings())
+    config.AI_STUDIO_URL = server.url
+    config.PREFETCH_ENABLED = prefetch
+    config.WAIT_USER_CONFIRMATION = False
+    config.HEADLESS = headless
+    config.USE_SYSTEM_CHROME = False
+
+    # 配置修改之后再导入（日志配置和默认值在导入时读取）
+    from video_automation import VideoProcessor, logger
+
+    workdir = Path(tempfile.mkdtemp(prefix="mock_ai_studio_"))
+    process_folder, videos = prepare_workdir(workdir, video_count, video_size)
+    config.LEDGER_FILE = process_folder / "ledger.sqlite3"
+    config.RESPONSE_CACHE_FILE = process_folder / "response_cache.sqlite3"
+
+    processor = VideoProcessor(worker_id=0)  # 工作者模式：出错时不等待终端输入
+    processor.ai_studio_url = server.url
+    processor.process_folder = process_folder
+    processor.videos_folder = process_folder / "videos"
+    processor.prompts_file = process_folder / "prompts.xlsx"
+    processor.video_list_file = process_folder / "videos" / "VideoList.csv"
+
+    timings = []
+    try:
+        processor.init_browser(headless=headless, use_system_chrome=False)
+        if not processor.open_ai_studio():
+            raise RuntimeError("打开模拟页面失败")
+
+        for i, video_info in enumerate(videos, start=1):
+            processor.next_video_info = videos[i] if i < len(videos) else None
+            # 每个视频使用新的对话（重新加载页面即清空对话；预上传的标签页本身就是新对话）
+            if not processor.prefetch:
+                processor.page.goto(server.url, wait_until="domcontentloaded")
+            started = time.time()
+            result = processor.process_single_video(video_info)
+            elapsed = time.time() - started
+            timings.append((video_info["filename"], result is True, elapsed))
+            logger.info(f"⏱️ {video_info['filename']}: {'成功' if result is True else '失败'}，耗时 {elapsed:.1f} 秒")
+    finally:
+        processor.close_browser()
+        server.shutdown()
+
+    succeeded = [t for t in timings if t[1]]
+    total = sum(t[2] for t in timings)
+    stats = {
+        "prefetch": prefetch,
+        "videos": len(timings),
+        "succeeded": len(succeeded),
+        "total_seconds": total,
+        "seconds_per_video": total / len(timings) if timings else 0,
+        "videos_per_hour": len(succeeded) * 3600 / total if total else 0,
+        "server": dict(server.stats),
+        "workdir": str(workdir),
+    }
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟 AI Studio 端到端吞吐量基准")
+    parser.add_argument("--videos", type=int, default=3, help="视频数量")
+    parser.add_argument("--video-size", type=int, default=5_000_000, help="占位视频大小（字节）")
+    parser.add_argument("--latency", type=float, default=0.5, help="首个片段之前的延迟（秒）")
+    parser.add_argument("--chunk-interval", type=float, default=0.03, help="流式片段间隔（秒）")
+    parser.add_argument("--upload-bps", type=int, default=0, help="上传限速（字节/秒）")
+    parser.add_argument("--prefetch", action="store_true", help="启用预上传（PREFETCH_ENABLED）")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    settings = MockSettings(latency=args.latency, chunk_interval=args.chunk_interval, upload_bps=args.upload_bps)
+    stats = run_benchmark(args.videos, args.video_size, settings, headless=not args.headed, prefetch=args.prefetch)
+
+    print("\n" + "=" * 60)
+    print("📊 模拟 AI Studio 基准结果")
+    print("=" * 60)
+    print(f"  预上传: {'开启' if stats['prefetch'] else '关闭'}")
+    print(f"  视频: {stats['succeeded']}/{stats['videos']} 成功")
+    print(f"  总耗时: {stats['total_seconds']:.1f} 秒（平均 {stats['seconds_per_video']:.1f} 秒/视频）")
+    print(f"  吞吐量: {stats['videos_per_hour']:.1f} 视频/小时")
+    print(f"  服务端: 上传 {stats['server']['uploads']} 次 / {stats['server']['upload_bytes']} 字节，"
+          f"生成 {stats['server']['generations']} 次")
+    print(f"  工作目录: {stats['workdir']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 AI Studio 模拟服务
+提供静态页面（static/）和两个接口：
+  POST /upload           - 接收上传的视频（可限速）
+  POST /upload/resumable - 可续传分片上传（X-Goog-Upload-Command: start / upload / upload, finalize）
+  POST /GenerateContent  - 按步骤生成回复，以 SSE 流返回（Gemini API 格式）
+页面结构、按钮和提示文本与真实 AI Studio 一致，VideoProcessor 不需要任何修改即可运行。
+
+运行: python -m mock_ai_studio.server [--port 8765] [--latency 0.5] ...
+然后把 config.AI_STUDIO_URL 设置为 http://127.0.0.1:8765/
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).parent / "static"
+
+
+class MockSettings:
+    """模拟服务的可调参数"""
+
+    def __init__(
+        self,
+        latency=0.5,
+        chunk_interval=0.03,
+        chunk_chars=80,
+        response_chars=600,
+        upload_latency=0.3,
+        upload_bps=0,
+        upload_chunk_bytes=8 * 1024 * 1024,
+        srt_step=23,
+        table_step=25,
+        table_rows=40,
+        rate_limit_at=None,
+        rate_limit_times=1,
+        blocked_at=None,
+        acknowledge_popup=False,
+    ):
+        self.latency = latency  # 首个片段之前的延迟（秒）
+        self.chunk_interval = chunk_interval  # 流式片段间隔（秒）
+        self.chunk_chars = chunk_chars  # 每个片段的字符数
+        self.response_chars = response_chars  # 普通步骤回复的长度
+        self.upload_latency = upload_latency  # 上传完成后的处理延迟（秒）
+        self.upload_bps = upload_bps  # 上传限速（字节/秒，0 表示不限速）
+        self.upload_chunk_bytes = upload_chunk_bytes  # 可续传上传的分片大小（0 表示单个请求上传）
+        self.srt_step = srt_step  # 返回 SRT 代码块的步骤
+        self.table_step = table_step  # 返回 CSV 代码块和表格的步骤
+        self.table_rows = table_rows  # 表格行数
+        self.rate_limit_at = rate_limit_at  # 在该步骤返回速率限制（None 表示不触发）
+        self.rate_limit_times = rate_limit_times  # 速率限制触发的次数
+        self.blocked_at = blocked_at  # 在该步骤返回 Content blocked（发送"继续"后正常回复）
+        self.acknowledge_popup = acknowledge_popup  # 上传后弹出版权确认弹窗（每个页面一次）
+
+    def to_page_settings(self):
+        """页面脚本需要的参数"""
+        return {"acknowledgePopup": self.acknowledge_popup, "uploadChunkBytes": self.upload_chunk_bytes}
+
+
+def format_srt_time(seconds):
+    """秒数 → SRT 时间 00:00:00,000"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def format_timecode(seconds, fps=30):
+    """秒数 → 时间码 00:00:00:00（时:分:秒:帧）"""
+    total_frames = int(round(seconds * fps))
+    secs, frames = divmod(total_frames, fps)
+    minutes, secs = divmod(secs, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
+
+
+def build_response_text(settings, step):
+    """生成步骤的回复（Markdown）"""
+    if step == settings.srt_step:
+        entries = []
+        for i in range(1, 11):
+            start = (i - 1) * 3.5
+            entries.append(f"{i}\n{format_srt_time(start)} --> {format_srt_time(start + 3)}\n第 {i} 句字幕\n")
+        srt = "\n".join(entries)
+        return f"以下是生成的字幕：\n\n```srt\n{srt}```\n"
+
+    if step == settings.table_step:
+        header = ["start", "end", "folder1", "folder2", "folder3", "music", "cover_time", "title"]
+        rows = []
+        for i in range(settings.table_rows):
+            start = 1 + i * 5
+            rows.append([
+                format_timecode(start), format_timecode(start + 4), "", "故事", "1", "",
+                format_timecode(start + 3) if i == 0 else "", f"片段 {i + 1}" if i == 0 else "",
+            ])
+        csv_text = "\n".join(",".join(row) for row in [header] + rows)
+        table = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        table += ["| " + " | ".join(row) + " |" for row in rows]
+        return f"剪辑表格如下：\n\n```csv\n{csv_text}\n```\n\n" + "\n".join(table) + "\n"
+
+    sentence = f"这是第 {step} 步的模拟回复内容。"
+    text = (sentence * (settings.response_chars // len(sentence) + 1))[:settings.response_chars]
+    return f"**步骤 {step}**\n\n{text}\n"
+
+
+class MockAIStudioServer(ThreadingHTTPServer):
+    """带设置和计数的 HTTP 服务"""
+
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, MockRequestHandler)
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.rate_limited = 0
+        self.stats = {"uploads": 0, "upload_bytes": 0, "upload_chunks": 0, "generations": 0}
+        self.resumable_uploads = {}  # 上传 ID -> 已接收字节数
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+class MockRequestHandler(SimpleHTTPRequestHandler):
+    """静态文件 + 模拟接口"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(STATIC_DIR), **kwargs)
+
+    def log_message(self, format, *args):
+        pass  # 不输出访问日志
+
+    def do_GET(self):
+        if self.path.startswith("/settings.json"):
+            self._send_json(self.server.settings.to_page_settings())
+            return
+        # 任意路径都返回对话页面（模拟 /prompts/new_chat 等地址）
+        if not (STATIC_DIR / self.path.split("?")[0].lstrip("/")).is_file():
+            self.path = "/index.html"
+        super().do_GET()
+
+    def do_POST(self):
+        if self.path.startswith("/upload/resumable"):
+            self._handle_resumable_upload()
+        elif self.path.startswith("/upload"):
+            self._handle_upload()
+        elif "GenerateContent" in self.path:
+            self._handle_generate()
+        else:
+            self.send_error(404)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        settings = self.server.settings
+        remaining = length
+        chunks = []
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if settings.upload_bps:
+                time.sleep(len(chunk) / settings.upload_bps)
+        return b"".join(chunks)
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_upload(self):
+        body = self._read_body()
+        time.sleep(self.server.settings.upload_latency)
+        with self.server.lock:
+            self.server.stats["uploads"] += 1
+            self.server.stats["upload_bytes"] += len(body)
+        self._send_json({"ok": True, "bytes": len(body)})
+
+    def _handle_resumable_upload(self):
+        command = (self.headers.get("X-Goog-Upload-Command") or "").lower()
+        body = self._read_body()
+        server = self.server
+
+        if command == "start":
+            with server.lock:
+                upload_id = str(len(server.resumable_uploads) + 1)
+                server.resumable_uploads[upload_id] = 0
+            self.send_response(200)
+            self.send_header("X-Goog-Upload-Status", "active")
+            self.send_header("X-Goog-Upload-URL", f"/upload/resumable?upload_id={upload_id}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        upload_id = self.path.rsplit("upload_id=", 1)[-1]
+        with server.lock:
+            if upload_id not in server.resumable_uploads:
+                self.send_error(404)
+                return
+            server.resumable_uploads[upload_id] += len(body)
+            received = server.resumable_uploads[upload_id]
+            server.stats["upload_chunks"] += 1
+
+        final = "finalize" in command
+        if final:
+            time.sleep(server.settings.upload_latency)
+            with server.lock:
+                server.stats["uploads"] += 1
+                server.stats["upload_bytes"] += received
+        self.send_response(200)
+        self.send_header("X-Goog-Upload-Status", "final" if final else "active")
+        self.send_header("X-Goog-Upload-Size-Received", str(received))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _handle_generate(self):
+        request = json.loads(self._read_body() or b"{}")
+        step = int(request.get("step") or 0)
+        prompt = request.get("prompt") or ""
+        settings = self.server.settings
+
+        with self.server.lock:
+            self.server.stats["generations"] += 1
+            rate_limited = (
+                settings.rate_limit_at == step and self.server.rate_limited < settings.rate_limit_times
+            )
+            if rate_limited:
+                self.server.rate_limited += 1
+
+        time.sleep(settings.latency)
+
+        if rate_limited:
+            self._send_json({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, status=429)
+            return
+        if settings.blocked_at == step and prompt.strip() != "继续":
+            self._send_json({"blocked": True})
+            return
+
+        text = build_response_text(settings, step)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for i in range(0, len(text), settings.chunk_chars):
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text[i:i + settings.chunk_chars]}]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(settings.chunk_interval)
+
+
+def start_server(settings=None, host="127.0.0.1", port=0):
+    """在后台线程启动模拟服务，返回 server（server.url 为页面地址）"""
+    server = MockAIStudioServer((host, port), settings or MockSettings())
+    thread = threading.Thread(target=server.serve_forever, name="mock-ai-studio", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 AI Studio 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="首个片段之前的延迟（秒）")
+    parser.add_argument("--chunk-interval", type=float, default=0.03, help="流式片段间隔（秒）")
+    parser.add_argument("--chunk-chars", type=int, default=80, help="每个片段的字符数")
+    parser.add_argument("--upload-bps", type=int, default=0, help="上传限速（字节/秒）")
+    parser.add_argument("--upload-chunk-bytes", type=int, default=8 * 1024 * 1024, help="可续传上传分片大小（0 为单个请求）")
+    parser.add_argument("--rate-limit-at", type=int, default=None, help="在该步骤返回速率限制")
+    parser.add_argument("--blocked-at", type=int, default=None, help="在该步骤返回 Content blocked")
+    parser.add_argument("--acknowledge-popup", action="store_true", help="上传后弹出版权确认弹窗")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency,
+        chunk_interval=args.chunk_interval,
+        chunk_chars=args.chunk_chars,
+        upload_bps=args.upload_bps,
+        upload_chunk_bytes=args.upload_chunk_bytes,
+        rate_limit_at=args.rate_limit_at,
+        blocked_at=args.blocked_at,
+        acknowledge_popup=args.acknowledge_popup,
+    )
+    server = MockAIStudioServer((args.host, args.port), settings)
+    print(f"🧪 模拟 AI Studio 已启动: {server.url}")
+    print(f"   在 config.py 中设置 AI_STUDIO_URL = \"{server.url}\"")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+// 模拟 AI Studio 对话页面
+// 页面元素和状态变化与真实页面一致：add_circle 菜单 → Upload File → 文件选择器，
+// Run/Stop 按钮，[data-turn-role] 对话轮次，代码块复制按钮，速率限制横幅和 Content blocked。
+(() => {
+  const chat = document.getElementById('chat');
+  const banner = document.getElementById('banner');
+  const menu = document.getElementById('upload-menu');
+  const addButton = document.getElementById('add-button');
+  const uploadButton = document.getElementById('upload-file-button');
+  const fileInput = document.getElementById('file-input');
+  const input = document.getElementById('prompt-input');
+  const runButton = document.getElementById('run-button');
+  const dialog = document.getElementById('dialog');
+  const acknowledgeButton = document.getElementById('acknowledge-button');
+
+  let settings = {acknowledgePopup: false, uploadChunkBytes: 0};
+  let step = 0;  // 已发送的步骤数（"继续"不计入）
+  let running = null;  // 正在进行的请求（AbortController）
+
+  fetch('/settings.json').then((r) => r.json()).then((data) => { settings = data; }).catch(() => {});
+
+  const escapeHtml = (text) => text
+    .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+
+  const scrollToBottom = () => { chat.scrollTop = chat.scrollHeight; };
+
+  // ==================== Run 按钮 ====================
+
+  const updateRunButton = () => {
+    if (running) {
+      runButton.innerHTML = '<span>Stop</span>';
+      runButton.classList.add('stoppable');
+      runButton.setAttribute('aria-disabled', 'false');
+    } else {
+      runButton.innerHTML = '<span>Run</span>';
+      runButton.classList.remove('stoppable');
+      runButton.setAttribute('aria-disabled', input.value.trim() ? 'false' : 'true');
+    }
+  };
+
+  input.addEventListener('input', updateRunButton);
+  input.addEventListener('keydown', (event) => {
+    if (event.key === 'Enter' && (event.ctrlKey || event.metaKey)) {
+      event.preventDefault();
+      run();
+    }
+  });
+  runButton.addEventListener('click', () => {
+    if (running) {
+      running.abort();
+      return;
+    }
+    if (runButton.getAttribute('aria-disabled') !== 'true') run();
+  });
+
+  // ==================== 上传 ====================
+
+  addButton.addEventListener('click', () => { menu.hidden = !menu.hidden; });
+  uploadButton.addEventListener('click', () => fileInput.click());
+  document.addEventListener('keydown', (event) => {
+    if (event.key === 'Escape') menu.hidden = true;
+  });
+
+  fileInput.addEventListener('change', async () => {
+    for (const file of Array.from(fileInput.files)) {
+      const turn = addTurn('User');
+      turn.innerHTML = `<div class="upload-chip"><div role="progressbar" class="upload-progress"></div> 上传中 ${escapeHtml(file.name)}</div>`;
+      scrollToBottom();
+      try {
+        await uploadFile(file);
+        turn.innerHTML = `<div class="upload-chip"><video class="video-thumbnail" muted></video> <span>${escapeHtml(file.name)}</span></div>`;
+      } catch (e) {
+        turn.innerHTML = `<div class="upload-chip">${escapeHtml(file.name)} 上传失败</div>`;
+      }
+    }
+    fileInput.value = '';
+
+    if (settings.acknowledgePopup && !sessionStorage.getItem('acknowledged')) {
+      dialog.hidden = false;
+    }
+  });
+
+  // 可续传上传（与 Google 上传协议相同的请求头），分片大小为 0 时单个请求上传
+  async function uploadFile(file) {
+    const chunkBytes = settings.uploadChunkBytes;
+    if (!chunkBytes) {
+      const response = await fetch('/upload', {method: 'POST', body: file});
+      if (!response.ok) throw new Error(`upload ${response.status}`);
+      return;
+    }
+
+    const start = await fetch('/upload/resumable', {
+      method: 'POST',
+      headers: {
+        'X-Goog-Upload-Protocol': 'resumable',
+        'X-Goog-Upload-Command': 'start',
+        'X-Goog-Upload-Header-Content-Length': String(file.size),
+      },
+    });
+    const uploadUrl = start.headers.get('X-Goog-Upload-URL');
+    let offset = 0;
+    do {
+      const chunk = file.slice(offset, offset + chunkBytes);
+      const last = offset + chunk.size >= file.size;
+      const response = await fetch(uploadUrl, {
+        method: 'POST',
+        headers: {
+          'X-Goog-Upload-Command': last ? 'upload, finalize' : 'upload',
+          'X-Goog-Upload-Offset': String(offset),
+        },
+        body: chunk,
+      });
+      if (!response.ok) throw new Error(`upload ${response.status}`);
+      offset += chunk.size;
+    } while (offset < file.size);
+  }
+
+  acknowledgeButton.addEventListener('click', () => {
+    sessionStorage.setItem('acknowledged', '1');
+    dialog.hidden = true;
+  });
+
+  // ==================== 对话 ====================
+
+  function addTurn(role) {
+    const turn = document.createElement('div');
+    turn.className = 'chat-turn';
+    turn.setAttribute('data-turn-role', role);
+    chat.appendChild(turn);
+    return turn;
+  }
+
+  // 简单的 Markdown 渲染：围栏代码块（带复制按钮）、表格、段落、粗体
+  function renderMarkdown(text) {
+    const html = [];
+    const parts = text.split(/```/);
+    parts.forEach((part, index) => {
+      if (index % 2 === 1) {
+        const newline = part.indexOf('\n');
+        const lang = newline >= 0 ? part.slice(0, newline).trim() : '';
+        const code = newline >= 0 ? part.slice(newline + 1) : '';
+        html.push(
+          '<ms-code-block><div class="code-block-header">'
+          + `<span>${escapeHtml(lang)}</span>`
+          + '<button iconname="content_copy" aria-label="Copy to clipboard" class="copy-button">'
+          + '<span class="material-symbols-outlined">content_copy</span></button>'
+          + `</div><pre><code>${escapeHtml(code)}</code></pre></ms-code-block>`
+        );
+        return;
+      }
+
+      const lines = part.split('\n');
+      let i = 0;
+      while (i < lines.length) {
+        if (lines[i].trim().startsWith('|')) {
+          const rows = [];
+          while (i < lines.length && lines[i].trim().startsWith('|')) rows.push(lines[i++]);
+          html.push(renderTable(rows));
+        } else {
+          const paragraph = [];
+          while (i < lines.length && lines[i].trim() && !lines[i].trim().startsWith('|')) paragraph.push(lines[i++]);
+          if (paragraph.length) {
+            html.push('<p>' + escapeHtml(paragraph.join('\n')).replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>') + '</p>');
+          } else {
+            i++;
+          }
+        }
+      }
+    });
+    return html.join('');
+  }
+
+  function renderTable(rows) {
+    const cells = (row) => row.trim().replace(/^\|/, '').replace(/\|$/, '').split('|').map((c) => escapeHtml(c.trim()));
+    const dataRows = rows.slice(1).filter((row) => !/^[\s|:-]+$/.test(row));
+    return '<table><thead><tr>' + cells(rows[0]).map((c) => `<th>${c}</th>`).join('') + '</tr></thead><tbody>'
+      + dataRows.map((row) => '<tr>' + cells(row).map((c) => `<td>${c}</td>`).join('') + '</tr>').join('')
+      + '</tbody></table>';
+  }
+
+  chat.addEventListener('click', (event) => {
+    const button = event.target.closest('button[iconname="content_copy"]');
+    if (!button) return;
+    const code = button.closest('ms-code-block').querySelector('pre code');
+    if (navigator.clipboard) navigator.clipboard.writeText(code.textContent).catch(() => {});
+  });
+
+  async function run() {
+    const prompt = input.value.trim();
+    if (!prompt || running) return;
+
+    if (prompt !== '继续') step += 1;
+    const userTurn = addTurn('User');
+    userTurn.textContent = prompt;
+    input.value = '';
+
+    const modelTurn = addTurn('Model');
+    modelTurn.innerHTML = '<span class="loading"></span>';
+    running = new AbortController();
+    updateRunButton();
+    scrollToBottom();
+
+    try {
+      const response = await fetch('/GenerateContent', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({step, prompt}),
+        signal: running.signal,
+      });
+
+      if (response.status === 429) {
+        modelTurn.innerHTML = '';
+        banner.textContent = "You've reached your rate limit. Please try again later.";
+        banner.hidden = false;
+      } else if ((response.headers.get('Content-Type') || '').includes('application/json')) {
+        const data = await response.json();
+        modelTurn.innerHTML = data.blocked ? '<p>Content blocked</p>' : '';
+      } else {
+        await streamInto(response, modelTurn);
+      }
+    } catch (e) {
+      // 用户点击 Stop
+    } finally {
+      running = null;
+      updateRunButton();
+      scrollToBottom();
+    }
+  }
+
+  async function streamInto(response, modelTurn) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    for (;;) {
+      const {done, value} = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, {stream: true});
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const event of events) {
+        if (!event.startsWith('data:')) continue;
+        const chunk = JSON.parse(event.slice(5));
+        for (const part of chunk.candidates[0].content.parts) text += part.text || '';
+      }
+      modelTurn.innerHTML = renderMarkdown(text);
+      scrollToBottom();
+    }
+  }
+})();
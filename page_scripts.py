@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面脚本
+在 AI Studio 页面内执行的 JavaScript，供同步版和异步版处理器共用。
+把多次 Playwright 调用合并为一次 evaluate / wait_for_function，减少与浏览器的往返。
+"""
+
+# Run 按钮 / 加载指示器状态（返回 true 表示 AI 正在运行）
+# 判断顺序与 VideoProcessor.is_ai_running 一致：先看 Run 按钮，找不到再看加载指示器
+AI_RUNNING_JS = """
+() => {
+    const selectors = ['button[aria-label="Run"]', 'button.run-button', 'button[type="submit"][aria-label="Run"]'];
+    for (const selector of selectors) {
+        const button = document.querySelector(selector);
+        if (!button) continue;
+        const html = button.innerHTML;
+        if (html.includes('Stop') || button.classList.contains('stoppable')) return true;
+        if (html.includes('Run')) return false;
+    }
+    const visible = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+    for (const el of document.querySelectorAll('[role="progressbar"], .loading, .spinner')) {
+        if (visible(el)) return true;
+    }
+    return false;
+}
+"""
+
+AI_IDLE_JS = f"() => !({AI_RUNNING_JS})()"
+
+# Run 按钮可用（填入提示词后 aria-disabled 不再是 "true"）
+RUN_BUTTON_ENABLED_JS = """
+() => {
+    const button = document.querySelector('button[aria-label="Run"], button.run-button');
+    return !!button && button.getAttribute('aria-disabled') !== 'true';
+}
+"""
+
+# 上传进度指示器全部消失
+UPLOAD_IDLE_JS = """
+() => {
+    const visible = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+    for (const el of document.querySelectorAll('[role="progressbar"], .upload-progress')) {
+        if (visible(el)) return false;
+    }
+    const text = document.body ? document.body.innerText : '';
+    return !text.includes('Uploading') && !text.includes('上传中');
+}
+"""
+
+# 运行状态观察器（init script）
+# MutationObserver 在页面内维护 window.__aiStudioRunState：
+#   running     - 当前是否在运行
+#   starts      - Run→Stop 次数
+#   completions - Stop→Run 次数（每完成一次响应加 1）
+# Python 端记录发送前的 completions，再用 wait_for_function 等待它增加，
+# 不需要每隔几秒轮询按钮。
+RUN_STATE_OBSERVER_JS = f"""
+(() => {{
+    if (window.__aiStudioRunState) return;
+    const isRunning = {AI_RUNNING_JS};
+    const state = window.__aiStudioRunState = {{
+        running: false,
+        starts: 0,
+        completions: 0,
+        lastChange: Date.now(),
+    }};
+
+    const update = () => {{
+        let running = false;
+        try {{ running = isRunning(); }} catch (e) {{ return; }}
+        if (running === state.running) return;
+        state.running = running;
+        state.lastChange = Date.now();
+        if (running) state.starts += 1;
+        else state.completions += 1;
+    }};
+
+    // 流式输出时变更非常频繁，合并到一个定时器里处理
+    let timer = null;
+    const schedule = () => {{
+        if (timer) return;
+        timer = setTimeout(() => {{ timer = null; update(); }}, 16);
+    }};
+
+    const start = () => {{
+        new MutationObserver(schedule).observe(document.documentElement, {{
+            subtree: true, childList: true, attributes: true, characterData: true,
+        }});
+        update();
+    }};
+    if (document.documentElement) start();
+    else document.addEventListener('DOMContentLoaded', start);
+}})();
+"""
+
+# 读取观察器的完成计数（观察器未安装时返回 null）
+RUN_COMPLETIONS_JS = """
+() => window.__aiStudioRunState ? window.__aiStudioRunState.completions : null
+"""
+
+# 等待完成计数超过发送前的基线
+RUN_COMPLETED_JS = """
+(baseline) => !!window.__aiStudioRunState && window.__aiStudioRunState.completions > baseline
+"""
+
+# 响应稳定检测：观察最后一个模型回复，连续 quietMs 毫秒没有 DOM 变化即认为稳定
+# watchTable 为 true 时还要求最后一个表格的行数在静默窗口内不变（步骤25）
+# 超过 maxMs 直接返回（settled=false）。一次 evaluate 完成，返回观测数据供调参。
+DOM_SETTLE_JS = """
+async ({quietMs, maxMs, watchTable}) => {
+    const start = performance.now();
+    const turns = document.querySelectorAll('[data-turn-role="Model"]');
+    const target = turns.length ? turns[turns.length - 1] : document.body;
+    const rowCount = () => {
+        const tables = target.querySelectorAll('table');
+        return tables.length ? tables[tables.length - 1].querySelectorAll('tr').length : 0;
+    };
+
+    let mutations = 0;
+    let lastChange = start;
+    let rows = rowCount();
+    const observer = new MutationObserver((records) => {
+        mutations += records.length;
+        lastChange = performance.now();
+    });
+    observer.observe(target, {subtree: true, childList: true, attributes: true, characterData: true});
+
+    try {
+        return await new Promise((resolve) => {
+            const check = () => {
+                const now = performance.now();
+                if (watchTable) {
+                    const current = rowCount();
+                    if (current !== rows) {
+                        rows = current;
+                        lastChange = now;
+                    }
+                }
+                const quietFor = now - lastChange;
+                const settled = quietFor >= quietMs;
+                if (settled || now - start >= maxMs) {
+                    resolve({
+                        settled,
+                        settleMs: Math.round(lastChange - start),
+                        waitedMs: Math.round(now - start),
+                        mutations,
+                        rows,
+                        textLength: (target.innerText || '').trim().length,
+                    });
+                    return;
+                }
+                setTimeout(check, Math.max(10, Math.min(50, quietMs - quietFor)));
+            };
+            check();
+        });
+    } finally {
+        observer.disconnect();
+    }
+}
+"""
+
+# 速率限制 / 配额超限提示文本（按优先级排列）
+RATE_LIMIT_TEXTS = [
+    "You've reached your rate limit",
+    "rate limit",
+    "exceeded quota",
+    "user has exceeded quota",
+    "Please try again later",
+    "请稍后再试",
+    "达到速率限制",
+    "配额已超限",
+]
+
+# Content blocked 等错误提示文本
+CONTENT_BLOCKED_TEXTS = ["Content blocked", "内容被阻止", "blocked", "error"]
+
+# 生成中提示文本（加载指示器的补充）
+LOADING_TEXTS = ["Generating", "生成中"]
+
+# 页面状态探针：一次 evaluate 返回所有检查需要的状态
+#   runButton      - {found, label: "run"/"stop"/null, disabled}
+#   running        - AI 是否在运行（与 AI_RUNNING_JS 判断一致，另外考虑"生成中"文本）
+#   loading        - 是否有可见的加载指示器
+#   rateLimit      - 命中的速率限制文本（按列表顺序的第一个），没有为 null
+#   contentBlocked - 命中的错误提示文本，没有为 null
+#   videoUploaded  - 是否有可见的视频元素
+#   acknowledgePopup - 是否有上传后的版权确认弹窗
+#   modelTurns / lastTurnLength / lastNonEmptyTurnLength - 模型回复统计
+#   lastTableRows  - 最后一个模型回复中最后一个表格的行数
+# 文本匹配与 get_by_text(exact=False) 一致：大小写不敏感的子串匹配，且所在元素可见
+PAGE_STATE_PROBE_JS = """
+({rateLimitTexts, blockedTexts, loadingTexts}) => {
+    const visible = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+
+    // Run 按钮
+    const runButton = {found: false, label: null, disabled: false};
+    for (const selector of ['button[aria-label="Run"]', 'button.run-button', 'button[type="submit"][aria-label="Run"]']) {
+        const button = document.querySelector(selector);
+        if (!button) continue;
+        const html = button.innerHTML;
+        runButton.found = true;
+        runButton.disabled = button.getAttribute('aria-disabled') === 'true';
+        if (html.includes('Stop') || button.classList.contains('stoppable')) runButton.label = 'stop';
+        else if (html.includes('Run')) runButton.label = 'run';
+        if (runButton.label) break;
+    }
+
+    // 页面可见文本匹配（一次遍历所有文本节点）
+    const groups = [rateLimitTexts, blockedTexts, loadingTexts].map((texts) => texts.map((t) => t.toLowerCase()));
+    const hits = groups.map((texts) => texts.map(() => false));
+    if (document.body) {
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const value = walker.currentNode.nodeValue;
+            if (!value || !value.trim()) continue;
+            const lowered = value.toLowerCase();
+            let parentVisible = null;
+            groups.forEach((texts, g) => texts.forEach((text, i) => {
+                if (hits[g][i] || !lowered.includes(text)) return;
+                if (parentVisible === null) parentVisible = visible(walker.currentNode.parentElement);
+                if (parentVisible) hits[g][i] = true;
+            }));
+        }
+    }
+    const firstHit = (g, texts) => {
+        const index = hits[g].indexOf(true);
+        return index >= 0 ? texts[index] : null;
+    };
+
+    let loading = !!firstHit(2, loadingTexts);
+    for (const el of document.querySelectorAll('[role="progressbar"], .loading, .spinner')) {
+        if (visible(el)) { loading = true; break; }
+    }
+
+    const running = runButton.label ? runButton.label === 'stop' : loading;
+
+    // 上传的视频
+    let videoUploaded = false;
+    for (const selector of ['video', '[data-test-id*="video"]', 'img[alt*="video"]', '.video-thumbnail', '[role="img"]']) {
+        if (Array.from(document.querySelectorAll(selector)).some(visible)) { videoUploaded = true; break; }
+    }
+
+    // 版权确认弹窗
+    const acknowledgePopup = Array.from(document.querySelectorAll('button')).some((button) => {
+        const label = button.getAttribute('aria-label') || '';
+        return visible(button) && (label.includes('Acknowledge') || label.includes('acknowledgement')
+            || (button.textContent || '').includes('Acknowledge'));
+    });
+
+    // 模型回复
+    const turns = document.querySelectorAll('[data-turn-role="Model"]');
+    const turnLength = (el) => (el.innerText || '').trim().length;
+    const lastTurn = turns.length ? turns[turns.length - 1] : null;
+    let lastNonEmptyTurnLength = 0;
+    for (let i = turns.length - 1; i >= 0; i--) {
+        const length = turnLength(turns[i]);
+        if (length > 0) { lastNonEmptyTurnLength = length; break; }
+    }
+    let lastTableRows = 0;
+    if (lastTurn) {
+        const tables = lastTurn.querySelectorAll('table');
+        if (tables.length) lastTableRows = tables[tables.length - 1].querySelectorAll('tr').length;
+    }
+
+    return {
+        runButton,
+        running,
+        loading,
+        rateLimit: firstHit(0, rateLimitTexts),
+        contentBlocked: firstHit(1, blockedTexts),
+        videoUploaded,
+        acknowledgePopup,
+        modelTurns: turns.length,
+        lastTurnLength: lastTurn ? turnLength(lastTurn) : 0,
+        lastNonEmptyTurnLength,
+        lastTableRows,
+    };
+}
+"""
+
+# 批量读取元素下所有表格（一次 evaluate 代替逐个单元格 inner_text）
+# 每个表格返回：
+#   rows        - 每行的 {th: [...], td: [...], text}（单元格为 innerText 去首尾空白）
+#   theadRows   - thead 中的行在 rows 中的下标
+#   tbodyRows   - tbody 中的行在 rows 中的下标
+TABLES_EXTRACT_JS = """
+(root) => Array.from(root.querySelectorAll('table')).map((table) => {
+    const rows = Array.from(table.querySelectorAll('tr'));
+    const cellTexts = (row, tag) => Array.from(row.children)
+        .filter((cell) => cell.tagName === tag)
+        .map((cell) => (cell.innerText || '').trim());
+    return {
+        rows: rows.map((row) => ({
+            th: cellTexts(row, 'TH'),
+            td: cellTexts(row, 'TD'),
+            text: row.innerText || '',
+        })),
+        theadRows: rows.map((row, i) => row.closest('thead') === null ? -1 : i).filter((i) => i >= 0),
+        tbodyRows: rows.map((row, i) => row.closest('tbody') === null ? -1 : i).filter((i) => i >= 0),
+    };
+})
+"""
+
+# 剪贴板拦截（init script）：包装 navigator.clipboard.writeText，
+# 把页面写入剪贴板的内容记录到 window.__copiedTexts，不需要剪贴板权限，无头模式也可用
+CLIPBOARD_HOOK_JS = """
+(() => {
+    if (window.__copiedTexts) return;
+    window.__copiedTexts = [];
+    const clipboard = navigator.clipboard;
+    if (!clipboard) return;
+    const original = clipboard.writeText ? clipboard.writeText.bind(clipboard) : null;
+    clipboard.writeText = (text) => {
+        window.__copiedTexts.push(String(text));
+        if (!original) return Promise.resolve();
+        return original(text).catch(() => undefined);
+    };
+})();
+"""
+
+# 直接读取每个复制按钮对应代码块的原始文本（不点击按钮）
+# 返回数组，与复制按钮一一对应；找不到代码块的按钮为 null
+COPY_BUTTON_BLOCKS_JS = """
+(root) => Array.from(root.querySelectorAll('button[iconname="content_copy"]')).map((button) => {
+    for (let node = button.parentElement; node && node !== root.parentElement; node = node.parentElement) {
+        const block = node.querySelector('pre code, pre, code');
+        if (block) return block.textContent;
+    }
+    return null;
+})
+"""
+
+# 一次性点击所有复制按钮，返回拦截到的剪贴板内容（需要先注入 CLIPBOARD_HOOK_JS）
+CLICK_COPY_BUTTONS_JS = """
+async (root) => {
+    if (!window.__copiedTexts) return null;
+    const buttons = Array.from(root.querySelectorAll('button[iconname="content_copy"]'));
+    const before = window.__copiedTexts.length;
+    for (const button of buttons) button.click();
+    // 复制通常是同步写入，个别实现会异步写入，最多再等 500 毫秒
+    const deadline = Date.now() + 500;
+    while (window.__copiedTexts.length - before < buttons.length && Date.now() < deadline) {
+        await new Promise((resolve) => setTimeout(resolve, 10));
+    }
+    return window.__copiedTexts.slice(before);
+}
+"""
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多工作者并发处理
+每个工作者拥有独立的浏览器页面和 VideoProcessor 状态，
+调度器把 VideoList.csv 中的视频分配给空闲的工作者。
+启用账号池时，每个视频再分配给剩余配额最多的账号，速率限制时改派。
+"""
+
+import queue
+import threading
+import time
+
+from account_pool import AccountPool
+from config import config
+from video_automation import VideoProcessor, logger
+
+
+class ParallelVideoRunner:
+    """多工作者调度器
+
+    Playwright 的同步 API 不能跨线程共享，因此每个工作者线程启动自己的
+    Playwright 实例和浏览器（使用 .browser_session/state.json 中保存的会话），
+    互不阻塞。截图和调试文件按工作者分目录保存。
+
+    启用账号池（config.ACCOUNT_POOL_ENABLED）时，工作者为每个视频从池中
+    领取账号并切换到该账号的浏览器上下文；遇到速率限制时账号进入冷却，
+    视频放回队列由其他账号处理。
+    """
+
+    def __init__(self, worker_count=None, headless=None, account_pool=None):
+        self.worker_count = worker_count or config.WORKER_COUNT
+        self.headless = headless
+        if account_pool is None and config.ACCOUNT_POOL_ENABLED:
+            account_pool = AccountPool()
+        self.account_pool = account_pool
+        # 协调者：只负责加载视频列表、合并数据和最终处理，不启动浏览器
+        self.coordinator = VideoProcessor()
+
+        self.video_queue = queue.Queue()
+        self.results_lock = threading.Lock()
+        self.results = []  # (worker_id, filename, success, elapsed)
+        self.upload_proxy = None  # 所有工作者共用的上传代理（UPLOAD_PROXY_ENABLED）
+        self.postprocess = None  # 所有工作者共用的后期处理工作池（POSTPROCESS_PIPELINE_ENABLED）
+
+    def _record_result(self, worker_id, filename, success, elapsed):
+        with self.results_lock:
+            self.results.append((worker_id, filename, success, elapsed))
+
+    def _worker_loop(self, worker_id):
+        """工作者主循环：不断从队列中取视频处理，直到队列为空"""
+        processor = VideoProcessor(worker_id=worker_id)
+        processor.upload_proxy = self.upload_proxy
+        processor.postprocess = self.postprocess
+
+        try:
+            processor.init_browser(headless=self.headless, use_system_chrome=False)
+            if self.account_pool is not None:
+                processor.account_pool = self.account_pool
+            elif not processor.open_ai_studio():
+                logger.error(f"❌ 工作者 {worker_id} 打开 AI Studio 失败，退出")
+                return
+        except Exception as e:
+            logger.error(f"❌ 工作者 {worker_id} 初始化失败: {e}")
+            processor.close_browser()
+            return
+
+        try:
+            while True:
+                try:
+                    video_info = self.video_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                account = None
+                if self.account_pool is not None:
+                    account = self._acquire_account(processor, worker_id, video_info)
+                    if account is None:
+                        break
+
+                logger.info(f"👷 工作者 {worker_id} 开始处理: {video_info['filename']}")
+                start_time = time.time()
+                try:
+                    result = processor.process_single_video(video_info)
+                except Exception as e:
+                    logger.error(f"❌ 工作者 {worker_id} 处理 {video_info['filename']} 出错: {e}")
+                    result = False
+
+                if account is not None:
+                    if result == "rate_limit":
+                        # 账号冷却，视频放回队列改派给其他账号
+                        self.account_pool.mark_rate_limited(account)
+                        self.video_queue.put(video_info)
+                        self.video_queue.task_done()
+                        continue
+                    self.account_pool.release(account, used=True)
+
+                elapsed = time.time() - start_time
+                self._record_result(worker_id, video_info["filename"], result is True, elapsed)
+                logger.info(
+                    f"👷 工作者 {worker_id} 完成: {video_info['filename']} "
+                    f"({'成功' if result else '失败'}, 用时 {int(elapsed)} 秒)"
+                )
+                self.video_queue.task_done()
+
+                # 同一工作者的两个视频之间稍作休息
+                if not self.video_queue.empty():
+                    time.sleep(config.WAIT_BETWEEN_VIDEOS)
+        finally:
+            processor.close_browser()
+
+    def _acquire_account(self, processor, worker_id, video_info):
+        """为视频领取账号并切换到该账号的上下文
+
+        没有可用账号时等待冷却结束；今天所有账号配额都用完时把视频放回队列并返回 None。
+        """
+        while True:
+            account = self.account_pool.acquire()
+            if account is not None:
+                if processor.open_account_context(account, self.account_pool.state_file(account)):
+                    logger.info(f"👷 工作者 {worker_id} 使用账号: {account}")
+                    return account
+                # 会话失效的账号冷却，避免反复分配
+                self.account_pool.mark_rate_limited(account)
+                continue
+
+            wait_seconds = self.account_pool.next_available_in()
+            if wait_seconds is None:
+                logger.error("❌ 账号池中所有账号今日配额已用完")
+                self.video_queue.put(video_info)
+                self.video_queue.task_done()
+                return None
+
+            wait_seconds = max(1, min(wait_seconds, 60))
+            logger.info(f"⏸️ 工作者 {worker_id} 暂无可用账号，{int(wait_seconds)} 秒后重试")
+            time.sleep(wait_seconds)
+
+    def run(self):
+        """并发处理 VideoList.csv 中的所有视频"""
+        videos = self.coordinator.load_video_list()
+        if not videos:
+            logger.error("❌ 没有找到待处理的视频")
+            return False
+
+        # 跳过处理记录中已完成的视频
+        videos = self.coordinator.skip_completed_videos(videos)
+        if not videos:
+            logger.info("✅ 所有视频都已处理完成")
+            return True
+
+        for video_info in videos:
+            self.video_queue.put(video_info)
+
+        # 提前在进程池中转码上传代理文件
+        if config.UPLOAD_PROXY_ENABLED:
+            from upload_proxy import UploadProxyManager
+            self.upload_proxy = UploadProxyManager()
+            self.upload_proxy.prepare([self.coordinator.videos_folder / v["filename"] for v in videos])
+
+        # 后期处理流水线：工作者保存输出后立即在后台处理
+        if config.POSTPROCESS_PIPELINE_ENABLED:
+            from postprocess_pool import PostProcessPool
+            self.postprocess = PostProcessPool()
+            self.coordinator.postprocess = self.postprocess
+
+        worker_count = min(self.worker_count, len(videos))
+        logger.info("\n" + "=" * 60)
+        logger.info(f"🚀 并发模式: {worker_count} 个工作者处理 {len(videos)} 个视频")
+        logger.info("=" * 60)
+
+        if self.account_pool is not None:
+            if not self.account_pool.accounts():
+                logger.error("❌ 账号池为空，请先运行 python account_pool.py add <邮箱> 登录账号")
+                return False
+            self.account_pool.log_status()
+            # 每个账号同一时间只被一个工作者使用
+            worker_count = min(worker_count, len(self.account_pool.accounts()))
+
+        batch_start = time.time()
+        threads = []
+        for worker_id in range(1, worker_count + 1):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(worker_id,),
+                name=f"worker-{worker_id}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+            # 错开启动时间，避免同时登录/上传
+            if worker_id < worker_count:
+                time.sleep(config.WORKER_START_INTERVAL)
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            logger.warning("\n⚠️ 用户中断，等待工作者退出...")
+            return "quit"
+
+        batch_elapsed = time.time() - batch_start
+        if self.upload_proxy:
+            self.upload_proxy.shutdown()
+
+        # 合并所有 Excel 文件并运行最终处理
+        try:
+            self.coordinator.merge_all_excel_files()
+        except Exception as e:
+            logger.error(f"❌ 合并数据失败: {e}")
+        try:
+            self.coordinator.finish_postprocess()
+        except Exception as e:
+            logger.error(f"❌ 最终处理失败: {e}")
+
+        self.log_summary(len(videos), batch_elapsed)
+        return True
+
+    def log_summary(self, total, batch_elapsed):
+        """输出并发处理统计（含吞吐量）"""
+        success = [r for r in self.results if r[2]]
+        failed = [r[1] for r in self.results if not r[2]]
+        not_started = total - len(self.results)
+
+        logger.info("\n" + "=" * 60)
+        logger.info("🎉 并发批次完成！")
+        logger.info("=" * 60)
+        logger.info(f"✅ 成功处理: {len(success)}/{total} 个视频")
+        if failed:
+            logger.warning(f"❌ 失败视频: {', '.join(failed)}")
+        if not_started:
+            logger.warning(f"⚠️ 未处理视频: {not_started} 个")
+
+        for worker_id in sorted({r[0] for r in self.results}):
+            worker_results = [r for r in self.results if r[0] == worker_id]
+            busy = sum(r[3] for r in worker_results)
+            logger.info(f"  👷 工作者 {worker_id}: {len(worker_results)} 个视频，累计 {int(busy)} 秒")
+
+        if batch_elapsed > 0:
+            per_hour = len(success) * 3600 / batch_elapsed
+            logger.info(f"⏱️ 总用时 {int(batch_elapsed)} 秒，吞吐量 {per_hour:.2f} 个视频/小时")
+
+
+def main():
+    """主函数"""
+    runner = ParallelVideoRunner()
+    runner.run()
+
+
+if __name__ == "__main__":
+    main()
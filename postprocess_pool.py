@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后期处理流水线
+每个视频的输出保存后（save_output_data 完成），立即把该视频的剪辑表写成单独的文件，
+在后台工作池中运行 process_video.py --clips <剪辑表>（剪切、合成、封面），
+与下一个视频的 AI 对话同时进行，不再等整批视频结束后才串行处理。
+
+每个任务是一个独立的子进程（moviepy/ffmpeg 占用 CPU，不受 GIL 影响），
+输出写入 <POSTPROCESS_DIR>/<视频>.log，用时报告写入 <POSTPROCESS_DIR>/<视频>_render.csv。
+工作池已经在视频之间并行，子进程按顺序渲染（--workers 1），CPU 核数按工作者数平分（--threads）。
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from columnar_store import columnar_available, find_step_tables, read_table, write_table
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class PostProcessPool:
+    """后台后期处理工作池（线程安全，并发模式下所有工作者共用一个实例）"""
+
+    def __init__(self, script=None, work_dir=None, workers=None, timeout=None):
+        self.script = Path(script or config.PROCESS_SCRIPT)
+        self.work_dir = Path(work_dir or config.POSTPROCESS_DIR)
+        self.workers = workers or config.POSTPROCESS_WORKERS
+        self.timeout = timeout or config.POSTPROCESS_TIMEOUT
+        self.executor = None
+        self.lock = threading.Lock()
+        self.futures = {}  # 视频名 -> Future
+        self.results = {}  # 视频名 -> (是否成功, 用时)
+
+    def write_clips_table(self, video_name, output_folder):
+        """把视频的所有步骤表格合并成一个剪辑表文件，没有表格时返回 None"""
+        frames = []
+        for path in find_step_tables(output_folder):
+            try:
+                frames.append(read_table(path))
+            except Exception as e:
+                logger.warning(f"⚠️ 读取 {path.name} 失败: {e}")
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return None
+        suffix = ".parquet" if columnar_available() else ".xlsx"
+        return write_table(pd.concat(frames, ignore_index=True), self.work_dir / f"{Path(video_name).stem}{suffix}")
+
+    def submit(self, video_name, output_folder):
+        """提交一个视频的后期处理（剪辑表写好后立即返回）"""
+        if not self.script.exists():
+            logger.warning(f"⚠️ 找不到处理脚本，跳过后期处理: {self.script}")
+            return None
+        try:
+            clips_file = self.write_clips_table(video_name, output_folder)
+        except Exception as e:
+            logger.error(f"❌ 写入 {video_name} 的剪辑表失败: {e}")
+            return None
+        if clips_file is None:
+            logger.warning(f"⚠️ {video_name} 没有可用的剪辑表，跳过后期处理")
+            return None
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="postprocess")
+            logger.info(f"🎬 提交后期处理: {video_name}（后台 {self.workers} 个工作者）")
+            future = self.executor.submit(self._run, video_name, clips_file)
+            self.futures[video_name] = future
+        return future
+
+    def _run(self, video_name, clips_file):
+        """运行 process_video.py（在工作池线程中）"""
+        log_file = self.work_dir / f"{Path(video_name).stem}.log"
+        report_file = self.work_dir / f"{Path(video_name).stem}_render.csv"
+        start = time.time()
+        try:
+            with open(log_file, "w", encoding="utf-8") as log:
+                result = subprocess.run(
+                    [sys.executable, str(self.script), "--clips", str(clips_file), "--no-pause",
+                     "--workers", "1", "--threads", str(max(1, (os.cpu_count() or 1) // self.workers)),
+                     "--report", str(report_file)],
+                    cwd=str(self.script.parent),
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    timeout=self.timeout,
+                )
+            success = result.returncode == 0
+        except subprocess.TimeoutExpired:
+            logger.error(f"❌ {video_name} 后期处理超时（{self.timeout} 秒）")
+            success = False
+        except Exception as e:
+            logger.error(f"❌ {video_name} 后期处理出错: {e}")
+            success = False
+
+        elapsed = time.time() - start
+        with self.lock:
+            self.results[video_name] = (success, elapsed)
+        if success:
+            logger.info(f"✅ 后期处理完成: {video_name}（用时 {int(elapsed)} 秒）")
+        else:
+            logger.warning(f"⚠️ 后期处理失败: {video_name}（用时 {int(elapsed)} 秒），日志: {log_file}")
+        return success
+
+    def pending(self):
+        """还没完成的任务数"""
+        with self.lock:
+            return sum(1 for future in self.futures.values() if not future.done())
+
+    def wait(self):
+        """等待所有任务完成并输出统计，返回 {视频名: 是否成功}"""
+        pending = self.pending()
+        if pending:
+            logger.info(f"⏳ 等待 {pending} 个后期处理任务完成...")
+        with self.lock:
+            futures = list(self.futures.values())
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        with self.lock:
+            results = dict(self.results)
+        if results:
+            success = sum(1 for ok, _ in results.values() if ok)
+            total_time = sum(elapsed for _, elapsed in results.values())
+            logger.info(f"🎬 后期处理: 成功 {success}/{len(results)} 个视频，累计用时 {int(total_time)} 秒")
+        return {video: ok for video, (ok, _) in results.items()}
+
+    def shutdown(self, wait=True):
+        """关闭工作池（wait=False 时取消未开始的任务）"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
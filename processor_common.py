@@ -0,0 +1,758 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理器公共逻辑
+同步版 VideoProcessor 和异步版 AsyncVideoProcessor 共用的
+视频列表/提示词加载、响应解析和输出保存代码，避免两套实现各自演化
+"""
+
+import re
+import logging
+import pandas as pd
+
+from columnar_store import save_step_table
+from prompt_templates import get_prompt_templates
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessorCommonMixin:
+    """不依赖浏览器的公共方法
+
+    使用方需要提供以下属性：
+    process_folder, prompts_file, video_list_file
+    """
+
+    def load_video_list(self):
+        """加载视频列表"""
+        if not self.video_list_file.exists():
+            logger.error(f"❌ 找不到视频列表文件: {self.video_list_file}")
+            return []
+
+        try:
+            df = pd.read_csv(self.video_list_file)
+            
+            # 清理列名（去除前后空格）
+            df.columns = df.columns.str.strip()
+            
+            videos = []
+            for _, row in df.iterrows():
+                video_info = {
+                    "filename": row["Filename"],
+                    "duration": row["Duration"]
+                }
+                # 如果有line1和line2列，也加载进来
+                if "line1" in row:
+                    video_info["line1"] = row["line1"]
+                if "line2" in row:
+                    video_info["line2"] = row["line2"]
+                videos.append(video_info)
+            logger.info(f"✅ 加载了 {len(videos)} 个视频")
+            return videos
+        except Exception as e:
+            logger.error(f"❌ 读取视频列表失败: {e}")
+            logger.error(f"   可用的列名: {list(df.columns) if 'df' in locals() else '无法读取'}")
+            return []
+
+    def get_prompts_list(self, video_info=None):
+        """获取视频的所有提示词（步骤1-25）
+
+        prompts.xlsx 按修改时间缓存在内存中，占位符用 video_info 的字段渲染，
+        不改写提示词文件（并发工作者之间不需要加锁）。
+
+        Args:
+            video_info: 字典，包含 filename, duration, line1, line2 等字段；为 None 时使用 prompts.xlsx 第一行的值
+        """
+        prompts = get_prompt_templates(self.prompts_file).render(video_info)
+        if video_info:
+            logger.info(f"✅ 渲染提示词: {video_info.get('filename')} - {video_info.get('duration')}")
+            if "line1" in video_info:
+                logger.info(f"   line1: {video_info.get('line1')}")
+            if "line2" in video_info:
+                logger.info(f"   line2: {video_info.get('line2')}")
+        print(f"✅ 提取了 {len(prompts)} 个提示词")
+        return prompts
+
+    def parse_table_response(self, response_text):
+        """解析 AI 响应中的表格数据
+        
+        尝试从响应文本中提取结构化的表格数据
+        支持多种格式：Markdown表格、CSV格式、JSON格式等
+        能够处理空单元格和不完整的行
+        """
+        import re
+        import json
+        
+        if not response_text:
+            return None
+        
+        try:
+            # 方法1：尝试解析 Markdown 表格（改进版，支持空单元格）
+            lines = response_text.strip().split('\n')
+            table_data = []
+            headers = []
+            
+            for i, line in enumerate(lines):
+                # 跳过分隔线
+                if re.match(r'^[\s\-\|]+$', line):
+                    continue
+                
+                # 检查是否是表格行
+                if '|' in line:
+                    # 分割单元格，但保留空单元格
+                    cells = line.split('|')
+                    # 移除首尾的空单元格（Markdown 表格通常以 | 开头和结尾）
+                    if cells and not cells[0].strip():
+                        cells = cells[1:]
+                    if cells and not cells[-1].strip():
+                        cells = cells[:-1]
+                    # 清理每个单元格的空白
+                    cells = [cell.strip() for cell in cells]
+                    
+                    if cells:
+                        if not headers:
+                            # 第一行作为表头
+                            headers = cells
+                            logger.info(f"📋 检测到表头: {headers}")
+                        else:
+                            # 数据行：即使单元格数量不匹配也尝试解析
+                            row_dict = {}
+                            for j, header in enumerate(headers):
+                                # 如果该列有数据，使用数据；否则使用空字符串
+                                if j < len(cells):
+                                    row_dict[header] = cells[j] if cells[j] else ""
+                                else:
+                                    row_dict[header] = ""
+                            table_data.append(row_dict)
+            
+            if table_data:
+                logger.info(f"✅ 解析到 {len(table_data)} 行表格数据")
+                # 显示每列的非空数据统计
+                if headers:
+                    for header in headers:
+                        non_empty = sum(1 for row in table_data if row.get(header, ""))
+                        logger.info(f"  - {header}: {non_empty}/{len(table_data)} 行有数据")
+                return table_data
+            
+            # 方法2：尝试解析 JSON 格式
+            try:
+                # 查找 JSON 数组
+                json_match = re.search(r'\[[\s\S]*\]', response_text)
+                if json_match:
+                    json_data = json.loads(json_match.group())
+                    if isinstance(json_data, list) and json_data:
+                        logger.info(f"✅ 解析到 {len(json_data)} 行 JSON 数据")
+                        return json_data
+            except:
+                pass
+            
+            # 方法3：尝试解析 CSV 格式
+            try:
+                import io
+                import csv
+                try:
+                    # 使用更宽松的参数来处理列数不一致的问题
+                    csv_data = pd.read_csv(io.StringIO(response_text), on_bad_lines='skip')
+                    if not csv_data.empty:
+                        logger.info(f"✅ 解析到 {len(csv_data)} 行 CSV 数据")
+                        return csv_data.to_dict('records')
+                except Exception as e:
+                    logger.warning(f"⚠️ 使用pandas解析CSV失败: {e}")
+                    # 如果pandas解析失败，尝试手动解析并清洗数据
+                    lines = response_text.strip().split('\n')
+                    if len(lines) < 2:
+                        logger.warning("⚠️ CSV内容行数不足")
+                        return None
+                    
+                    # 解析表头
+                    header = lines[0].split(',')
+                    header = [h.strip() for h in header]
+                    logger.info(f"📋 CSV表头: {header}")
+                    
+                    # 解析数据行
+                    table_data = []
+                    for i, line in enumerate(lines[1:], 1):
+                        try:
+                            # 使用csv模块解析，处理引号和转义字符
+                            reader = csv.reader([line])
+                            row_data = next(reader)
+                            
+                            # 创建行字典，处理列数不匹配的情况
+                            row_dict = {}
+                            # 如果列数过多，丢弃后面多出的列（因为这些多出的列数据是空的）
+                            actual_data_length = len(row_data)
+                            header_length = len(header)
+                            
+                            # 处理列数不匹配的情况
+                            for j, header_col in enumerate(header):
+                                if j < actual_data_length:
+                                    row_dict[header_col] = row_data[j].strip()
+                                else:
+                                    row_dict[header_col] = ""  # 填充空值
+                            
+                            # 如果数据列比表头列多，检查多出的列是否都是空的，如果是则忽略
+                            if actual_data_length > header_length:
+                                extra_columns_empty = True
+                                for j in range(header_length, actual_data_length):
+                                    if row_data[j].strip():
+                                        extra_columns_empty = False
+                                        break
+                                
+                                if extra_columns_empty:
+                                    logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的空列，已丢弃")
+                                else:
+                                    logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的非空列")
+                            
+                            table_data.append(row_dict)
+                            logger.debug(f"  行 {i}: {row_dict}")
+                        except Exception as line_e:
+                            logger.warning(f"⚠️ 解析行 {i} 失败: {line_e}")
+                            continue
+                    
+                    if table_data:
+                        logger.info(f"✅ 手动解析CSV得到 {len(table_data)} 行数据")
+                        return table_data
+                    else:
+                        logger.warning("⚠️ 手动解析未获得有效数据")
+            except:
+                pass
+            
+            logger.warning("⚠️ 无法解析为结构化数据，将保存原始文本")
+            return None
+            
+        except Exception as e:
+            logger.error(f"❌ 解析表格数据失败: {e}")
+            import traceback
+            logger.debug(traceback.format_exc())
+            return None
+
+    def parse_csv_content(self, csv_content):
+        """解析复制按钮获取的CSV内容为表格数据
+        
+        Args:
+            csv_content: CSV内容字符串，或多个内容组成的列表（会跳过SRT格式的内容）
+            
+        Returns:
+            表格数据（字典列表），如果无法解析则返回None
+        """
+
+        try:
+            import io
+            import csv
+            if isinstance(csv_content, str):
+                # 单个CSV内容
+                # 检查是否是CSV格式（不是SRT）
+                # SRT格式的特征：包含 --> 时间箭头和 SRT 序号行
+                is_srt = ('-->' in csv_content and 
+                         re.search(r'^\d+$', csv_content.split('\n')[0] if csv_content.split('\n') else '', re.MULTILINE))
+
+                if is_srt:
+                    logger.warning("⚠️ 复制按钮内容是SRT格式，不是CSV，跳过")
+                else:
+                    # 修复CSV中的时间格式问题：将 00:00:00,000 改为 00:00:00.000
+                    # 因为CSV使用逗号分隔，时间中的逗号会被误认为列分隔符
+                    csv_content = re.sub(r'(\d{2}:\d{2}:\d{2}),(\d{3})', r'\1.\2', csv_content)
+
+                    # 去除每行尾部的多余逗号，避免列数不匹配
+                    lines = csv_content.strip().split('\n')
+                    cleaned_lines = [line.rstrip(',') for line in lines]
+                    csv_content = '\n'.join(cleaned_lines)
+
+                    logger.debug("🔧 已修复CSV格式（时间逗号改点号，去除行尾逗号）")
+
+                    # 使用更健壮的CSV解析方法
+                    try:
+                        # 先尝试使用pandas解析，使用更宽松的参数来处理列数不一致的问题
+                        df = pd.read_csv(io.StringIO(csv_content), on_bad_lines='skip')
+                        table_data = df.to_dict('records')
+                        logger.info(f"✅ 解析CSV得到 {len(table_data)} 行数据")
+                        return table_data
+                    except Exception as e:
+                        logger.warning(f"⚠️ 使用pandas解析CSV失败: {e}")
+                        # 如果pandas解析失败，尝试手动解析并清洗数据
+                        lines = csv_content.strip().split('\n')
+                        if len(lines) < 2:
+                            logger.warning("⚠️ CSV内容行数不足")
+                            return None
+
+                        # 解析表头
+                        header = lines[0].split(',')
+                        header = [h.strip() for h in header]
+                        logger.info(f"📋 CSV表头: {header}")
+
+                        # 解析数据行
+                        table_data = []
+                        for i, line in enumerate(lines[1:], 1):
+                            try:
+                                # 使用csv模块解析，处理引号和转义字符
+                                reader = csv.reader([line])
+                                row_data = next(reader)
+
+                                # 创建行字典，处理列数不匹配的情况
+                                row_dict = {}
+                                # 如果列数过多，丢弃后面多出的列（因为这些多出的列数据是空的）
+                                actual_data_length = len(row_data)
+                                header_length = len(header)
+
+                                # 处理列数不匹配的情况
+                                for j, header_col in enumerate(header):
+                                    if j < actual_data_length:
+                                        row_dict[header_col] = row_data[j].strip()
+                                    else:
+                                        row_dict[header_col] = ""  # 填充空值
+
+                                # 如果数据列比表头列多，检查多出的列是否都是空的，如果是则忽略
+                                if actual_data_length > header_length:
+                                    extra_columns_empty = True
+                                    for j in range(header_length, actual_data_length):
+                                        if row_data[j].strip():
+                                            extra_columns_empty = False
+                                            break
+
+                                    if extra_columns_empty:
+                                        logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的空列，已丢弃")
+                                    else:
+                                        logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的非空列")
+
+                                table_data.append(row_dict)
+                                logger.debug(f"  行 {i}: {row_dict}")
+                            except Exception as line_e:
+                                logger.warning(f"⚠️ 解析行 {i} 失败: {line_e}")
+                                continue
+
+                        if table_data:
+                            logger.info(f"✅ 手动解析CSV得到 {len(table_data)} 行数据")
+                            return table_data
+                        else:
+                            logger.warning("⚠️ 手动解析未获得有效数据")
+            else:
+                # 多个CSV内容，尝试每一个
+                logger.info(f"📋 获取到 {len(csv_content)} 个内容，尝试解析...")
+                for i, content in enumerate(csv_content, 1):
+                    # 检查是否是CSV格式（不是SRT）
+                    # SRT格式的特征：包含 --> 时间箭头和 SRT 序号行
+                    is_srt = ('-->' in content and 
+                             re.search(r'^\d+$', content.split('\n')[0] if content.split('\n') else '', re.MULTILINE))
+
+                    if is_srt:
+                        logger.info(f"⚠️ 内容 {i} 是SRT格式，跳过")
+                        continue
+
+                    # 修复CSV中的时间格式问题：将 00:00:00,000 改为 00:00:00.000
+                    content = re.sub(r'(\d{2}:\d{2}:\d{2}),(\d{3})', r'\1.\2', content)
+
+                    # 去除每行尾部的多余逗号，避免列数不匹配
+                    lines = content.strip().split('\n')
+                    cleaned_lines = [line.rstrip(',') for line in lines]
+                    content = '\n'.join(cleaned_lines)
+
+                    logger.debug(f"🔧 内容 {i}: 已修复CSV格式")
+
+                    try:
+                        # 使用更宽松的参数来处理列数不一致的问题
+                        df = pd.read_csv(io.StringIO(content), on_bad_lines='skip')
+                        table_data = df.to_dict('records')
+                        logger.info(f"✅ 从内容 {i} 解析CSV得到 {len(table_data)} 行数据")
+                        return table_data
+                    except Exception as e:
+                        logger.warning(f"⚠️ 解析内容 {i} 失败: {e}")
+                        continue
+        except Exception as e:
+            logger.warning(f"⚠️ 解析CSV失败: {e}")
+        
+        return None
+
+    def parse_dom_table(self, table):
+        """把 TABLES_EXTRACT_JS 返回的单个表格转换为表格数据（字典列表）
+
+        表头优先取 thead 第一行，其次取表格第一行（th 优先，没有则用 td）；
+        有 tbody 时数据行取 tbody 中的行，否则取第一行之后的所有行。
+        """
+        rows = table.get("rows", [])
+        if not rows:
+            return None
+
+        header_index = table["theadRows"][0] if table.get("theadRows") else 0
+        header_row = rows[header_index]
+        headers = header_row["th"] or header_row["td"]
+        if not headers:
+            logger.warning("⚠️ 未找到表头")
+            return None
+        logger.info(f"📋 表头: {headers}")
+
+        if table.get("tbodyRows"):
+            data_rows = [rows[i] for i in table["tbodyRows"]]
+        else:
+            data_rows = rows[1:]
+        logger.info(f"📊 找到 {len(data_rows)} 行数据")
+
+        table_data = []
+        for row in data_rows:
+            row_dict = {}
+            for col_index, text in enumerate(row["td"]):
+                if col_index < len(headers):
+                    row_dict[headers[col_index]] = text
+                else:
+                    row_dict[f"column_{col_index}"] = text
+            if row_dict:
+                table_data.append(row_dict)
+
+        if not table_data:
+            logger.warning("⚠️ 未提取到任何数据")
+            return None
+
+        logger.info(f"✅ 成功提取 {len(table_data)} 行数据")
+        for header in headers:
+            non_empty = sum(1 for row in table_data if row.get(header, ""))
+            logger.info(f"  - {header}: {non_empty}/{len(table_data)} 行有数据")
+        return table_data
+
+    def parse_srt_tables(self, tables):
+        """从 TABLES_EXTRACT_JS 返回的表格中找出 SRT 表格（序号/时间戳/内容）并拼接为 SRT 文本"""
+        all_srt_content = []
+
+        for table_idx, table in enumerate(tables):
+            rows = table.get("rows", [])
+            if len(rows) < 2:  # 至少需要表头和一行数据
+                continue
+
+            # 检查表头是否包含SRT相关列（序号、时间戳、内容）
+            header_text = rows[0]["text"].lower()
+            is_srt_table = ('时间戳' in header_text or 'timestamp' in header_text) and \
+                           ('序号' in header_text or '内容' in header_text or 'content' in header_text)
+            if not is_srt_table:
+                logger.debug(f"表格 {table_idx} 不是SRT表格")
+                continue
+
+            srt_entries = []
+            for row in rows[1:]:
+                cells = row["td"]
+                if len(cells) < 3:
+                    continue
+
+                seq_num, timestamp, content = cells[0], cells[1], cells[2]
+
+                # 清理时间戳格式（可能包含数学符号）
+                # 将 "−−>" 转换为 "-->"
+                timestamp = timestamp.replace('−', '-').replace('—', '--')
+                if '-->' not in timestamp:
+                    timestamp = timestamp.replace('--', ' --> ')
+
+                srt_entries.append(f"{seq_num}\n{timestamp}\n{content}\n")
+
+            if srt_entries:
+                all_srt_content.append('\n'.join(srt_entries))
+                logger.info(f"✅ 从表格 {table_idx} 提取了 {len(srt_entries)} 个SRT条目")
+
+        if all_srt_content:
+            logger.info(f"✅ 总共提取了 {len(all_srt_content)} 个SRT文件的内容")
+            return '\n'.join(all_srt_content)
+        return None
+
+    def _clean_srt_content(self, srt_text):
+        """清理SRT内容，移除UI元素和无关文本
+        
+        Args:
+            srt_text: 原始SRT文本
+            
+        Returns:
+            清理后的SRT文本
+        """
+        import re
+        
+        # 查找第一个SRT序号和时间戳
+        first_entry_match = re.search(r'^(\d+)\s+(\d{2}:\d{2}:\d{2},\d{3}\s+-->)', srt_text, re.MULTILINE)
+        
+        if first_entry_match:
+            # 从第一个SRT条目开始提取
+            start_pos = first_entry_match.start()
+            cleaned_text = srt_text[start_pos:].strip()
+            
+            # 移除末尾的UI元素和下一个文件的标题
+            # 策略：找到最后一个有效的SRT条目，移除之后的所有内容
+            lines = cleaned_text.split('\n')
+            
+            # 查找最后一个完整的SRT条目
+            # 完整的SRT条目包含：序号 + 时间戳 + 至少一行文本
+            last_subtitle_end = -1
+            i = 0
+            
+            while i < len(lines):
+                line = lines[i].strip()
+                
+                # 检查是否是序号（纯数字）
+                if re.match(r'^\d+$', line):
+                    # 检查下一行是否是时间戳
+                    if i + 1 < len(lines) and re.match(r'^\d{2}:\d{2}:\d{2},\d{3}\s+-->', lines[i + 1].strip()):
+                        # 找到一个SRT条目的开始
+                        # 查找这个条目的结束位置（下一个空行或文件结束）
+                        j = i + 2  # 从时间戳的下一行开始（字幕文本）
+                        subtitle_text_found = False
+                        
+                        while j < len(lines):
+                            current_line = lines[j].strip()
+                            
+                            # 空行表示条目结束
+                            if not current_line:
+                                if subtitle_text_found:
+                                    last_subtitle_end = j
+                                break
+                            
+                            # 检查是否是UI元素或无关内容
+                            is_ui_element = (
+                                current_line in ['code', 'Srt', 'download', 'content_copy', 'expand_less', 'expand_more'] or
+                                re.match(r'^(?:SRT\s*)?(?:文件|File)\s*[A-Z\d一二三四五六七八九十]+[：:]', current_line, re.IGNORECASE) or
+                                'Google Search' in current_line or
+                                'Display of Search' in current_line or
+                                re.match(r'^Step\s+\d+', current_line)
+                            )
+                            
+                            if is_ui_element:
+                                # 遇到UI元素，当前条目在此结束
+                                if subtitle_text_found:
+                                    last_subtitle_end = j
+                                break
+                            else:
+                                # 这是字幕文本
+                                subtitle_text_found = True
+                            
+                            j += 1
+                        else:
+                            # 到达文件末尾
+                            if subtitle_text_found:
+                                last_subtitle_end = len(lines)
+                        
+                        # 跳到这个条目之后
+                        i = j
+                        continue
+                
+                i += 1
+            
+            # 如果找到了有效的字幕条目，截取到最后一个条目
+            if last_subtitle_end > 0:
+                cleaned_text = '\n'.join(lines[:last_subtitle_end]).strip()
+                removed_lines = len(lines) - last_subtitle_end
+                if removed_lines > 0:
+                    logger.debug(f"✂️ 移除了末尾的 {removed_lines} 行无关内容")
+            
+            return cleaned_text
+        
+        # 如果没找到标准格式，返回原文本
+        return srt_text.strip()
+
+    def extract_and_save_srt_files(self, text_content, output_folder):
+        """从文本中提取并保存SRT文件
+        
+        Args:
+            text_content: 包含SRT内容的文本（字符串）或SRT内容列表（列表）
+            output_folder: 输出文件夹
+            
+        Returns:
+            保存的SRT文件列表
+        """
+        import re
+        
+        srt_files = []
+        
+        try:
+            # 如果输入是列表（从复制按钮获取的多个SRT文件）
+            if isinstance(text_content, list):
+                logger.info(f"📋 处理 {len(text_content)} 个SRT文件（来自复制按钮）")
+                for i, srt_content in enumerate(text_content, 1):
+                    # 清理每个SRT内容
+                    srt_content = self._clean_srt_content(srt_content)
+                    srt_file = output_folder / f"step_23_output_{i}.srt"
+                    with open(srt_file, "w", encoding="utf-8") as f:
+                        f.write(srt_content.strip())
+                    srt_files.append(srt_file)
+                    logger.info(f"✅ 保存SRT文件 {i}: {srt_file.name} ({len(srt_content)} 字符)")
+                return srt_files
+            # 清理文本：移除UI元素（如按钮文本）
+            # 常见的UI元素关键词
+            ui_keywords = [
+                'code', 'Srt', 'download', 'content_copy', 'expand_less', 'expand_more',
+                'Copy code', 'Download', 'Show more', 'Show less'
+            ]
+            
+            # 查找第一个SRT时间戳的位置
+            first_timestamp_match = re.search(r'\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->', text_content)
+            
+            if first_timestamp_match:
+                # 从第一个时间戳之前开始查找，移除UI元素
+                before_timestamp = text_content[:first_timestamp_match.start()]
+                
+                # 查找 expand_less 或类似的标记
+                expand_less_pos = before_timestamp.rfind('expand_less')
+                if expand_less_pos == -1:
+                    expand_less_pos = before_timestamp.rfind('expand_more')
+                
+                if expand_less_pos != -1:
+                    # 从 expand_less 之后开始提取内容
+                    logger.info(f"🔍 检测到UI元素标记，从位置 {expand_less_pos} 之后开始提取")
+                    text_content = text_content[expand_less_pos + len('expand_less'):].strip()
+                    logger.info(f"✂️ 清理后的内容长度: {len(text_content)} 字符")
+                else:
+                    # 尝试查找标题行（通常在第一个时间戳之前）
+                    # 移除第一个时间戳之前的所有内容（标题、按钮等）
+                    lines_before = before_timestamp.strip().split('\n')
+                    if len(lines_before) > 3:  # 如果有多行，可能包含UI元素
+                        logger.info(f"🔍 检测到 {len(lines_before)} 行前置内容，尝试清理")
+                        # 保留标题行（通常是第一行），移除其他UI元素
+                        text_content = text_content[first_timestamp_match.start():].strip()
+                        logger.info(f"✂️ 清理后的内容长度: {len(text_content)} 字符")
+            
+            # 方法1：查找明确标记的SRT文件（如 "文件1:" 或 "File 1:" 或 "SRT 文件 1："）
+            # 分割文本，查找多个SRT块
+            # 支持多种格式：
+            # - "文件1:" 或 "文件 1:"
+            # - "File 1:" 或 "File1:"
+            # - "SRT 1:" 或 "SRT1:"
+            # - "SRT 文件 1:" 或 "SRT文件1:"
+            srt_pattern = r'(?:SRT\s*文件|文件|File|SRT)\s*(\d+)\s*[：:](.*?)(?=(?:SRT\s*文件|文件|File|SRT)\s*\d+\s*[：:]|$)'
+            matches = re.findall(srt_pattern, text_content, re.DOTALL | re.IGNORECASE)
+            
+            if matches:
+                logger.info(f"📋 找到 {len(matches)} 个标记的SRT文件")
+                for i, (file_num, srt_content) in enumerate(matches, 1):
+                    # 清理每个SRT内容
+                    srt_content = self._clean_srt_content(srt_content)
+                    srt_file = output_folder / f"step_23_output_{file_num}.srt"
+                    with open(srt_file, "w", encoding="utf-8") as f:
+                        f.write(srt_content.strip())
+                    srt_files.append(srt_file)
+                    logger.info(f"✅ 保存SRT文件 {file_num}: {srt_file.name} ({len(srt_content)} 字符)")
+            else:
+                # 方法2：查找SRT格式的内容块（通过时间戳识别）
+                # SRT格式：序号 + 时间戳 + 文本
+                srt_block_pattern = r'(\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->\s+\d{2}:\d{2}:\d{2},\d{3}.*?)(?=\n\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->|\Z)'
+                
+                # 尝试分割成多个SRT文件（通过连续的空行或特定标记）
+                # 简单方法：如果文本很长，可能包含多个SRT文件，尝试按长度分割
+                if '00:00:00,000' in text_content or '00:00:00,0' in text_content:
+                    # 包含SRT时间戳，尝试保存
+                    # 检查是否有多个SRT文件（通过查找多个起始时间戳）
+                    start_timestamps = re.findall(r'^1\s+00:00:00', text_content, re.MULTILINE)
+                    
+                    if len(start_timestamps) > 1:
+                        # 多个SRT文件，尝试分割
+                        logger.info(f"📋 检测到 {len(start_timestamps)} 个SRT文件起始标记")
+                        parts = re.split(r'(?=^1\s+00:00:00)', text_content, flags=re.MULTILINE)
+                        parts = [p.strip() for p in parts if p.strip()]
+                        
+                        for i, part in enumerate(parts, 1):
+                            if part:
+                                # 清理每个SRT内容
+                                part = self._clean_srt_content(part)
+                                srt_file = output_folder / f"step_23_output_{i}.srt"
+                                with open(srt_file, "w", encoding="utf-8") as f:
+                                    f.write(part)
+                                srt_files.append(srt_file)
+                                logger.info(f"✅ 保存SRT文件 {i}: {srt_file.name} ({len(part)} 字符)")
+                    else:
+                        # 单个SRT文件
+                        text_content = self._clean_srt_content(text_content)
+                        srt_file = output_folder / "step_23_output_1.srt"
+                        with open(srt_file, "w", encoding="utf-8") as f:
+                            f.write(text_content.strip())
+                        srt_files.append(srt_file)
+                        logger.info(f"✅ 保存SRT文件: {srt_file.name} ({len(text_content)} 字符)")
+            
+            return srt_files
+            
+        except Exception as e:
+            logger.error(f"❌ 提取SRT文件失败: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return []
+
+    def save_output_data(self, video_name, step_outputs):
+        """保存输出数据（表格默认保存为 Parquet，见 STEP_OUTPUT_FORMAT）"""
+        output_folder = self.process_folder / video_name.replace(".mp4", "").replace(
+            ".MP4", ""
+        )
+        output_folder.mkdir(exist_ok=True)
+
+        logger.info(f"💾 保存输出数据到: {output_folder}")
+        logger.info(f"📊 待保存的步骤: {list(step_outputs.keys())}")
+
+        for step_num, data in step_outputs.items():
+            logger.info(f"🔍 处理步骤 {step_num}, 数据类型: {type(data)}, 数据长度: {len(data) if data else 0}")
+            
+            if not data:
+                logger.warning(f"⚠️ 步骤 {step_num} 数据为空，跳过")
+                continue
+
+            # 步骤23特殊处理：保存为SRT文件
+            if step_num == 23 and (isinstance(data, str) or isinstance(data, list)):
+                try:
+                    srt_files = self.extract_and_save_srt_files(data, output_folder)
+                    if srt_files:
+                        logger.info(f"✅ 步骤 23 保存了 {len(srt_files)} 个SRT文件")
+                        for srt_file in srt_files:
+                            logger.info(f"  - {srt_file.name}")
+                    else:
+                        logger.warning("⚠️ 步骤 23 未找到SRT文件内容，保存为文本")
+                        # 回退到保存为文本文件
+                        text_file = output_folder / f"step_{step_num}_output.txt"
+                        with open(text_file, "w", encoding="utf-8") as f:
+                            if isinstance(data, list):
+                                f.write('\n\n=== 文件分隔 ===\n\n'.join(data))
+                            else:
+                                f.write(data)
+                        logger.info(f"✅ 已保存为文本文件: {text_file.name}")
+                    continue
+                except Exception as e:
+                    logger.error(f"❌ 保存步骤 23 SRT文件失败: {e}")
+                    # 继续使用默认的保存逻辑
+
+            try:
+                # 如果是列表（从DOM直接提取的表格数据）
+                if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
+                    df = pd.DataFrame(data)
+                    logger.info(f"📊 步骤 {step_num} 数据: {len(df)} 行 x {len(df.columns)} 列")
+                    logger.info(f"📋 列名: {', '.join(df.columns.tolist())}")
+                    
+                # 如果是字符串，尝试解析为表格数据
+                elif isinstance(data, str):
+                    # 尝试解析表格数据
+                    parsed_data = self.parse_table_response(data)
+                    
+                    if parsed_data:
+                        # 成功解析为结构化数据
+                        df = pd.DataFrame(parsed_data)
+                        logger.info(f"📊 步骤 {step_num} 解析到 {len(df)} 行 x {len(df.columns)} 列数据")
+                        logger.info(f"📋 列名: {', '.join(df.columns.tolist())}")
+                    else:
+                        # 无法解析，保存为单列文本
+                        df = pd.DataFrame({"输出内容": [data]})
+                        logger.info(f"📝 步骤 {step_num} 保存为原始文本")
+                        
+                elif isinstance(data, dict):
+                    df = pd.DataFrame([data])
+                else:
+                    df = pd.DataFrame([{"数据": str(data)}])
+
+                # 写入表格文件（默认 Parquet，STEP_EXCEL_EXPORT 时另存 Excel）
+                output_file = save_step_table(df, output_folder, step_num)
+                
+                # 验证文件是否真的被创建
+                if output_file.exists():
+                    file_size = output_file.stat().st_size
+                    logger.info(f"✅ 保存步骤 {step_num} 数据: {output_file.name} ({file_size} 字节)")
+                else:
+                    logger.error(f"❌ 文件未创建: {output_file.name}")
+
+            except Exception as e:
+                logger.error(f"❌ 保存步骤 {step_num} 数据失败: {e}")
+
+                # 尝试保存为文本文件
+                try:
+                    text_file = output_folder / f"step_{step_num}_output.txt"
+                    with open(text_file, "w", encoding="utf-8") as f:
+                        f.write(str(data))
+                    logger.info(f"✅ 已保存为文本文件: {text_file.name}")
+                except Exception as e2:
+                    logger.error(f"❌ 保存文本文件也失败: {e2}")
+
+        return output_folder
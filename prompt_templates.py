@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板
+prompts.xlsx 只读取一次（按修改时间缓存，文件变化后自动重新加载），
+每个视频的提示词在内存中渲染，不再改写 prompts.xlsx。
+
+提示词中可以使用的占位符：
+  {视频名称} / {filename}       视频文件名
+  {视频时长} / {duration}       VideoList.csv 中的时长（原样，如 03:32.5）
+  {时长} / {duration_text}      中文时长（如 3分32秒）
+  {line1}                       VideoList.csv 的 line1
+  {line2} / {lin2}              VideoList.csv 的 line2
+未知的 {…} 原样保留。VideoList.csv 缺少某个字段时使用 prompts.xlsx 第一行的值。
+"""
+
+import logging
+import re
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+# 占位符 -> video_info 字段
+PLACEHOLDERS = {
+    "视频名称": "filename",
+    "filename": "filename",
+    "视频时长": "duration",
+    "duration": "duration",
+    "时长": "duration_text",
+    "duration_text": "duration_text",
+    "line1": "line1",
+    "line2": "line2",
+    "lin2": "line2",
+}
+
+# prompts.xlsx 第一行的列 -> video_info 字段（作为默认值）
+DEFAULT_COLUMNS = {
+    "视频名称": "filename",
+    "视频时长": "duration",
+    "line1": "line1",
+    "line2": "line2",
+    "lin2": "line2",  # 兼容 Excel 中的拼写错误
+}
+
+PLACEHOLDER_PATTERN = re.compile(r"\{([^{}\s]+)\}")
+
+
+def format_duration_text(duration):
+    """把 12:58 / 03:32.5 / 1:02:03 格式的时长转成 12分58秒 / 3分32秒 / 1小时2分3秒"""
+    text = str(duration).strip()
+    parts = text.split(":")
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        return text
+    if len(numbers) == 2:
+        hours, minutes, seconds = 0, numbers[0], numbers[1]
+    elif len(numbers) == 3:
+        hours, minutes, seconds = numbers
+    else:
+        return text
+    result = f"{int(minutes)}分{int(seconds)}秒"
+    return f"{int(hours)}小时{result}" if hours else result
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and pd.isna(value)) or not str(value).strip()
+
+
+def _text(value):
+    """单元格的文本（Excel/CSV 中的整数会被读成 223.0，还原为 223）"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def extract_templates(df):
+    """从提示词表格中提取提示词模板（步骤1-25）"""
+    templates = []
+    # 提示词在名称包含“步骤/step/提示”的列中，按步骤排列
+    for col in df.columns:
+        if "步骤" in col or "step" in col.lower() or "提示" in col:
+            for val in df[col].dropna():
+                if val and str(val).strip():
+                    templates.append(str(val).strip())
+
+    # 如果没有找到，尝试读取所有非空值
+    if not templates:
+        for _, row in df.iterrows():
+            for val in row.dropna():
+                if val and str(val).strip() and str(val) not in ["文件名称", "视频时长"]:
+                    templates.append(str(val).strip())
+    return templates
+
+
+def extract_defaults(df):
+    """prompts.xlsx 第一行的视频信息（VideoList.csv 缺少字段时使用）"""
+    defaults = {}
+    if df.empty:
+        return defaults
+    for column, field in DEFAULT_COLUMNS.items():
+        if column in df.columns and not _is_blank(df.iloc[0][column]):
+            defaults.setdefault(field, _text(df.iloc[0][column]))
+    return defaults
+
+
+def render_template(template, values):
+    """替换模板中的占位符（未知占位符原样保留）"""
+    def replace(match):
+        field = PLACEHOLDERS.get(match.group(1))
+        if field is None or field not in values:
+            return match.group(0)
+        return values[field]
+
+    return PLACEHOLDER_PATTERN.sub(replace, template)
+
+
+class PromptTemplates:
+    """prompts.xlsx 的内存缓存和渲染（线程安全，同一文件的所有工作者共用一个实例）"""
+
+    def __init__(self, prompts_file):
+        self.prompts_file = Path(prompts_file)
+        self.lock = threading.Lock()
+        self.signature = None  # (修改时间, 大小)
+        self.templates = []
+        self.defaults = {}
+
+    def load(self):
+        """返回提示词模板列表（文件未变化时直接使用缓存）"""
+        if not self.prompts_file.exists():
+            logger.error(f"❌ 找不到提示词文件: {self.prompts_file}")
+            return []
+
+        stat = self.prompts_file.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if signature != self.signature:
+                try:
+                    df = pd.read_excel(self.prompts_file)
+                except Exception as e:
+                    logger.error(f"❌ 读取提示词文件失败: {e}")
+                    return list(self.templates)
+                self.templates = extract_templates(df)
+                self.defaults = extract_defaults(df)
+                self.signature = signature
+                placeholders = sorted({m for t in self.templates for m in PLACEHOLDER_PATTERN.findall(t) if m in PLACEHOLDERS})
+                logger.info(
+                    f"✅ 加载提示词模板: {len(self.templates)} 个"
+                    + (f"，占位符 {', '.join(placeholders)}" if placeholders else "")
+                )
+            return list(self.templates)
+
+    def values_for(self, video_info=None):
+        """占位符的取值：prompts.xlsx 第一行作为默认值，VideoList.csv 的字段覆盖"""
+        values = dict(self.defaults)
+        for field in ("filename", "duration", "line1", "line2"):
+            if video_info and field in video_info and not _is_blank(video_info[field]):
+                values[field] = _text(video_info[field])
+        if "duration" in values:
+            values["duration_text"] = format_duration_text(values["duration"])
+        return values
+
+    def render(self, video_info=None):
+        """渲染一个视频的全部提示词"""
+        templates = self.load()
+        values = self.values_for(video_info)
+        return [render_template(template, values) for template in templates]
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_prompt_templates(prompts_file):
+    """同一个提示词文件共用一个 PromptTemplates（进程内只解析一次）"""
+    key = str(Path(prompts_file).resolve())
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = PromptTemplates(prompts_file)
+        return _instances[key]
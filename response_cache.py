@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型回复缓存（SQLite）
+每个步骤的回复按 (视频内容哈希, 到该步骤为止所有提示词的哈希) 缓存。
+提示词链前缀不变时回复可以复用：
+- 到最后一个需要保存的步骤都命中缓存：整个视频不再打开浏览器，直接使用缓存的输出
+- 前 k 步命中且有对话经过第 k 步（前缀一致）：打开该对话，删除第 k 步之后的轮次，从第 k+1 步继续
+缓存按总大小和存放时间淘汰。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    video_hash TEXT NOT NULL,
+    prefix_hash TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    text TEXT,                     -- 模型回复文本（可能为空）
+    output TEXT,                   -- SAVE_STEPS 的结构化输出（JSON）
+    chat_url TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (video_hash, prefix_hash)
+);
+CREATE TABLE IF NOT EXISTS chats (
+    chat_url TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    video_hash TEXT NOT NULL,
+    prefix_hash TEXT NOT NULL,     -- 该步骤对应的提示词链前缀
+    turns INTEGER NOT NULL,        -- 该步骤完成时对话中的模型回复数（截断对话时使用）
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (chat_url, step)
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+def prompt_prefix_hashes(prompts):
+    """每个步骤的提示词链前缀哈希：第 i 项覆盖提示词 1..i+1"""
+    hashes = []
+    digest = hashlib.sha256()
+    for prompt in prompts:
+        digest.update(str(prompt).encode("utf-8"))
+        digest.update(b"\0")
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+
+class ResponseCache:
+    """步骤回复缓存（线程安全）"""
+
+    def __init__(self, db_file=None, max_bytes=None, max_age_days=None):
+        self.db_file = Path(db_file or config.RESPONSE_CACHE_FILE)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+        self.max_age = (max_age_days if max_age_days is not None else config.RESPONSE_CACHE_MAX_AGE_DAYS) * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ==================== 写入 ====================
+
+    def put(self, video_hash, prefix_hash, step, text=None, chat_url=None, turns=None):
+        """记录步骤完成（回复文本、对话地址和此时对话中的模型回复数）"""
+        now = time.time()
+        size = len((text or "").encode("utf-8"))
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO responses (video_hash, prefix_hash, step, text, chat_url, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_hash, prefix_hash) DO UPDATE SET
+                    text = COALESCE(excluded.text, text),
+                    chat_url = COALESCE(excluded.chat_url, chat_url),
+                    size = MAX(size, excluded.size),
+                    accessed_at = excluded.accessed_at
+                """,
+                (video_hash, prefix_hash, step, text, chat_url, size, now, now),
+            )
+            if chat_url and turns is not None:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO chats (chat_url, step, video_hash, prefix_hash, turns, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (chat_url, step, video_hash, prefix_hash, turns, now),
+                )
+
+    def truncate_chat(self, chat_url, step):
+        """对话中第 step 步之后的轮次已删除：清除这些步骤的记录"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM chats WHERE chat_url = ? AND step > ?", (chat_url, step))
+
+    def put_output(self, video_hash, prefix_hash, step, output):
+        """记录步骤的结构化输出（表格行、SRT 内容等）"""
+        data = json.dumps(output, ensure_ascii=False, default=str)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO responses (video_hash, prefix_hash, step, output, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_hash, prefix_hash) DO UPDATE SET
+                    output = excluded.output,
+                    size = COALESCE(LENGTH(CAST(text AS BLOB)), 0) + excluded.size,
+                    accessed_at = excluded.accessed_at
+                """,
+                (video_hash, prefix_hash, step, data, len(data.encode("utf-8")), now, now),
+            )
+
+    # ==================== 读取 ====================
+
+    def cached_prefix_length(self, video_hash, prefix_hashes):
+        """从步骤 1 开始连续命中缓存的步骤数"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT prefix_hash FROM responses WHERE video_hash = ?", (video_hash,)
+            ).fetchall()
+        cached = {row["prefix_hash"] for row in rows}
+        count = 0
+        for prefix_hash in prefix_hashes:
+            if prefix_hash not in cached:
+                break
+            count += 1
+        return count
+
+    def outputs(self, video_hash, prefix_hashes, steps):
+        """读取指定步骤的结构化输出 {步骤: 输出}（缺少输出的步骤不包含在结果中）"""
+        result = {}
+        now = time.time()
+        with self.lock, self.conn:
+            for step in steps:
+                if step < 1 or step > len(prefix_hashes):
+                    continue
+                row = self.conn.execute(
+                    "SELECT output FROM responses WHERE video_hash = ? AND prefix_hash = ?",
+                    (video_hash, prefix_hashes[step - 1]),
+                ).fetchone()
+                if row and row["output"] is not None:
+                    result[step] = json.loads(row["output"])
+                    self.conn.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE video_hash = ? AND prefix_hash = ?",
+                        (now, video_hash, prefix_hashes[step - 1]),
+                    )
+        return result
+
+    def resumable_chat(self, video_hash, prefix_hashes, max_step):
+        """找到经过第 k 步（k <= max_step，取最大的 k）且前缀一致的对话
+
+        Returns:
+            (对话地址, k, 第 k 步完成时的模型回复数)，没有时返回 (None, 0, None)
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chat_url, step, prefix_hash, turns FROM chats WHERE video_hash = ? ORDER BY step DESC, updated_at DESC",
+                (video_hash,),
+            ).fetchall()
+        for row in rows:
+            step = row["step"]
+            if not 1 <= step <= min(max_step, len(prefix_hashes)) or prefix_hashes[step - 1] != row["prefix_hash"]:
+                continue
+            return row["chat_url"], step, row["turns"]
+        return None, 0, None
+
+    # ==================== 淘汰 ====================
+
+    def evict(self):
+        """删除过期的条目，总大小超过上限时按最近使用时间淘汰，返回删除的条目数"""
+        removed = 0
+        with self.lock, self.conn:
+            if self.max_age:
+                cursor = self.conn.execute("DELETE FROM responses WHERE accessed_at < ?", (time.time() - self.max_age,))
+                removed += cursor.rowcount
+                self.conn.execute("DELETE FROM chats WHERE updated_at < ?", (time.time() - self.max_age,))
+
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if self.max_bytes and total > self.max_bytes:
+                rows = self.conn.execute(
+                    "SELECT video_hash, prefix_hash, size FROM responses ORDER BY accessed_at"
+                ).fetchall()
+                for row in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute(
+                        "DELETE FROM responses WHERE video_hash = ? AND prefix_hash = ?",
+                        (row["video_hash"], row["prefix_hash"]),
+                    )
+                    total -= row["size"]
+                    removed += 1
+        if removed:
+            logger.info(f"🧹 回复缓存淘汰 {removed} 条")
+        return removed
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络层响应捕获
+监听 AI Studio 生成接口的响应，从网络数据中直接拼出模型回复的文本（Markdown），
+按步骤编号保存。启用后 extract_response 优先使用捕获的文本，不再依赖页面渲染结果。
+
+支持的响应格式：
+- Gemini API JSON（{"candidates": [{"content": {"parts": [{"text": ...}]}}]}），单个或数组
+- SSE 流（每行 "data: {...}"）
+- AI Studio 内部接口的嵌套数组格式（内容为 [[[null, "文本"], ...], "model"]）
+"""
+
+import json
+import logging
+import re
+import threading
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 去掉 JSON 防劫持前缀
+XSSI_PREFIX = ")]}'"
+
+FENCED_BLOCK_PATTERN = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+
+
+def _load_json_chunks(body):
+    """把响应体解析为 JSON 对象列表（兼容 SSE、XSSI 前缀、逐行 JSON）"""
+    text = body.strip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):].strip()
+    if not text:
+        return []
+
+    # SSE: data: {...}
+    if text.startswith("data:"):
+        chunks = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("data:"):
+                payload = line[len("data:"):].strip()
+                if payload and payload != "[DONE]":
+                    try:
+                        chunks.append(json.loads(payload))
+                    except json.JSONDecodeError:
+                        continue
+        return chunks
+
+    try:
+        return [json.loads(text)]
+    except json.JSONDecodeError:
+        pass
+
+    # 逐个解码连续的 JSON 值（流式接口可能把多个数组直接拼接）
+    decoder = json.JSONDecoder()
+    chunks = []
+    index = 0
+    while index < len(text):
+        while index < len(text) and text[index] in " \r\n\t,":
+            index += 1
+        if index >= len(text):
+            break
+        try:
+            value, index = decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            break
+        chunks.append(value)
+    return chunks
+
+
+def _texts_from_gemini(value):
+    """Gemini API JSON 中模型回复的文本片段（跳过 thought 部分）"""
+    texts = []
+    for candidate in value.get("candidates", []) or []:
+        content = candidate.get("content") or {}
+        for part in content.get("parts", []) or []:
+            if isinstance(part, dict) and isinstance(part.get("text"), str) and not part.get("thought"):
+                texts.append(part["text"])
+    return texts
+
+
+def _texts_from_nested(value):
+    """AI Studio 嵌套数组格式中模型回复的文本片段
+
+    查找形如 [parts, "model"] 的内容节点，parts 中每个片段为 [null, "文本", ...]。
+    """
+    texts = []
+    if isinstance(value, dict):
+        if "candidates" in value:
+            return _texts_from_gemini(value)
+        for item in value.values():
+            texts.extend(_texts_from_nested(item))
+        return texts
+
+    if not isinstance(value, list):
+        return texts
+
+    if (len(value) >= 2 and value[1] == "model" and isinstance(value[0], list)
+            and all(isinstance(part, list) for part in value[0])):
+        for part in value[0]:
+            if len(part) >= 2 and part[0] is None and isinstance(part[1], str):
+                texts.append(part[1])
+        return texts
+
+    for item in value:
+        texts.extend(_texts_from_nested(item))
+    return texts
+
+
+def parse_stream_text(body):
+    """从一个生成接口的响应体中拼出模型回复文本"""
+    texts = []
+    for chunk in _load_json_chunks(body):
+        texts.extend(_texts_from_nested(chunk))
+    return "".join(texts)
+
+
+def extract_code_blocks(markdown):
+    """提取 Markdown 中所有围栏代码块的内容"""
+    return [block.strip() for block in FENCED_BLOCK_PATTERN.findall(markdown or "") if block.strip()]
+
+
+class ResponseCapture:
+    """按步骤记录生成接口的响应
+
+    page.on("response") 只记录响应对象（流还在传输时就会触发），
+    读取文本时才调用 response.body()，此时流已经结束。
+    """
+
+    def __init__(self, url_patterns=None):
+        self.url_patterns = url_patterns or config.RESPONSE_CAPTURE_URL_PATTERNS
+        self.lock = threading.Lock()
+        self.current_step = None
+        self.responses = {}  # 步骤编号 -> [[response, ...], ...]（每一轮对话一个列表，"继续"等补充提示词另起一轮）
+        self.texts = {}  # 步骤编号 -> 已解析的文本（缓存）
+        self.page = None
+
+    def attach(self, page):
+        """开始监听页面（切换页面时重新调用即可）"""
+        if self.page is not None:
+            try:
+                self.page.remove_listener("response", self._on_response)
+            except Exception:
+                pass
+        self.page = page
+        page.on("response", self._on_response)
+
+    def matches(self, url):
+        """URL 是否为生成接口"""
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def begin_step(self, step_number):
+        """开始新的步骤，之后捕获的响应都记到该步骤下"""
+        with self.lock:
+            self.current_step = step_number
+            self.responses[step_number] = [[]]
+            self.texts.pop(step_number, None)
+
+    def begin_turn(self):
+        """当前步骤开始新的一轮（如 Content blocked 后发送的"继续"），步骤的回复改为取最后一轮"""
+        with self.lock:
+            if self.current_step is not None:
+                self.responses.setdefault(self.current_step, []).append([])
+                self.texts.pop(self.current_step, None)
+
+    def reset(self):
+        """清空所有记录（开始处理新视频时调用）"""
+        with self.lock:
+            self.current_step = None
+            self.responses.clear()
+            self.texts.clear()
+
+    def _on_response(self, response):
+        if self.current_step is None or not self.matches(response.url):
+            return
+        with self.lock:
+            turns = self.responses.setdefault(self.current_step, [[]])
+            turns[-1].append(response)
+            self.texts.pop(self.current_step, None)
+
+    def text_for_step(self, step_number):
+        """步骤的模型回复文本：最后一轮有内容的回复（与从页面读取最后一条回复一致，
+        同一轮中的多次生成按顺序拼接），没有捕获到时返回空字符串"""
+        with self.lock:
+            if step_number in self.texts:
+                return self.texts[step_number]
+            turns = [list(turn) for turn in self.responses.get(step_number, [])]
+
+        text = ""
+        for responses in reversed(turns):
+            parts = []
+            for response in responses:
+                try:
+                    part = parse_stream_text(response.text())
+                except Exception as e:
+                    logger.debug(f"读取生成接口响应失败: {e}")
+                    continue
+                if part:
+                    parts.append(part)
+            if parts:
+                text = "\n".join(parts)
+                break
+        with self.lock:
+            self.texts[step_number] = text
+        return text
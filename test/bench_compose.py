@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频合成性能对比
+用 ffmpeg lavfi 生成主视频（带音轨）、画中画和片尾素材，
+对比 moviepy 逐帧合成（process_videos_moviepy）和一个 ffmpeg filter_complex 合成（compose_video）
+
+运行: python test/bench_compose.py [主视频秒数]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "assets" / "vidoes"))
+
+from ffmpeg_compose import compose_video, probe_media  # noqa: E402
+from upload_proxy import find_ffmpeg  # noqa: E402
+
+
+def make_video(ffmpeg, path, duration, size, audio=True):
+    """lavfi 测试画面（可选 440Hz 音轨）"""
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=25:duration={duration}"]
+    if audio:
+        cmd += ["-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}", "-c:a", "aac"]
+    cmd += ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-shortest", str(path)]
+    subprocess.run(cmd, check=True)
+
+
+def bench(name, func):
+    """运行一次，返回 (结果, 秒数)"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {name}: {elapsed:.1f} 秒")
+    return result, elapsed
+
+
+def main():
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        print("❌ 找不到 ffmpeg")
+        return 1
+    ffprobe = shutil.which("ffprobe") or "ffprobe"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work = Path(tmp_dir)
+        main_path, pip_path, outro_path = work / "main.mp4", work / "pip.mp4", work / "outro.mp4"
+        print("🎞️ 生成测试素材...")
+        make_video(ffmpeg, main_path, duration, "1280x720")
+        make_video(ffmpeg, pip_path, 20, "640x360", audio=False)
+        make_video(ffmpeg, outro_path, 5, "1280x720")
+        arrow_path, text_path = work / "arrow.png", work / "text.png"
+        Image.new("RGBA", (130, 130), (255, 0, 0, 255)).save(arrow_path)
+        Image.new("RGBA", (350, 100), (0, 0, 255, 255)).save(text_path)
+
+        # process_video.py 导入时会创建 OUTPUT_DIR 等文件夹：在临时目录中导入，并使用本机的 ffmpeg
+        os.chdir(work)
+        import process_video as pv
+        pv.FFMPEG_CMD, pv.FFPROBE_CMD = ffmpeg, ffprobe
+        pv.PIP_START_TIME = min(pv.PIP_START_TIME, duration // 2)
+        layout = {
+            'arrow_size': pv.ARROW_SIZE, 'arrow_pos_x': pv.ARROW_POS_X,
+            'text_width': pv.TEXT_SIZE_WIDTH, 'text_pos_x': pv.TEXT_POS_X, 'position_y': pv.POSITION_Y,
+            'bounce_speed': pv.BOUNCE_SPEED, 'bounce_height': pv.BOUNCE_HEIGHT, 'pip_start': pv.PIP_START_TIME,
+        }
+
+        print(f"📊 主视频 {duration} 秒 1280x720，画中画从第 {pv.PIP_START_TIME} 秒开始，片尾 5 秒")
+        moviepy_out, ffmpeg_out = work / "out_moviepy.mp4", work / "out_ffmpeg.mp4"
+        moviepy_ok, moviepy_s = bench("moviepy 逐帧合成", lambda: pv.process_videos_moviepy(
+            str(main_path), str(moviepy_out), str(arrow_path), str(text_path), str(pip_path), str(outro_path)))
+        ffmpeg_ok, ffmpeg_s = bench("ffmpeg 一次合成", lambda: compose_video(
+            ffmpeg, ffprobe, main_path, ffmpeg_out, layout, arrow_path, text_path,
+            pip_path=pip_path, outro_path=outro_path, enable_resize=pv.ENABLE_RESIZE, target_width=pv.TARGET_WIDTH,
+            output_args=["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"]))
+        os.chdir(ROOT)
+
+        if not (moviepy_ok and ffmpeg_ok):
+            print("❌ 合成失败")
+            return 1
+        for name, path in (("moviepy", moviepy_out), ("ffmpeg", ffmpeg_out)):
+            info = probe_media(ffmpeg, ffprobe, path)
+            print(f"  {name} 输出: {info['width']}x{info['height']}，{info['duration']:.1f} 秒")
+        print(f"\n⚡ 提速 {moviepy_s / ffmpeg_s:.1f} 倍")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
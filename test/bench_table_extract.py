@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表格提取性能对比
+用 page.set_content 加载 html/step25ret.html（步骤25的真实响应），
+对比逐个单元格 inner_text 的旧实现和一次 evaluate 的批量实现
+
+运行: python test/bench_table_extract.py [重复次数]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from playwright.sync_api import sync_playwright
+
+from video_automation import VideoProcessor
+
+HTML_FILE = Path(__file__).parent.parent / "html" / "step25ret.html"
+
+
+def legacy_extract_table_from_dom(response_element):
+    """旧实现：通过 locator 逐个单元格读取（每个单元格一次浏览器往返）"""
+    table = response_element.locator('table').all()[-1]
+
+    headers = []
+    thead_rows = table.locator('thead tr').all()
+    first_row = thead_rows[0] if thead_rows else table.locator('tr').all()[0]
+    header_cells = first_row.locator('th').all() or first_row.locator('td').all()
+    for cell in header_cells:
+        headers.append(cell.inner_text().strip())
+
+    all_rows = table.locator('tr').all()
+    data_rows = table.locator('tbody tr').all() or all_rows[1:]
+
+    table_data = []
+    for row in data_rows:
+        row_dict = {}
+        for col_index, cell in enumerate(row.locator('td').all()):
+            text = cell.inner_text().strip()
+            key = headers[col_index] if col_index < len(headers) else f"column_{col_index}"
+            row_dict[key] = text
+        if row_dict:
+            table_data.append(row_dict)
+    return table_data
+
+
+def bench(name, func, repeat):
+    """运行 repeat 次，返回 (结果, 平均毫秒)"""
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"  {name}: {elapsed_ms:.1f} ms/次")
+    return result, elapsed_ms
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    processor = VideoProcessor()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(HTML_FILE.read_text(encoding="utf-8"))
+        response_element = page.locator('[data-turn-role="Model"]').last
+
+        print(f"📊 {HTML_FILE.name}，每种实现运行 {repeat} 次")
+        legacy_rows, legacy_ms = bench("旧实现（逐单元格）", lambda: legacy_extract_table_from_dom(response_element), repeat)
+        bulk_rows, bulk_ms = bench("批量实现（一次 evaluate）", lambda: processor.extract_table_from_dom(response_element), repeat)
+
+        browser.close()
+
+    assert legacy_rows == bulk_rows, "两种实现的结果不一致"
+    print(f"\n✅ 结果一致: {len(bulk_rows)} 行 × {len(bulk_rows[0]) if bulk_rows else 0} 列")
+    print(f"⚡ 提速 {legacy_ms / bulk_ms:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
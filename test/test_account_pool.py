@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试账号池调度逻辑
+不启动浏览器，只使用临时目录中的 storage_state 文件
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from account_pool import AccountPool
+
+
+def make_pool(tmp_dir, accounts, daily_quota=3, cooldown=60):
+    """在临时目录中创建账号池"""
+    state_dir = Path(tmp_dir) / "accounts"
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for account in accounts:
+        (state_dir / f"{account}.json").write_text("{}", encoding="utf-8")
+    return AccountPool(
+        state_dir=state_dir,
+        pool_file=Path(tmp_dir) / "account_pool.json",
+        daily_quota=daily_quota,
+        cooldown=cooldown,
+    )
+
+
+def test_acquire_prefers_most_remaining_quota():
+    """分配剩余配额最多的账号"""
+    print("🧪 测试按剩余配额分配...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = make_pool(tmp_dir, ["a@example.com", "b@example.com"])
+
+        account = pool.acquire()
+        assert account == "a@example.com"
+        pool.release(account, used=True)
+
+        # a 已用 1 次，b 剩余更多
+        assert pool.acquire() == "b@example.com"
+        # b 正在使用中，只能分配 a
+        assert pool.acquire() == "a@example.com"
+        # 两个账号都在使用中
+        assert pool.acquire() is None
+    print("✅ 通过")
+
+
+def test_rate_limit_cooldown_reroutes():
+    """速率限制的账号进入冷却，调度改派给其他账号"""
+    print("🧪 测试速率限制冷却...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = make_pool(tmp_dir, ["a@example.com", "b@example.com"])
+
+        pool.mark_rate_limited(pool.acquire())
+        assert pool.cooldown_remaining("a@example.com") > 0
+        assert pool.acquire() == "b@example.com"
+        pool.release("b@example.com")
+
+        # 只剩 b 可用
+        assert pool.acquire(exclude={"b@example.com"}) is None
+        assert pool.next_available_in() == 0
+
+        # 两个账号都在冷却，需要等待
+        pool.mark_rate_limited(pool.acquire())
+        assert pool.acquire() is None
+        assert 0 < pool.next_available_in() <= 60
+    print("✅ 通过")
+
+
+def test_usage_survives_restart():
+    """用量和冷却时间在重启后保留，跨天时重置当日计数"""
+    print("🧪 测试持久化...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = make_pool(tmp_dir, ["a@example.com"], daily_quota=2)
+        pool.release(pool.acquire(), used=True)
+        pool.release(pool.acquire(), used=True)
+        assert pool.acquire() is None
+        assert pool.next_available_in() is None
+
+        restarted = make_pool(tmp_dir, ["a@example.com"], daily_quota=2)
+        assert restarted.remaining_quota("a@example.com") == 0
+        assert restarted.acquire() is None
+
+        # 模拟前一天的记录
+        pool_file = Path(tmp_dir) / "account_pool.json"
+        data = json.loads(pool_file.read_text(encoding="utf-8"))
+        data["accounts"]["a@example.com"]["date"] = "2000-01-01"
+        data["accounts"]["a@example.com"]["cooldown_until"] = time.time() - 1
+        pool_file.write_text(json.dumps(data), encoding="utf-8")
+
+        next_day = make_pool(tmp_dir, ["a@example.com"], daily_quota=2)
+        assert next_day.remaining_quota("a@example.com") == 2
+        assert next_day.acquire() == "a@example.com"
+        assert next_day.usage["a@example.com"]["total_used"] == 2
+    print("✅ 通过")
+
+
+def test_session_account_charged_per_video():
+    """单进程模式通过已保存会话切换账号后，每完成一个视频计入一个配额"""
+    print("🧪 测试单进程模式的配额计数...")
+    from video_automation import VideoProcessor
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = make_pool(tmp_dir, ["a@example.com", "b@example.com"], daily_quota=5)
+        processor = VideoProcessor.__new__(VideoProcessor)
+        processor.account_pool = None
+        processor.session_pool = pool
+        processor.current_account = "a@example.com"
+        processor.session_account = None
+        processor.unavailable_accounts = set()
+        processor.switched_accounts = set()
+        processor.save_account_state = lambda account=None: True
+
+        def open_account_context(account, state_file):
+            processor.current_account = account
+            return True
+
+        processor.open_account_context = open_account_context
+        assert processor.switch_account_via_storage_state()
+        assert processor.current_account == "b@example.com"
+        processor.charge_session_account()
+        processor.charge_session_account()
+        assert pool.usage["b@example.com"]["used_today"] == 2
+        assert pool.usage["a@example.com"]["rate_limits"] == 1
+
+        # 之后通过账号菜单切换到其他账号：不再计入 b 的配额
+        processor.current_account = "c@example.com"
+        processor.charge_session_account()
+        assert pool.usage["b@example.com"]["used_today"] == 2
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_acquire_prefers_most_remaining_quota()
+    test_rate_limit_cooldown_reroutes()
+    test_usage_survives_restart()
+    test_session_account_charged_per_video()
+    print("\n🎉 所有测试通过")
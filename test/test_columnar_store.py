@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试列式输出存储
+验证步骤表格保存为 Parquet（混合类型的列也能保存）、旧的 Excel 输出仍可读取、切换格式后不读到旧输出，
+以及合并数据集只重写有变化的视频分区
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from columnar_store import ClipsDataset, find_step_tables, read_table, save_step_table, step_table_path
+from config import config
+
+
+def test_save_step_table():
+    """步骤表格保存为 Parquet，读取结果与原数据一致"""
+    print("🧪 测试步骤表格保存...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = Path(tmp_dir)
+        df = pd.DataFrame([
+            {"filename": "Episode1.mp4", "start": "00:00:01", "folder3": 1},
+            {"filename": "Episode1.mp4", "start": 12.5, "folder3": "2"},
+        ])
+        path = save_step_table(df, folder, 25)
+        assert path.suffix == f".{config.STEP_OUTPUT_FORMAT}"
+        assert step_table_path(folder, 25) == path
+
+        loaded = read_table(path)
+        assert loaded["start"].tolist() == ["00:00:01", "12.5"]
+        assert loaded["folder3"].astype(str).tolist() == ["1", "2"]
+
+        # 只有旧的 Excel 输出时也能找到
+        pd.DataFrame([{"a": 1}]).to_excel(folder / "step_24_output.xlsx", index=False)
+        assert step_table_path(folder, 24).suffix == ".xlsx"
+    print("✅ 通过")
+
+
+def test_switch_output_format():
+    """切换 STEP_OUTPUT_FORMAT 后重新保存，读取到的是新的输出（旧格式的文件被删除）"""
+    print("🧪 测试切换输出格式...")
+    original = config.STEP_OUTPUT_FORMAT, config.STEP_EXCEL_EXPORT
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            folder = Path(tmp_dir)
+            config.STEP_OUTPUT_FORMAT, config.STEP_EXCEL_EXPORT = "parquet", False
+            save_step_table(pd.DataFrame([{"value": 1}]), folder, 25)
+
+            config.STEP_OUTPUT_FORMAT = "xlsx"
+            path = save_step_table(pd.DataFrame([{"value": 2}]), folder, 25)
+            assert path.suffix == ".xlsx"
+            assert sorted(p.name for p in folder.iterdir()) == ["step_25_output.xlsx"]
+            assert step_table_path(folder, 25) == path and find_step_tables(folder) == [path]
+            assert read_table(step_table_path(folder, 25))["value"].tolist() == [2]
+
+            # 切回列式格式并导出 Excel 副本：两份内容一致
+            config.STEP_OUTPUT_FORMAT, config.STEP_EXCEL_EXPORT = "feather", True
+            path = save_step_table(pd.DataFrame([{"value": 3}]), folder, 25)
+            assert sorted(p.name for p in folder.iterdir()) == ["step_25_output.feather", "step_25_output.xlsx"]
+            assert find_step_tables(folder) == [path]
+            assert read_table(folder / "step_25_output.xlsx")["value"].tolist() == [3]
+    finally:
+        config.STEP_OUTPUT_FORMAT, config.STEP_EXCEL_EXPORT = original
+    print("✅ 通过")
+
+
+def test_dataset_rewrites_changed_partitions():
+    """合并数据集只重写输出有变化的视频"""
+    print("🧪 测试合并数据集...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process_folder = Path(tmp_dir) / "Process_Folder"
+        (process_folder / "videos").mkdir(parents=True)
+        for video in ("Episode1", "Episode2"):
+            (process_folder / video).mkdir()
+            save_step_table(pd.DataFrame([{"filename": f"{video}.mp4", "start": "00:01"}]), process_folder / video, 25)
+
+        dataset = ClipsDataset(Path(tmp_dir) / "clips_dataset")
+        assert dataset.update(process_folder) == 2
+        first = dataset.partition_path("Episode1").stat().st_mtime_ns
+
+        save_step_table(
+            pd.DataFrame([{"filename": "Episode2.mp4", "start": "00:01"}, {"filename": "Episode2.mp4", "start": "00:05"}]),
+            process_folder / "Episode2",
+            25,
+        )
+        assert dataset.update(process_folder) == 3
+        assert dataset.partition_path("Episode1").stat().st_mtime_ns == first
+        assert dataset.read()["filename"].tolist() == ["Episode1.mp4", "Episode2.mp4", "Episode2.mp4"]
+
+        # 删除视频后分区也被删除
+        for path in (process_folder / "Episode1").iterdir():
+            path.unlink()
+        (process_folder / "Episode1").rmdir()
+        assert dataset.update(process_folder) == 2
+        assert not dataset.partition_path("Episode1").exists()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_save_step_table()
+    test_switch_output_format()
+    test_dataset_rewrites_changed_partitions()
+    print("\n🎉 所有测试通过")
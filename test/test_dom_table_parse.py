@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量表格提取结果的解析（不启动浏览器）
+输入为 TABLES_EXTRACT_JS 在页面中返回的结构
+"""
+
+from video_automation import VideoProcessor
+
+
+def row(th=(), td=()):
+    """构造一行（text 与浏览器 innerText 一样用制表符连接单元格）"""
+    return {"th": list(th), "td": list(td), "text": "\t".join(list(th) + list(td))}
+
+
+def test_thead_tbody_table():
+    """thead + tbody 表格：表头取 thead，数据取 tbody"""
+    print("🧪 测试 thead/tbody 表格...")
+    table = {
+        "rows": [
+            row(th=["开始", "结束", "标题"]),
+            row(td=["00:00:01:00", "00:00:05:00", "第一段"]),
+            row(td=["00:00:06:00", "00:00:09:00", "第二段", "多余"]),
+        ],
+        "theadRows": [0],
+        "tbodyRows": [1, 2],
+    }
+    data = VideoProcessor().parse_dom_table(table)
+    assert data == [
+        {"开始": "00:00:01:00", "结束": "00:00:05:00", "标题": "第一段"},
+        {"开始": "00:00:06:00", "结束": "00:00:09:00", "标题": "第二段", "column_3": "多余"},
+    ]
+    print("✅ 通过")
+
+
+def test_td_header_table():
+    """没有 thead、表头为 td 的表格：表头取第一行，tbody 中 th 行被跳过"""
+    print("🧪 测试 td 表头表格...")
+    table = {
+        "rows": [
+            row(td=["a", "b"]),
+            row(td=["1", "2"]),
+        ],
+        "theadRows": [],
+        "tbodyRows": [],
+    }
+    assert VideoProcessor().parse_dom_table(table) == [{"a": "1", "b": "2"}]
+
+    table = {
+        "rows": [row(th=["a", "b"]), row(td=["1", "2"])],
+        "theadRows": [],
+        "tbodyRows": [0, 1],
+    }
+    assert VideoProcessor().parse_dom_table(table) == [{"a": "1", "b": "2"}]
+    print("✅ 通过")
+
+
+def test_srt_table():
+    """SRT 表格（序号/时间戳/内容）转换为 SRT 文本"""
+    print("🧪 测试 SRT 表格...")
+    tables = [
+        {"rows": [row(th=["名称"]), row(td=["忽略"])], "theadRows": [], "tbodyRows": []},
+        {
+            "rows": [
+                row(th=["序号", "时间戳", "内容"]),
+                row(td=["1", "00:00:01,000 −−> 00:00:02,000", "你好"]),
+                row(td=["2", "00:00:03,000 --> 00:00:04,000", "再见"]),
+            ],
+            "theadRows": [0],
+            "tbodyRows": [1, 2],
+        },
+    ]
+    srt = VideoProcessor().parse_srt_tables(tables)
+    assert srt == (
+        "1\n00:00:01,000 --> 00:00:02,000\n你好\n"
+        "\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n再见\n"
+    )
+    assert VideoProcessor().parse_srt_tables(tables[:1]) is None
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_thead_tbody_table()
+    test_td_header_table()
+    test_srt_table()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试导出 clips.xlsx
+从合并数据集导出的结果应与读取所有步骤输出一致；每次导出都全量重写
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from columnar_store import ClipsDataset, columnar_available
+from excel_merge import export_clips_excel
+
+
+def write_output(process_folder, video, step, rows):
+    folder = Path(process_folder) / video
+    folder.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_excel(folder / f"step_{step}_output.xlsx", index=False)
+
+
+def read_clips(clips_file):
+    return pd.read_excel(clips_file).astype(str)
+
+
+def test_export_from_dataset_matches_sources():
+    """从合并数据集导出与读取所有步骤输出一致"""
+    print("🧪 测试从合并数据集导出...")
+    if not columnar_available():
+        pytest.skip("未安装 pyarrow")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process_folder = Path(tmp_dir) / "Process_Folder"
+        (process_folder / "videos").mkdir(parents=True)
+        write_output(process_folder, "Episode1", 25, [{"故事": 1, "开始": "00:01"}, {"故事": 2, "开始": "00:09"}])
+        write_output(process_folder, "Episode2", 25, [{"故事": 1, "开始": "00:05", "备注": "新列"}])
+        dataset_dir = Path(tmp_dir) / "clips_dataset"
+        ClipsDataset(dataset_dir).update(process_folder)
+
+        assert export_clips_excel(process_folder, Path(tmp_dir) / "from_sources.xlsx") == 3
+        assert export_clips_excel(process_folder, Path(tmp_dir) / "from_dataset.xlsx", dataset_dir) == 3
+        pd.testing.assert_frame_equal(read_clips(Path(tmp_dir) / "from_sources.xlsx"),
+                                      read_clips(Path(tmp_dir) / "from_dataset.xlsx"))
+    print("✅ 通过")
+
+
+def test_export_rewrites_clips():
+    """clips.xlsx 被手动修改、源文件删除后，再次导出全量重写"""
+    print("🧪 测试全量导出...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process_folder = Path(tmp_dir) / "Process_Folder"
+        clips_file = Path(tmp_dir) / "clips.xlsx"
+        write_output(process_folder, "Episode1", 25, [{"故事": 1}])
+        write_output(process_folder, "Episode2", 25, [{"故事": 2}])
+        assert export_clips_excel(process_folder, clips_file) == 2
+
+        pd.DataFrame([{"故事": 9}, {"故事": 9}]).to_excel(clips_file, index=False)
+        (process_folder / "Episode2" / "step_25_output.xlsx").unlink()
+        assert export_clips_excel(process_folder, clips_file) == 1
+        assert read_clips(clips_file)["故事"].tolist() == ["1"]
+        assert not (Path(tmp_dir) / "~tmp_clips.xlsx").exists()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_export_from_dataset_matches_sources()
+    test_export_rewrites_clips()
+    print("\n🎉 所有测试通过")
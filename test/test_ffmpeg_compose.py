@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 ffmpeg 合成（assets/vidoes/ffmpeg_compose.py）
+验证滤镜图结构，以及带画中画和片尾的合成结果（尺寸、时长、音轨）
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "assets" / "vidoes"))
+
+from ffmpeg_compose import build_compose_graph, compose_video, output_size, probe_media  # noqa: E402
+from upload_proxy import find_ffmpeg  # noqa: E402
+
+
+LAYOUT = {
+    "arrow_size": (130, 130),
+    "arrow_pos_x": 0.95,
+    "text_width": 350,
+    "text_pos_x": 0.82,
+    "position_y": 0.35,
+    "bounce_speed": 6.0,
+    "bounce_height": 20,
+    "pip_start": 30,
+}
+
+
+def test_build_graph():
+    """缩放、画中画、文案、跳动的箭头和片尾 concat"""
+    print("🧪 测试合成滤镜图...")
+    assert output_size(1920, 1080, True, 1080) == (1080, 608)
+    assert output_size(720, 1280, True, 1080) == (720, 1280)
+    assert output_size(1920, 1080, False, 1080) == (1920, 1080)
+
+    main = {"width": 1920, "height": 1080, "fps": 25.0, "duration": 40.0, "has_audio": True}
+    pip = {"width": 640, "height": 360, "fps": 25.0, "duration": 20.0, "has_audio": False}
+    outro = {"width": 1280, "height": 720, "fps": 30.0, "duration": 5.0, "has_audio": False}
+    graph, video, audio = build_compose_graph(main, (1080, 608), LAYOUT, pip=pip, outro=outro)
+    assert graph.startswith("[0:v]scale=1080:608,setsar=1[base];[3:v]scale=1080:-2,setsar=1,setpts=PTS-STARTPTS+30/TB[pip];")
+    assert "[base][pip]overlay=x=(W-w)/2:y=0:eof_action=pass[withpip]" in graph
+    assert "[withpip][text]overlay=x=W*0.82-w/2:y=H*0.35-h-10[withtext]" in graph
+    assert "[withtext][arrow]overlay=x=W*0.95-65:y=H*0.35+sin(6*t)*20,format=yuv420p[main]" in graph
+    assert "[4:v]scale=1080:608,setsar=1,fps=25,format=yuv420p[outro]" in graph
+    assert "anullsrc=r=44100:cl=stereo,atrim=duration=5[outroaudio]" in graph
+    assert graph.endswith("[main][mainaudio][outro][outroaudio]concat=n=2:v=1:a=1[outv][outa]")
+    assert (video, audio) == ("[outv]", "[outa]")
+
+    graph, video, audio = build_compose_graph(dict(main, has_audio=False), (1080, 608), LAYOUT)
+    assert "[pip]" not in graph and "concat" not in graph
+    assert (video, audio) == ("[main]", None)
+    print("✅ 通过")
+
+
+def test_compose_video():
+    """带画中画和片尾合成：尺寸缩放到目标宽度，时长 = 主视频 + 片尾，有音轨"""
+    print("🧪 测试 ffmpeg 合成...")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    def make_video(path, source, duration, size, rate, audio):
+        cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "lavfi", "-i", f"{source}=size={size}:rate={rate}:duration={duration}"]
+        if audio:
+            cmd += ["-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}", "-c:a", "aac", "-shortest"]
+        subprocess.run(cmd + ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(path)], check=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        make_video(tmp / "main.mp4", "testsrc2", 3, "640x360", 25, True)
+        make_video(tmp / "pip.mp4", "rgbtestsrc", 2, "320x180", 25, False)
+        make_video(tmp / "outro.mp4", "smptebars", 1, "480x480", 30, False)
+        Image.new("RGBA", (200, 200), (255, 0, 0, 255)).save(tmp / "arrow.png")
+        Image.new("RGBA", (400, 100), (0, 0, 255, 200)).save(tmp / "text.png")
+
+        output = tmp / "final.mp4"
+        layout = dict(LAYOUT, arrow_size=(40, 40), text_width=100, pip_start=1)
+        assert compose_video(ffmpeg, "ffprobe", tmp / "main.mp4", output, layout, tmp / "arrow.png", tmp / "text.png",
+                             pip_path=tmp / "pip.mp4", outro_path=tmp / "outro.mp4", target_width=320,
+                             output_args=["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"])
+
+        info = probe_media(ffmpeg, "ffprobe", output)
+        assert (info["width"], info["height"]) == (320, 180)
+        assert info["has_audio"] and info["fps"] == 25
+        assert abs(info["duration"] - 4.0) < 0.15
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_build_graph()
+    test_compose_video()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试单次解码剪切（assets/vidoes/ffmpeg_cut.py）
+验证输入分配、滤镜图结构，以及多个乱序片段一次剪切后的总时长
+"""
+
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "assets" / "vidoes"))
+
+from ffmpeg_cut import build_cut_command, build_cut_graph, cut_segments, plan_inputs, valid_segments  # noqa: E402
+from upload_proxy import find_ffmpeg  # noqa: E402
+
+
+def probe_duration(ffmpeg, path):
+    """读取 ffmpeg -i 输出中的时长（秒）"""
+    result = subprocess.run([ffmpeg, "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):(\d+\.\d+)", result.stderr).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_plan_and_graph():
+    """相近的片段共用一个输入，远的片段各自定位；滤镜图按表格顺序拼接"""
+    print("🧪 测试剪切计划...")
+    segments = [(40, 42), (10, 12), (13, 14)]
+    inputs, placements = plan_inputs(segments, merge_gap=5)
+    assert inputs == [(10, 4), (40, 2)]
+    assert placements == [(1, 0, 2), (0, 0, 2), (0, 3, 4)]
+
+    graph, outputs = build_cut_graph(placements, has_audio=True)
+    assert graph.startswith("[0:v]split=2[v0_0][v0_1];[0:a]asplit=2[a0_0][a0_1];")
+    assert "[1:v]trim=start=0:end=2,setpts=PTS-STARTPTS[tv0]" in graph
+    assert "[v0_1]trim=start=3:end=4,setpts=PTS-STARTPTS[tv2]" in graph
+    assert "[a0_0]atrim=start=0:end=2,asetpts=PTS-STARTPTS[ta1]" in graph
+    assert graph.endswith("[tv0][ta0][tv1][ta1][tv2][ta2]concat=n=3:v=1:a=1[outv][outa]")
+    assert outputs == ["[outv]", "[outa]"]
+
+    graph, outputs = build_cut_graph([(0, 1, 2.5)], has_audio=False)
+    assert graph == "[0:v]trim=start=1:end=2.5,setpts=PTS-STARTPTS[tv0];[tv0]concat=n=1:v=1:a=0[outv]"
+    assert outputs == ["[outv]"]
+
+    graph, outputs = build_cut_graph([(0, 1, 2.5)], has_audio=True, has_video=False)
+    assert graph == "[0:a]atrim=start=1:end=2.5,asetpts=PTS-STARTPTS[ta0];[ta0]concat=n=1:v=0:a=1[outa]"
+    assert outputs == ["[outa]"]
+
+    cmd = build_cut_command("ffmpeg", "in.mp4", segments, "out.mp4", merge_gap=5)
+    assert cmd.count("-i") == 2 and cmd[cmd.index("-ss") + 1] == "10" and cmd[cmd.index("-t") + 1] == "4"
+    assert valid_segments([(3, 2), (1, None), (1, 2)]) == [(1.0, 2.0)]
+    print("✅ 通过")
+
+
+def test_cut_segments():
+    """乱序片段一次剪切，总时长等于片段时长之和"""
+    print("🧪 测试单次剪切...")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = Path(tmp_dir) / "source.mp4"
+        subprocess.run(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=10",
+                "-f", "lavfi", "-i", "sine=frequency=440:duration=10",
+                "-c:v", "libx264", "-preset", "ultrafast", "-g", "50", "-c:a", "aac", "-shortest",
+                str(source),
+            ],
+            check=True,
+        )
+        output = Path(tmp_dir) / "merged.mp4"
+        segments = [(5, 6.5), (1, 2), (3, 3.5), (8.5, 9)]  # 相近和相距较远的片段都有
+        assert cut_segments(ffmpeg, source, segments, output, merge_gap=1.5,
+                            video_args=["-c:v", "libx264", "-preset", "ultrafast"], audio_args=["-c:a", "aac"])
+        assert abs(probe_duration(ffmpeg, output) - 3.5) < 0.1
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_plan_and_graph()
+    test_cut_segments()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试断点续传记录（临时目录中的 SQLite 文件）
+"""
+
+import tempfile
+from pathlib import Path
+
+from ledger import Ledger
+
+
+def test_resume_point_and_outputs():
+    """步骤进度、对话地址和输出在重新打开后仍然可用"""
+    print("🧪 测试步骤进度和输出...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video = Path(tmp_dir) / "a.mp4"
+        video.write_bytes(b"video a")
+        db_file = Path(tmp_dir) / "ledger.sqlite3"
+
+        ledger = Ledger(db_file)
+        video_hash = ledger.video_hash(video)
+        ledger.start_video(video_hash, "a.mp4", reset=True)
+        ledger.finish_step(video_hash, 1, account="a@example.com", chat_url=None)
+        ledger.finish_step(video_hash, 2, chat_url="https://aistudio.google.com/prompts/abc")
+        ledger.save_output(video_hash, 23, ["1\n00:00:01,000 --> 00:00:02,000\n你好"])
+        ledger.finish_step(video_hash, 19, prefix_hash="p19")
+        ledger.close()
+
+        # 模拟重启
+        ledger = Ledger(db_file)
+        assert ledger.video_hash(video) == video_hash
+        point = ledger.resume_point(video_hash)
+        assert point == {
+            "last_step": 19,
+            "chat_url": "https://aistudio.google.com/prompts/abc",
+            "account": "a@example.com",
+            "prefix_hash": "p19",
+        }
+        assert ledger.step_outputs(video_hash) == {23: ["1\n00:00:01,000 --> 00:00:02,000\n你好"]}
+        assert not ledger.is_completed(video_hash)
+
+        # 不续传时从步骤 1 重新开始，清除旧记录
+        ledger.start_video(video_hash, "a.mp4", reset=True)
+        assert ledger.resume_point(video_hash)["last_step"] == 0
+        assert ledger.step_outputs(video_hash) == {}
+        ledger.close()
+    print("✅ 通过")
+
+
+def test_completed_and_reset():
+    """完成的视频不再续传，reset 后重新处理"""
+    print("🧪 测试完成和重置...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger = Ledger(Path(tmp_dir) / "ledger.sqlite3")
+        ledger.start_video("h1", "a.mp4")
+        ledger.finish_step("h1", 25)
+        ledger.save_output("h1", 25, [{"start": "00:00:01:00", "end": "00:00:02:00"}])
+        ledger.complete_video("h1")
+        assert ledger.is_completed("h1")
+        assert ledger.resume_point("h1") is None
+
+        assert ledger.reset_video("a.mp4") == 1
+        assert not ledger.is_completed("h1")
+        assert ledger.step_outputs("h1") == {}
+        ledger.close()
+    print("✅ 通过")
+
+
+class FakePage:
+    """只记录打开的地址"""
+
+    def __init__(self):
+        self.urls = []
+
+    @property
+    def url(self):
+        return self.urls[-1] if self.urls else ""
+
+    def goto(self, url, **kwargs):
+        self.urls.append(url)
+
+    def wait_for_selector(self, selector, **kwargs):
+        return None
+
+
+def test_resume_requires_same_account_and_prompts():
+    """只续传同一账号、提示词链未修改的对话"""
+    print("🧪 测试续传条件...")
+    from response_cache import prompt_prefix_hashes
+    from video_automation import VideoProcessor
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = Path(tmp_dir)
+        (folder / "a.mp4").write_bytes(b"video a")
+        ledger = Ledger(folder / "ledger.sqlite3")
+        hashes = prompt_prefix_hashes([f"步骤{i}" for i in range(1, 6)])
+
+        def record_progress():
+            video_hash = ledger.video_hash(folder / "a.mp4")
+            ledger.start_video(video_hash, "a.mp4", reset=True)
+            for step in (1, 2, 3):
+                ledger.finish_step(video_hash, step, account="a@example.com",
+                                   chat_url="https://aistudio.google.com/prompts/abc", prefix_hash=hashes[step - 1])
+
+        def begin(account_pool, account, prefix_hashes):
+            processor = VideoProcessor.__new__(VideoProcessor)
+            processor.ledger = ledger
+            processor.ledger_checked = set()
+            processor.videos_folder = folder
+            processor.account_pool = account_pool
+            processor.current_account = account
+            processor.page = FakePage()
+            processor.ai_studio_url = "https://aistudio.google.com/prompts/new_chat"
+            _, start_step = processor.begin_ledger_video("a.mp4", 1, prefix_hashes)
+            return start_step, processor.page.urls
+
+        record_progress()
+        assert begin("pool", "b@example.com", hashes) == (1, [])  # 账号池改派给其他账号
+        record_progress()
+        changed = prompt_prefix_hashes(["步骤1", "步骤2（修改）", "步骤3", "步骤4", "步骤5"])
+        assert begin(None, "a@example.com", changed) == (1, [])  # 提示词已修改
+        record_progress()
+        assert begin(None, "a@example.com", hashes[:2]) == (1, [])  # 提示词变少
+        record_progress()
+        assert begin("pool", "a@example.com", hashes) == (4, ["https://aistudio.google.com/prompts/abc"])
+        record_progress()
+        assert begin(None, None, hashes) == (4, ["https://aistudio.google.com/prompts/abc"])  # 单账号模式
+        ledger.close()
+    print("✅ 通过")
+
+
+def test_cache_resume_then_ledger_resume():
+    """回复缓存快进后中断：处理记录续传时仍有缓存的步骤 23 输出"""
+    print("🧪 测试缓存快进后的断点续传...")
+    from response_cache import ResponseCache, prompt_prefix_hashes
+    from video_automation import VideoProcessor
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = Path(tmp_dir)
+        (folder / "a.mp4").write_bytes(b"video a")
+        ledger = Ledger(folder / "ledger.sqlite3")
+        cache = ResponseCache(folder / "cache.sqlite3", max_bytes=10 * 1024 * 1024, max_age_days=30)
+        chat_url = "https://aistudio.google.com/prompts/abc"
+        prompts = [f"步骤{i}" for i in range(1, 26)]
+        hashes = prompt_prefix_hashes(prompts)
+        video_hash = ledger.video_hash(folder / "a.mp4")
+        srt = ["1\n00:00:01,000 --> 00:00:02,000\n你好"]
+        for step in range(1, 26):
+            cache.put(video_hash, hashes[step - 1], step, text=f"回复{step}", chat_url=chat_url, turns=step)
+        cache.put_output(video_hash, hashes[22], 23, srt)
+
+        def new_processor():
+            processor = VideoProcessor.__new__(VideoProcessor)
+            processor.ledger = ledger
+            processor.ledger_checked = set()
+            processor.response_cache = cache
+            processor.videos_folder = folder
+            processor.account_pool = None
+            processor.current_account = None
+            processor.page = FakePage()
+            processor.ai_studio_url = "https://aistudio.google.com/prompts/new_chat"
+            processor.truncate_chat = lambda model_turns: None
+            return processor
+
+        # 只修改第 25 步：缓存快进到步骤 24，然后在步骤 25 中断
+        changed = prompt_prefix_hashes(prompts[:24] + ["步骤25（修改）"])
+        processor = new_processor()
+        assert processor.begin_ledger_video("a.mp4", 1, changed) == (video_hash, 1)
+        start_step, outputs = processor.fast_forward_from_cache(video_hash, prompts, changed)
+        assert (start_step, outputs) == (25, {23: srt})
+        processor.record_cached_steps(video_hash, start_step - 1, outputs, changed)
+
+        # 重新运行：处理记录从步骤 25 续传，步骤 23 的输出还在
+        processor = new_processor()
+        assert processor.begin_ledger_video("a.mp4", 1, changed) == (video_hash, 25)
+        assert processor.page.urls == [chat_url]
+        assert ledger.step_outputs(video_hash) == {23: srt}
+        cache.close()
+        ledger.close()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_resume_point_and_outputs()
+    test_completed_and_reset()
+    test_resume_requires_same_account_and_prompts()
+    test_cache_resume_then_ledger_resume()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试媒体信息缓存（assets/vidoes/media_cache.py）
+验证 ffprobe JSON 解析，以及按 路径 + 大小 + 修改时间 的缓存命中和失效
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "assets" / "vidoes"))
+
+from media_cache import MediaCache, list_media, parse_ffprobe  # noqa: E402
+from smart_cut import source_from_info  # noqa: E402
+from upload_proxy import find_ffmpeg  # noqa: E402
+
+
+def test_parse_ffprobe():
+    """流信息、关键帧（从文件开始时间算起）和 B 帧延迟"""
+    print("🧪 测试 ffprobe 输出解析...")
+    data = {
+        "format": {"duration": "12.500000", "start_time": "0.080000"},
+        "streams": [
+            {"index": 0, "codec_type": "video", "codec_name": "h264", "profile": "High", "pix_fmt": "yuv420p",
+             "width": 1920, "height": 1080, "r_frame_rate": "25/1", "avg_frame_rate": "25/1"},
+            {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+        ],
+        "packets": [
+            {"stream_index": 0, "pts_time": "0.080000", "dts_time": "0.000000", "flags": "K__"},
+            {"stream_index": 1, "pts_time": "0.000000", "dts_time": "0.000000", "flags": "K__"},
+            {"stream_index": 0, "pts_time": "0.240000", "dts_time": "0.040000", "flags": "___"},
+            {"stream_index": 0, "pts_time": "5.080000", "dts_time": "5.000000", "flags": "K__"},
+        ],
+    }
+    info = parse_ffprobe(data)
+    assert info["duration"] == 12.5 and (info["width"], info["height"]) == (1920, 1080)
+    assert info["fps"] == 25.0 and info["fps_rate"] == "25" and info["cfr"]
+    assert info["has_audio"] and info["audio_codec"] == "aac" and info["video_codec"] == "h264"
+    assert info["keyframes"] == [0.0, 5.0] and info["delay"] == 2
+
+    source = source_from_info(info)
+    assert source["fps"] == 25 and source["delay"] == 2 and source["keyframes"] == [0.0, 5.0]
+
+    data["streams"][0]["avg_frame_rate"] = "24000/1001"
+    assert source_from_info(parse_ffprobe(data)) is None
+    del data["packets"]
+    assert "keyframes" not in parse_ffprobe(data)
+    assert parse_ffprobe({"streams": [{"codec_type": "audio"}]}) is None
+    print("✅ 通过")
+
+
+def test_cache_hit_and_invalidate():
+    """第二次读取不再探测；文件修改后重新探测"""
+    print("🧪 测试媒体信息缓存...")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        video = tmp / "clip.mp4"
+        subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                        "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=2",
+                        "-c:v", "libx264", "-preset", "ultrafast", "-g", "25", "-bf", "0", str(video)], check=True)
+        (tmp / "notes.txt").write_text("x")
+        assert list_media(tmp) == [str(video)]
+
+        db_file = tmp / "cache" / "media.sqlite3"
+        cache = MediaCache(db_file, ffmpeg, "ffprobe")
+        info = cache.media_info(video, keyframes=True)
+        assert cache.probes == 1
+        assert (info["width"], info["height"]) == (320, 240) and not info["has_audio"]
+        assert abs(info["duration"] - 2.0) < 0.1 and info["keyframes"][:2] == [0.0, 1.0]
+
+        # 新的实例（下一次运行）直接读取缓存
+        second = MediaCache(db_file, ffmpeg, "ffprobe")
+        assert second.media_info(video) == info and second.media_info(video, keyframes=True) == info
+        assert (second.hits, second.probes) == (2, 0)
+
+        # 修改时间变化 → 重新探测
+        stat = os.stat(video)
+        os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert second.get(video) is None
+        second.media_info(video)
+        assert second.probes == 1
+
+        # 没有关键帧索引的缓存在需要关键帧时补充探测
+        assert "keyframes" not in second.get(video)
+        assert second.media_info(video, keyframes=True)["keyframes"][:2] == [0.0, 1.0]
+        assert second.probes == 2
+        assert cache.media_info(tmp / "missing.mp4") is None
+
+        # 旧版本的缓存（关键帧时间未按开始时间换算）视为没有缓存
+        cache.put(video, {key: value for key, value in info.items() if key != "version"})
+        assert cache.get(video) is None
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_parse_ffprobe()
+    test_cache_hit_and_invalidate()
+    print("\n🎉 所有测试通过")
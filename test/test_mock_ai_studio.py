@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试本地 AI Studio 模拟服务（只测 HTTP 接口，不启动浏览器）
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+from mock_ai_studio.server import MockSettings, start_server
+from response_capture import extract_code_blocks, parse_stream_text
+
+
+def post(url, data):
+    request = urllib.request.Request(url, data=data, method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.headers.get("Content-Type"), response.read().decode("utf-8")
+
+
+def generate(server, step, prompt="提示词"):
+    body = json.dumps({"step": step, "prompt": prompt}).encode("utf-8")
+    return post(server.url + "GenerateContent", body)
+
+
+def test_page_and_upload():
+    """任意路径返回对话页面，上传计数"""
+    print("🧪 测试页面和上传...")
+    server = start_server(MockSettings(upload_latency=0))
+    try:
+        with urllib.request.urlopen(server.url + "prompts/new_chat", timeout=10) as response:
+            html = response.read().decode("utf-8")
+        assert 'aria-label="Run"' in html and 'iconname="add_circle"' in html
+
+        status, _, body = post(server.url + "upload", b"\0" * 1000)
+        assert status == 200 and json.loads(body)["bytes"] == 1000
+        assert server.stats["uploads"] == 1 and server.stats["upload_bytes"] == 1000
+    finally:
+        server.shutdown()
+    print("✅ 通过")
+
+
+def test_resumable_upload():
+    """可续传分片上传：finalize 分片返回 final"""
+    print("🧪 测试可续传上传...")
+    server = start_server(MockSettings(upload_latency=0))
+    try:
+        start = urllib.request.Request(
+            server.url + "upload/resumable", data=b"", method="POST",
+            headers={"X-Goog-Upload-Command": "start"},
+        )
+        with urllib.request.urlopen(start, timeout=10) as response:
+            upload_url = response.headers["X-Goog-Upload-URL"]
+
+        statuses = []
+        for command, chunk in (("upload", b"a" * 600), ("upload, finalize", b"b" * 400)):
+            request = urllib.request.Request(
+                server.url.rstrip("/") + upload_url, data=chunk, method="POST",
+                headers={"X-Goog-Upload-Command": command},
+            )
+            with urllib.request.urlopen(request, timeout=10) as response:
+                statuses.append((response.headers["X-Goog-Upload-Status"], response.headers["X-Goog-Upload-Size-Received"]))
+
+        assert statuses == [("active", "600"), ("final", "1000")]
+        assert server.stats["uploads"] == 1 and server.stats["upload_bytes"] == 1000
+    finally:
+        server.shutdown()
+    print("✅ 通过")
+
+
+def test_generate_steps():
+    """普通步骤、SRT 步骤和表格步骤的流式回复"""
+    print("🧪 测试生成接口...")
+    server = start_server(MockSettings(latency=0, chunk_interval=0, table_rows=5))
+    try:
+        _, content_type, body = generate(server, 1)
+        assert content_type.startswith("text/event-stream")
+        assert parse_stream_text(body).startswith("**步骤 1**")
+
+        _, _, body = generate(server, 23)
+        srt = extract_code_blocks(parse_stream_text(body))[0]
+        assert srt.startswith("1\n00:00:00,000 --> 00:00:03,000\n")
+
+        _, _, body = generate(server, 25)
+        csv_text = extract_code_blocks(parse_stream_text(body))[0]
+        lines = csv_text.splitlines()
+        assert lines[0] == "start,end,folder1,folder2,folder3,music,cover_time,title"
+        assert len(lines) == 6 and lines[1].startswith("00:00:01:00,00:00:05:00,")
+    finally:
+        server.shutdown()
+    print("✅ 通过")
+
+
+def test_rate_limit_and_blocked():
+    """速率限制只触发指定次数，Content blocked 在"继续"后恢复"""
+    print("🧪 测试速率限制和 Content blocked...")
+    server = start_server(MockSettings(latency=0, chunk_interval=0, rate_limit_at=2, blocked_at=3))
+    try:
+        try:
+            generate(server, 2)
+            assert False, "应返回 429"
+        except urllib.error.HTTPError as e:
+            assert e.code == 429
+        assert generate(server, 2)[0] == 200  # 只触发一次
+
+        _, content_type, body = generate(server, 3)
+        assert content_type.startswith("application/json") and json.loads(body)["blocked"]
+        _, content_type, _ = generate(server, 3, prompt="继续")
+        assert content_type.startswith("text/event-stream")
+    finally:
+        server.shutdown()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_page_and_upload()
+    test_resumable_upload()
+    test_generate_steps()
+    test_rate_limit_and_blocked()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后期处理流水线
+用一个模拟的处理脚本验证：提交不阻塞、多个视频并行处理、剪辑表只包含该视频的数据
+"""
+
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from columnar_store import read_table, save_step_table
+from postprocess_pool import PostProcessPool
+
+
+FAKE_SCRIPT = textwrap.dedent('''
+    import argparse, time
+    import pandas as pd
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips")
+    parser.add_argument("--no-pause", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--report")
+    args = parser.parse_args()
+    time.sleep(2)
+    df = pd.read_parquet(args.clips) if args.clips.endswith(".parquet") else pd.read_excel(args.clips)
+    print("rows", len(df), "files", ",".join(sorted(set(df["filename"]))), "workers", args.workers, "report", args.report)
+    raise SystemExit(0 if args.no_pause else 1)
+''')
+
+
+def test_pipeline_runs_videos_concurrently():
+    """两个视频并行处理，提交时不等待"""
+    print("🧪 测试后期处理流水线...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        script = tmp_dir / "process_video.py"
+        script.write_text(FAKE_SCRIPT, encoding="utf-8")
+        pool = PostProcessPool(script=script, work_dir=tmp_dir / "postprocess", workers=2, timeout=60)
+
+        start = time.time()
+        for video in ("Episode1", "Episode2"):
+            folder = tmp_dir / video
+            folder.mkdir()
+            save_step_table(pd.DataFrame([{"filename": f"{video}.mp4", "start": "00:01", "end": "00:05"}]), folder, 25)
+            pool.submit(f"{video}.mp4", folder)
+        assert time.time() - start < 1, "提交不应等待处理完成"
+
+        results = pool.wait()
+        elapsed = time.time() - start
+        pool.shutdown()
+
+        assert results == {"Episode1.mp4": True, "Episode2.mp4": True}
+        assert elapsed < 4, f"两个任务应并行运行（串行至少 4 秒），实际用时 {elapsed:.1f} 秒"
+        clips = read_table(next(p for p in (tmp_dir / "postprocess").glob("Episode2.*") if p.suffix != ".log"))
+        assert clips["filename"].tolist() == ["Episode2.mp4"]
+        log = (tmp_dir / "postprocess" / "Episode1.log").read_text(encoding="utf-8")
+        assert "files Episode1.mp4 workers 1" in log
+        # 每个视频的用时报告单独一个文件，并行的子进程不会互相覆盖
+        assert f"report {tmp_dir / 'postprocess' / 'Episode1_render.csv'}" in log
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_pipeline_runs_videos_concurrently()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试提示词模板
+验证占位符渲染、第一行默认值、按修改时间缓存，以及渲染不会改写 prompts.xlsx
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from prompt_templates import PromptTemplates, format_duration_text
+
+
+def write_prompts(path, prompts, **first_row):
+    """生成与 prompts.xlsx 相同结构的表格"""
+    rows = [{"视频名称": "", "line1": "", "lin2": "", "视频时长": "", "提示词": prompt} for prompt in prompts]
+    rows[0].update(first_row)
+    pd.DataFrame(rows).to_excel(path, index=False)
+
+
+def test_format_duration_text():
+    """时长转中文"""
+    print("🧪 测试时长格式...")
+    assert format_duration_text("12:58") == "12分58秒"
+    assert format_duration_text("03:32.5") == "3分32秒"
+    assert format_duration_text("1:02:03") == "1小时2分3秒"
+    assert format_duration_text("未知") == "未知"
+    print("✅ 通过")
+
+
+def test_render_placeholders():
+    """占位符替换，缺少的字段使用第一行的值，未知占位符保留"""
+    print("🧪 测试占位符渲染...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "prompts.xlsx"
+        write_prompts(
+            path,
+            ["步骤1：分析 {视频名称}", "步骤2：时长是{时长}（{duration}）", "步骤3：{line1}/{line2} {未知}"],
+            **{"视频名称": "old.mp4", "line1": "bat", "lin2": "223", "视频时长": "12:58"},
+        )
+        templates = PromptTemplates(path)
+
+        prompts = templates.render({"filename": "Episode1.mp4", "duration": "03:32.5", "line1": "cat"})
+        assert prompts == ["步骤1：分析 Episode1.mp4", "步骤2：时长是3分32秒（03:32.5）", "步骤3：cat/223 {未知}"]
+
+        # 不传视频信息时使用第一行的值
+        assert templates.render()[1] == "步骤2：时长是12分58秒（12:58）"
+    print("✅ 通过")
+
+
+def test_cache_and_no_rewrite():
+    """文件不变时不重新解析，渲染不改写文件，文件修改后重新加载"""
+    print("🧪 测试模板缓存...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "prompts.xlsx"
+        write_prompts(path, ["步骤1：{视频名称}"])
+        mtime = path.stat().st_mtime_ns
+        templates = PromptTemplates(path)
+
+        for i in range(5):
+            assert templates.render({"filename": f"v{i}.mp4", "duration": "1:00"}) == [f"步骤1：v{i}.mp4"]
+        assert path.stat().st_mtime_ns == mtime
+        signature = templates.signature
+
+        write_prompts(path, ["步骤1：新的 {视频名称}", "步骤2：继续"])
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+        assert templates.render({"filename": "a.mp4"}) == ["步骤1：新的 a.mp4", "步骤2：继续"]
+        assert templates.signature != signature
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_format_duration_text()
+    test_render_placeholders()
+    test_cache_and_no_rewrite()
+    print("\n🎉 所有测试通过")
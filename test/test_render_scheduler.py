@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试并行渲染调度（assets/vidoes/render_scheduler.py）
+验证线程预算、任务并行运行、失败任务和用时报告
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "assets" / "vidoes"))
+
+from render_scheduler import run_jobs, thread_budget  # noqa: E402
+
+
+def fake_render(job):
+    """模拟渲染：等待 1 秒，返回阶段用时"""
+    if job.get("fail"):
+        raise RuntimeError("渲染失败")
+    time.sleep(1)
+    return {"output": job["name"], "cut": 0.4, "composite": 0.6, "ok": True}
+
+
+def test_thread_budget():
+    """CPU 核数按并行任务数平分，不超过任务数"""
+    print("🧪 测试线程预算...")
+    assert thread_budget(10, cpu_count=16) == (4, 4)
+    assert thread_budget(2, cpu_count=16) == (2, 8)
+    assert thread_budget(10, cpu_count=2) == (1, 2)
+    assert thread_budget(10, cpu_count=16, workers=3) == (3, 5)
+    assert thread_budget(10, cpu_count=8, threads_per_job=2) == (4, 2)
+    assert thread_budget(0, cpu_count=8) == (1, 8)
+    print("✅ 通过")
+
+
+def test_run_jobs_parallel():
+    """两个任务在进程池中并行运行，失败的任务记录在报告中"""
+    print("🧪 测试并行渲染...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = Path(tmp_dir) / "render_report.csv"
+        jobs = [{"name": "A/1"}, {"name": "A/2"}, {"name": "B/1", "fail": True}]
+
+        start = time.time()
+        results = run_jobs(fake_render, jobs, workers=2, report_file=report)
+        elapsed = time.time() - start
+
+        assert elapsed < 1.9, f"两个任务应并行运行，实际用时 {elapsed:.1f} 秒"
+        by_name = {result["output"]: result for result in results}
+        assert by_name["A/1"]["ok"] and by_name["A/2"]["composite"] == 0.6
+        assert not by_name["B/1"]["ok"] and "渲染失败" in by_name["B/1"]["error"]
+        assert len({by_name["A/1"]["pid"], by_name["A/2"]["pid"]}) == 2
+
+        df = pd.read_csv(report)
+        assert sorted(df["output"]) == ["A/1", "A/2", "B/1"]
+        assert {"cut", "composite", "wall", "ok"} <= set(df.columns)
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_thread_budget()
+    test_run_jobs_parallel()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试模型回复缓存（临时目录中的 SQLite 文件）
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from response_cache import ResponseCache, prompt_prefix_hashes
+
+
+def test_prefix_hashes():
+    """修改某一步只影响该步及之后的前缀"""
+    print("🧪 测试提示词链前缀哈希...")
+    original = prompt_prefix_hashes(["步骤1", "步骤2", "步骤3"])
+    changed = prompt_prefix_hashes(["步骤1", "步骤2", "步骤3（修改）"])
+    assert original[:2] == changed[:2] and original[2] != changed[2]
+    # 拼接边界不同的提示词不会得到相同的哈希
+    assert prompt_prefix_hashes(["ab", "c"])[1] != prompt_prefix_hashes(["a", "bc"])[1]
+    print("✅ 通过")
+
+
+def test_fast_forward_lookup():
+    """连续命中的步骤数、输出和可以继续的对话"""
+    print("🧪 测试缓存查找...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(Path(tmp_dir) / "cache.sqlite3", max_bytes=10 * 1024 * 1024, max_age_days=30)
+        prompts = [f"步骤{i}" for i in range(1, 6)]
+        hashes = prompt_prefix_hashes(prompts)
+        for step in range(1, 6):
+            cache.put("v1", hashes[step - 1], step, text=f"回复{step}", chat_url="https://x/prompts/a", turns=step)
+        cache.put_output("v1", hashes[2], 3, [{"start": "00:00:01:00"}])
+        cache.put_output("v1", hashes[4], 5, ["1\n00:00:01,000 --> 00:00:02,000\n你好"])
+
+        assert cache.cached_prefix_length("v1", hashes) == 5
+        assert cache.outputs("v1", hashes, [3, 5]) == {3: [{"start": "00:00:01:00"}], 5: ["1\n00:00:01,000 --> 00:00:02,000\n你好"]}
+
+        # 第 4 步修改：前 3 步命中，对话 a 经过第 3 步，截断到第 3 条模型回复后继续
+        changed = prompt_prefix_hashes(prompts[:3] + ["步骤4（修改）", "步骤5"])
+        assert cache.cached_prefix_length("v1", changed) == 3
+        assert cache.resumable_chat("v1", changed, 3) == ("https://x/prompts/a", 3, 3)
+
+        # 截断后对话 a 的第 4、5 步记录删除，用修改后的提示词继续
+        cache.truncate_chat("https://x/prompts/a", 3)
+        cache.put("v1", changed[3], 4, chat_url="https://x/prompts/a", turns=4)
+        assert cache.resumable_chat("v1", hashes, 5) == ("https://x/prompts/a", 3, 3)
+        assert cache.resumable_chat("v1", changed, 4) == ("https://x/prompts/a", 4, 4)
+
+        # 其他视频不受影响
+        assert cache.cached_prefix_length("v2", hashes) == 0
+        cache.close()
+    print("✅ 通过")
+
+
+def test_last_step_changed():
+    """只修改第 25 步的提示词：打开完成的对话，截断到第 24 步后只执行第 25 步"""
+    print("🧪 测试只修改最后一步...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(Path(tmp_dir) / "cache.sqlite3", max_bytes=10 * 1024 * 1024, max_age_days=30)
+        prompts = [f"步骤{i}" for i in range(1, 26)]
+        hashes = prompt_prefix_hashes(prompts)
+        for step in range(1, 26):
+            # 第 10 步 Content blocked 后发送了"继续"，之后每步的模型回复数多 1
+            cache.put("v1", hashes[step - 1], step, text=f"回复{step}", chat_url="https://x/prompts/done",
+                      turns=step + (step >= 10))
+
+        changed = prompt_prefix_hashes(prompts[:24] + ["步骤25（修改）"])
+        assert cache.cached_prefix_length("v1", changed) == 24
+        assert cache.resumable_chat("v1", changed, 24) == ("https://x/prompts/done", 24, 25)
+        cache.close()
+    print("✅ 通过")
+
+
+def test_eviction():
+    """按存放时间和总大小淘汰"""
+    print("🧪 测试缓存淘汰...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(Path(tmp_dir) / "cache.sqlite3", max_bytes=2500, max_age_days=1)
+        hashes = prompt_prefix_hashes(["a", "b", "c", "d"])
+        for step in range(1, 5):
+            cache.put("v1", hashes[step - 1], step, text="x" * 1000)
+
+        # 第 1 条过期
+        with cache.conn:
+            cache.conn.execute("UPDATE responses SET accessed_at = ? WHERE step = 1", (time.time() - 2 * 86400,))
+        # 剩余 3000 字节超过 2500：最久未使用的第 2 条被淘汰
+        assert cache.evict() == 2
+        assert cache.cached_prefix_length("v1", hashes) == 0
+        remaining = {row[0] for row in cache.conn.execute("SELECT step FROM responses")}
+        assert remaining == {3, 4}
+        cache.close()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_prefix_hashes()
+    test_fast_forward_lookup()
+    test_last_step_changed()
+    test_eviction()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试网络层响应捕获
+1. 解析录制的流式响应（不启动浏览器）
+2. 用 route.fulfill 模拟生成接口，验证按步骤捕获（需要 Chromium）
+"""
+
+import json
+
+import pytest
+
+from response_capture import ResponseCapture, extract_code_blocks, parse_stream_text
+
+# AI Studio 内部接口格式：多个数组块拼接，内容节点为 [[[null, "文本"]], "model"]
+NESTED_STREAM = "[" + ",".join(
+    json.dumps([[[[[[None, text]], "model"]]], None, None])
+    for text in ["步骤结果：\n", "```srt\n1\n00:00:01,000 --> 00:00:02,000\n你好\n```", "\n完成"]
+) + "]"
+
+# Gemini API SSE 格式（含 thought 部分）
+SSE_STREAM = "\n\n".join(
+    "data: " + json.dumps({"candidates": [{"content": {"role": "model", "parts": parts}}]})
+    for parts in [
+        [{"text": "思考中", "thought": True}],
+        [{"text": "| 开始 | 结束 |\n"}],
+        [{"text": "|---|---|\n| 00:00:01:00 | 00:00:02:00 |\n"}],
+    ]
+)
+
+
+def test_parse_nested_stream():
+    """解析嵌套数组格式"""
+    print("🧪 测试嵌套数组格式...")
+    text = parse_stream_text(")]}'\n" + NESTED_STREAM)
+    assert text.startswith("步骤结果：\n```srt")
+    assert text.endswith("```\n完成")
+    assert extract_code_blocks(text) == ["1\n00:00:01,000 --> 00:00:02,000\n你好"]
+    print("✅ 通过")
+
+
+def test_parse_sse_stream():
+    """解析 SSE 格式（跳过 thought）"""
+    print("🧪 测试 SSE 格式...")
+    text = parse_stream_text(SSE_STREAM)
+    assert text == "| 开始 | 结束 |\n|---|---|\n| 00:00:01:00 | 00:00:02:00 |\n"
+    print("✅ 通过")
+
+
+class FakeResponse:
+    """只有 url 和 text() 的响应对象"""
+
+    def __init__(self, body, url="https://alkalimakersuite-pa.clients6.google.com/GenerateContent"):
+        self.url = url
+        self.body = body
+
+    def text(self):
+        return self.body
+
+
+def test_continuation_is_separate_turn():
+    """Content blocked 后的"继续"另起一轮，步骤回复只取最后一轮，不和被中断的回复拼在一起"""
+    print("🧪 测试补充提示词的回复...")
+    capture = ResponseCapture(url_patterns=["GenerateContent"])
+    capture.begin_step(25)
+    capture._on_response(FakeResponse(SSE_STREAM))
+    assert capture.text_for_step(25).startswith("| 开始 | 结束 |")
+
+    capture.begin_turn()
+    capture._on_response(FakeResponse(NESTED_STREAM))
+    assert capture.text_for_step(25).startswith("步骤结果：") and "| 开始 |" not in capture.text_for_step(25)
+
+    # 最后一轮没有内容时使用之前的回复
+    capture.begin_turn()
+    capture._on_response(FakeResponse("[]"))
+    assert capture.text_for_step(25).startswith("步骤结果：")
+    capture.begin_step(26)
+    assert capture.text_for_step(26) == "" and capture.text_for_step(25).startswith("步骤结果：")
+    print("✅ 通过")
+
+
+def test_capture_with_route_fulfill():
+    """用 route.fulfill 提供录制的响应，验证按步骤捕获"""
+    print("🧪 测试 route.fulfill 模拟接口...")
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"无法启动 Chromium: {e}")
+
+        page = browser.new_page()
+        # 后注册的路由优先匹配：先注册页面，再注册生成接口
+        page.route("http://mock.local/**", lambda route: route.fulfill(status=200, body="<html></html>"))
+        payloads = {"1": NESTED_STREAM, "2": SSE_STREAM}
+        page.route(
+            "**/GenerateContent*",
+            lambda route: route.fulfill(
+                status=200,
+                content_type="application/json",
+                body=payloads[route.request.url.rsplit("=", 1)[-1]],
+            ),
+        )
+        page.goto("http://mock.local/")
+
+        capture = ResponseCapture(url_patterns=["GenerateContent"])
+        capture.attach(page)
+
+        for step in (1, 2):
+            capture.begin_step(step)
+            page.evaluate(f"fetch('/GenerateContent?step={step}').then((r) => r.text())")
+        page.wait_for_timeout(200)
+
+        assert "```srt" in capture.text_for_step(1)
+        assert capture.text_for_step(2).startswith("| 开始 | 结束 |")
+        assert capture.text_for_step(3) == ""
+        browser.close()
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_parse_nested_stream()
+    test_parse_sse_stream()
+    test_continuation_is_separate_turn()
+    test_capture_with_route_fulfill()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试智能剪切（assets/vidoes/smart_cut.py）
+验证片段按关键帧拆分，以及复制码流的部分与源视频逐帧一致、拼接后的帧数和时间戳连续
+"""
+
+import re
+import subprocess
+import sys
+import tempfile
+from fractions import Fraction
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "assets" / "vidoes"))
+
+from smart_cut import build_piece_command, keyframe_times, plan_segment, probe_source, smart_cut_segments  # noqa: E402
+from upload_proxy import find_ffmpeg  # noqa: E402
+
+
+def frame_hashes(ffmpeg, path):
+    """解码后每一帧的 md5"""
+    result = subprocess.run([ffmpeg, "-nostdin", "-v", "error", "-i", str(path), "-map", "0:v", "-fps_mode", "passthrough", "-f", "framemd5", "-"],
+                            capture_output=True, text=True)
+    return [line.split(",")[-1].strip() for line in result.stdout.splitlines() if line and not line.startswith("#")]
+
+
+def frame_times(ffmpeg, path):
+    result = subprocess.run([ffmpeg, "-nostdin", "-i", str(path), "-map", "0:v", "-vf", "showinfo", "-f", "null", "-"],
+                            capture_output=True, text=True)
+    return [float(t) for t in re.findall(r"showinfo.*? pts_time:([\d.]+)", result.stderr)]
+
+
+def test_plan_segment():
+    """片头、片尾不完整的 GOP 重新编码，中间复制；可复制的内容太短时整段重新编码"""
+    print("🧪 测试片段拆分...")
+    keyframes = [0, 2, 4, 6, 8]
+    assert plan_segment(1.5, 7.2, keyframes, 25) == [("encode", 38, 12), ("copy", 50, 100), ("encode", 150, 30)]
+    assert plan_segment(2, 6, keyframes, 25) == [("copy", 50, 100)]
+    assert plan_segment(3.5, 4.5, keyframes, 25) == [("encode", 88, 25)]
+    assert plan_segment(1.5, 4.5, keyframes, 25, min_copy=3) == [("encode", 38, 75)]
+    assert plan_segment(5, 5, keyframes, 25) == []
+
+    copy_cmd = build_piece_command("ffmpeg", "in.mp4", "copy", 50, 100, Fraction(25), "p.mkv")
+    assert copy_cmd[copy_cmd.index("-ss") + 1] == "2.02" and "copy" in copy_cmd
+    encode_cmd = build_piece_command("ffmpeg", "in.mp4", "encode", 38, 12, Fraction(25), "p.mkv", ["-c:v", "libx264"])
+    assert encode_cmd[encode_cmd.index("-ss") + 1] == "1.5" and encode_cmd[encode_cmd.index("-frames:v") + 1] == "12"
+    print("✅ 通过")
+
+
+def test_smart_cut():
+    """复制的部分与源视频逐帧一致，拼接后帧数准确、时间戳连续"""
+    print("🧪 测试智能剪切...")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = Path(tmp_dir) / "source.mp4"
+        subprocess.run(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=12",
+                "-f", "lavfi", "-i", "sine=frequency=440:duration=12",
+                "-c:v", "libx264", "-preset", "veryfast", "-g", "25", "-keyint_min", "25", "-sc_threshold", "0",
+                "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest",
+                str(source),
+            ],
+            check=True,
+        )
+        info = probe_source(ffmpeg, "ffprobe", source)
+        assert info and info["fps"] == 25 and info["keyframes"][:3] == [0, 1, 2]
+
+        output = Path(tmp_dir) / "merged.mp4"
+        segments = [(2.3, 5.52), (0.5, 1.2), (7, 10)]  # 片头/片尾重新编码、整段重新编码、整段复制
+        assert smart_cut_segments(ffmpeg, source, segments, output, info,
+                                  video_args=["-c:v", "libx264", "-preset", "ultrafast"], audio_args=["-c:a", "aac"])
+
+        source_frames = frame_hashes(ffmpeg, source)
+        frames = frame_hashes(ffmpeg, output)
+        assert len(frames) == (18 + 50 + 13) + 17 + 75
+        assert frames[18:68] == source_frames[75:125]
+        assert frames[98:] == source_frames[175:250]
+
+        times = frame_times(ffmpeg, output)
+        assert all(abs(b - a - 0.04) < 0.001 for a, b in zip(times, times[1:]))
+    print("✅ 通过")
+
+
+def test_start_time():
+    """容器开始时间不为 0（没有编辑列表、带 B 帧）：关键帧时间从开始时间算起，剪切结果逐帧准确"""
+    print("🧪 测试开始时间不为 0 的源视频...")
+    packets = [{"pts_time": "0.080000", "flags": "K__"}, {"pts_time": "0.160000", "flags": "___"},
+               {"pts_time": "1.080000", "flags": "K__"}, {"pts_time": "N/A", "flags": "K__"}]
+    assert keyframe_times(packets, "0.080000") == [0.0, 1.0]
+    assert keyframe_times(packets, "N/A") == [0.08, 1.08]
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = Path(tmp_dir) / "source.mp4"
+        subprocess.run(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "lavfi", "-i", "testsrc2=size=320x240:rate=25:duration=8",
+                "-c:v", "libx264", "-preset", "veryfast", "-g", "25", "-keyint_min", "25", "-sc_threshold", "0",
+                "-bf", "2", "-pix_fmt", "yuv420p", "-use_editlist", "0",
+                str(source),
+            ],
+            check=True,
+        )
+        probe = subprocess.run([ffmpeg, "-hide_banner", "-i", str(source)], capture_output=True, text=True).stderr
+        assert "start: 0.080000" in probe
+        info = probe_source(ffmpeg, "ffprobe", source)
+        assert info and info["delay"] == 2 and info["keyframes"][:3] == [0, 1, 2]
+
+        output = Path(tmp_dir) / "merged.mp4"
+        assert smart_cut_segments(ffmpeg, source, [(0.6, 4.4)], output, info, has_audio=False,
+                                  video_args=["-c:v", "libx264", "-preset", "ultrafast"])
+        source_frames = frame_hashes(ffmpeg, source)
+        frames = frame_hashes(ffmpeg, output)
+        assert len(frames) == 10 + 75 + 10
+        assert frames[10:85] == source_frames[25:100]
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_plan_segment()
+    test_smart_cut()
+    test_start_time()
+    print("\n🎉 所有测试通过")
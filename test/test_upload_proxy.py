@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试上传代理转码和缓存
+用 ffmpeg 生成一段测试视频，验证代理文件更小、时长不变、第二次直接命中缓存
+"""
+
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from upload_proxy import UploadProxyManager, find_ffmpeg
+
+
+def probe_duration(ffmpeg, path):
+    """读取 ffmpeg -i 输出中的时长（秒）"""
+    result = subprocess.run([ffmpeg, "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+\.\d+)", result.stderr)
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def make_source(ffmpeg, path):
+    """生成 3 秒 720p 高码率测试视频（带音频）"""
+    subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30:duration=3",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=3",
+            "-c:v", "libx264", "-crf", "8", "-preset", "ultrafast", "-c:a", "aac", "-shortest",
+            str(path),
+        ],
+        check=True,
+    )
+
+
+def test_proxy_transcode_and_cache():
+    """代理文件更小、时长一致，第二次命中缓存"""
+    print("🧪 测试上传代理...")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        pytest.skip("找不到 ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = Path(tmp_dir) / "episode.mp4"
+        make_source(ffmpeg, source)
+
+        manager = UploadProxyManager(cache_dir=Path(tmp_dir) / "cache", workers=1)
+        manager.prepare([source])
+        proxy = manager.get(source)
+        manager.shutdown()
+
+        assert proxy != source and proxy.name == "episode.mp4"
+        assert proxy.stat().st_size < source.stat().st_size
+        assert abs(probe_duration(ffmpeg, proxy) - probe_duration(ffmpeg, source)) < 0.05
+
+        # 新的管理器（相同参数）直接命中缓存，不再提交转码
+        cached = UploadProxyManager(cache_dir=Path(tmp_dir) / "cache", workers=1)
+        cached.prepare([source])
+        assert not cached.futures
+        assert cached.get(source) == proxy
+
+        # 转码参数变化后使用新的缓存目录
+        changed = UploadProxyManager(cache_dir=Path(tmp_dir) / "cache", profile={**cached.profile, "height": 240})
+        assert changed.proxy_path(source) != proxy
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_proxy_transcode_and_cache()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试上传请求跟踪（不启动浏览器，直接输入请求/响应序列）
+"""
+
+from upload_tracker import UploadTracker
+
+
+def test_resumable_upload():
+    """可续传上传：start → 分片 → finalize 时确认"""
+    print("🧪 测试可续传上传...")
+    tracker = UploadTracker(url_patterns=["upload"])
+    tracker.begin()
+    assert tracker.matches("https://x/upload/resumable?upload_id=1", "POST")
+    assert not tracker.matches("https://x/upload/resumable", "GET")
+
+    tracker.record_request("start", {"X-Goog-Upload-Command": "start", "X-Goog-Upload-Header-Content-Length": "250"})
+    tracker.record_response("start", 200, {"x-goog-upload-status": "active"})
+    tracker.record_finished("start")
+    assert tracker.resumable and tracker.expected_bytes == 250 and tracker.in_progress
+
+    for i, offset in enumerate((0, 100)):
+        key = f"chunk{i}"
+        tracker.record_request(key, {"X-Goog-Upload-Command": "upload", "X-Goog-Upload-Offset": str(offset)}, size=100)
+        tracker.record_response(key, 200, {"X-Goog-Upload-Status": "active"})
+        tracker.record_finished(key)
+    assert tracker.bytes_confirmed == 200 and tracker.chunks_finished == 2
+    assert not tracker.committed
+
+    tracker.record_request("last", {"X-Goog-Upload-Command": "upload, finalize", "X-Goog-Upload-Offset": "200"}, size=50)
+    tracker.record_response("last", 200, {"X-Goog-Upload-Status": "final", "X-Goog-Upload-Size-Received": "250"})
+    assert tracker.committed and tracker.bytes_confirmed == 250
+    assert not tracker.in_progress
+    assert "100%" in tracker.progress_text()
+    print("✅ 通过")
+
+
+def test_single_request_upload():
+    """单个请求上传：2xx 即确认"""
+    print("🧪 测试单个请求上传...")
+    tracker = UploadTracker(url_patterns=["upload"])
+    tracker.begin(expected_bytes=1000)
+    tracker.record_request("post", {"content-type": "video/mp4"})
+    assert tracker.in_progress
+    tracker.record_response("post", 200, {})
+    assert tracker.committed and tracker.bytes_confirmed == 1000
+    print("✅ 通过")
+
+
+def test_failed_upload():
+    """分片返回错误或请求失败"""
+    print("🧪 测试上传失败...")
+    tracker = UploadTracker(url_patterns=["upload"])
+    tracker.begin()
+    tracker.record_request("start", {"X-Goog-Upload-Command": "start"})
+    tracker.record_response("start", 503, {})
+    assert tracker.failed and not tracker.committed
+
+    tracker.begin()
+    tracker.record_request("post", {})
+    tracker.record_failed("post", "net::ERR_CONNECTION_RESET")
+    assert tracker.failed and tracker.error == "net::ERR_CONNECTION_RESET"
+
+    # 与上传无关的请求被忽略
+    tracker.begin()
+    tracker.record_response("unknown", 500, {})
+    tracker.record_failed("unknown")
+    assert not tracker.seen and not tracker.failed
+    print("✅ 通过")
+
+
+if __name__ == "__main__":
+    test_resumable_upload()
+    test_single_request_upload()
+    test_failed_upload()
+    print("\n🎉 所有测试通过")
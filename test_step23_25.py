@@ -9,10 +9,10 @@ import sys
 import logging
 from pathlib import Path
 from playwright.sync_api import sync_playwright
-import pandas as pd
 
 # 导入配置和主类
 import config
+from columnar_store import read_table, step_table_path
 from video_automation import VideoProcessor
 
 # 配置日志
@@ -226,16 +226,16 @@ class Step23And25Tester(VideoProcessor):
                         return False
             else:
                 # 步骤25应该保存为Excel文件
-                output_file = output_folder / f"step_{step_number}_output.xlsx"
+                output_file = step_table_path(output_folder, step_number)
                 
-                if output_file.exists():
+                if output_file:
                     file_size = output_file.stat().st_size
                     logger.info(f"✅ 文件已创建: {output_file}")
                     logger.info(f"📊 文件大小: {file_size} 字节")
                     
                     # 读取并显示数据
                     try:
-                        df = pd.read_excel(output_file)
+                        df = read_table(output_file)
                         logger.info(f"📊 数据行数: {len(df)}")
                         logger.info(f"📊 数据列数: {len(df.columns)}")
                         logger.info(f"📋 列名: {', '.join(df.columns.tolist())}")
@@ -249,7 +249,7 @@ class Step23And25Tester(VideoProcessor):
                         logger.error(f"❌ 读取Excel文件失败: {e}")
                         return False
                 else:
-                    logger.error(f"❌ 文件未创建: {output_file}")
+                    logger.error(f"❌ 文件未创建: {output_folder}/step_{step_number}_output.*")
                     return False
                 
         except Exception as e:
@@ -281,7 +281,7 @@ def main():
             logger.info("\n✅ 所有测试通过")
             logger.info("📁 输出文件:")
             logger.info("  - 步骤23: assets/Process_Folder/test_步骤23_SRT文件/step_23_output.xlsx")
-            logger.info("  - 步骤25: assets/Process_Folder/test_步骤25_表格数据/step_25_output.xlsx")
+            logger.info("  - 步骤25: assets/Process_Folder/test_步骤25_表格数据/step_25_output.parquet")
             return 0
         else:
             logger.error("\n❌ 测试失败")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传代理文件
+上传前用 ffmpeg 把原始视频转成低码率、低分辨率的代理文件（足够模型分析），
+减少上传时间和服务端处理时间。
+
+- 转码在进程池中进行，浏览器处理第 N 个视频时后面的视频已经在转码
+- 代理文件按 原始文件内容哈希 + 转码参数 缓存，同一视频只转码一次
+- 不裁剪、不改变帧率（帧时间戳原样保留），时间码与原始视频一致
+- 代理文件保持原始文件名（放在以缓存键命名的目录中），对话中显示的文件名不变
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_ffmpeg():
+    """返回 ffmpeg 可执行文件路径（优先 config.FFMPEG_BINARY，其次 imageio-ffmpeg 自带的版本）"""
+    binary = shutil.which(config.FFMPEG_BINARY)
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def file_content_hash(path, chunk_size=4 * 1024 * 1024):
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def profile_hash(profile):
+    """转码参数的哈希（参数变化后缓存自动失效）"""
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def build_proxy_command(ffmpeg, source, target, profile):
+    """生成转码命令
+
+    - scale 只缩小不放大，宽度按比例取偶数
+    - -fps_mode passthrough：不丢帧、不补帧，帧时间戳原样保留
+    - 音频保留（字幕和剪辑依赖对白），单声道低码率
+    """
+    height = int(profile["height"])
+    return [
+        ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", str(source),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({height},ih)'",
+        "-c:v", "libx264", "-preset", profile["preset"], "-crf", str(profile["crf"]),
+        "-pix_fmt", "yuv420p",
+        "-fps_mode", "passthrough",
+        "-c:a", "aac", "-b:a", profile["audio_bitrate"], "-ac", "1",
+        "-movflags", "+faststart",
+        str(target),
+    ]
+
+
+def transcode_proxy(ffmpeg, source, target, profile):
+    """转码一个代理文件（在进程池中运行），成功返回代理文件路径"""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.stem + ".partial" + target.suffix)
+    result = subprocess.run(
+        build_proxy_command(ffmpeg, source, partial, profile),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0 or not partial.exists():
+        partial.unlink(missing_ok=True)
+        raise RuntimeError(result.stderr.strip()[-500:] or f"ffmpeg 退出码 {result.returncode}")
+    # 写完再改名，中断的转码不会被当成缓存
+    partial.replace(target)
+    return str(target)
+
+
+class UploadProxyManager:
+    """管理代理文件的转码和缓存
+
+    prepare() 把一批视频提交到进程池，get() 在上传前取出对应的代理文件
+    （还在转码时等待完成）。任何失败都回退到原始文件。
+    """
+
+    def __init__(self, cache_dir=None, profile=None, workers=None):
+        self.cache_dir = Path(cache_dir or config.UPLOAD_PROXY_DIR)
+        self.profile = dict(profile or config.UPLOAD_PROXY_PROFILE)
+        self.workers = workers or config.UPLOAD_PROXY_WORKERS
+        self.ffmpeg = find_ffmpeg()
+        self.executor = None
+        self.futures = {}  # 原始路径 -> Future
+        self.lock = threading.RLock()  # 并发模式下多个工作者共用
+        self.hash_index_file = self.cache_dir / "hash_index.json"
+        self.hash_index = self._load_hash_index()
+
+    def _load_hash_index(self):
+        """文件哈希索引：(路径, 大小, 修改时间) 不变时不重新计算内容哈希"""
+        try:
+            return json.loads(self.hash_index_file.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def _save_hash_index(self):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.hash_index_file.write_text(json.dumps(self.hash_index, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception as e:
+            logger.debug(f"保存哈希索引失败: {e}")
+
+    def source_hash(self, source):
+        """原始文件的内容哈希（带索引缓存）"""
+        source = Path(source)
+        stat = source.stat()
+        key = str(source.resolve())
+        entry = self.hash_index.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        digest = file_content_hash(source)
+        with self.lock:
+            self.hash_index[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest}
+            self._save_hash_index()
+        return digest
+
+    def proxy_path(self, source):
+        """代理文件路径：<缓存目录>/<内容哈希>-<参数哈希>/<原始文件名>"""
+        source = Path(source)
+        key = f"{self.source_hash(source)[:16]}-{profile_hash(self.profile)}"
+        return self.cache_dir / key / source.name
+
+    def prepare(self, sources):
+        """把一批视频提交到进程池转码（已缓存的跳过）"""
+        if not self.ffmpeg:
+            logger.warning("⚠️ 找不到 ffmpeg，上传代理已禁用（将上传原始文件）")
+            return
+
+        for source in sources:
+            source = Path(source)
+            if str(source) in self.futures or not source.exists():
+                continue
+            try:
+                target = self.proxy_path(source)
+            except Exception as e:
+                logger.warning(f"⚠️ 计算 {source.name} 的哈希失败: {e}")
+                continue
+            if target.exists():
+                logger.info(f"♻️ 代理文件已缓存: {source.name}")
+                continue
+            with self.lock:
+                if str(source) in self.futures:
+                    continue
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                logger.info(f"🎞️ 提交代理转码: {source.name}")
+                self.futures[str(source)] = self.executor.submit(
+                    transcode_proxy, self.ffmpeg, str(source), str(target), self.profile
+                )
+
+    def get(self, source, timeout=None):
+        """返回用于上传的文件：代理文件（必要时等待转码完成），失败时返回原始文件"""
+        source = Path(source)
+        if not self.ffmpeg or not source.exists():
+            return source
+
+        try:
+            target = self.proxy_path(source)
+            if not target.exists():
+                future = self.futures.get(str(source))
+                if future is None:
+                    self.prepare([source])
+                    future = self.futures.get(str(source))
+                if future is None:
+                    return source
+                logger.info(f"⏳ 等待代理转码完成: {source.name}")
+                future.result(timeout=timeout or config.UPLOAD_PROXY_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"⚠️ 代理转码失败，上传原始文件: {e}")
+            return source
+
+        original_size = source.stat().st_size
+        proxy_size = target.stat().st_size
+        if proxy_size >= original_size:
+            logger.info(f"ℹ️ 代理文件不比原始文件小，上传原始文件: {source.name}")
+            return source
+
+        saved = original_size - proxy_size
+        logger.info(
+            f"📉 上传代理 {source.name}: {original_size / 1024 / 1024:.1f} MB → "
+            f"{proxy_size / 1024 / 1024:.1f} MB，节省 {saved / 1024 / 1024:.1f} MB（{saved / original_size:.0%}）"
+        )
+        return target
+
+    def shutdown(self):
+        """关闭进程池（不等待未开始的转码）"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.futures.clear()
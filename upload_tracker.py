@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传完成检测（网络层）
+通过 page.on("request") / "response" / "requestfinished" / "requestfailed" 跟踪上传请求，
+服务端确认上传（可续传协议的 finalize 分片返回 final，或单个上传请求返回 2xx）时立即判定完成，
+并按分片报告已确认的字节数。取代轮询上传进度元素 + 固定等待。
+
+支持 Google 可续传上传协议：
+  start 请求（X-Goog-Upload-Command: start）→ 若干 upload 分片（X-Goog-Upload-Offset）
+  → 最后一个分片的命令包含 finalize，响应头 X-Goog-Upload-Status: final
+"""
+
+import logging
+import threading
+import time
+
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def _header(headers, name):
+    """不区分大小写读取请求头/响应头"""
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _int_header(headers, name):
+    try:
+        return int(_header(headers, name))
+    except (TypeError, ValueError):
+        return None
+
+
+class UploadTracker:
+    """跟踪一次视频上传的网络请求
+
+    使用方式：attach(page) → begin(文件大小) → 选择文件 → wait_for_commit(page)
+    """
+
+    def __init__(self, url_patterns=None):
+        self.url_patterns = url_patterns or config.UPLOAD_URL_PATTERNS
+        self.lock = threading.Lock()
+        self.page = None
+        self.begin()
+
+    # ==================== 监听 ====================
+
+    def attach(self, page):
+        """开始监听页面的上传请求"""
+        self.detach()
+        self.page = page
+        page.on("request", self._on_request)
+        page.on("response", self._on_response)
+        page.on("requestfinished", self._on_request_finished)
+        page.on("requestfailed", self._on_request_failed)
+
+    def detach(self):
+        """停止监听（上传完成后调用）"""
+        if self.page is None:
+            return
+        for event, handler in (
+            ("request", self._on_request),
+            ("response", self._on_response),
+            ("requestfinished", self._on_request_finished),
+            ("requestfailed", self._on_request_failed),
+        ):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+        self.page = None
+
+    def matches(self, url, method):
+        """是否为上传请求（只看 POST/PUT）"""
+        return method in ("POST", "PUT") and any(pattern in url for pattern in self.url_patterns)
+
+    def _on_request(self, request):
+        if not self.matches(request.url, request.method):
+            return
+        size = _int_header(request.headers, "content-length")
+        if size is None:
+            try:
+                size = len(request.post_data_buffer or b"")
+            except Exception:
+                size = None
+        self.record_request(request, request.headers, size)
+
+    def _on_response(self, response):
+        request = response.request
+        if not self.matches(request.url, request.method):
+            return
+        self.record_response(request, response.status, response.headers)
+
+    def _on_request_finished(self, request):
+        if self.matches(request.url, request.method):
+            self.record_finished(request)
+
+    def _on_request_failed(self, request):
+        if self.matches(request.url, request.method):
+            self.record_failed(request, request.failure)
+
+    # ==================== 状态 ====================
+
+    def begin(self, expected_bytes=None):
+        """开始新的上传（选择文件之前调用）"""
+        with self.lock:
+            self.expected_bytes = expected_bytes
+            self.started_at = time.time()
+            self.requests = {}  # 请求 -> {"command", "size", "offset", "status"}
+            self.resumable = False
+            self.chunks_finished = 0
+            self.bytes_confirmed = 0
+            self.committed_at = None
+            self.error = None
+
+    @property
+    def seen(self):
+        """是否已经看到上传请求"""
+        return bool(self.requests)
+
+    @property
+    def committed(self):
+        return self.committed_at is not None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    @property
+    def in_progress(self):
+        return self.seen and not self.committed and not self.failed
+
+    def record_request(self, key, headers, size=None):
+        """上传请求发出"""
+        command = (_header(headers, "x-goog-upload-command") or "").lower()
+        with self.lock:
+            if command or (_header(headers, "x-goog-upload-protocol") or "").lower() == "resumable":
+                self.resumable = True
+            if self.expected_bytes is None:
+                self.expected_bytes = _int_header(headers, "x-goog-upload-header-content-length")
+            self.requests[key] = {
+                "command": command,
+                "size": size,
+                "offset": _int_header(headers, "x-goog-upload-offset"),
+                "status": None,
+            }
+
+    def record_response(self, key, status, headers):
+        """服务端响应上传请求：final / finalize 分片或单个上传请求的 2xx 即为上传完成"""
+        with self.lock:
+            info = self.requests.get(key)
+            if info is None:
+                return
+            info["status"] = status
+            if status >= 400:
+                self.error = f"HTTP {status}"
+                return
+
+            received = _int_header(headers, "x-goog-upload-size-received")
+            if received is not None:
+                self.bytes_confirmed = max(self.bytes_confirmed, received)
+            elif info["size"] and "start" not in info["command"]:
+                base = info["offset"] if info["offset"] is not None else self.bytes_confirmed
+                self.bytes_confirmed = max(self.bytes_confirmed, base + info["size"])
+
+            upload_status = (_header(headers, "x-goog-upload-status") or "").lower()
+            if upload_status == "final" or "finalize" in info["command"]:
+                self.committed_at = time.time()
+            elif not self.resumable and 200 <= status < 300:
+                # 单个请求上传整个文件
+                self.committed_at = time.time()
+                if self.expected_bytes:
+                    self.bytes_confirmed = max(self.bytes_confirmed, self.expected_bytes)
+
+    def record_finished(self, key):
+        """请求完成（响应体也已接收）"""
+        with self.lock:
+            info = self.requests.get(key)
+            if info is not None and "start" not in info["command"]:
+                self.chunks_finished += 1
+
+    def record_failed(self, key, failure=None):
+        """请求失败（网络错误、被取消）"""
+        with self.lock:
+            if key in self.requests:
+                self.error = failure or "请求失败"
+
+    def progress_text(self):
+        """已确认字节数的描述"""
+        confirmed = self.bytes_confirmed / 1024 / 1024
+        if self.expected_bytes:
+            total = self.expected_bytes / 1024 / 1024
+            percent = min(100, self.bytes_confirmed * 100 // self.expected_bytes)
+            text = f"{confirmed:.1f}/{total:.1f} MB（{percent}%）"
+        else:
+            text = f"{confirmed:.1f} MB"
+        if self.resumable:
+            text += f"，{self.chunks_finished} 个分片"
+        return text
+
+    # ==================== 等待 ====================
+
+    def wait_for_commit(self, page, timeout, grace=None):
+        """等待服务端确认上传
+
+        Playwright 同步 API 只在调用期间分发事件，这里用 page.wait_for_timeout 驱动事件循环。
+
+        Returns:
+            True  - 服务端已确认
+            False - 上传请求失败或超时
+            None  - 宽限时间内没有看到上传请求（调用方回退到页面元素检测）
+        """
+        grace = config.UPLOAD_SIGNAL_GRACE if grace is None else grace
+        deadline = time.time() + timeout
+        last_log = 0
+        while True:
+            if self.committed:
+                logger.info(
+                    f"✅ 服务端已确认上传: {self.progress_text()}，用时 {self.committed_at - self.started_at:.1f} 秒"
+                )
+                return True
+            if self.failed:
+                logger.error(f"❌ 上传请求失败: {self.error}")
+                return False
+
+            now = time.time()
+            if not self.seen and now - self.started_at > grace:
+                logger.info("ℹ️ 未检测到上传请求，改用页面元素检测")
+                return None
+            if now > deadline:
+                logger.warning(f"⚠️ 等待上传确认超时（{timeout} 秒）: {self.progress_text()}")
+                return False
+            if self.seen and now - last_log >= 5:
+                logger.info(f"⏳ 上传中... {self.progress_text()}")
+                last_log = now
+
+            page.wait_for_timeout(250)
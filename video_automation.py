@@ -10,18 +10,42 @@ import sys
 import time
 import re
 import logging
-import pandas as pd
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
+from columnar_store import ClipsDataset, columnar_available
 from config import config, ensure_directories
+from excel_merge import export_clips_excel
+from page_scripts import (
+    CLICK_COPY_BUTTONS_JS,
+    CLIPBOARD_HOOK_JS,
+    CONTENT_BLOCKED_TEXTS,
+    COPY_BUTTON_BLOCKS_JS,
+    DOM_SETTLE_JS,
+    LOADING_TEXTS,
+    PAGE_STATE_PROBE_JS,
+    RATE_LIMIT_TEXTS,
+    RUN_COMPLETED_JS,
+    RUN_COMPLETIONS_JS,
+    RUN_STATE_OBSERVER_JS,
+    TABLES_EXTRACT_JS,
+)
+from processor_common import ProcessorCommonMixin
+from prompt_templates import get_prompt_templates
+from response_cache import prompt_prefix_hashes
+from response_capture import ResponseCapture, extract_code_blocks
+from upload_tracker import UploadTracker
 
 
 # 配置日志
 def setup_logging():
     """配置日志系统"""
     log_format = "%(asctime)s - %(levelname)s - %(message)s"
+    if config.WORKER_COUNT > 1:
+        # 并发模式下在日志中标记工作者（线程名）
+        log_format = "%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s"
     logging.basicConfig(
         level=getattr(logging, config.LOG_LEVEL),
         format=log_format,
@@ -36,10 +60,10 @@ def setup_logging():
 logger = setup_logging()
 
 
-class VideoProcessor:
+class VideoProcessor(ProcessorCommonMixin):
     """视频处理自动化类"""
 
-    def __init__(self):
+    def __init__(self, worker_id=None):
         # 使用配置文件中的路径
         self.base_dir = config.BASE_DIR
         self.process_folder = config.PROCESS_FOLDER
@@ -48,6 +72,7 @@ class VideoProcessor:
         self.video_list_file = config.VIDEO_LIST_FILE
         self.output_folder = config.OUTPUT_FOLDER
         self.clips_file = config.CLIPS_FILE
+        self.clips_dataset_dir = config.CLIPS_DATASET_DIR
 
         self.ai_studio_url = config.AI_STUDIO_URL
         self.page = None
@@ -61,122 +86,63 @@ class VideoProcessor:
         
         # 账号切换记录
         self.unavailable_accounts = set()  # 记录不可用的账号（遇到rate limit的）
+        self.switched_accounts = set()  # 记录切换过的账号
         self.current_account = None  # 当前使用的账号
+        self.account_pool = None  # 账号池模式下由调度器设置，速率限制时交给调度器改派
+        self.account_browser = None  # 系统 Chrome 模式下承载账号上下文的 Chromium
+        self.session_pool = None  # 单进程模式下快速切换账号使用的账号池
+        self.session_account = None  # 单进程模式下从 session_pool 切换到的账号（每完成一个视频计入配额）
         
         # AI Studio 打开标记
         self.ai_studio_opened = False  # 标记是否已经打开过 AI Studio
 
+        # 预上传：处理当前视频的后几个步骤时，在影子标签页中上传下一个视频
+        self.next_video_info = None  # 由 run_batch 设置
+        self.prefetch = None  # {"filename", "page", "status", "result", "tracker", "started"}
+
+        # 上传代理：上传前转码的低码率文件（由 run_batch 按需创建）
+        self.upload_proxy = None
+
+        # 后期处理流水线：视频保存输出后立即在后台剪辑/合成（由 run_batch 按需创建）
+        self.postprocess = None
+
+        # 最近一次上传的网络请求跟踪（start_upload 创建）
+        self.upload_tracker = None
+
+        # 断点续传记录（按视频内容哈希记录步骤进度和输出）
+        self.ledger = None
+        if config.LEDGER_ENABLED:
+            from ledger import Ledger
+            self.ledger = Ledger()
+        self.ledger_checked = set()  # 本次运行中已尝试过续传的视频哈希
+
+        # 模型回复缓存（按视频哈希 + 提示词链前缀复用步骤回复）
+        self.response_cache = None
+        if config.RESPONSE_CACHE_ENABLED:
+            from response_cache import ResponseCache
+            self.response_cache = ResponseCache()
+            self.response_cache.evict()
+
+        # 运行状态观察器：发送提示词前记录的完成计数（None 表示观察器不可用）
+        self.run_completions_baseline = None
+
+        # 网络层响应捕获（按步骤记录生成接口的响应）
+        self.response_capture = ResponseCapture() if config.RESPONSE_CAPTURE_ENABLED else None
+
+        # 并发工作者配置（worker_id 为 None 表示单进程交互模式）
+        self.worker_id = worker_id
+        self.interactive = worker_id is None  # 工作者模式下不等待终端输入
+        if worker_id is None:
+            self.screenshot_dir = config.SCREENSHOT_DIR
+            self.debug_folder_name = "debug"
+        else:
+            self.screenshot_dir = config.SCREENSHOT_DIR / f"worker_{worker_id}"
+            self.debug_folder_name = f"debug_worker_{worker_id}"
+
         # 确保目录存在
         ensure_directories()
-
-    def load_video_list(self):
-        """加载视频列表"""
-        if not self.video_list_file.exists():
-            logger.error(f"❌ 找不到视频列表文件: {self.video_list_file}")
-            return []
-
-        try:
-            df = pd.read_csv(self.video_list_file)
-            
-            # 清理列名（去除前后空格）
-            df.columns = df.columns.str.strip()
-            
-            videos = []
-            for _, row in df.iterrows():
-                video_info = {
-                    "filename": row["Filename"],
-                    "duration": row["Duration"]
-                }
-                # 如果有line1和line2列，也加载进来
-                if "line1" in row:
-                    video_info["line1"] = row["line1"]
-                if "line2" in row:
-                    video_info["line2"] = row["line2"]
-                videos.append(video_info)
-            logger.info(f"✅ 加载了 {len(videos)} 个视频")
-            return videos
-        except Exception as e:
-            logger.error(f"❌ 读取视频列表失败: {e}")
-            logger.error(f"   可用的列名: {list(df.columns) if 'df' in locals() else '无法读取'}")
-            return []
-
-    def load_prompts(self):
-        """加载提示词文件"""
-        if not self.prompts_file.exists():
-            logger.error(f"❌ 找不到提示词文件: {self.prompts_file}")
-            return None
-
-        try:
-            df = pd.read_excel(self.prompts_file)
-            logger.info(f"✅ 加载提示词文件，共 {len(df)} 行")
-            return df
-        except Exception as e:
-            logger.error(f"❌ 读取提示词文件失败: {e}")
-            return None
-
-    def update_prompts_file(self, video_info):
-        """更新提示词文件中的视频信息
-        
-        Args:
-            video_info: 字典，包含 filename, duration, line1, line2 等字段
-        """
-        df = self.load_prompts()
-        if df is None:
-            return False
-
-        # 更新视频名称
-        if "视频名称" in df.columns:
-            df.loc[0, "视频名称"] = video_info.get("filename", "")
-        
-        # 更新视频时长
-        if "视频时长" in df.columns:
-            df.loc[0, "视频时长"] = video_info.get("duration", "")
-        
-        # 更新line1
-        if "line1" in df.columns and "line1" in video_info:
-            df.loc[0, "line1"] = video_info.get("line1", "")
-        
-        # 更新line2（注意Excel中可能是lin2的拼写错误）
-        if "line2" in df.columns and "line2" in video_info:
-            df.loc[0, "line2"] = video_info.get("line2", "")
-        elif "lin2" in df.columns and "line2" in video_info:
-            df.loc[0, "lin2"] = video_info.get("line2", "")
-
-        df.to_excel(self.prompts_file, index=False)
-        logger.info(f"✅ 更新提示词文件: {video_info.get('filename')} - {video_info.get('duration')}")
-        if "line1" in video_info:
-            logger.info(f"   line1: {video_info.get('line1')}")
-        if "line2" in video_info:
-            logger.info(f"   line2: {video_info.get('line2')}")
-        return True
-
-    def get_prompts_list(self):
-        """获取所有提示词（步骤1-25）"""
-        df = self.load_prompts()
-        if df is None:
-            return []
-
-        prompts = []
-        # 假设提示词在某一列中，按步骤排列
-        for col in df.columns:
-            if "步骤" in col or "step" in col.lower() or "提示" in col:
-                for val in df[col].dropna():
-                    if val and str(val).strip():
-                        prompts.append(str(val).strip())
-
-        # 如果没有找到，尝试读取所有非空值
-        if not prompts:
-            for _, row in df.iterrows():
-                for val in row.dropna():
-                    if (
-                        val
-                        and str(val).strip()
-                        and str(val) not in ["文件名称", "视频时长"]
-                    ):
-                        prompts.append(str(val).strip())
-
-        print(f"✅ 提取了 {len(prompts)} 个提示词")
-        return prompts
+        if config.SAVE_SCREENSHOTS:
+            self.screenshot_dir.mkdir(parents=True, exist_ok=True)
 
     def get_chrome_user_data_dir(self):
         """获取 Chrome 用户数据目录"""
@@ -226,6 +192,7 @@ class VideoProcessor:
                     self.context = self.browser
                     self.page = self.browser.pages[0] if self.browser.pages else self.browser.new_page()
                     self.page.set_default_timeout(config.BROWSER_TIMEOUT)
+                    self.install_page_scripts()
                     logger.info("✅ 系统 Chrome 已启动，使用默认用户配置")
                     return
                     
@@ -272,11 +239,14 @@ class VideoProcessor:
         
         self.page = self.context.new_page()
         self.page.set_default_timeout(config.BROWSER_TIMEOUT)
+        self.install_page_scripts()
         logger.info("✅ 浏览器已启动")
 
     def close_browser(self):
         """关闭浏览器，保存会话状态"""
         try:
+            self.discard_prefetch()
+
             # 如果使用的是 persistent context，不需要保存会话
             # 因为会话已经保存在系统 Chrome 的用户数据中
             if self.context and self.context != self.browser:
@@ -291,6 +261,9 @@ class VideoProcessor:
             
             if self.browser:
                 self.browser.close()
+
+            if self.account_browser:
+                self.account_browser.close()
             
             if self.playwright:
                 self.playwright.stop()
@@ -299,13 +272,158 @@ class VideoProcessor:
         except Exception as e:
             logger.error(f"关闭浏览器时出错: {e}")
 
+    def _get_context_browser(self):
+        """返回可以创建新上下文的浏览器
+
+        系统 Chrome 模式下 self.browser 是 persistent context，不能再创建上下文，
+        此时额外启动一个 Chromium 专门承载账号上下文。
+        """
+        if self.context is not self.browser and hasattr(self.browser, "new_context"):
+            return self.browser
+        if self.account_browser is None:
+            logger.info("🌐 启动 Chromium 用于账号上下文")
+            self.account_browser = self.playwright.chromium.launch(
+                headless=config.HEADLESS, args=["--start-maximized"]
+            )
+        return self.account_browser
+
+    def install_page_scripts(self):
+        """在上下文中注册页面脚本（之后每次导航自动注入），并注入到当前页面"""
+        if self.response_capture:
+            self.response_capture.attach(self.page)
+        try:
+            for script in (RUN_STATE_OBSERVER_JS, CLIPBOARD_HOOK_JS):
+                self.context.add_init_script(script)
+                self.page.evaluate(script)
+        except Exception as e:
+            logger.debug(f"注入页面脚本失败: {e}")
+
+    def open_account_context(self, account, state_file):
+        """在新的浏览器上下文中加载账号的 storage_state，并直接打开 AI Studio
+
+        切换成本只有一次上下文创建和一次页面导航，不经过账号菜单。
+        同一账号重复调用时复用当前上下文。
+        """
+        if self.current_account == account and self.page and self.ai_studio_opened:
+            return True
+
+        logger.info(f"🔑 加载账号会话: {account}")
+        start_time = time.time()
+        old_context = self.context
+        new_context = None
+        try:
+            new_context = self._get_context_browser().new_context(
+                viewport=None,
+                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+                storage_state=str(state_file),
+            )
+            new_context.add_init_script(RUN_STATE_OBSERVER_JS)
+            new_context.add_init_script(CLIPBOARD_HOOK_JS)
+            new_page = new_context.new_page()
+            new_page.set_default_timeout(config.BROWSER_TIMEOUT)
+
+            # 直接打开 AI Studio，输入框出现即说明会话有效
+            new_page.goto(self.ai_studio_url, wait_until="domcontentloaded", timeout=60000)
+            new_page.wait_for_selector(config.SELECTORS["input_box"], state="visible", timeout=30000)
+        except Exception as e:
+            logger.error(f"❌ 账号 {account} 的会话无效或页面加载失败: {e}")
+            if new_context:
+                try:
+                    new_context.close()
+                except Exception:
+                    pass
+            return False
+
+        self.context = new_context
+        self.page = new_page
+        if self.response_capture:
+            self.response_capture.attach(new_page)
+
+        # 关闭旧账号的上下文（persistent context 即系统 Chrome，本身保留）
+        if old_context and old_context is not self.browser:
+            try:
+                old_context.close()
+            except Exception:
+                pass
+
+        self.current_account = account
+        self.ai_studio_opened = True
+        logger.info(f"✅ 已切换到账号 {account}（用时 {time.time() - start_time:.1f} 秒）")
+        return True
+
+    def save_account_state(self, account=None):
+        """把当前上下文的会话保存为账号的 storage_state 文件，供之后快速切换"""
+        account = account or self.current_account
+        if not account or not self.context:
+            return False
+        try:
+            state_dir = Path(config.ACCOUNT_STATE_DIR)
+            state_dir.mkdir(parents=True, exist_ok=True)
+            self.context.storage_state(path=str(state_dir / f"{account}.json"))
+            logger.info(f"💾 已保存账号会话: {account}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ 保存账号 {account} 的会话失败: {e}")
+            return False
+
+    def switch_account_via_storage_state(self):
+        """通过已保存的账号会话快速切换账号（不经过账号菜单）
+
+        当前账号进入账号池冷却，再从池中选择剩余配额最多的其他账号。
+        没有可用的已保存会话时返回 False，由调用方回退到菜单切换。
+        """
+        from account_pool import AccountPool
+
+        # 账号池模式下复用调度器的账号池；单进程模式单独创建（不改变 self.account_pool，
+        # 否则 wait_for_response 会把速率限制当作账号池改派处理）
+        if self.account_pool is not None:
+            pool = self.account_pool
+        else:
+            if self.session_pool is None:
+                self.session_pool = AccountPool()
+            pool = self.session_pool
+        if not pool.accounts():
+            return False
+
+        current_account = self.current_account or self.get_current_account()
+        if current_account:
+            self.unavailable_accounts.add(current_account)
+            # 顺便保存当前账号的会话，下次可以直接切回
+            self.save_account_state(current_account)
+            pool.mark_rate_limited(current_account)
+            self.session_account = None
+
+        while True:
+            account = pool.acquire(exclude=self.unavailable_accounts)
+            if account is None:
+                logger.info("💡 没有可用的已保存账号会话")
+                return False
+            if self.open_account_context(account, pool.state_file(account)):
+                self.switched_accounts.add(account)
+                if pool is self.session_pool:
+                    self.session_account = account
+                return True
+            # 会话失效的账号不再尝试
+            self.unavailable_accounts.add(account)
+            pool.release(account, used=False)
+
+    def charge_session_account(self):
+        """单进程模式下完成一个视频：给从 session_pool 切换到的账号计入一个配额（与账号池模式一致）"""
+        if self.session_pool is None or not self.session_account:
+            return
+        if self.session_account != self.current_account:
+            # 之后又通过账号菜单切换到了其他账号
+            self.session_account = None
+            return
+        self.session_pool.release(self.session_account, used=True)
+
     def take_screenshot(self, name="screenshot"):
         """截图保存"""
         if config.SAVE_SCREENSHOTS and self.page:
             try:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"{name}_{timestamp}.png"
-                filepath = config.SCREENSHOT_DIR / filename
+                filepath = self.screenshot_dir / filename
                 self.page.screenshot(path=str(filepath))
                 logger.debug(f"截图已保存: {filepath}")
             except Exception as e:
@@ -320,6 +438,10 @@ class VideoProcessor:
             # 保存会话状态
             self.context.storage_state(path=str(session_dir / "state.json"))
             logger.info("💾 会话状态已保存")
+
+            # 已知当前账号时，同时保存为该账号的会话文件（供账号池和快速切换使用）
+            if self.current_account:
+                self.save_account_state()
             return True
         except Exception as e:
             logger.error(f"❌ 保存会话失败: {e}")
@@ -434,8 +556,8 @@ class VideoProcessor:
             self.take_screenshot("ai_studio_opened")
             logger.info("✅ AI Studio 已打开")
             
-            # 只在首次打开时等待用户确认
-            if config.WAIT_USER_CONFIRMATION and not self.ai_studio_opened:
+            # 只在首次打开时等待用户确认（工作者模式下自动检测登录状态）
+            if config.WAIT_USER_CONFIRMATION and self.interactive and not self.ai_studio_opened:
                 logger.info("📝 首次打开 AI Studio，需要用户确认")
                 if not self.wait_for_user_confirmation():
                     logger.error("❌ 用户未确认，终止操作")
@@ -471,69 +593,57 @@ class VideoProcessor:
             # 等待一下，让弹窗有时间出现
             time.sleep(2)
             
-            # 检查是否有 Acknowledge 按钮（版权确认弹窗）
+            state = self.probe_page_state()
+            if not state or not state["acknowledgePopup"]:
+                # 没有检测到弹窗
+                logger.debug("✅ 未检测到上传后的弹窗")
+                return False
+
+            logger.warning("⚠️ 检测到上传后的弹窗（版权确认）")
+            self.take_screenshot("upload_popup_detected")
+
+            # 点击 Acknowledge 按钮
             acknowledge_selectors = [
                 'button[aria-label*="Acknowledge"]',
                 'button[aria-label*="acknowledgement"]',
                 'button:has-text("Acknowledge")',
-                'button.ms-button-primary:has-text("Acknowledge")',
             ]
-            
             for selector in acknowledge_selectors:
                 try:
                     button = self.page.locator(selector).first
-                    if button.count() > 0 and button.is_visible(timeout=2000):
-                        logger.warning("⚠️ 检测到上传后的弹窗（版权确认）")
-                        self.take_screenshot("upload_popup_detected")
-                        
-                        # 点击 Acknowledge 按钮
+                    if button.is_visible():
                         button.click(timeout=5000)
                         logger.info("✅ 已点击 Acknowledge 按钮")
                         time.sleep(2)
                         self.take_screenshot("upload_popup_closed")
-                        
-                        return True  # 返回 True 表示有弹窗并已关闭
+                        break
                 except:
                     continue
             
-            # 没有检测到弹窗
-            logger.debug("✅ 未检测到上传后的弹窗")
-            return False
+            return True  # 返回 True 表示有弹窗并已关闭
             
         except Exception as e:
             logger.debug(f"检查上传弹窗时出错: {e}")
             return False
     
-    def check_video_uploaded(self):
-        """检查视频是否已成功上传到对话中"""
-        try:
-            # 查找视频缩略图或视频元素
-            video_indicators = [
-                'video',  # video 标签
-                '[data-test-id*="video"]',
-                'img[alt*="video"]',
-                '.video-thumbnail',
-                '[role="img"]',
-            ]
-            
-            for selector in video_indicators:
-                try:
-                    element = self.page.locator(selector).first
-                    if element.count() > 0 and element.is_visible(timeout=2000):
-                        logger.debug(f"✅ 检测到视频元素: {selector}")
-                        return True
-                except:
-                    continue
-            
-            logger.warning("⚠️ 未检测到视频元素")
-            return False
-            
-        except Exception as e:
-            logger.debug(f"检查视频上传状态时出错: {e}")
-            return False
+    def check_video_uploaded(self, state=None):
+        """检查视频是否已成功上传到对话中（读取页面状态快照）"""
+        state = state or self.probe_page_state()
+        if state and state["videoUploaded"]:
+            logger.debug("✅ 检测到视频元素")
+            return True
+
+        logger.warning("⚠️ 未检测到视频元素")
+        return False
     
     def upload_video(self, video_path):
-        """上传视频文件 - 点击添加按钮，然后点击 Upload File"""
+        """上传视频文件 - 点击添加按钮，然后点击 Upload File，并等待上传完成"""
+        if not self.start_upload(video_path):
+            return False
+        return self.finish_upload()
+
+    def start_upload(self, video_path):
+        """开始上传：点击添加按钮 → Upload File → 选择文件（文件在浏览器中继续上传）"""
         logger.info(f"📤 正在上传视频: {video_path}")
 
         if not Path(video_path).exists():
@@ -610,6 +720,12 @@ class VideoProcessor:
 
             logger.info("✅ 找到 Upload File 按钮")
 
+            # 开始跟踪上传请求（必须在选择文件之前）
+            if config.UPLOAD_TRACKING_ENABLED:
+                self.upload_tracker = UploadTracker()
+                self.upload_tracker.attach(self.page)
+                self.upload_tracker.begin(Path(video_path).stat().st_size)
+
             # 步骤3：使用 file chooser 上传文件
             logger.info("3️⃣ 设置文件选择器并上传文件...")
             
@@ -670,34 +786,60 @@ class VideoProcessor:
                     time.sleep(1)
                 except Exception as e2:
                     logger.warning(f"⚠️ 点击关闭菜单失败: {e2}")
-            
-            # 步骤5：等待上传完成（检测上传进度）
+
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ 上传视频失败: {e}")
+            import traceback
+            traceback.print_exc()
+            self.take_screenshot("error_upload_video")
+            if self.upload_tracker:
+                self.upload_tracker.detach()
+            return False
+
+    def is_upload_in_progress(self, tracker=None):
+        """上传是否还在进行：有上传请求时以网络信号为准，否则看页面上的上传进度指示器"""
+        if tracker and tracker.seen:
+            return tracker.in_progress
+        # 常见的上传进度指示器
+        progress_selectors = [
+            '[role="progressbar"]',
+            '.upload-progress',
+            'text="Uploading"',
+            'text="上传中"',
+        ]
+        for selector in progress_selectors:
+            try:
+                indicator = self.page.locator(selector).first
+                if indicator.count() > 0 and indicator.is_visible():
+                    return True
+            except:
+                continue
+        return False
+
+    def finish_upload(self, tracker=None):
+        """等待上传完成，处理上传后的弹窗并验证视频已加入对话"""
+        tracker = tracker or self.upload_tracker
+        try:
+            # 步骤5：等待上传完成（优先使用网络信号：服务端确认上传即完成）
             logger.info("⏳ 等待视频上传完成...")
-            
-            # 等待上传进度条消失或上传完成
+            committed = None
+            if tracker:
+                committed = tracker.wait_for_commit(self.page, timeout=config.UPLOAD_COMMIT_TIMEOUT)
+                tracker.detach()
+                if committed is False:
+                    self.take_screenshot("error_upload_not_committed")
+                    return False
+
+            # 没有检测到上传请求时，等待上传进度条消失
             upload_wait_time = 0
             max_upload_wait = config.WAIT_AFTER_UPLOAD * 2  # 最多等待 2 倍时间
             
-            while upload_wait_time < max_upload_wait:
+            while committed is None and upload_wait_time < max_upload_wait:
                 # 检查是否有上传进度指示器
                 try:
-                    # 常见的上传进度指示器
-                    progress_selectors = [
-                        '[role="progressbar"]',
-                        '.upload-progress',
-                        'text="Uploading"',
-                        'text="上传中"',
-                    ]
-                    
-                    uploading = False
-                    for selector in progress_selectors:
-                        try:
-                            indicator = self.page.locator(selector).first
-                            if indicator.count() > 0 and indicator.is_visible():
-                                uploading = True
-                                break
-                        except:
-                            continue
+                    uploading = self.is_upload_in_progress()
                     
                     if not uploading:
                         # 没有上传指示器，可能已完成
@@ -715,8 +857,9 @@ class VideoProcessor:
                     logger.debug(f"检查上传进度时出错: {e}")
                     break
             
-            # 额外等待确保上传完成
-            time.sleep(3)
+            # 额外等待确保上传完成（网络信号已确认时不需要）
+            if committed is None:
+                time.sleep(3)
             self.take_screenshot("video_uploaded")
 
             # 检查是否有弹窗（例如版权确认）
@@ -743,6 +886,130 @@ class VideoProcessor:
             self.take_screenshot("error_upload_video")
             return False
 
+    def get_upload_path(self, video_name):
+        """上传使用的文件：启用上传代理时为代理文件，否则为原始文件"""
+        video_path = self.videos_folder / video_name
+        if self.upload_proxy:
+            return self.upload_proxy.get(video_path)
+        return video_path
+
+    @contextmanager
+    def _on_page(self, page):
+        """临时把 self.page 指向另一个标签页（复用基于 self.page 的方法）"""
+        current_page = self.page
+        self.page = page
+        try:
+            yield page
+        finally:
+            self.page = current_page
+
+    def start_prefetch(self, video_info):
+        """在影子标签页中打开新对话并开始上传下一个视频"""
+        video_name = video_info["filename"]
+        logger.info(f"🔮 预上传下一个视频: {video_name}")
+        self.prefetch = {
+            "filename": video_name, "page": None, "status": "failed", "result": None,
+            "tracker": None, "started": time.time(),
+        }
+        page = None
+        try:
+            page = self.context.new_page()
+            page.set_default_timeout(config.BROWSER_TIMEOUT)
+            page.goto(self.ai_studio_url, wait_until="domcontentloaded", timeout=60000)
+            page.wait_for_selector(config.SELECTORS["input_box"], state="visible", timeout=30000)
+            with self._on_page(page):
+                started = self.start_upload(self.get_upload_path(video_name))
+            self.page.bring_to_front()
+        except Exception as e:
+            logger.warning(f"⚠️ 预上传失败: {e}")
+            started = False
+
+        if not started:
+            logger.warning("⚠️ 预上传未能开始，下一个视频将正常上传")
+            if page:
+                try:
+                    page.close()
+                except:
+                    pass
+            return False
+
+        self.prefetch.update(page=page, status="uploading", tracker=self.upload_tracker)
+        return True
+
+    def advance_prefetch(self, step_number):
+        """推进预上传（当前视频每发送一个提示词调用一次，AI 生成期间执行）
+
+        从 PREFETCH_START_STEP 开始在影子标签页中上传下一个视频；之后的步骤中
+        检查上传是否结束，结束后处理弹窗并验证视频。
+        """
+        if not config.PREFETCH_ENABLED or not self.next_video_info:
+            return
+        if step_number is None or step_number < config.PREFETCH_START_STEP:
+            return
+
+        if self.prefetch is None or self.prefetch["filename"] != self.next_video_info["filename"]:
+            self.discard_prefetch()
+            self.start_prefetch(self.next_video_info)
+            return
+
+        if self.prefetch["status"] != "uploading":
+            return
+
+        try:
+            with self._on_page(self.prefetch["page"]):
+                if self.is_upload_in_progress(self.prefetch["tracker"]):
+                    return
+                self.prefetch["result"] = self.finish_upload(self.prefetch["tracker"])
+            self.prefetch["status"] = "ready"
+            self.page.bring_to_front()
+            logger.info(f"✅ 预上传完成: {self.prefetch['filename']}")
+        except Exception as e:
+            logger.warning(f"⚠️ 检查预上传状态失败: {e}")
+            self.discard_prefetch()
+
+    def take_prefetched_upload(self, video_name):
+        """切换到已预上传该视频的影子标签页
+
+        Returns:
+            上传结果（同 upload_video）；没有可用的预上传时返回 None
+        """
+        prefetch = self.prefetch
+        if not prefetch or prefetch["filename"] != video_name or prefetch["page"] is None:
+            return None
+        self.prefetch = None
+
+        page = prefetch["page"]
+        if page.is_closed():
+            logger.warning("⚠️ 预上传的标签页已关闭，重新上传")
+            return None
+
+        logger.info(f"⚡ 切换到预上传的标签页（{time.time() - prefetch['started']:.0f} 秒前开始上传）")
+        old_page = self.page
+        self.page = page
+        try:
+            self.page.bring_to_front()
+        except:
+            pass
+        if self.response_capture:
+            self.response_capture.attach(self.page)
+        try:
+            old_page.close()
+        except:
+            pass
+
+        if prefetch["status"] == "ready":
+            return prefetch["result"]
+        return self.finish_upload(prefetch["tracker"])
+
+    def discard_prefetch(self):
+        """关闭未使用的预上传标签页"""
+        if self.prefetch and self.prefetch["page"] is not None:
+            try:
+                self.prefetch["page"].close()
+            except:
+                pass
+        self.prefetch = None
+
     def send_prompt(self, prompt_text, step_number=None):
         """发送提示词到对话框
         
@@ -794,6 +1061,15 @@ class VideoProcessor:
             logger.info(f"✅ 已填入提示词")
             time.sleep(0.5)
 
+            # 点击 Run 之前记录完成计数，wait_for_response 等待它增加
+            self.mark_run_baseline()
+            # "继续"等补充提示词（没有步骤编号）的响应记到当前步骤下的新一轮，步骤回复取最后一轮
+            if self.response_capture:
+                if step_number is not None:
+                    self.response_capture.begin_step(step_number)
+                else:
+                    self.response_capture.begin_turn()
+
             # 等待 Run 按钮变为可用状态
             logger.info("⏳ 等待 Run 按钮可用...")
             run_button = None
@@ -874,73 +1150,46 @@ class VideoProcessor:
             self.take_screenshot("error_send_prompt")
             return False
 
-    def check_content_blocked(self):
-        """检查是否出现 Content blocked（带去重逻辑）"""
+    def check_content_blocked(self, state=None):
+        """检查是否出现 Content blocked（带去重逻辑，读取页面状态快照）"""
         try:
-            # 检查多种可能的错误提示
-            error_texts = ["Content blocked", "内容被阻止", "blocked", "error"]
-
-            for text in error_texts:
-                try:
-                    blocked_element = self.page.get_by_text(text, exact=False).first
-                    if blocked_element.is_visible(timeout=1000):
-                        current_time = time.time()
-                        
-                        # 检查是否在短时间内已经处理过（冷却时间内不重复处理）
-                        cooldown = config.CONTENT_BLOCKED_COOLDOWN
-                        if current_time - self.last_blocked_time < cooldown:
-                            logger.debug(f"⏭️ Content blocked 已在 {int(current_time - self.last_blocked_time)} 秒前处理过，跳过")
-                            return False
-                        
-                        logger.warning(f"⚠️ 检测到错误提示: {text}")
-                        self.take_screenshot("content_blocked")
+            state = state or self.probe_page_state()
+            text = state and state["contentBlocked"]
+            if text:
+                current_time = time.time()
+                
+                # 检查是否在短时间内已经处理过（冷却时间内不重复处理）
+                cooldown = config.CONTENT_BLOCKED_COOLDOWN
+                if current_time - self.last_blocked_time < cooldown:
+                    logger.debug(f"⏭️ Content blocked 已在 {int(current_time - self.last_blocked_time)} 秒前处理过，跳过")
+                    return False
+                
+                logger.warning(f"⚠️ 检测到错误提示: {text}")
+                self.take_screenshot("content_blocked")
 
-                        # 自动输入"继续"
-                        logger.info("正在输入'继续'...")
-                        self.send_prompt("继续")
-                        
-                        # 更新处理时间
-                        self.last_blocked_time = current_time
-                        
-                        time.sleep(3)
-                        return True
-                except:
-                    continue
+                # 自动输入"继续"
+                logger.info("正在输入'继续'...")
+                self.send_prompt("继续")
+                
+                # 更新处理时间
+                self.last_blocked_time = current_time
+                
+                time.sleep(3)
+                return True
         except Exception as e:
             logger.debug(f"检查 Content blocked 时出错: {e}")
 
         return False
     
-    def check_rate_limit(self):
-        """检查是否达到速率限制或配额超限"""
-        try:
-            # 检查 rate limit 和 quota exceeded 错误提示
-            rate_limit_texts = [
-                "You've reached your rate limit",
-                "rate limit",
-                "exceeded quota",  # 新增：配额超限
-                "user has exceeded quota",  # 新增：用户配额超限
-                "Please try again later",  # 新增：请稍后重试
-                "请稍后再试",
-                "达到速率限制",
-                "配额已超限",  # 新增：中文配额超限
-            ]
-            
-            for text in rate_limit_texts:
-                try:
-                    element = self.page.get_by_text(text, exact=False).first
-                    if element.is_visible(timeout=1000):
-                        logger.warning(f"⚠️ 检测到速率限制或配额超限: {text}")
-                        self.take_screenshot("rate_limit_or_quota_exceeded")
-                        return True
-                except:
-                    continue
-            
-            return False
-            
-        except Exception as e:
-            logger.debug(f"检查速率限制时出错: {e}")
-            return False
+    def check_rate_limit(self, state=None):
+        """检查是否达到速率限制或配额超限（读取页面状态快照）"""
+        state = state or self.probe_page_state()
+        text = state and state["rateLimit"]
+        if text:
+            logger.warning(f"⚠️ 检测到速率限制或配额超限: {text}")
+            self.take_screenshot("rate_limit_or_quota_exceeded")
+            return True
+        return False
     
     def get_current_account(self):
         """获取当前登录的账号（增强版，等待页面更新）"""
@@ -1109,6 +1358,14 @@ class VideoProcessor:
         logger.info("="*60)
         
         try:
+            # 优先使用已保存的账号会话快速切换
+            if self.switch_account_via_storage_state():
+                logger.info("="*60)
+                logger.info("✅ 账号切换完成（会话切换）")
+                logger.info("="*60)
+                return True
+            logger.info("↪️ 回退到账号菜单切换")
+
             # 步骤1：获取当前账号并标记为不可用
             current_account = self.get_current_account()
             if current_account:
@@ -1291,6 +1548,10 @@ class VideoProcessor:
                 logger.warning("⚠️ 没有找到可用的账号")
                 logger.info("💡 提示: 所有账号可能都已使用，或需要手动选择")
                 
+                if not self.interactive:
+                    logger.error("❌ 工作者模式下无法手动选择账号")
+                    return False
+                
                 # 等待用户手动选择
                 logger.info("\n请手动选择一个账号，然后按 Enter 继续...")
                 try:
@@ -1370,74 +1631,71 @@ class VideoProcessor:
             self.take_screenshot("error_switch_account")
             return False
 
-    def is_ai_running(self):
+    def probe_page_state(self):
+        """一次 evaluate 读取页面状态快照（Run 按钮、加载指示器、错误提示、视频、模型回复）
+
+        各项检查都从快照中读取，避免每项检查各自发起多次 Playwright 调用。
+        读取失败时返回 None。
+        """
+        try:
+            return self.page.evaluate(PAGE_STATE_PROBE_JS, {
+                "rateLimitTexts": RATE_LIMIT_TEXTS,
+                "blockedTexts": CONTENT_BLOCKED_TEXTS,
+                "loadingTexts": LOADING_TEXTS,
+            })
+        except Exception as e:
+            logger.debug(f"读取页面状态失败: {e}")
+            return None
+
+    def is_ai_running(self, state=None):
         """检查 AI 是否正在运行
         
         正确的判断逻辑：
         - AI运行中：Run按钮显示"Stop"
         - AI完成：Run按钮显示"Run"且不可用（aria-disabled="true"）
         - 可以发送：Run按钮显示"Run"且可用（填入提示词后）
+        - 找不到 Run 按钮时，以加载指示器为准
         """
-        try:
-            # 查找 Run 按钮
-            run_button_selectors = [
-                'button[aria-label="Run"]',
-                'button.run-button',
-                'button[type="submit"][aria-label="Run"]',
-            ]
-            
-            for selector in run_button_selectors:
-                try:
-                    run_button = self.page.locator(selector).first
-                    if run_button.count() > 0:
-                        # 检查按钮内容和属性
-                        button_html = run_button.inner_html()
-                        button_class = run_button.get_attribute('class') or ''
-                        aria_disabled = run_button.get_attribute('aria-disabled')
-                        
-                        # 如果按钮显示 "Stop" 或包含 stoppable 类，说明 AI 正在运行
-                        if 'Stop' in button_html or 'stoppable' in button_class:
-                            logger.debug("🔍 AI运行中: 按钮显示Stop")
-                            return True
-                        
-                        # 如果按钮显示 "Run" 且不可用，说明 AI 已完成（输入框为空）
-                        if 'Run' in button_html and aria_disabled == 'true':
-                            logger.debug("🔍 AI已完成: 按钮显示Run且不可用")
-                            return False
-                        
-                        # 如果按钮显示 "Run" 且可用，说明已填入提示词，可以发送
-                        if 'Run' in button_html and aria_disabled != 'true':
-                            logger.debug("🔍 可以发送: 按钮显示Run且可用")
-                            return False
-                except:
-                    continue
-            
-            # 方法2：检查是否有加载指示器
-            loading_selectors = [
-                '[role="progressbar"]',
-                '.loading',
-                '.spinner',
-                'text="Generating"',
-                'text="生成中"',
-            ]
-            
-            for selector in loading_selectors:
-                try:
-                    indicator = self.page.locator(selector).first
-                    if indicator.count() > 0 and indicator.is_visible(timeout=500):
-                        logger.debug(f"🔍 AI运行中: 发现加载指示器 {selector}")
-                        return True
-                except:
-                    continue
-            
+        state = state or self.probe_page_state()
+        if not state:
             # 默认返回 False（假设已完成）
-            logger.debug("🔍 AI已完成: 所有检查通过")
             return False
-            
+
+        button = state["runButton"]
+        if button["label"] == "stop":
+            logger.debug("🔍 AI运行中: 按钮显示Stop")
+        elif button["label"] == "run":
+            logger.debug(f"🔍 按钮显示Run（{'不可用，AI已完成' if button['disabled'] else '可用，可以发送'}）")
+        elif state["loading"]:
+            logger.debug("🔍 AI运行中: 发现加载指示器")
+        return state["running"]
+    
+    def mark_run_baseline(self):
+        """记录运行状态观察器当前的完成计数"""
+        try:
+            self.run_completions_baseline = self.page.evaluate(RUN_COMPLETIONS_JS)
         except Exception as e:
-            logger.debug(f"检查 AI 运行状态时出错: {e}")
+            logger.debug(f"读取运行状态失败: {e}")
+            self.run_completions_baseline = None
+
+    def wait_for_run_complete(self, timeout):
+        """等待页面内观察器报告本次运行结束（Run→Stop→Run）
+
+        完成后几十毫秒内返回 True；超时或观察器不可用时返回 False。
+        """
+        if self.run_completions_baseline is None:
             return False
-    
+        try:
+            self.page.wait_for_function(
+                RUN_COMPLETED_JS,
+                arg=self.run_completions_baseline,
+                timeout=timeout * 1000,
+                polling=50,
+            )
+            return True
+        except Exception:
+            return False
+
     def scroll_chat_to_bottom(self):
         """滚动聊天容器到底部，确保能看到最新内容"""
         try:
@@ -1487,51 +1745,66 @@ class VideoProcessor:
         except Exception as e:
             logger.warning(f"⚠️ 滚动到底部时出错: {e}")
     
-    def verify_response_complete(self, step_number=None):
-        """验证响应是否完整"""
-        try:
-            # 检查是否有响应
-            responses = self.page.locator('[data-turn-role="Model"]').all()
-            if not responses:
-                logger.debug("⚠️ 未找到任何响应")
-                return False
-            
-            # 检查最后一个响应是否有内容
-            last_response = responses[-1]
-            text = last_response.inner_text()
-            
-            if not text or len(text.strip()) == 0:
-                logger.debug("⚠️ 最后一个响应为空")
-                return False
-            
-            # 检查响应长度是否合理（至少10个字符）
-            if len(text.strip()) < 10:
-                logger.debug(f"⚠️ 响应太短: {len(text)} 字符")
-                return False
-            
-            # 如果是步骤25，检查是否有表格
-            if step_number == 25:
-                tables = last_response.locator('table').all()
-                if not tables:
-                    logger.debug("⚠️ 步骤25未找到表格")
-                    return False
-                
-                # 检查表格是否有数据
-                table = tables[-1]
-                rows = table.locator('tr').count()
-                if rows < 2:  # 至少有表头 + 1行数据
-                    logger.debug(f"⚠️ 表格数据不足: {rows} 行")
-                    return False
-                
-                logger.debug(f"✅ 步骤25表格验证通过: {rows} 行")
-            
-            logger.debug(f"✅ 响应验证通过: {len(text)} 字符")
-            return True
-            
-        except Exception as e:
-            logger.debug(f"⚠️ 验证响应时出错: {e}")
+    def verify_response_complete(self, step_number=None, state=None):
+        """验证响应是否完整（读取页面状态快照）"""
+        state = state or self.probe_page_state()
+        if not state:
+            return False
+
+        if not state["modelTurns"]:
+            logger.debug("⚠️ 未找到任何响应")
             return False
+
+        # 检查最后一个响应是否有内容（至少10个字符）
+        length = state["lastTurnLength"]
+        if length == 0:
+            logger.debug("⚠️ 最后一个响应为空")
+            return False
+        if length < 10:
+            logger.debug(f"⚠️ 响应太短: {length} 字符")
+            return False
+
+        # 如果是步骤25，检查是否有表格（至少有表头 + 1行数据）
+        if step_number == 25:
+            rows = state["lastTableRows"]
+            if rows < 2:
+                logger.debug(f"⚠️ 步骤25表格数据不足: {rows} 行")
+                return False
+            logger.debug(f"✅ 步骤25表格验证通过: {rows} 行")
+
+        logger.debug(f"✅ 响应验证通过: {length} 字符")
+        return True
     
+    def wait_for_dom_settle(self, step_number=None):
+        """等待最后一个模型回复的 DOM 稳定
+
+        连续 RESPONSE_QUIET_WINDOW 秒没有变化即返回（步骤25使用 RESPONSE_QUIET_WINDOW_TABLE，
+        并要求表格行数不变），最多等待 RESPONSE_SETTLE_MAX 秒。
+        返回页面内的观测数据（settled、settleMs、mutations、rows、textLength），失败时返回 None。
+        """
+        watch_table = step_number == 25
+        quiet_window = config.RESPONSE_QUIET_WINDOW_TABLE if watch_table else config.RESPONSE_QUIET_WINDOW
+        try:
+            result = self.page.evaluate(DOM_SETTLE_JS, {
+                "quietMs": int(quiet_window * 1000),
+                "maxMs": int(config.RESPONSE_SETTLE_MAX * 1000),
+                "watchTable": watch_table,
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ 等待响应稳定失败: {e}，改为固定等待 {quiet_window} 秒")
+            time.sleep(quiet_window)
+            return None
+
+        # 稳定用时指标：用于调整静默窗口
+        table_info = f"，表格 {result['rows']} 行" if watch_table else ""
+        status = "稳定" if result["settled"] else "达到上限"
+        logger.info(
+            f"📏 响应{status}: 步骤 {step_number} 稳定用时 {result['settleMs']} ms，"
+            f"总等待 {result['waitedMs']} ms（静默窗口 {int(quiet_window * 1000)} ms，"
+            f"DOM 变更 {result['mutations']} 次{table_info}）"
+        )
+        return result
+
     def wait_for_response(self, timeout=None, step_number=None):
         """等待 AI 响应完成 - 通过检测按钮状态，并处理 rate limit
         
@@ -1545,22 +1818,35 @@ class VideoProcessor:
         logger.info(f"⏳ 等待 AI 响应{step_info}...")
 
         start_time = time.time()
-        check_interval = 2
+        # 观察器可用时每个等待窗口 10 秒（完成时立即返回），否则每 2 秒轮询一次
+        observer_available = self.run_completions_baseline is not None
+        check_interval = 10 if observer_available else 2
         last_status_log = 0
         timeout_count = 0  # 超时次数计数
         max_timeout_count = 3  # 最多3次超时后询问用户
 
         while True:  # 改为无限循环，直到AI完成
             elapsed = time.time() - start_time
+
+            # 每轮只读取一次页面状态快照，各项检查共用
+            state = self.probe_page_state()
             
             # 检查是否达到速率限制
-            if self.check_rate_limit():
+            if self.check_rate_limit(state):
+                # 账号池模式：由调度器把视频改派给其他账号
+                if self.account_pool is not None:
+                    logger.warning(f"⚠️ 账号 {self.current_account} 达到速率限制，交给账号池改派")
+                    return "rate_limit"
+
                 logger.warning("⚠️ 检测到速率限制，尝试切换账号...")
                 
                 # 尝试切换账号
                 if self.switch_account():
                     logger.info("✅ 账号切换成功，重新发送请求")
                     return "rate_limit_switched"
+                elif not self.interactive:
+                    logger.error("❌ 账号切换失败，工作者跳过当前视频")
+                    return "skip"
                 else:
                     logger.error("❌ 账号切换失败")
                     logger.info("\n可选操作:")
@@ -1592,13 +1878,19 @@ class VideoProcessor:
                 continue
             
             # 检查是否被阻止
-            if self.check_content_blocked():
+            if self.check_content_blocked(state):
                 start_time = time.time()  # 重置计时器
                 timeout_count = 0
                 continue
 
+            # 等待完成信号；超时后再用按钮状态确认一次（观察器漏判时兜底）
+            if self.wait_for_run_complete(check_interval):
+                running = False
+            else:
+                running = self.is_ai_running()
+
             # 检查 AI 是否正在运行
-            if self.is_ai_running():
+            if running:
                 # AI 正在运行，继续等待
                 current_time = time.time()
                 
@@ -1615,6 +1907,11 @@ class VideoProcessor:
                     timeout_count += 1
                     logger.warning(f"⚠️ 等待超时（第 {timeout_count} 次），但 AI 仍在运行")
                     
+                    # 工作者模式下无人值守，超过最大超时次数直接跳过当前视频
+                    if timeout_count >= max_timeout_count and not self.interactive:
+                        logger.error(f"❌ 已超时 {timeout_count} 次（{int(elapsed)} 秒），工作者跳过当前视频")
+                        return "skip"
+                    
                     # 如果超过最大超时次数，询问用户
                     if timeout_count >= max_timeout_count:
                         logger.warning(f"⚠️ 已超时 {timeout_count} 次（{int(elapsed)} 秒）")
@@ -1647,19 +1944,13 @@ class VideoProcessor:
                         logger.info(f"💡 继续等待 AI 完成... (将在第 {max_timeout_count} 次超时后询问)")
                         start_time = time.time()  # 重置计时器
                 
-                time.sleep(check_interval)
+                if not observer_available:
+                    time.sleep(check_interval)
                 continue
             else:
-                # AI 已完成（Run按钮不可用），等待响应稳定
+                # AI 已完成（Run按钮不可用），等待响应稳定（步骤25还要等表格行数不再变化）
                 logger.info("✅ AI 处理完成，等待响应稳定...")
-                
-                # 步骤25需要更长时间渲染表格
-                if step_number == 25:
-                    logger.info("📊 步骤25：等待表格渲染（10秒）...")
-                    time.sleep(10)
-                else:
-                    time.sleep(5)
-                
+                self.wait_for_dom_settle(step_number)
                 logger.info("✅ 响应已稳定，可以提取数据")
                 break
 
@@ -1679,8 +1970,42 @@ class VideoProcessor:
             else "response_received"
         )
 
+    def extract_captured_response(self, step_number):
+        """从网络层捕获的回复文本中提取步骤输出，没有可用数据时返回 None
+
+        步骤23返回SRT代码块，步骤25返回表格数据（CSV代码块或Markdown表格），其余返回文本。
+        """
+        if not self.response_capture or step_number is None:
+            return None
+
+        text = self.response_capture.text_for_step(step_number)
+        if not text.strip():
+            return None
+        logger.info(f"📡 使用网络捕获的步骤 {step_number} 回复（{len(text)} 字符）")
+
+        if step_number == 23:
+            srt_blocks = [
+                block for block in extract_code_blocks(text)
+                if '-->' in block and re.search(r'\d{2}:\d{2}:\d{2},\d{3}', block)
+            ]
+            if srt_blocks:
+                return srt_blocks[0] if len(srt_blocks) == 1 else srt_blocks
+            return None
+
+        if step_number == 25:
+            blocks = extract_code_blocks(text)
+            table_data = self.parse_csv_content(blocks[0] if len(blocks) == 1 else blocks) if blocks else None
+            return table_data or self.parse_table_response(text)
+
+        return text
+
     def extract_response(self, step_number=None):
         """提取 AI 的响应内容"""
+        # 优先使用网络层捕获的回复
+        captured = self.extract_captured_response(step_number)
+        if captured:
+            return captured
+
         # 滚动聊天到底部，确保能看到最新内容
         self.scroll_chat_to_bottom()
         
@@ -1711,8 +2036,8 @@ class VideoProcessor:
                 try:
                     response_text = last_response_element.inner_text()
                     if not response_text or len(response_text.strip()) == 0:
-                        logger.warning("⚠️ 响应元素为空，等待3秒后重试...")
-                        time.sleep(3)
+                        logger.warning("⚠️ 响应元素为空，等待响应稳定后重试...")
+                        self.wait_for_dom_settle(step_number)
                         response_text = last_response_element.inner_text()
                         if not response_text or len(response_text.strip()) == 0:
                             logger.warning("⚠️ 响应仍然为空")
@@ -1780,129 +2105,9 @@ class VideoProcessor:
                     if csv_content:
                         logger.info(f"✅ 通过复制按钮获取到CSV内容")
                         # 解析CSV内容为表格数据
-                        try:
-                            import io
-                            import csv
-                            if isinstance(csv_content, str):
-                                # 单个CSV内容
-                                # 检查是否是CSV格式（不是SRT）
-                                # SRT格式的特征：包含 --> 时间箭头和 SRT 序号行
-                                is_srt = ('-->' in csv_content and 
-                                         re.search(r'^\d+$', csv_content.split('\n')[0] if csv_content.split('\n') else '', re.MULTILINE))
-                                
-                                if is_srt:
-                                    logger.warning("⚠️ 复制按钮内容是SRT格式，不是CSV，跳过")
-                                else:
-                                    # 修复CSV中的时间格式问题：将 00:00:00,000 改为 00:00:00.000
-                                    # 因为CSV使用逗号分隔，时间中的逗号会被误认为列分隔符
-                                    csv_content = re.sub(r'(\d{2}:\d{2}:\d{2}),(\d{3})', r'\1.\2', csv_content)
-                                    
-                                    # 去除每行尾部的多余逗号，避免列数不匹配
-                                    lines = csv_content.strip().split('\n')
-                                    cleaned_lines = [line.rstrip(',') for line in lines]
-                                    csv_content = '\n'.join(cleaned_lines)
-                                    
-                                    logger.debug("🔧 已修复CSV格式（时间逗号改点号，去除行尾逗号）")
-                                    
-                                    # 使用更健壮的CSV解析方法
-                                    try:
-                                        # 先尝试使用pandas解析，使用更宽松的参数来处理列数不一致的问题
-                                        df = pd.read_csv(io.StringIO(csv_content), on_bad_lines='skip')
-                                        table_data = df.to_dict('records')
-                                        logger.info(f"✅ 解析CSV得到 {len(table_data)} 行数据")
-                                        return table_data
-                                    except Exception as e:
-                                        logger.warning(f"⚠️ 使用pandas解析CSV失败: {e}")
-                                        # 如果pandas解析失败，尝试手动解析并清洗数据
-                                        lines = csv_content.strip().split('\n')
-                                        if len(lines) < 2:
-                                            logger.warning("⚠️ CSV内容行数不足")
-                                            return None
-                                        
-                                        # 解析表头
-                                        header = lines[0].split(',')
-                                        header = [h.strip() for h in header]
-                                        logger.info(f"📋 CSV表头: {header}")
-                                        
-                                        # 解析数据行
-                                        table_data = []
-                                        for i, line in enumerate(lines[1:], 1):
-                                            try:
-                                                # 使用csv模块解析，处理引号和转义字符
-                                                reader = csv.reader([line])
-                                                row_data = next(reader)
-                                                
-                                                # 创建行字典，处理列数不匹配的情况
-                                                row_dict = {}
-                                                # 如果列数过多，丢弃后面多出的列（因为这些多出的列数据是空的）
-                                                actual_data_length = len(row_data)
-                                                header_length = len(header)
-                                                
-                                                # 处理列数不匹配的情况
-                                                for j, header_col in enumerate(header):
-                                                    if j < actual_data_length:
-                                                        row_dict[header_col] = row_data[j].strip()
-                                                    else:
-                                                        row_dict[header_col] = ""  # 填充空值
-                                                
-                                                # 如果数据列比表头列多，检查多出的列是否都是空的，如果是则忽略
-                                                if actual_data_length > header_length:
-                                                    extra_columns_empty = True
-                                                    for j in range(header_length, actual_data_length):
-                                                        if row_data[j].strip():
-                                                            extra_columns_empty = False
-                                                            break
-                                                    
-                                                    if extra_columns_empty:
-                                                        logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的空列，已丢弃")
-                                                    else:
-                                                        logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的非空列")
-                                                
-                                                table_data.append(row_dict)
-                                                logger.debug(f"  行 {i}: {row_dict}")
-                                            except Exception as line_e:
-                                                logger.warning(f"⚠️ 解析行 {i} 失败: {line_e}")
-                                                continue
-                                        
-                                        if table_data:
-                                            logger.info(f"✅ 手动解析CSV得到 {len(table_data)} 行数据")
-                                            return table_data
-                                        else:
-                                            logger.warning("⚠️ 手动解析未获得有效数据")
-                            else:
-                                # 多个CSV内容，尝试每一个
-                                logger.info(f"📋 获取到 {len(csv_content)} 个内容，尝试解析...")
-                                for i, content in enumerate(csv_content, 1):
-                                    # 检查是否是CSV格式（不是SRT）
-                                    # SRT格式的特征：包含 --> 时间箭头和 SRT 序号行
-                                    is_srt = ('-->' in content and 
-                                             re.search(r'^\d+$', content.split('\n')[0] if content.split('\n') else '', re.MULTILINE))
-                                    
-                                    if is_srt:
-                                        logger.info(f"⚠️ 内容 {i} 是SRT格式，跳过")
-                                        continue
-                                    
-                                    # 修复CSV中的时间格式问题：将 00:00:00,000 改为 00:00:00.000
-                                    content = re.sub(r'(\d{2}:\d{2}:\d{2}),(\d{3})', r'\1.\2', content)
-                                    
-                                    # 去除每行尾部的多余逗号，避免列数不匹配
-                                    lines = content.strip().split('\n')
-                                    cleaned_lines = [line.rstrip(',') for line in lines]
-                                    content = '\n'.join(cleaned_lines)
-                                    
-                                    logger.debug(f"🔧 内容 {i}: 已修复CSV格式")
-                                    
-                                    try:
-                                        # 使用更宽松的参数来处理列数不一致的问题
-                                        df = pd.read_csv(io.StringIO(content), on_bad_lines='skip')
-                                        table_data = df.to_dict('records')
-                                        logger.info(f"✅ 从内容 {i} 解析CSV得到 {len(table_data)} 行数据")
-                                        return table_data
-                                    except Exception as e:
-                                        logger.warning(f"⚠️ 解析内容 {i} 失败: {e}")
-                                        continue
-                        except Exception as e:
-                            logger.warning(f"⚠️ 解析CSV失败: {e}")
+                        table_data = self.parse_csv_content(csv_content)
+                        if table_data:
+                            return table_data
                     
                     # 方法2：尝试从HTML DOM提取表格数据（备用）
                     logger.info("🔍 方法2：尝试从HTML DOM提取表格数据...")
@@ -1938,14 +2143,16 @@ class VideoProcessor:
             logger.error(traceback.format_exc())
             return ""
     
-    def save_response_html(self, response_element, step_number, video_name="debug"):
+    def save_response_html(self, response_element, step_number, video_name=None):
         """保存响应元素的HTML内容用于调试
         
         Args:
             response_element: 响应元素
             step_number: 步骤编号
-            video_name: 视频名称
+            video_name: 视频名称（默认使用当前处理器的调试目录名）
         """
+        if video_name is None:
+            video_name = self.debug_folder_name
         try:
             # 创建调试目录
             debug_folder = self.process_folder / video_name / "debug"
@@ -1989,8 +2196,73 @@ class VideoProcessor:
             logger.warning(f"⚠️ 保存HTML调试文件失败: {e}")
             return None
     
+    def capture_copy_button_contents(self, response_element):
+        """获取响应中所有复制按钮对应的内容（一次调用，按 COPY_CAPTURE_MODE 选择方式）
+
+        "direct" 直接读取代码块文本；有按钮找不到代码块时改用 "hook"；
+        "hook" 拦截不可用时回退到逐个点击读取剪贴板。
+        返回内容列表（与复制按钮顺序一致，空内容已去掉）。
+        """
+        mode = config.COPY_CAPTURE_MODE
+
+        if mode == "direct":
+            blocks = response_element.evaluate(COPY_BUTTON_BLOCKS_JS)
+            if blocks and all(block is not None for block in blocks):
+                logger.info(f"📋 直接读取了 {len(blocks)} 个代码块")
+                return [block for block in blocks if block]
+            if not blocks:
+                return []
+            logger.info("💡 部分复制按钮没有对应的代码块，改为拦截剪贴板")
+            mode = "hook"
+
+        if mode == "hook":
+            copied = response_element.evaluate(CLICK_COPY_BUTTONS_JS)
+            if copied is not None:
+                logger.info(f"📋 拦截到 {len(copied)} 个复制内容")
+                return [text for text in copied if text]
+            logger.warning("⚠️ 剪贴板拦截未注入，回退到读取剪贴板")
+
+        return self._read_copy_buttons_via_clipboard(response_element)
+
+    def _read_copy_buttons_via_clipboard(self, response_element):
+        """逐个点击复制按钮并读取系统剪贴板（旧方式）"""
+        copy_buttons = response_element.locator('button[iconname="content_copy"]').all()
+        contents = []
+
+        for i, button in enumerate(copy_buttons):
+            try:
+                logger.info(f"📋 点击复制按钮 {i+1}/{len(copy_buttons)}...")
+                
+                # 点击复制按钮
+                button.click()
+                
+                # 等待剪贴板更新
+                time.sleep(0.5)
+                
+                # 获取剪贴板内容
+                clipboard_content = self.page.evaluate('''
+                    async () => {
+                        try {
+                            return await navigator.clipboard.readText();
+                        } catch (e) {
+                            return null;
+                        }
+                    }
+                ''')
+                
+                if clipboard_content:
+                    contents.append(clipboard_content)
+                else:
+                    logger.warning(f"⚠️ 无法从复制按钮 {i+1} 获取剪贴板内容")
+                
+            except Exception as e:
+                logger.warning(f"⚠️ 点击复制按钮 {i+1} 失败: {e}")
+                continue
+
+        return contents
+
     def extract_content_by_clicking_copy_buttons(self, response_element, content_type="通用"):
-        """通用方法：通过点击复制按钮获取剪贴板内容
+        """通用方法：获取复制按钮对应的内容
         
         Args:
             response_element: 响应元素
@@ -2000,54 +2272,14 @@ class VideoProcessor:
             内容列表（如果有多个复制按钮）或单个内容字符串（如果只有一个按钮）
         """
         try:
-            # 查找所有复制按钮（iconname="content_copy"）
-            copy_buttons = response_element.locator('button[iconname="content_copy"]').all()
-            
-            if not copy_buttons:
-                logger.warning("⚠️ 未找到复制按钮")
-                return None
-            
-            logger.info(f"🔍 找到 {len(copy_buttons)} 个复制按钮")
-            
-            contents = []
-            
-            for i, button in enumerate(copy_buttons):
-                try:
-                    logger.info(f"📋 点击复制按钮 {i+1}/{len(copy_buttons)}...")
-                    
-                    # 点击复制按钮
-                    button.click()
-                    
-                    # 等待剪贴板更新
-                    time.sleep(0.5)
-                    
-                    # 获取剪贴板内容
-                    # 使用 Playwright 的 evaluate 方法读取剪贴板
-                    clipboard_content = self.page.evaluate('''
-                        async () => {
-                            try {
-                                return await navigator.clipboard.readText();
-                            } catch (e) {
-                                return null;
-                            }
-                        }
-                    ''')
-                    
-                    if clipboard_content:
-                        logger.info(f"✅ 从复制按钮 {i+1} 获取到 {len(clipboard_content)} 字符的{content_type}内容")
-                        contents.append(clipboard_content)
-                    else:
-                        logger.warning(f"⚠️ 无法从复制按钮 {i+1} 获取剪贴板内容")
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ 点击复制按钮 {i+1} 失败: {e}")
-                    continue
+            contents = self.capture_copy_button_contents(response_element)
             
             if contents:
                 logger.info(f"✅ 总共获取了 {len(contents)} 个{content_type}内容")
                 # 如果只有一个内容，返回字符串；否则返回列表
                 return contents[0] if len(contents) == 1 else contents
             
+            logger.warning(f"⚠️ 未获取到{content_type}内容")
             return None
             
         except Exception as e:
@@ -2057,7 +2289,7 @@ class VideoProcessor:
             return None
     
     def extract_srt_by_clicking_copy_buttons(self, response_element):
-        """通过点击复制按钮获取SRT剪贴板内容（带格式验证）
+        """获取复制按钮对应的SRT内容（带格式验证）
         
         Args:
             response_element: 响应元素
@@ -2066,52 +2298,14 @@ class VideoProcessor:
             SRT文件内容列表，每个元素是一个SRT文件的内容
         """
         try:
-            # 查找所有复制按钮（iconname="content_copy"）
-            copy_buttons = response_element.locator('button[iconname="content_copy"]').all()
-            
-            if not copy_buttons:
-                logger.warning("⚠️ 未找到复制按钮")
-                return None
-            
-            logger.info(f"🔍 找到 {len(copy_buttons)} 个复制按钮")
-            
             srt_contents = []
-            
-            for i, button in enumerate(copy_buttons):
-                try:
-                    logger.info(f"📋 点击复制按钮 {i+1}/{len(copy_buttons)}...")
-                    
-                    # 点击复制按钮
-                    button.click()
-                    
-                    # 等待剪贴板更新
-                    time.sleep(0.5)
-                    
-                    # 获取剪贴板内容
-                    # 使用 Playwright 的 evaluate 方法读取剪贴板
-                    clipboard_content = self.page.evaluate('''
-                        async () => {
-                            try {
-                                return await navigator.clipboard.readText();
-                            } catch (e) {
-                                return null;
-                            }
-                        }
-                    ''')
-                    
-                    if clipboard_content:
-                        # 检查是否是SRT格式
-                        if '-->' in clipboard_content and re.search(r'\d{2}:\d{2}:\d{2},\d{3}', clipboard_content):
-                            logger.info(f"✅ 从复制按钮 {i+1} 获取到 {len(clipboard_content)} 字符的SRT内容")
-                            srt_contents.append(clipboard_content)
-                        else:
-                            logger.warning(f"⚠️ 复制按钮 {i+1} 的内容不是SRT格式")
-                    else:
-                        logger.warning(f"⚠️ 无法从复制按钮 {i+1} 获取剪贴板内容")
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ 点击复制按钮 {i+1} 失败: {e}")
-                    continue
+            for i, content in enumerate(self.capture_copy_button_contents(response_element)):
+                # 检查是否是SRT格式
+                if '-->' in content and re.search(r'\d{2}:\d{2}:\d{2},\d{3}', content):
+                    logger.info(f"✅ 内容 {i+1} 为 {len(content)} 字符的SRT内容")
+                    srt_contents.append(content)
+                else:
+                    logger.warning(f"⚠️ 内容 {i+1} 不是SRT格式")
             
             if srt_contents:
                 logger.info(f"✅ 总共获取了 {len(srt_contents)} 个SRT文件的内容")
@@ -2135,8 +2329,8 @@ class VideoProcessor:
             SRT文件内容（字符串或列表），如果失败则返回None
         """
         try:
-            # 方法1：通过点击复制按钮获取剪贴板内容（推荐）
-            logger.info("🔍 方法1：尝试通过点击复制按钮获取剪贴板内容...")
+            # 方法1：获取复制按钮对应的内容（推荐）
+            logger.info("🔍 方法1：尝试获取复制按钮对应的内容...")
             srt_contents = self.extract_srt_by_clicking_copy_buttons(response_element)
             if srt_contents:
                 # 如果获取到多个SRT文件，合并它们
@@ -2190,6 +2384,10 @@ class VideoProcessor:
             logger.debug(traceback.format_exc())
             return None
     
+    def read_tables(self, response_element):
+        """一次 evaluate 读取响应元素下所有表格的表头和单元格文本"""
+        return response_element.evaluate(TABLES_EXTRACT_JS)
+
     def extract_srt_from_table(self, response_element):
         """从表格中提取SRT内容
         
@@ -2200,80 +2398,13 @@ class VideoProcessor:
             SRT文件内容（字符串），如果失败则返回None
         """
         try:
-            # 查找所有表格
-            tables = response_element.locator('table').all()
+            tables = self.read_tables(response_element)
             if not tables:
                 logger.debug("未找到表格元素")
                 return None
             
             logger.info(f"📋 找到 {len(tables)} 个表格")
-            
-            all_srt_content = []
-            
-            for table_idx, table in enumerate(tables):
-                try:
-                    # 获取所有行
-                    rows = table.locator('tr').all()
-                    if len(rows) < 2:  # 至少需要表头和一行数据
-                        continue
-                    
-                    # 检查表头是否包含SRT相关列（序号、时间戳、内容）
-                    header_row = rows[0]
-                    header_text = header_row.inner_text().lower()
-                    
-                    # 判断是否是SRT表格
-                    is_srt_table = ('时间戳' in header_text or 'timestamp' in header_text) and \
-                                   ('序号' in header_text or '内容' in header_text or 'content' in header_text)
-                    
-                    if not is_srt_table:
-                        logger.debug(f"表格 {table_idx} 不是SRT表格")
-                        continue
-                    
-                    logger.info(f"✅ 表格 {table_idx} 是SRT表格，开始提取...")
-                    
-                    # 提取数据行（跳过表头）
-                    srt_entries = []
-                    for row_idx, row in enumerate(rows[1:], 1):
-                        try:
-                            cells = row.locator('td').all()
-                            if len(cells) < 3:
-                                continue
-                            
-                            # 提取序号、时间戳、内容
-                            seq_num = cells[0].inner_text().strip()
-                            timestamp = cells[1].inner_text().strip()
-                            content = cells[2].inner_text().strip()
-                            
-                            # 清理时间戳格式（可能包含数学符号）
-                            # 将 "−−>" 转换为 "-->"
-                            timestamp = timestamp.replace('−', '-').replace('—', '--')
-                            if '-->' not in timestamp:
-                                timestamp = timestamp.replace('--', ' --> ')
-                            
-                            # 构建SRT条目
-                            srt_entry = f"{seq_num}\n{timestamp}\n{content}\n"
-                            srt_entries.append(srt_entry)
-                            
-                        except Exception as e:
-                            logger.debug(f"提取行 {row_idx} 失败: {e}")
-                            continue
-                    
-                    if srt_entries:
-                        table_srt = '\n'.join(srt_entries)
-                        all_srt_content.append(table_srt)
-                        logger.info(f"✅ 从表格 {table_idx} 提取了 {len(srt_entries)} 个SRT条目")
-                
-                except Exception as e:
-                    logger.debug(f"处理表格 {table_idx} 失败: {e}")
-                    continue
-            
-            if all_srt_content:
-                # 合并所有SRT内容
-                combined_srt = '\n'.join(all_srt_content)
-                logger.info(f"✅ 总共提取了 {len(all_srt_content)} 个SRT文件的内容")
-                return combined_srt
-            
-            return None
+            return self.parse_srt_tables(tables)
             
         except Exception as e:
             logger.error(f"❌ 从表格提取SRT失败: {e}")
@@ -2282,115 +2413,16 @@ class VideoProcessor:
             return None
     
     def extract_table_from_dom(self, response_element):
-        """从HTML DOM中直接提取表格数据"""
+        """从HTML DOM中直接提取表格数据（一次 evaluate 读取所有单元格）"""
         try:
-            # 查找表格元素
-            tables = response_element.locator('table').all()
+            tables = self.read_tables(response_element)
             if not tables:
                 logger.warning("⚠️ 未找到表格元素")
                 return None
             
             # 使用最后一个表格（通常是最新的）
-            table = tables[-1]
             logger.info(f"📋 找到 {len(tables)} 个表格，使用最后一个")
-            
-            # 提取表头 - 尝试多种方法
-            headers = []
-            
-            # 方法1：查找 thead > tr > th
-            try:
-                thead_rows = table.locator('thead tr').all()
-                if thead_rows:
-                    header_cells = thead_rows[0].locator('th').all()
-                    if not header_cells:
-                        header_cells = thead_rows[0].locator('td').all()
-                    for cell in header_cells:
-                        try:
-                            text = cell.inner_text().strip()
-                            headers.append(text)
-                        except:
-                            headers.append("")
-                    if headers:
-                        logger.info(f"📋 表头（从thead提取）: {headers}")
-            except:
-                pass
-            
-            # 方法2：查找第一行（如果没有thead）
-            if not headers:
-                try:
-                    all_rows = table.locator('tr').all()
-                    if all_rows:
-                        first_row = all_rows[0]
-                        header_cells = first_row.locator('th').all()
-                        if not header_cells:
-                            header_cells = first_row.locator('td').all()
-                        for cell in header_cells:
-                            try:
-                                text = cell.inner_text().strip()
-                                headers.append(text)
-                            except:
-                                headers.append("")
-                        if headers:
-                            logger.info(f"📋 表头（从第一行提取）: {headers}")
-                except:
-                    pass
-            
-            if not headers:
-                logger.warning("⚠️ 未找到表头")
-                return None
-            
-            # 提取数据行（跳过表头行）
-            table_data = []
-            all_rows = table.locator('tr').all()
-            
-            # 确定从哪一行开始提取数据
-            start_row = 1 if all_rows else 0  # 跳过第一行（表头）
-            
-            # 如果有tbody，从tbody中提取
-            tbody_rows = table.locator('tbody tr').all()
-            if tbody_rows:
-                data_rows = tbody_rows
-                logger.info(f"📊 从tbody找到 {len(data_rows)} 行数据")
-            else:
-                data_rows = all_rows[start_row:] if len(all_rows) > start_row else []
-                logger.info(f"📊 找到 {len(data_rows)} 行数据（跳过表头）")
-            
-            for row_index, row in enumerate(data_rows):
-                try:
-                    cells = row.locator('td').all()
-                    row_dict = {}
-                    
-                    for col_index, cell in enumerate(cells):
-                        try:
-                            text = cell.inner_text().strip()
-                            if col_index < len(headers):
-                                header = headers[col_index]
-                                row_dict[header] = text if text else ""
-                            else:
-                                row_dict[f"column_{col_index}"] = text if text else ""
-                        except Exception as e:
-                            logger.debug(f"提取单元格 [{row_index},{col_index}] 失败: {e}")
-                            if col_index < len(headers):
-                                row_dict[headers[col_index]] = ""
-                    
-                    if row_dict:
-                        table_data.append(row_dict)
-                        logger.debug(f"行 {row_index + 1}: {row_dict}")
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ 提取第 {row_index + 1} 行失败: {e}")
-                    continue
-            
-            if table_data:
-                logger.info(f"✅ 成功提取 {len(table_data)} 行数据")
-                # 显示每列的统计
-                for header in headers:
-                    non_empty = sum(1 for row in table_data if row.get(header, ""))
-                    logger.info(f"  - {header}: {non_empty}/{len(table_data)} 行有数据")
-                return table_data
-            else:
-                logger.warning("⚠️ 未提取到任何数据")
-                return None
+            return self.parse_dom_table(tables[-1])
             
         except Exception as e:
             logger.error(f"❌ 从DOM提取表格失败: {e}")
@@ -2398,468 +2430,6 @@ class VideoProcessor:
             logger.debug(traceback.format_exc())
             return None
     
-    def parse_table_response(self, response_text):
-        """解析 AI 响应中的表格数据
-        
-        尝试从响应文本中提取结构化的表格数据
-        支持多种格式：Markdown表格、CSV格式、JSON格式等
-        能够处理空单元格和不完整的行
-        """
-        import re
-        import json
-        
-        if not response_text:
-            return None
-        
-        try:
-            # 方法1：尝试解析 Markdown 表格（改进版，支持空单元格）
-            lines = response_text.strip().split('\n')
-            table_data = []
-            headers = []
-            
-            for i, line in enumerate(lines):
-                # 跳过分隔线
-                if re.match(r'^[\s\-\|]+$', line):
-                    continue
-                
-                # 检查是否是表格行
-                if '|' in line:
-                    # 分割单元格，但保留空单元格
-                    cells = line.split('|')
-                    # 移除首尾的空单元格（Markdown 表格通常以 | 开头和结尾）
-                    if cells and not cells[0].strip():
-                        cells = cells[1:]
-                    if cells and not cells[-1].strip():
-                        cells = cells[:-1]
-                    # 清理每个单元格的空白
-                    cells = [cell.strip() for cell in cells]
-                    
-                    if cells:
-                        if not headers:
-                            # 第一行作为表头
-                            headers = cells
-                            logger.info(f"📋 检测到表头: {headers}")
-                        else:
-                            # 数据行：即使单元格数量不匹配也尝试解析
-                            row_dict = {}
-                            for j, header in enumerate(headers):
-                                # 如果该列有数据，使用数据；否则使用空字符串
-                                if j < len(cells):
-                                    row_dict[header] = cells[j] if cells[j] else ""
-                                else:
-                                    row_dict[header] = ""
-                            table_data.append(row_dict)
-            
-            if table_data:
-                logger.info(f"✅ 解析到 {len(table_data)} 行表格数据")
-                # 显示每列的非空数据统计
-                if headers:
-                    for header in headers:
-                        non_empty = sum(1 for row in table_data if row.get(header, ""))
-                        logger.info(f"  - {header}: {non_empty}/{len(table_data)} 行有数据")
-                return table_data
-            
-            # 方法2：尝试解析 JSON 格式
-            try:
-                # 查找 JSON 数组
-                json_match = re.search(r'\[[\s\S]*\]', response_text)
-                if json_match:
-                    json_data = json.loads(json_match.group())
-                    if isinstance(json_data, list) and json_data:
-                        logger.info(f"✅ 解析到 {len(json_data)} 行 JSON 数据")
-                        return json_data
-            except:
-                pass
-            
-            # 方法3：尝试解析 CSV 格式
-            try:
-                import io
-                import csv
-                try:
-                    # 使用更宽松的参数来处理列数不一致的问题
-                    csv_data = pd.read_csv(io.StringIO(response_text), on_bad_lines='skip')
-                    if not csv_data.empty:
-                        logger.info(f"✅ 解析到 {len(csv_data)} 行 CSV 数据")
-                        return csv_data.to_dict('records')
-                except Exception as e:
-                    logger.warning(f"⚠️ 使用pandas解析CSV失败: {e}")
-                    # 如果pandas解析失败，尝试手动解析并清洗数据
-                    lines = response_text.strip().split('\n')
-                    if len(lines) < 2:
-                        logger.warning("⚠️ CSV内容行数不足")
-                        return None
-                    
-                    # 解析表头
-                    header = lines[0].split(',')
-                    header = [h.strip() for h in header]
-                    logger.info(f"📋 CSV表头: {header}")
-                    
-                    # 解析数据行
-                    table_data = []
-                    for i, line in enumerate(lines[1:], 1):
-                        try:
-                            # 使用csv模块解析，处理引号和转义字符
-                            reader = csv.reader([line])
-                            row_data = next(reader)
-                            
-                            # 创建行字典，处理列数不匹配的情况
-                            row_dict = {}
-                            # 如果列数过多，丢弃后面多出的列（因为这些多出的列数据是空的）
-                            actual_data_length = len(row_data)
-                            header_length = len(header)
-                            
-                            # 处理列数不匹配的情况
-                            for j, header_col in enumerate(header):
-                                if j < actual_data_length:
-                                    row_dict[header_col] = row_data[j].strip()
-                                else:
-                                    row_dict[header_col] = ""  # 填充空值
-                            
-                            # 如果数据列比表头列多，检查多出的列是否都是空的，如果是则忽略
-                            if actual_data_length > header_length:
-                                extra_columns_empty = True
-                                for j in range(header_length, actual_data_length):
-                                    if row_data[j].strip():
-                                        extra_columns_empty = False
-                                        break
-                                
-                                if extra_columns_empty:
-                                    logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的空列，已丢弃")
-                                else:
-                                    logger.debug(f"  行 {i}: 发现 {actual_data_length - header_length} 个多余的非空列")
-                            
-                            table_data.append(row_dict)
-                            logger.debug(f"  行 {i}: {row_dict}")
-                        except Exception as line_e:
-                            logger.warning(f"⚠️ 解析行 {i} 失败: {line_e}")
-                            continue
-                    
-                    if table_data:
-                        logger.info(f"✅ 手动解析CSV得到 {len(table_data)} 行数据")
-                        return table_data
-                    else:
-                        logger.warning("⚠️ 手动解析未获得有效数据")
-            except:
-                pass
-            
-            logger.warning("⚠️ 无法解析为结构化数据，将保存原始文本")
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ 解析表格数据失败: {e}")
-            import traceback
-            logger.debug(traceback.format_exc())
-            return None
-
-    def _clean_srt_content(self, srt_text):
-        """清理SRT内容，移除UI元素和无关文本
-        
-        Args:
-            srt_text: 原始SRT文本
-            
-        Returns:
-            清理后的SRT文本
-        """
-        import re
-        
-        # 查找第一个SRT序号和时间戳
-        first_entry_match = re.search(r'^(\d+)\s+(\d{2}:\d{2}:\d{2},\d{3}\s+-->)', srt_text, re.MULTILINE)
-        
-        if first_entry_match:
-            # 从第一个SRT条目开始提取
-            start_pos = first_entry_match.start()
-            cleaned_text = srt_text[start_pos:].strip()
-            
-            # 移除末尾的UI元素和下一个文件的标题
-            # 策略：找到最后一个有效的SRT条目，移除之后的所有内容
-            lines = cleaned_text.split('\n')
-            
-            # 查找最后一个完整的SRT条目
-            # 完整的SRT条目包含：序号 + 时间戳 + 至少一行文本
-            last_subtitle_end = -1
-            i = 0
-            
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                # 检查是否是序号（纯数字）
-                if re.match(r'^\d+$', line):
-                    # 检查下一行是否是时间戳
-                    if i + 1 < len(lines) and re.match(r'^\d{2}:\d{2}:\d{2},\d{3}\s+-->', lines[i + 1].strip()):
-                        # 找到一个SRT条目的开始
-                        # 查找这个条目的结束位置（下一个空行或文件结束）
-                        j = i + 2  # 从时间戳的下一行开始（字幕文本）
-                        subtitle_text_found = False
-                        
-                        while j < len(lines):
-                            current_line = lines[j].strip()
-                            
-                            # 空行表示条目结束
-                            if not current_line:
-                                if subtitle_text_found:
-                                    last_subtitle_end = j
-                                break
-                            
-                            # 检查是否是UI元素或无关内容
-                            is_ui_element = (
-                                current_line in ['code', 'Srt', 'download', 'content_copy', 'expand_less', 'expand_more'] or
-                                re.match(r'^(?:SRT\s*)?(?:文件|File)\s*[A-Z\d一二三四五六七八九十]+[：:]', current_line, re.IGNORECASE) or
-                                'Google Search' in current_line or
-                                'Display of Search' in current_line or
-                                re.match(r'^Step\s+\d+', current_line)
-                            )
-                            
-                            if is_ui_element:
-                                # 遇到UI元素，当前条目在此结束
-                                if subtitle_text_found:
-                                    last_subtitle_end = j
-                                break
-                            else:
-                                # 这是字幕文本
-                                subtitle_text_found = True
-                            
-                            j += 1
-                        else:
-                            # 到达文件末尾
-                            if subtitle_text_found:
-                                last_subtitle_end = len(lines)
-                        
-                        # 跳到这个条目之后
-                        i = j
-                        continue
-                
-                i += 1
-            
-            # 如果找到了有效的字幕条目，截取到最后一个条目
-            if last_subtitle_end > 0:
-                cleaned_text = '\n'.join(lines[:last_subtitle_end]).strip()
-                removed_lines = len(lines) - last_subtitle_end
-                if removed_lines > 0:
-                    logger.debug(f"✂️ 移除了末尾的 {removed_lines} 行无关内容")
-            
-            return cleaned_text
-        
-        # 如果没找到标准格式，返回原文本
-        return srt_text.strip()
-    
-    def extract_and_save_srt_files(self, text_content, output_folder):
-        """从文本中提取并保存SRT文件
-        
-        Args:
-            text_content: 包含SRT内容的文本（字符串）或SRT内容列表（列表）
-            output_folder: 输出文件夹
-            
-        Returns:
-            保存的SRT文件列表
-        """
-        import re
-        
-        srt_files = []
-        
-        try:
-            # 如果输入是列表（从复制按钮获取的多个SRT文件）
-            if isinstance(text_content, list):
-                logger.info(f"📋 处理 {len(text_content)} 个SRT文件（来自复制按钮）")
-                for i, srt_content in enumerate(text_content, 1):
-                    # 清理每个SRT内容
-                    srt_content = self._clean_srt_content(srt_content)
-                    srt_file = output_folder / f"step_23_output_{i}.srt"
-                    with open(srt_file, "w", encoding="utf-8") as f:
-                        f.write(srt_content.strip())
-                    srt_files.append(srt_file)
-                    logger.info(f"✅ 保存SRT文件 {i}: {srt_file.name} ({len(srt_content)} 字符)")
-                return srt_files
-            # 清理文本：移除UI元素（如按钮文本）
-            # 常见的UI元素关键词
-            ui_keywords = [
-                'code', 'Srt', 'download', 'content_copy', 'expand_less', 'expand_more',
-                'Copy code', 'Download', 'Show more', 'Show less'
-            ]
-            
-            # 查找第一个SRT时间戳的位置
-            first_timestamp_match = re.search(r'\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->', text_content)
-            
-            if first_timestamp_match:
-                # 从第一个时间戳之前开始查找，移除UI元素
-                before_timestamp = text_content[:first_timestamp_match.start()]
-                
-                # 查找 expand_less 或类似的标记
-                expand_less_pos = before_timestamp.rfind('expand_less')
-                if expand_less_pos == -1:
-                    expand_less_pos = before_timestamp.rfind('expand_more')
-                
-                if expand_less_pos != -1:
-                    # 从 expand_less 之后开始提取内容
-                    logger.info(f"🔍 检测到UI元素标记，从位置 {expand_less_pos} 之后开始提取")
-                    text_content = text_content[expand_less_pos + len('expand_less'):].strip()
-                    logger.info(f"✂️ 清理后的内容长度: {len(text_content)} 字符")
-                else:
-                    # 尝试查找标题行（通常在第一个时间戳之前）
-                    # 移除第一个时间戳之前的所有内容（标题、按钮等）
-                    lines_before = before_timestamp.strip().split('\n')
-                    if len(lines_before) > 3:  # 如果有多行，可能包含UI元素
-                        logger.info(f"🔍 检测到 {len(lines_before)} 行前置内容，尝试清理")
-                        # 保留标题行（通常是第一行），移除其他UI元素
-                        text_content = text_content[first_timestamp_match.start():].strip()
-                        logger.info(f"✂️ 清理后的内容长度: {len(text_content)} 字符")
-            
-            # 方法1：查找明确标记的SRT文件（如 "文件1:" 或 "File 1:" 或 "SRT 文件 1："）
-            # 分割文本，查找多个SRT块
-            # 支持多种格式：
-            # - "文件1:" 或 "文件 1:"
-            # - "File 1:" 或 "File1:"
-            # - "SRT 1:" 或 "SRT1:"
-            # - "SRT 文件 1:" 或 "SRT文件1:"
-            srt_pattern = r'(?:SRT\s*文件|文件|File|SRT)\s*(\d+)\s*[：:](.*?)(?=(?:SRT\s*文件|文件|File|SRT)\s*\d+\s*[：:]|$)'
-            matches = re.findall(srt_pattern, text_content, re.DOTALL | re.IGNORECASE)
-            
-            if matches:
-                logger.info(f"📋 找到 {len(matches)} 个标记的SRT文件")
-                for i, (file_num, srt_content) in enumerate(matches, 1):
-                    # 清理每个SRT内容
-                    srt_content = self._clean_srt_content(srt_content)
-                    srt_file = output_folder / f"step_23_output_{file_num}.srt"
-                    with open(srt_file, "w", encoding="utf-8") as f:
-                        f.write(srt_content.strip())
-                    srt_files.append(srt_file)
-                    logger.info(f"✅ 保存SRT文件 {file_num}: {srt_file.name} ({len(srt_content)} 字符)")
-            else:
-                # 方法2：查找SRT格式的内容块（通过时间戳识别）
-                # SRT格式：序号 + 时间戳 + 文本
-                srt_block_pattern = r'(\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->\s+\d{2}:\d{2}:\d{2},\d{3}.*?)(?=\n\d+\s+\d{2}:\d{2}:\d{2},\d{3}\s+-->|\Z)'
-                
-                # 尝试分割成多个SRT文件（通过连续的空行或特定标记）
-                # 简单方法：如果文本很长，可能包含多个SRT文件，尝试按长度分割
-                if '00:00:00,000' in text_content or '00:00:00,0' in text_content:
-                    # 包含SRT时间戳，尝试保存
-                    # 检查是否有多个SRT文件（通过查找多个起始时间戳）
-                    start_timestamps = re.findall(r'^1\s+00:00:00', text_content, re.MULTILINE)
-                    
-                    if len(start_timestamps) > 1:
-                        # 多个SRT文件，尝试分割
-                        logger.info(f"📋 检测到 {len(start_timestamps)} 个SRT文件起始标记")
-                        parts = re.split(r'(?=^1\s+00:00:00)', text_content, flags=re.MULTILINE)
-                        parts = [p.strip() for p in parts if p.strip()]
-                        
-                        for i, part in enumerate(parts, 1):
-                            if part:
-                                # 清理每个SRT内容
-                                part = self._clean_srt_content(part)
-                                srt_file = output_folder / f"step_23_output_{i}.srt"
-                                with open(srt_file, "w", encoding="utf-8") as f:
-                                    f.write(part)
-                                srt_files.append(srt_file)
-                                logger.info(f"✅ 保存SRT文件 {i}: {srt_file.name} ({len(part)} 字符)")
-                    else:
-                        # 单个SRT文件
-                        text_content = self._clean_srt_content(text_content)
-                        srt_file = output_folder / "step_23_output_1.srt"
-                        with open(srt_file, "w", encoding="utf-8") as f:
-                            f.write(text_content.strip())
-                        srt_files.append(srt_file)
-                        logger.info(f"✅ 保存SRT文件: {srt_file.name} ({len(text_content)} 字符)")
-            
-            return srt_files
-            
-        except Exception as e:
-            logger.error(f"❌ 提取SRT文件失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return []
-    
-    def save_output_data(self, video_name, step_outputs):
-        """保存输出数据为 Excel"""
-        output_folder = self.process_folder / video_name.replace(".mp4", "").replace(
-            ".MP4", ""
-        )
-        output_folder.mkdir(exist_ok=True)
-
-        logger.info(f"💾 保存输出数据到: {output_folder}")
-        logger.info(f"📊 待保存的步骤: {list(step_outputs.keys())}")
-
-        for step_num, data in step_outputs.items():
-            logger.info(f"🔍 处理步骤 {step_num}, 数据类型: {type(data)}, 数据长度: {len(data) if data else 0}")
-            
-            if not data:
-                logger.warning(f"⚠️ 步骤 {step_num} 数据为空，跳过")
-                continue
-
-            # 步骤23特殊处理：保存为SRT文件
-            if step_num == 23 and (isinstance(data, str) or isinstance(data, list)):
-                try:
-                    srt_files = self.extract_and_save_srt_files(data, output_folder)
-                    if srt_files:
-                        logger.info(f"✅ 步骤 23 保存了 {len(srt_files)} 个SRT文件")
-                        for srt_file in srt_files:
-                            logger.info(f"  - {srt_file.name}")
-                    else:
-                        logger.warning("⚠️ 步骤 23 未找到SRT文件内容，保存为文本")
-                        # 回退到保存为文本文件
-                        text_file = output_folder / f"step_{step_num}_output.txt"
-                        with open(text_file, "w", encoding="utf-8") as f:
-                            if isinstance(data, list):
-                                f.write('\n\n=== 文件分隔 ===\n\n'.join(data))
-                            else:
-                                f.write(data)
-                        logger.info(f"✅ 已保存为文本文件: {text_file.name}")
-                    continue
-                except Exception as e:
-                    logger.error(f"❌ 保存步骤 23 SRT文件失败: {e}")
-                    # 继续使用默认的保存逻辑
-
-            output_file = output_folder / f"step_{step_num}_output.xlsx"
-
-            try:
-                # 如果是列表（从DOM直接提取的表格数据）
-                if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                    df = pd.DataFrame(data)
-                    logger.info(f"📊 步骤 {step_num} 数据: {len(df)} 行 x {len(df.columns)} 列")
-                    logger.info(f"📋 列名: {', '.join(df.columns.tolist())}")
-                    
-                # 如果是字符串，尝试解析为表格数据
-                elif isinstance(data, str):
-                    # 尝试解析表格数据
-                    parsed_data = self.parse_table_response(data)
-                    
-                    if parsed_data:
-                        # 成功解析为结构化数据
-                        df = pd.DataFrame(parsed_data)
-                        logger.info(f"📊 步骤 {step_num} 解析到 {len(df)} 行 x {len(df.columns)} 列数据")
-                        logger.info(f"📋 列名: {', '.join(df.columns.tolist())}")
-                    else:
-                        # 无法解析，保存为单列文本
-                        df = pd.DataFrame({"输出内容": [data]})
-                        logger.info(f"📝 步骤 {step_num} 保存为原始文本")
-                        
-                elif isinstance(data, dict):
-                    df = pd.DataFrame([data])
-                else:
-                    df = pd.DataFrame([{"数据": str(data)}])
-
-                # 写入Excel文件
-                df.to_excel(output_file, index=False)
-                
-                # 验证文件是否真的被创建
-                if output_file.exists():
-                    file_size = output_file.stat().st_size
-                    logger.info(f"✅ 保存步骤 {step_num} 数据: {output_file.name} ({file_size} 字节)")
-                else:
-                    logger.error(f"❌ 文件未创建: {output_file.name}")
-
-            except Exception as e:
-                logger.error(f"❌ 保存步骤 {step_num} 数据失败: {e}")
-
-                # 尝试保存为文本文件
-                try:
-                    text_file = output_folder / f"step_{step_num}_output.txt"
-                    with open(text_file, "w", encoding="utf-8") as f:
-                        f.write(str(data))
-                    logger.info(f"✅ 已保存为文本文件: {text_file.name}")
-                except Exception as e2:
-                    logger.error(f"❌ 保存文本文件也失败: {e2}")
-
-        return output_folder
-
     def wait_for_user_action(self, error_msg, current_step=None):
         """等待用户处理错误后继续"""
         logger.error(f"\n{'='*60}")
@@ -2869,6 +2439,11 @@ class VideoProcessor:
         if current_step:
             logger.info(f"📍 当前步骤: {current_step}")
         
+        # 工作者模式下无人值守，直接跳过当前视频
+        if not self.interactive:
+            logger.warning("⏭️ 工作者模式，跳过当前视频")
+            return "skip", None
+        
         logger.info("\n可选操作:")
         logger.info("  1. 输入步骤号 (1-25) - 从指定步骤继续")
         logger.info("  2. 输入 'retry' - 重试当前步骤")
@@ -2914,58 +2489,256 @@ class VideoProcessor:
             except Exception as e:
                 logger.error(f"❌ 输入错误: {e}")
 
+    def skip_completed_videos(self, videos):
+        """过滤掉处理记录中已完成的视频（提示词链变化后的视频不跳过）"""
+        if not self.ledger:
+            return videos
+        pending = []
+        for video_info in videos:
+            try:
+                prompts = get_prompt_templates(self.prompts_file).render(video_info)
+                chain_hash = prompt_prefix_hashes(prompts)[-1] if prompts else None
+                video_hash = self.ledger.video_hash(self.videos_folder / video_info["filename"])
+                if self.ledger.is_completed(video_hash, chain_hash):
+                    logger.info(f"⏭️ 已完成，跳过: {video_info['filename']}")
+                    continue
+            except Exception as e:
+                logger.debug(f"读取处理记录失败: {e}")
+            pending.append(video_info)
+        if len(pending) < len(videos):
+            logger.info(f"📒 处理记录中已完成 {len(videos) - len(pending)} 个视频，剩余 {len(pending)} 个")
+        return pending
+
+    def begin_ledger_video(self, video_name, start_step, prefix_hashes=None):
+        """在处理记录中登记视频，返回 (视频哈希, 续传起始步骤)
+
+        每个视频每次运行只尝试一次续传：打开记录的对话地址，从最后完成的步骤之后继续。
+        对话属于其他账号（账号池模式）或提示词链已修改时不续传，从步骤 1 开始。
+        """
+        try:
+            video_hash = self.ledger.video_hash(self.videos_folder / video_name)
+        except Exception as e:
+            logger.warning(f"⚠️ 计算视频哈希失败，不记录进度: {e}")
+            return None, start_step
+
+        first_attempt = video_hash not in self.ledger_checked
+        self.ledger_checked.add(video_hash)
+        point = self.ledger.resume_point(video_hash) if first_attempt and start_step <= 1 else None
+        if point and point["last_step"] >= 1 and point["chat_url"]:
+            last_step = point["last_step"]
+            if self.account_pool is not None and point["account"] != self.current_account:
+                logger.info(f"ℹ️ 记录的对话属于账号 {point['account']}，当前账号无法打开，从步骤 1 开始")
+                point = None
+            elif not prefix_hashes or last_step > len(prefix_hashes) or point["prefix_hash"] != prefix_hashes[last_step - 1]:
+                logger.info(f"ℹ️ 步骤 1-{last_step} 的提示词已修改，不续传记录的对话，从步骤 1 开始")
+                point = None
+        if point and point["last_step"] >= 1 and point["chat_url"]:
+            logger.info(f"♻️ 断点续传: 已完成到步骤 {point['last_step']}，打开对话 {point['chat_url']}")
+            try:
+                self.page.goto(point["chat_url"], wait_until="domcontentloaded", timeout=60000)
+                self.page.wait_for_selector(config.SELECTORS["input_box"], state="visible", timeout=30000)
+                self.page.wait_for_selector('[data-turn-role="Model"]', timeout=30000)
+                self.ledger.start_video(video_hash, video_name)
+                return video_hash, point["last_step"] + 1
+            except Exception as e:
+                logger.warning(f"⚠️ 无法打开记录的对话，从步骤 1 开始: {e}")
+                try:
+                    self.page.goto(self.ai_studio_url, wait_until="domcontentloaded", timeout=60000)
+                except Exception:
+                    pass
+
+        self.ledger.start_video(video_hash, video_name, reset=start_step <= 1)
+        return video_hash, start_step
+
+    def video_content_hash(self, video_name):
+        """视频内容哈希（处理记录可用时使用其中缓存的哈希）"""
+        video_path = self.videos_folder / video_name
+        try:
+            if self.ledger:
+                return self.ledger.video_hash(video_path)
+            from upload_proxy import file_content_hash
+            return file_content_hash(video_path)
+        except Exception as e:
+            logger.warning(f"⚠️ 计算视频哈希失败: {e}")
+            return None
+
+    def fast_forward_from_cache(self, video_hash, prompts, prefix_hashes):
+        """用回复缓存跳过提示词链前缀不变的步骤
+
+        Returns:
+            (起始步骤, 缓存的输出)；起始步骤为 None 表示所有需要保存的步骤都已命中，无需打开浏览器
+        """
+        cached = self.response_cache.cached_prefix_length(video_hash, prefix_hashes)
+        if not cached:
+            return 1, {}
+
+        save_steps = [step for step in config.SAVE_STEPS if step <= len(prompts)]
+        last_needed = max(save_steps, default=len(prompts))
+        outputs = self.response_cache.outputs(video_hash, prefix_hashes, save_steps)
+        if cached >= last_needed and all(step in outputs for step in save_steps):
+            logger.info(f"⏩ 步骤 1-{cached} 命中回复缓存，直接使用缓存的输出")
+            return None, outputs
+
+        # 模型需要完整的对话上下文：打开经过缓存前缀末尾的对话，删除之后的轮次再接着执行
+        chat_url, step, turns = self.response_cache.resumable_chat(video_hash, prefix_hashes, cached)
+        if chat_url:
+            logger.info(f"⏩ 步骤 1-{step} 命中回复缓存，打开对话从步骤 {step + 1} 继续")
+            try:
+                self.page.goto(chat_url, wait_until="domcontentloaded", timeout=60000)
+                self.page.wait_for_selector(config.SELECTORS["input_box"], state="visible", timeout=30000)
+                self.page.wait_for_selector('[data-turn-role="Model"]', timeout=30000)
+                self.truncate_chat(turns)
+                self.response_cache.truncate_chat(chat_url, step)
+                return step + 1, {s: o for s, o in outputs.items() if s <= step}
+            except Exception as e:
+                logger.warning(f"⚠️ 无法打开缓存的对话: {e}")
+                try:
+                    self.page.goto(self.ai_studio_url, wait_until="domcontentloaded", timeout=60000)
+                except Exception:
+                    pass
+
+        logger.info(f"ℹ️ 前 {cached} 步命中回复缓存，但没有可以继续的对话，从步骤 1 执行")
+        return 1, {}
+
+    def record_cached_steps(self, video_hash, last_step, outputs, prefix_hashes):
+        """回复缓存快进到第 last_step 步后，把这些步骤和缓存的输出写入处理记录
+
+        之后中断时，处理记录从第 last_step 步之后续传，缓存的 SAVE_STEPS 输出（如步骤 23）不会丢失。
+        """
+        if not self.ledger or not video_hash:
+            return
+        try:
+            url = self.page.url
+            chat_url = url if "/prompts/" in url and "new_chat" not in url else None
+            for step in range(1, last_step + 1):
+                self.ledger.finish_step(video_hash, step, account=self.current_account, chat_url=chat_url,
+                                        prefix_hash=prefix_hashes[step - 1])
+            for step, output in outputs.items():
+                self.ledger.save_output(video_hash, step, output)
+        except Exception as e:
+            logger.debug(f"记录缓存步骤失败: {e}")
+
+    def truncate_chat(self, model_turns):
+        """删除对话中第 model_turns 条模型回复之后的所有轮次（从最后一轮开始删除），失败时抛出异常"""
+        turns = self.page.locator(config.SELECTORS["chat_turn"])
+        count = turns.count()
+        keep = 0  # 保留的轮次数
+        models = 0
+        for index in range(count):
+            if models >= model_turns:
+                break
+            keep = index + 1
+            if turns.nth(index).locator('[data-turn-role="Model"]').count():
+                models += 1
+        if models < model_turns:
+            raise RuntimeError(f"对话中只有 {models} 条模型回复，少于记录的 {model_turns} 条")
+        if keep == count:
+            return
+
+        logger.info(f"✂️ 删除对话中第 {model_turns} 条模型回复之后的 {count - keep} 个轮次")
+        for index in range(count - 1, keep - 1, -1):
+            turn = turns.nth(index)
+            turn.hover()
+            turn.locator(config.SELECTORS["turn_options_button"]).first.click(timeout=10000)
+            self.page.locator(config.SELECTORS["turn_delete_menuitem"]).first.click(timeout=10000)
+            deadline = time.time() + 10
+            while turns.count() > index and time.time() < deadline:
+                time.sleep(0.2)
+            if turns.count() > index:
+                raise RuntimeError(f"删除第 {index + 1} 个轮次失败")
+
+    def record_step_done(self, video_hash, step_number, started_at, prefix_hashes=None):
+        """记录步骤完成：处理记录（用时、账号、对话地址）和回复缓存"""
+        if not video_hash:
+            return
+        try:
+            url = self.page.url
+            chat_url = url if "/prompts/" in url and "new_chat" not in url else None
+            if self.ledger:
+                self.ledger.finish_step(video_hash, step_number, started_at, self.current_account, chat_url,
+                                        prefix_hashes[step_number - 1] if prefix_hashes else None)
+            if self.response_cache and prefix_hashes:
+                text = self.response_capture.text_for_step(step_number) if self.response_capture else None
+                turns = self.page.locator('[data-turn-role="Model"]').count() if chat_url else None
+                self.response_cache.put(video_hash, prefix_hashes[step_number - 1], step_number, text or None,
+                                        chat_url, turns)
+        except Exception as e:
+            logger.debug(f"记录步骤进度失败: {e}")
+
+    def record_step_output(self, video_hash, step_number, output, prefix_hashes=None):
+        """记录 SAVE_STEPS 步骤的输出（处理记录和回复缓存）"""
+        if not video_hash:
+            return
+        try:
+            if self.ledger:
+                self.ledger.save_output(video_hash, step_number, output)
+            if self.response_cache and prefix_hashes:
+                self.response_cache.put_output(video_hash, prefix_hashes[step_number - 1], step_number, output)
+        except Exception as e:
+            logger.debug(f"记录步骤输出失败: {e}")
+
     def process_single_video(self, video_info, start_step=1):
         """处理单个视频的完整流程（支持错误恢复）"""
         video_name = video_info["filename"]
         duration = video_info["duration"]
-        video_path = self.videos_folder / video_name
+        video_path = self.get_upload_path(video_name)
 
         logger.info(f"\n{'='*60}")
         logger.info(f"🎬 开始处理视频: {video_name}")
+        if self.response_capture:
+            self.response_capture.reset()
         logger.info(f"{'='*60}")
         
         # 重置 Content blocked 处理标记（每个视频独立处理）
         self.last_blocked_time = 0
 
+        video_hash = None
         try:
-            # 1. 更新提示词文件
-            if start_step <= 1:
-                try:
-                    if not self.update_prompts_file(video_info):
-                        action, step = self.wait_for_user_action("更新提示词文件失败", 1)
-                        if action == "quit":
-                            return False
-                        elif action == "skip":
-                            return False
-                        elif action == "retry":
-                            return self.process_single_video(video_info, start_step=1)
-                        elif action == "goto":
-                            return self.process_single_video(video_info, start_step=step)
-                except Exception as e:
-                    action, step = self.wait_for_user_action(f"更新提示词文件异常: {e}", 1)
-                    if action == "quit":
-                        return False
-                    elif action == "skip":
-                        return False
-                    elif action == "retry":
-                        return self.process_single_video(video_info, start_step=1)
-
-            # 2. 获取提示词列表
-            prompts = self.get_prompts_list()
+            # 1-2. 渲染这个视频的提示词（内存中替换占位符，不改写 prompts.xlsx）
+            try:
+                prompts = self.get_prompts_list(video_info)
+            except Exception as e:
+                logger.error(f"❌ 渲染提示词失败: {e}")
+                prompts = []
             if not prompts:
                 action, step = self.wait_for_user_action("没有找到提示词", 1)
-                if action == "quit":
-                    return False
-                elif action == "skip":
-                    return False
+                if action == "retry":
+                    return self.process_single_video(video_info, start_step=start_step)
                 return False
 
             logger.info(f"共有 {len(prompts)} 个提示词需要处理")
+            prefix_hashes = prompt_prefix_hashes(prompts)
+
+            # 断点续传：登记到处理记录，有可恢复的对话（同一账号、提示词未修改）时从最后完成的步骤之后继续
+            if self.ledger:
+                video_hash, start_step = self.begin_ledger_video(video_name, start_step, prefix_hashes)
+            elif self.response_cache:
+                video_hash = self.video_content_hash(video_name)
+
+            # 回复缓存：提示词链前缀不变的步骤直接复用
+            cached_outputs = {}
+            if self.response_cache and video_hash and start_step <= 1:
+                start_step, cached_outputs = self.fast_forward_from_cache(video_hash, prompts, prefix_hashes)
+                if start_step is None:
+                    self.discard_prefetch()  # 不需要上传：关闭为这个视频预上传的标签页
+                    output_folder = self.save_output_data(video_name, cached_outputs)
+                    self.submit_postprocess(video_name, output_folder)
+                    if self.ledger:
+                        self.ledger.complete_video(video_hash, prefix_hashes[-1])
+                    logger.info(f"✅ 视频 {video_name} 处理完成（回复缓存）")
+                    return True
+                if start_step > 1:
+                    self.record_cached_steps(video_hash, start_step - 1, cached_outputs, prefix_hashes)
 
             # 3. 上传视频（如果需要）
-            if start_step <= 1:
+            if start_step > 1:
+                # 断点续传或缓存快进打开了已有对话，不需要上传：关闭为这个视频预上传的标签页
+                self.discard_prefetch()
+            else:
                 try:
-                    upload_result = self.upload_video(video_path)
+                    upload_result = self.take_prefetched_upload(video_name)
+                    if upload_result is None:
+                        upload_result = self.upload_video(video_path)
                     
                     # 检查是否需要刷新页面（上传后出现弹窗）
                     if upload_result == "popup_closed_need_refresh":
@@ -3003,6 +2776,7 @@ class VideoProcessor:
             # 4. 发送第一个提示词并运行
             if start_step <= 1 and prompts:
                 try:
+                    step_started = time.time()
                     send_result = self.send_prompt(prompts[0], step_number=1)
                     
                     # 检查是否是上传失败
@@ -3042,12 +2816,15 @@ class VideoProcessor:
                         logger.info("📤 需要重新上传视频并从步骤1开始")
                         # 从头开始（start_step=1 会重新上传视频）
                         return self.process_single_video(video_info, start_step=1)
+                    elif response_result == "rate_limit":
+                        return "rate_limit"
                     elif response_result == "skip":
                         logger.info("⏭️ 跳过当前视频")
                         return False
                     elif response_result == "quit":
                         logger.info("👋 退出程序")
                         return False
+                    self.record_step_done(video_hash, 1, step_started, prefix_hashes)
                 except Exception as e:
                     action, step = self.wait_for_user_action(f"步骤1异常: {e}", 1)
                     if action == "quit":
@@ -3058,12 +2835,15 @@ class VideoProcessor:
                         return self.process_single_video(video_info, start_step=1)
 
             # 5. 逐步发送剩余提示词（步骤2-25）
-            step_outputs = {}
+            # 从中间步骤开始时，之前步骤的输出从处理记录中恢复
+            step_outputs = self.ledger.step_outputs(video_hash) if self.ledger and video_hash and start_step > 1 else {}
+            step_outputs.update(cached_outputs)
             
             # 先提取步骤1的数据（如果需要）
             if 1 in config.SAVE_STEPS and start_step <= 1:
                 response = self.extract_response(step_number=1)
                 step_outputs[1] = response
+                self.record_step_output(video_hash, 1, response, prefix_hashes)
                 logger.info(f"💾 已捕获步骤 1 的输出")
                 logger.info(f"📊 步骤 1 数据类型: {type(response)}, 数据量: {len(response) if response else 0}")
 
@@ -3083,6 +2863,7 @@ class VideoProcessor:
                         logger.info(f"📊 提取步骤 {prev_step} 的数据...")
                         response = self.extract_response(step_number=prev_step)
                         step_outputs[prev_step] = response
+                        self.record_step_output(video_hash, prev_step, response, prefix_hashes)
                         logger.info(f"💾 已捕获步骤 {prev_step} 的输出")
                         logger.info(f"📊 步骤 {prev_step} 数据类型: {type(response)}, 数据量: {len(response) if response else 0}")
                         if isinstance(response, list) and response:
@@ -3090,6 +2871,7 @@ class VideoProcessor:
                         self.take_screenshot(f"step_{prev_step}_output")
                     
                     # 发送当前步骤的提示词
+                    step_started = time.time()
                     if not self.send_prompt(prompt, step_number=i):
                         action, step = self.wait_for_user_action(f"步骤 {i} 发送失败", i)
                         if action == "quit":
@@ -3103,6 +2885,9 @@ class VideoProcessor:
                         elif action == "continue":
                             continue
 
+                    # AI 生成期间推进下一个视频的预上传
+                    self.advance_prefetch(i)
+
                     # 等待响应，处理 rate limit
                     response_result = self.wait_for_response(step_number=i)
                     
@@ -3113,12 +2898,15 @@ class VideoProcessor:
                         logger.info(f"💡 当前在步骤 {i}，切换后将从步骤1重新开始")
                         # 从头开始（start_step=1 会重新上传视频）
                         return self.process_single_video(video_info, start_step=1)
+                    elif response_result == "rate_limit":
+                        return "rate_limit"
                     elif response_result == "skip":
                         logger.info("⏭️ 跳过当前视频")
                         return False
                     elif response_result == "quit":
                         logger.info("👋 退出程序")
                         return False
+                    self.record_step_done(video_hash, i, step_started, prefix_hashes)
 
                 except Exception as e:
                     action, step = self.wait_for_user_action(f"步骤 {i} 异常: {e}", i)
@@ -3139,21 +2927,25 @@ class VideoProcessor:
                 logger.info(f"📊 提取步骤 {last_step} 的数据...")
                 response = self.extract_response(step_number=last_step)
                 step_outputs[last_step] = response
+                self.record_step_output(video_hash, last_step, response, prefix_hashes)
                 logger.info(f"💾 已捕获步骤 {last_step} 的输出")
                 logger.info(f"📊 步骤 {last_step} 数据类型: {type(response)}, 数据量: {len(response) if response else 0}")
                 if isinstance(response, list) and response:
                     logger.info(f"📋 步骤 {last_step} 第一条数据: {response[0]}")
                 self.take_screenshot(f"step_{last_step}_output")
 
-            # 6. 保存输出数据
+            # 6. 保存输出数据（启用后期处理流水线时立即提交该视频的剪辑/合成）
             try:
-                self.save_output_data(video_name, step_outputs)
+                output_folder = self.save_output_data(video_name, step_outputs)
+                self.submit_postprocess(video_name, output_folder)
             except Exception as e:
                 logger.error(f"❌ 保存输出数据失败: {e}")
                 action, step = self.wait_for_user_action(f"保存数据异常: {e}", 25)
                 if action == "quit":
                     return False
 
+            if self.ledger and video_hash:
+                self.ledger.complete_video(video_hash, prefix_hashes[-1] if prefix_hashes else None)
             logger.info(f"✅ 视频 {video_name} 处理完成")
             return True
 
@@ -3175,38 +2967,50 @@ class VideoProcessor:
             
             return False
 
-    def merge_all_excel_files(self):
-        """合并所有输出的 Excel 文件"""
-        logger.info("📊 开始合并所有 Excel 文件...")
-
-        all_data = []
-        for folder in self.process_folder.iterdir():
-            if folder.is_dir() and folder.name != "videos":
-                for excel_file in folder.glob("*.xlsx"):
-                    # 跳过临时文件（以 .~ 或 ~$ 开头）
-                    if excel_file.name.startswith('.~') or excel_file.name.startswith('~$'):
-                        logger.debug(f"  ⏭️ 跳过临时文件: {excel_file.name}")
-                        continue
-                    
-                    try:
-                        df = pd.read_excel(excel_file)
-                        all_data.append(df)
-                        logger.info(f"  ✅ 读取: {excel_file.name}")
-                    except Exception as e:
-                        logger.warning(f"  ❌ 读取失败 {excel_file.name}: {e}")
-
-        if all_data:
-            merged_df = pd.concat(all_data, ignore_index=True)
+    def submit_postprocess(self, video_name, output_folder):
+        """把视频的剪辑表交给后台后期处理工作池（未启用流水线时什么都不做）"""
+        if not self.postprocess or not output_folder:
+            return
+        try:
+            self.postprocess.submit(video_name, output_folder)
+        except Exception as e:
+            logger.error(f"❌ 提交后期处理失败: {e}")
 
-            # 保存到 clips.xlsx
-            self.clips_file.parent.mkdir(exist_ok=True)
-            merged_df.to_excel(self.clips_file, index=False)
-            logger.info(f"✅ 合并完成，保存到: {self.clips_file}")
-            logger.info(f"📊 合并数据: {len(merged_df)} 行 x {len(merged_df.columns)} 列")
-            return True
+    def finish_postprocess(self):
+        """批次结束：启用流水线时等待后台任务完成，否则运行一次完整的最终处理"""
+        if self.postprocess:
+            self.postprocess.wait()
         else:
-            logger.warning("❌ 没有找到可合并的文件")
-            return False
+            self.run_final_processing()
+
+    def merge_all_excel_files(self, full_rebuild=None):
+        """合并所有步骤输出
+
+        - 列式数据集（CLIPS_DATASET_DIR，每个视频一个分区）：只重写输出有变化的视频
+        - clips.xlsx（CLIPS_EXCEL_EXPORT，或未安装 pyarrow）：全量导出，只用于查看
+
+        Args:
+            full_rebuild: True 表示重新读取所有文件并全部重写，默认使用 config.MERGE_FULL_REBUILD
+        """
+        logger.info("📊 开始合并所有步骤输出...")
+        if full_rebuild is None:
+            full_rebuild = config.MERGE_FULL_REBUILD
+
+        merged = False
+        dataset_dir = None
+        if columnar_available():
+            try:
+                merged = ClipsDataset(self.clips_dataset_dir).update(self.process_folder, full_rebuild=full_rebuild) > 0
+                dataset_dir = self.clips_dataset_dir
+            except Exception as e:
+                logger.error(f"❌ 合并数据集失败: {e}")
+
+        if config.CLIPS_EXCEL_EXPORT or not columnar_available():
+            try:
+                merged = export_clips_excel(self.process_folder, self.clips_file, dataset_dir) > 0 or merged
+            except Exception as e:
+                logger.error(f"❌ 合并 clips.xlsx 失败: {e}")
+        return merged
 
     def run_final_processing(self):
         """运行最终的视频处理脚本"""
@@ -3269,6 +3073,24 @@ class VideoProcessor:
             logger.error("❌ 没有找到待处理的视频")
             return False
 
+        # 跳过处理记录中已完成的视频
+        videos = self.skip_completed_videos(videos)
+        if not videos:
+            logger.info("✅ 所有视频都已处理完成")
+            return True
+
+        # 提前在进程池中转码上传代理文件（与浏览器操作并行）
+        if config.UPLOAD_PROXY_ENABLED:
+            if self.upload_proxy is None:
+                from upload_proxy import UploadProxyManager
+                self.upload_proxy = UploadProxyManager()
+            self.upload_proxy.prepare([self.videos_folder / v["filename"] for v in videos])
+
+        # 后期处理流水线：每个视频完成后立即在后台处理，与下一个视频的 AI 对话并行
+        if config.POSTPROCESS_PIPELINE_ENABLED and self.postprocess is None:
+            from postprocess_pool import PostProcessPool
+            self.postprocess = PostProcessPool()
+
         # 2. 首次打开 AI Studio 并等待用户确认（仅首次）
         if not self.ai_studio_opened:
             logger.info("\n" + "="*60)
@@ -3291,6 +3113,7 @@ class VideoProcessor:
             logger.info(f"# 视频: {video_info['filename']}")
             logger.info(f"{'#'*60}")
 
+            self.next_video_info = videos[i] if i < len(videos) else None
             result = self.process_single_video(video_info)
             
             # 检查是否用户要求退出
@@ -3300,6 +3123,7 @@ class VideoProcessor:
             
             if result:
                 success_count += 1
+                self.charge_session_account()
             else:
                 failed_videos.append(video_info["filename"])
 
@@ -3317,12 +3141,12 @@ class VideoProcessor:
         except Exception as e:
             logger.error(f"❌ 合并数据失败: {e}")
 
-        # 5. 运行最终处理
+        # 5. 运行最终处理（流水线模式下等待后台任务完成）
         logger.info("\n" + "=" * 60)
         logger.info("运行最终处理...")
         logger.info("=" * 60)
         try:
-            self.run_final_processing()
+            self.finish_postprocess()
         except Exception as e:
             logger.error(f"❌ 最终处理失败: {e}")
 
@@ -3396,11 +3220,21 @@ class VideoProcessor:
         finally:
             # 7. 关闭浏览器
             self.close_browser()
+            if self.upload_proxy:
+                self.upload_proxy.shutdown()
+            if self.postprocess:
+                self.postprocess.shutdown(wait=False)
             logger.info(f"\n📝 完整日志已保存到: {config.LOG_FILE}")
 
 
 def main():
     """主函数"""
+    # 多工作者并发模式 / 账号池模式
+    if config.WORKER_COUNT > 1 or config.ACCOUNT_POOL_ENABLED:
+        from parallel_runner import ParallelVideoRunner
+        ParallelVideoRunner().run()
+        return
+
     processor = VideoProcessor()
 
     # headless=False 表示显示浏览器窗口，方便调试